@@ -1,47 +1,56 @@
-from flask import Flask, render_template, request, jsonify, send_file, redirect, url_for, flash
+from flask import Flask, Request, render_template, request, jsonify, send_file, redirect, url_for, flash, session
 import os
-import pandas as pd
-import numpy as np
 from werkzeug.utils import secure_filename
 import json
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
 import io
-import base64
+import time
+import tracemalloc
 # Import from original modified files
 import sys
 sys.path.append('models')
-import importlib.util
-
-# Import step1 from 1_cek_missing_value.py
-spec = importlib.util.spec_from_file_location("step1", "models/1_cek_missing_value.py")
-step1_module = importlib.util.module_from_spec(spec)
-spec.loader.exec_module(step1_module)
-step1_missing_value = step1_module.step1_missing_value
-
-# Import step2 from 2_transformasi_MinMaxScaler.py
-spec2 = importlib.util.spec_from_file_location("step2", "models/2_transformasi_MinMaxScaler.py")
-step2_module = importlib.util.module_from_spec(spec2)
-spec2.loader.exec_module(step2_module)
-step2_minmax_scaled = step2_module.step2_minmax_scaler
-
-# Import step3 from 3_seleksi_fitur_anova.py
-spec3 = importlib.util.spec_from_file_location("step3", "models/3_seleksi_fitur_anova.py")
-step3_module = importlib.util.module_from_spec(spec3)
-spec3.loader.exec_module(step3_module)
-step3_anova_features = step3_module.step3_anova
-
-# Import step4 from 4_immbalance_data_rus.py
-spec4 = importlib.util.spec_from_file_location("step4", "models/4_immbalance_data_rus.py")
-step4_module = importlib.util.module_from_spec(spec4)
-spec4.loader.exec_module(step4_module)
-step4_rus_balancing = step4_module.step4_rus
+# Step 1-4 dan dependensi beratnya (sklearn, imblearn, matplotlib) baru dimuat saat pertama dipakai
+from pipeline import STEP_MODULES, step_function, preload_modules, run_full_pipeline, PipelineError
+from streaming import run_streaming_pipeline, MEDIAN_MODES, DEFAULT_CHUNKSIZE
+from serialization import frame_records, series_dict
+
+# Shared parsed-dataset cache used by all steps
+from dataset_cache import load_dataset, dataset_cache
+from jobs import JobQueue, QueueFullError
+from storage import store_upload, store_file, dataset_path, output_dir_for, is_valid_dataset_id, touch, collect_garbage, dataset_in_use
+from upload_stream import ProfilingUpload, ChunkedUploads, UploadOffsetError
+from artifacts import find_table, export_csv
+from charts import get_chart, chart_cache, ChartNotFoundError, CHART_FORMATS, PREVIEW_DPI
+from json_provider import NumpyJSONProvider, compress_response
+from instrumentation import ProfileSession, metrics, format_gauge, process_memory
+from incremental import link_versions, linked_base
+from feature_selection import check_scorer, check_stability, selection_policy, stability_options
+from balancing import balancing_options
+from kernels import check_dtype
+from training import MODEL_FILE, training_options
+from inference import MicroBatcher, load_bundle, records_matrix, csv_matrix, predict_rows, prediction_records
 
 app = Flask(__name__)
+# JSON langsung dari numpy/pandas (orjson bila tersedia), respons besar di-gzip
+app.json = NumpyJSONProvider(app)
+app.after_request(compress_response)
 app.config['SECRET_KEY'] = 'your-secret-key-here'
 app.config['UPLOAD_FOLDER'] = 'uploads'
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+app.config['OUTPUT_FOLDER'] = 'output'
+app.config['DATASET_TTL_SECONDS'] = int(os.environ.get('DATASET_TTL_SECONDS', str(24 * 3600)))
+app.config['GC_INTERVAL_SECONDS'] = int(os.environ.get('GC_INTERVAL_SECONDS', '600'))
+app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('MAX_CONTENT_LENGTH_MB', '16')) * 1024 * 1024  # default 16MB max file size
+app.config['MAX_UPLOAD_BYTES'] = int(os.environ.get('MAX_UPLOAD_MB', '4096')) * 1024 * 1024  # total size for chunked uploads
+app.config['UPLOAD_CHUNK_BYTES'] = int(os.environ.get('UPLOAD_CHUNK_MB', '8')) * 1024 * 1024
+app.config['JOB_DB'] = os.environ.get('JOB_DB', 'output/jobs.sqlite3')
+app.config['JOB_WORKERS'] = int(os.environ.get('JOB_WORKERS', '2'))
+app.config['JOB_MAX_PENDING'] = int(os.environ.get('JOB_MAX_PENDING', '32'))
+# Micro-batching /predict: record tunggal digabung sampai N baris atau menunggu maksimal sekian ms
+app.config['PREDICT_MAX_BATCH'] = int(os.environ.get('PREDICT_MAX_BATCH', '64'))
+app.config['PREDICT_MAX_WAIT_MS'] = float(os.environ.get('PREDICT_MAX_WAIT_MS', '5'))
+# Puncak memori per stage di /metrics butuh tracemalloc (overhead), default mati
+app.config['METRICS_TRACEMALLOC'] = os.environ.get('METRICS_TRACEMALLOC', '0') == '1'
+# Muat semua step saat import (untuk server pre-fork, lihat gunicorn.conf.py)
+app.config['PRELOAD_MODULES'] = os.environ.get('PRELOAD_MODULES', '0') == '1'
 
 # Enable debug logging
 import logging
@@ -52,11 +61,232 @@ ALLOWED_EXTENSIONS = {'csv'}
 
 # Ensure uploads directory exists
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-os.makedirs('output', exist_ok=True)
+os.makedirs(app.config['OUTPUT_FOLDER'], exist_ok=True)
+
+class UploadRequest(Request):
+    """Request that profiles files sent to /upload while werkzeug writes them to disk"""
+    
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if self.endpoint != 'upload_file':
+            # File di endpoint lain (mis. CSV /predict) tidak disimpan sebagai upload
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+        return ProfilingUpload(app.config['UPLOAD_FOLDER'])
+
+app.request_class = UploadRequest
+
+if app.config['METRICS_TRACEMALLOC']:
+    tracemalloc.start()
+
+if app.config['PRELOAD_MODULES']:
+    logger.info(f"Step modules preloaded in {preload_modules():.2f}s")
+
+# Resumable uploads for files larger than MAX_CONTENT_LENGTH
+chunked_uploads = ChunkedUploads(app.config['UPLOAD_FOLDER'], app.config['MAX_UPLOAD_BYTES'])
+
+# Background job queue for /process
+job_queue = JobQueue(
+    db_path=app.config['JOB_DB'],
+    max_workers=app.config['JOB_WORKERS'],
+    max_pending=app.config['JOB_MAX_PENDING']
+)
+
+# Concurrent single-record /predict requests are scored together
+predict_batcher = MicroBatcher(
+    max_batch=app.config['PREDICT_MAX_BATCH'],
+    max_wait=app.config['PREDICT_MAX_WAIT_MS'] / 1000
+)
+
+# Output table per step; steps 2-4 are stored as ARTIFACT_FORMAT artifacts
+OUTPUT_TABLES = {
+    '1': '1_missing_values_analysis',
+    '2': '2_scaled_data',
+    '3': '3_selected_features',
+    '4': '4_rus_cleaned_data',
+    '5': '5_cv_results'
+}
+
+# Grafik yang ditautkan hasil /results per step
+RESULT_CHARTS = {
+    '3': 'anova',
+    '4': 'rus',
+    '5': 'training'
+}
+
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def resolve_dataset(data=None):
+    """
+    Find the dataset a request refers to
+
+    The dataset id is taken from the JSON body, then the query string, then
+    the session's most recent upload.
+
+    Returns:
+        tuple: (dataset_id, csv path, output directory), or (None, None, None)
+    """
+    dataset_id = (data or {}).get('dataset_id') or request.args.get('dataset_id') or session.get('dataset_id')
+    if not is_valid_dataset_id(dataset_id):
+        return None, None, None
+    
+    filepath = dataset_path(dataset_id, app.config['UPLOAD_FOLDER'])
+    if not os.path.exists(filepath):
+        return None, None, None
+    
+    touch(dataset_id, app.config['UPLOAD_FOLDER'], app.config['OUTPUT_FOLDER'])
+    return dataset_id, filepath, output_dir_for(dataset_id, app.config['OUTPUT_FOLDER'])
+
+def attach_chart_urls(result, dataset_id):
+    """
+    Add a chart_url next to every chart_name in a step or pipeline result
+
+    Charts are rendered lazily by /charts/<name>, so results only carry a link.
+    """
+    if not isinstance(result, dict):
+        return result
+    steps = result.get('steps', {}).values() if 'steps' in result else [result]
+    for step_result in steps:
+        if isinstance(step_result, dict) and step_result.get('chart_name'):
+            step_result['chart_url'] = url_for('get_chart_image', name=step_result['chart_name'],
+                                               dataset_id=dataset_id, dpi=PREVIEW_DPI)
+    return result
+
+def run_pipeline(filepath, output_dir, data, on_stage_done=None):
+    """
+    Run steps 1-4 in one pass, in memory or chunk by chunk
+
+    ``data['mode'] == 'stream'`` reads the CSV in chunks of ``data['chunksize']``
+    rows so memory stays bounded for files larger than RAM.
+    """
+    target = data.get('target', 'Biopsy')
+    scorer, policy, stability = selection_options(data)
+    balancing = request_balancing(data)
+    training = request_training(data) if data.get('train') else None
+    if data.get('mode') == 'stream':
+        return run_streaming_pipeline(
+            filepath,
+            target=target,
+            output_dir=output_dir,
+            chunksize=int(data.get('chunksize') or DEFAULT_CHUNKSIZE),
+            median=data.get('median', 'exact'),
+            on_stage_done=on_stage_done,
+            policy=policy,
+            balancing=balancing
+        )
+    return run_full_pipeline(filepath, target=target, output_dir=output_dir, on_stage_done=on_stage_done,
+                             scorer=scorer, policy=policy, stability=stability, balancing=balancing,
+                             training=training, dtype=data.get('dtype'))
+
+def selection_options(data):
+    """
+    Step 3 scorer, selection policy and stability options of a request
+
+    Reads scorer, alpha, k, correction and, when ``stability`` is true,
+    resamples, resample_method and stability_threshold.
+
+    Returns:
+        tuple: (scorer, policy, stability options or None)
+
+    Raises:
+        ValueError: If an option is invalid
+    """
+    scorer = check_scorer(data.get('scorer'))
+    policy = selection_policy(data.get('alpha'), data.get('k'), data.get('correction'))
+    stability = None
+    if data.get('stability'):
+        stability = stability_options(data.get('resamples'), data.get('resample_method'),
+                                      data.get('stability_threshold'))
+        check_stability(scorer, stability)
+    return scorer, policy, stability
+
+def request_balancing(data):
+    """
+    Step 4 balancing options of a request (sampler, ratio, seed)
+
+    Raises:
+        ValueError: If an option is invalid
+    """
+    return balancing_options(data.get('sampler'), data.get('ratio'), data.get('seed'))
+
+def request_training(data):
+    """
+    Step 5 training options of a request (models, folds, metric, halving_factor, seed)
+
+    Raises:
+        ValueError: If an option is invalid
+    """
+    return training_options(data.get('models'), data.get('folds'), data.get('metric'),
+                            data.get('halving_factor'), data.get('seed'))
+
+def link_base_version(dataset_id, base_id):
+    """
+    Record base_id as the previous version of dataset_id
+
+    Steps 2-4 and the full pipeline of dataset_id then update the base
+    version's results from the changed rows instead of starting over.
+
+    Returns:
+        bool: True if the base dataset exists and was linked
+    """
+    if not is_valid_dataset_id(base_id) or base_id == dataset_id:
+        return False
+    base_path = dataset_path(base_id, app.config['UPLOAD_FOLDER'])
+    if not os.path.exists(base_path):
+        return False
+    link_versions(output_dir_for(dataset_id, app.config['OUTPUT_FOLDER']), base_path,
+                  output_dir_for(base_id, app.config['OUTPUT_FOLDER']))
+    return True
+
+def profile_requested():
+    """True when the request asks for a profile with ?profile=1"""
+    return request.args.get('profile', '').lower() in ('1', 'true', 'yes')
+
+def run_profiled(func, profile=False):
+    """
+    Call func(), optionally attaching a per-stage breakdown and cProfile summary
+
+    With profile=True the result gets a 'profile' entry (see ProfileSession.summary).
+    """
+    if not profile:
+        return func()
+    with ProfileSession() as session:
+        result = func()
+    result = dict(result)
+    result['profile'] = session.summary()
+    return result
+
+def pipeline_options_error(data):
+    """Validate the mode, chunksize, median, dtype, selection, balancing and training options of a pipeline request"""
+    if data.get('mode', 'memory') not in ('memory', 'stream'):
+        return 'Invalid mode, expected memory or stream'
+    try:
+        dtype = check_dtype(data.get('dtype'))
+        scorer, _, stability = selection_options(data)
+        balancing = request_balancing(data)
+        if data.get('train') or data.get('step') == '5':
+            request_training(data)
+    except (TypeError, ValueError) as e:
+        return str(e)
+    if data.get('mode') == 'stream' and scorer != 'anova':
+        return 'Streaming mode only supports the anova scorer'
+    if data.get('mode') == 'stream' and stability is not None:
+        return 'Streaming mode does not support stability selection'
+    if data.get('mode') == 'stream' and (balancing['sampler'] != 'rus' or balancing['ratio'] is not None):
+        return 'Streaming mode only supports the rus sampler without a ratio'
+    if data.get('mode') == 'stream' and data.get('train'):
+        return 'Streaming mode does not support model training'
+    if data.get('mode') == 'stream' and data.get('dtype') and dtype != 'float64':
+        return 'Streaming mode only supports the float64 dtype'
+    if data.get('median', 'exact') not in MEDIAN_MODES:
+        return f'Invalid median, expected one of {list(MEDIAN_MODES)}'
+    try:
+        if int(data.get('chunksize') or DEFAULT_CHUNKSIZE) < 1:
+            return 'chunksize must be positive'
+    except (TypeError, ValueError):
+        return 'chunksize must be an integer'
+    return None
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -81,102 +311,136 @@ def upload_file():
             logger.error(f"Invalid file type: {file.filename}")
             return jsonify({'error': 'Invalid file type. Only CSV files allowed'}), 400
         
-        filename = secure_filename(file.filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], 'current_data.csv')
-        logger.info(f"Saving to: {filepath}")
-        
-        # Ensure directory exists
-        os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-        
-        # Save file
-        file.save(filepath)
-        logger.info(f"File saved successfully")
-        
-        # Check if file was saved successfully
-        if not os.path.exists(filepath):
-            logger.error(f"File not found after save: {filepath}")
-            return jsonify({'error': 'Failed to save file'}), 500
+        if isinstance(file.stream, ProfilingUpload):
+            # Hash dan preview sudah dihitung selama upload berlangsung
+            profiler = file.stream.profiler
+            return finish_upload(file.stream.detach_file(), file.filename, profiler.hexdigest(), profiler.preview())
         
-        # Get data preview
+        # Save file under its content hash
+        dataset_id = store_upload(file, app.config['UPLOAD_FOLDER'])
+        return finish_upload(None, file.filename, dataset_id=dataset_id)
+    
+    except Exception as e:
+        logger.error(f"Upload exception: {str(e)}", exc_info=True)
+        return jsonify({'error': f'Upload error: {str(e)}'}), 500
+
+def finish_upload(src_path, filename, digest=None, preview_data=None, dataset_id=None):
+    """
+    Store a completed upload and build the /upload response
+
+    Args:
+        src_path (str): Complete upload to move into storage, or None if
+            already stored under dataset_id
+        filename (str): Original file name
+        digest (str): SHA-256 hex digest computed while receiving
+        preview_data (dict): Preview built while receiving, if any
+        dataset_id (str): Id of an already stored upload
+    """
+    # Remove uploads and outputs idle longer than the TTL
+    collect_garbage(app.config['DATASET_TTL_SECONDS'], app.config['UPLOAD_FOLDER'],
+                    app.config['OUTPUT_FOLDER'], min_interval=app.config['GC_INTERVAL_SECONDS'])
+    
+    if src_path is not None:
+        dataset_id = store_file(src_path, app.config['UPLOAD_FOLDER'], digest=digest)
+    filepath = dataset_path(dataset_id, app.config['UPLOAD_FOLDER'])
+    
+    # Upload ulang dengan sedikit perubahan: hitung inkremental dari versi sebelumnya
+    output_dir = output_dir_for(dataset_id, app.config['OUTPUT_FOLDER'])
+    if linked_base(output_dir) is None:
+        link_base_version(dataset_id, session.get('dataset_id'))
+    base = linked_base(output_dir)
+    session['dataset_id'] = dataset_id
+    logger.info(f"File saved successfully as dataset {dataset_id}")
+    
+    # Check if file was saved successfully
+    if not os.path.exists(filepath):
+        logger.error(f"File not found after save: {filepath}")
+        return jsonify({'error': 'Failed to save file'}), 500
+    
+    # Fall back to parsing the stored file if the incremental preview failed
+    if preview_data is None or 'error' in preview_data:
         logger.info("Getting data preview...")
         preview_data = get_data_preview(filepath)
-        if 'error' in preview_data:
-            logger.error(f"Data preview error: {preview_data['error']}")
-            return jsonify({'error': f'Data preview error: {preview_data["error"]}'}), 500
-        
-        logger.info("Upload completed successfully")
-        return jsonify({
-            'message': 'File uploaded successfully',
-            'filename': filename,
-            'preview': preview_data
-        })
+    if 'error' in preview_data:
+        logger.error(f"Data preview error: {preview_data['error']}")
+        return jsonify({'error': f'Data preview error: {preview_data["error"]}'}), 500
+    
+    logger.info("Upload completed successfully")
+    return jsonify({
+        'message': 'File uploaded successfully',
+        'filename': secure_filename(filename),
+        'dataset_id': dataset_id,
+        'base_dataset_id': os.path.splitext(os.path.basename(base[0]))[0] if base else None,
+        'preview': preview_data
+    })
+
+@app.route('/upload/chunked', methods=['POST'])
+def start_chunked_upload():
+    data = request.get_json(silent=True) or {}
+    filename = data.get('filename', '')
+    
+    if not allowed_file(filename):
+        return jsonify({'error': 'Invalid file type. Only CSV files allowed'}), 400
     
+    try:
+        size = int(data['size']) if data.get('size') is not None else None
+        upload_id = chunked_uploads.start(filename, size)
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({
+        'upload_id': upload_id,
+        'chunk_size': app.config['UPLOAD_CHUNK_BYTES'],
+        'upload_url': url_for('chunked_upload', upload_id=upload_id)
+    }), 201
+
+@app.route('/upload/chunked/<upload_id>', methods=['GET', 'PUT'])
+def chunked_upload(upload_id):
+    if request.method == 'GET':
+        status = chunked_uploads.status(upload_id)
+        if status is None:
+            return jsonify({'error': 'Upload not found'}), 404
+        return jsonify(status)
+    
+    try:
+        offset = int(request.args.get('offset', '0'))
+        received = chunked_uploads.append(upload_id, offset, request.stream)
+    except KeyError:
+        return jsonify({'error': 'Upload not found'}), 404
+    except UploadOffsetError as e:
+        # Client melanjutkan dari offset yang dikembalikan
+        return jsonify({'error': str(e), 'received': e.expected}), 409
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({'upload_id': upload_id, 'received': received})
+
+@app.route('/upload/chunked/<upload_id>/complete', methods=['POST'])
+def complete_chunked_upload(upload_id):
+    try:
+        part_path, filename, profiler = chunked_uploads.finish(upload_id)
+    except KeyError:
+        return jsonify({'error': 'Upload not found'}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        return finish_upload(part_path, filename, profiler.hexdigest(), profiler.preview())
     except Exception as e:
         logger.error(f"Upload exception: {str(e)}", exc_info=True)
         return jsonify({'error': f'Upload error: {str(e)}'}), 500
 
 def get_data_preview(filepath):
     try:
-        df = pd.read_csv(filepath, na_values=["?", "NA", "NaN", ""])
-        
-        # Convert numpy types to Python native types for JSON serialization
-        def convert_numpy_types(obj):
-            if isinstance(obj, np.integer):
-                return int(obj)
-            elif isinstance(obj, np.floating):
-                if pd.isna(obj) or np.isnan(obj):
-                    return None
-                return float(obj)
-            elif isinstance(obj, np.bool_):
-                return bool(obj)
-            elif isinstance(obj, np.ndarray):
-                return obj.tolist()
-            elif pd.isna(obj):
-                return None
-            elif isinstance(obj, float) and np.isnan(obj):
-                return None
-            return obj
-        
-        # Prepare sample data with proper type conversion
-        sample_data = df.head(5)
-        sample_records = []
-        for _, row in sample_data.iterrows():
-            sample_records.append({col: convert_numpy_types(row[col]) for col in df.columns})
-        
-        # Convert missing values counts to regular Python integers
-        missing_values = {}
-        for col in df.columns:
-            missing_count = df.isnull().sum()[col]
-            missing_values[col] = int(missing_count)
-        
-        # Convert dtypes to strings for JSON serialization
-        dtypes = {}
-        for col in df.columns:
-            dtype_str = str(df[col].dtype)
-            dtypes[col] = dtype_str
-        
-        # Ensure all values are JSON serializable - convert NaN to None
-        def clean_json_data(data):
-            if isinstance(data, dict):
-                return {k: clean_json_data(v) for k, v in data.items()}
-            elif isinstance(data, list):
-                return [clean_json_data(item) for item in data]
-            elif pd.isna(data) or (isinstance(data, float) and np.isnan(data)):
-                return None
-            elif isinstance(data, np.integer):
-                return int(data)
-            elif isinstance(data, np.floating):
-                return float(data)
-            return data
+        df = load_dataset(filepath)
         
-        preview_data = {
+        return {
             'shape': [int(df.shape[0]), int(df.shape[1])],
             'columns': list(df.columns),
-            'sample_data': clean_json_data(sample_records),
-            'dtypes': dtypes,
-            'missing_values': missing_values
+            'sample_data': frame_records(df.head(5)),
+            'dtypes': {col: str(dtype) for col, dtype in df.dtypes.items()},
+            'missing_values': series_dict(df.isnull().sum())
         }
-        return preview_data
     except Exception as e:
         return {'error': str(e)}
 
@@ -188,100 +452,283 @@ def process_data():
     if not process_step:
         return jsonify({'error': 'No process step specified'}), 400
     
+    if process_step not in STEP_MODULES and process_step != 'all':
+        return jsonify({'error': 'Invalid process step'}), 400
+    
     # Check if file exists
-    filepath = os.path.join(app.config['UPLOAD_FOLDER'], 'current_data.csv')
-    if not os.path.exists(filepath):
+    dataset_id, filepath, output_dir = resolve_dataset(data)
+    if not filepath:
         return jsonify({'error': 'No file uploaded'}), 400
+    if data.get('base_dataset_id') and not link_base_version(dataset_id, data['base_dataset_id']):
+        return jsonify({'error': 'Base dataset not found'}), 400
+    
+    profile = profile_requested()
+    options_error = pipeline_options_error(data) if process_step in ('all', '2', '3', '4', '5') else None
+    if options_error:
+        return jsonify({'error': options_error}), 400
+    if process_step == 'all':
+        def run_job(report):
+            return run_profiled(lambda: run_pipeline(filepath, output_dir, data,
+                                                     on_stage_done=lambda stage, done, total: report(done / total, stage)),
+                                profile)
+    else:
+        def run_job(report):
+            report(0.0, f'step_{process_step}')
+            run_step = step_function(process_step)
+            dtype = data.get('dtype')
+            if process_step == '2':
+                return run_profiled(lambda: run_step(filepath, return_json=True, output_dir=output_dir,
+                                                     dtype=dtype), profile)
+            if process_step == '3':
+                scorer, policy, stability = selection_options(data)
+                return run_profiled(lambda: run_step(filepath, return_json=True, output_dir=output_dir,
+                                                     scorer=scorer, policy=policy, stability=stability,
+                                                     dtype=dtype), profile)
+            if process_step == '4':
+                balancing = request_balancing(data)
+                return run_profiled(lambda: run_step(filepath, return_json=True, output_dir=output_dir,
+                                                     balancing=balancing, dtype=dtype), profile)
+            if process_step == '5':
+                options, balancing = request_training(data), request_balancing(data)
+                return run_profiled(lambda: run_step(filepath, return_json=True, output_dir=output_dir,
+                                                     options=options, balancing=balancing, dtype=dtype), profile)
+            return run_profiled(lambda: run_step(filepath, return_json=True, output_dir=output_dir), profile)
+    
+    def run_leased(report):
+        # Jangan biarkan GC menghapus dataset selama job berjalan
+        with dataset_in_use(dataset_id, app.config['UPLOAD_FOLDER'], app.config['OUTPUT_FOLDER']):
+            return run_job(report)
     
     try:
-        if process_step == '1':
-            result = step1_missing_value(filepath, return_json=True)
-        elif process_step == '2':
-            result = step2_minmax_scaled(filepath, return_json=True)
-        elif process_step == '3':
-            result = step3_anova_features(filepath, return_json=True)
-        elif process_step == '4':
-            result = step4_rus_balancing(filepath, return_json=True)
-        else:
-            return jsonify({'error': 'Invalid process step'}), 400
+        job_id = job_queue.submit(process_step, run_leased,
+                                  params={'step': process_step, 'dataset_id': dataset_id,
+                                          'mode': data.get('mode', 'memory'), 'profile': profile})
+    except QueueFullError as e:
+        logger.warning(str(e))
+        return jsonify({'error': str(e)}), 503
+    
+    return jsonify({
+        'success': True,
+        'step': process_step,
+        'dataset_id': dataset_id,
+        'job_id': job_id,
+        'status': 'queued',
+        'status_url': url_for('get_job', job_id=job_id)
+    }), 202
+
+@app.route('/jobs/<job_id>')
+def get_job(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    if 'result' in job:
+        attach_chart_urls(job['result'], job['params'].get('dataset_id'))
+    return jsonify(job)
+
+@app.route('/process/all', methods=['POST'])
+def process_all():
+    data = request.get_json(silent=True) or {}
+    
+    options_error = pipeline_options_error(data)
+    if options_error:
+        return jsonify({'error': options_error}), 400
+    
+    # Check if file exists
+    dataset_id, filepath, output_dir = resolve_dataset(data)
+    if not filepath:
+        return jsonify({'error': 'No file uploaded'}), 400
+    if data.get('base_dataset_id') and not link_base_version(dataset_id, data['base_dataset_id']):
+        return jsonify({'error': 'Base dataset not found'}), 400
+    
+    try:
+        with dataset_in_use(dataset_id, app.config['UPLOAD_FOLDER'], app.config['OUTPUT_FOLDER']):
+            result = run_profiled(lambda: run_pipeline(filepath, output_dir, data), profile_requested())
+        logger.info(f"Full pipeline finished in {result['total_seconds']:.3f}s")
         
         return jsonify({
             'success': True,
-            'step': process_step,
-            'result': result
+            'step': 'all',
+            'dataset_id': dataset_id,
+            'result': attach_chart_urls(result, dataset_id)
         })
     
+    except PipelineError as e:
+        logger.error(f"Pipeline error: {str(e)}", exc_info=True)
+        return jsonify({'error': str(e), 'stage': e.stage}), 500
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/results/<step>')
 def get_results(step):
     try:
-        if step == '1':
-            csv_path = 'output/1_missing_values_analysis.csv'
-            if os.path.exists(csv_path):
-                return send_file(csv_path, as_attachment=True)
-        elif step == '2':
-            csv_path = 'output/2_scaled_data.csv'
-            if os.path.exists(csv_path):
-                return send_file(csv_path, as_attachment=True)
-        elif step == '3':
-            csv_path = 'output/3_selected_features.csv'
-            if os.path.exists(csv_path):
-                result = {'csv': csv_path}
-                # Try to convert PNG to base64 for web display
-                png_path = 'output/3_anova_selection.png'
-                if os.path.exists(png_path):
-                    with open(png_path, 'rb') as f:
-                        img_data = base64.b64encode(f.read()).decode()
-                    result['chart'] = f"data:image/png;base64,{img_data}"
-                return jsonify(result)
-        elif step == '4':
-            csv_path = 'output/4_rus_cleaned_data.csv'
-            if os.path.exists(csv_path):
-                result = {'csv': csv_path}
-                # Try to convert PNG to base64 for web display
-                png_path = 'output/4_rus_balance.png'
-                if os.path.exists(png_path):
-                    with open(png_path, 'rb') as f:
-                        img_data = base64.b64encode(f.read()).decode()
-                    result['chart'] = f"data:image/png;base64,{img_data}"
-                return jsonify(result)
+        dataset_id, _, output_dir = resolve_dataset()
+        if not dataset_id:
+            return jsonify({'error': 'No file uploaded'}), 400
+        
+        name = OUTPUT_TABLES.get(step)
+        artifact = find_table(output_dir, name) if name else None
+        if artifact:
+            if step in ('1', '2'):
+                return send_file(export_csv(output_dir, name), as_attachment=True)
+            result = {
+                'csv': url_for('download_file', filename=f'{name}.csv', dataset_id=dataset_id),
+                'output_file': artifact,
+                'dataset_id': dataset_id,
+                'chart_name': RESULT_CHARTS[step]
+            }
+            if step == '5' and os.path.exists(os.path.join(output_dir, MODEL_FILE)):
+                result['model'] = url_for('download_file', filename=MODEL_FILE, dataset_id=dataset_id)
+            return jsonify(attach_chart_urls(result, dataset_id))
         
         return jsonify({'error': 'No results found for this step'}), 404
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/charts/<name>')
+def get_chart_image(name):
+    dataset_id, _, output_dir = resolve_dataset()
+    if not dataset_id:
+        return jsonify({'error': 'No file uploaded'}), 400
+    
+    fmt = request.args.get('format', 'png').lower()
+    if fmt not in CHART_FORMATS:
+        return jsonify({'error': f'Unsupported chart format: {fmt}'}), 400
+    try:
+        dpi = int(request.args.get('dpi', PREVIEW_DPI))
+    except ValueError:
+        return jsonify({'error': 'Invalid dpi'}), 400
+    
+    try:
+        image, mimetype, key = get_chart(name, output_dir, dpi=dpi, fmt=fmt)
+    except ChartNotFoundError as e:
+        return jsonify({'error': str(e)}), 404
+    
+    # Cache key berbasis hash data, jadi browser bisa memakai If-None-Match
+    return send_file(io.BytesIO(image), mimetype=mimetype, etag=key, max_age=3600)
+
 @app.route('/download/<filename>')
 def download_file(filename):
     try:
-        file_path = os.path.join('output', filename)
-        if os.path.exists(file_path):
+        dataset_id, _, output_dir = resolve_dataset()
+        if not dataset_id:
+            return jsonify({'error': 'No file uploaded'}), 400
+        
+        filename = secure_filename(filename)
+        name, ext = os.path.splitext(filename)
+        if ext == '.csv':
+            # CSV hanya dibuat saat diunduh, dari artefak biner step 2-4
+            file_path = export_csv(output_dir, name)
+        else:
+            file_path = os.path.join(output_dir, filename)
+        if file_path and os.path.exists(file_path):
             return send_file(file_path, as_attachment=True)
         else:
             return jsonify({'error': 'File not found'}), 404
     except Exception as e:
        	return jsonify({'error': str(e)}), 500
 
+def request_features(bundle, data):
+    """
+    Raw feature matrix of a /predict request
+
+    Accepts a JSON object with ``records`` (list) or ``record`` (object), a
+    JSON list of records, an uploaded CSV ``file`` or a ``text/csv`` body.
+
+    Raises:
+        ValueError: If the request holds no records or they are malformed
+    """
+    features = bundle['features']
+    if 'file' in request.files:
+        return csv_matrix(request.files['file'].read(), features)
+    if request.mimetype == 'text/csv':
+        return csv_matrix(request.get_data(), features)
+    if isinstance(data, list):
+        return records_matrix(data, features)
+    if isinstance(data, dict) and ('records' in data or 'record' in data):
+        return records_matrix(data.get('records', data.get('record')), features)
+    raise ValueError('No records to score, send records, record, a CSV file or a text/csv body')
+
+@app.route('/predict', methods=['POST'])
+def predict():
+    start = time.perf_counter()
+    data = request.get_json(silent=True) if request.is_json else None
+    dataset_id, _, output_dir = resolve_dataset(data if isinstance(data, dict) else None)
+    if not dataset_id:
+        return jsonify({'error': 'No file uploaded'}), 400
+    
+    try:
+        bundle = load_bundle(output_dir)
+    except FileNotFoundError:
+        return jsonify({'error': 'No trained model for this dataset, run step 5 first'}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 409
+    
+    try:
+        X = request_features(bundle, data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        if len(X) < predict_batcher.max_batch and request.environ.get('wsgi.multithread'):
+            # Record sedikit di server berthread: tunggu sebentar supaya bisa di-score bersama request lain
+            # (worker sync tidak pernah menerima request bersamaan, jadi langsung di-score)
+            labels, proba = predict_batcher.submit(bundle, X).result()
+        else:
+            labels, proba = predict_rows(bundle, X)
+    except Exception as e:
+        logger.error(f"Prediction error: {str(e)}", exc_info=True)
+        return jsonify({'error': str(e)}), 500
+    
+    return jsonify({
+        'dataset_id': dataset_id,
+        'model': bundle['model'],
+        'target': bundle['target'],
+        'features': bundle['features'],
+        'count': len(labels),
+        'predictions': prediction_records(bundle, labels, proba),
+        'latency_ms': (time.perf_counter() - start) * 1000
+    })
+
 @app.route('/status')
 def get_status():
-    status = {}
-    output_files = [
-        ('1', '1_missing_values_analysis.csv'),
-        ('2', '2_scaled_data.csv'),
-        ('3', '3_selected_features.csv'),
-        ('4', '4_rus_cleaned_data.csv')
-    ]
-    
-    for step, filename in output_files:
-        file_path = os.path.join('output', filename)
+    dataset_id, _, output_dir = resolve_dataset()
+    status = {'dataset_id': dataset_id}
+    for step, name in OUTPUT_TABLES.items():
         status[f'step_{step}'] = {
-            'completed': os.path.exists(file_path),
-            'filename': filename
+            'completed': bool(output_dir) and find_table(output_dir, name) is not None,
+            'filename': f'{name}.csv'
         }
     
+    status['dataset_cache'] = dataset_cache.stats()
+    status['chart_cache'] = chart_cache.stats()
+    status['jobs'] = job_queue.stats()
+    status['predict'] = predict_batcher.stats()
+    
     return jsonify(status)
 
+@app.route('/metrics')
+def get_metrics():
+    """Stage histograms, cache and job counters in Prometheus text format"""
+    current_rss, peak_rss = process_memory()
+    cache = dataset_cache.stats()
+    charts = chart_cache.stats()
+    batches = predict_batcher.stats()
+    
+    text = metrics.render()
+    if current_rss is not None:
+        text += format_gauge('process_resident_memory_bytes', 'Resident memory of this worker', current_rss)
+    text += format_gauge('process_peak_resident_memory_bytes', 'Peak resident memory of this worker', peak_rss)
+    text += format_gauge('dataset_cache_hits', 'Parsed dataset cache hits', cache['hits'])
+    text += format_gauge('dataset_cache_misses', 'Parsed dataset cache misses', cache['misses'])
+    text += format_gauge('dataset_cache_bytes', 'Memory held by the parsed dataset cache', cache['current_bytes'])
+    text += format_gauge('chart_cache_hits', 'Rendered chart cache hits', charts['hits'])
+    text += format_gauge('chart_cache_misses', 'Rendered chart cache misses', charts['misses'])
+    text += format_gauge('predict_batches', 'Micro-batches scored by /predict', batches['batches'])
+    text += format_gauge('predict_records', 'Records scored through /predict micro-batches', batches['records'])
+    text += format_gauge('jobs', 'Jobs in the job store by status',
+                         {f'status="{status}"': count for status, count in job_queue.stats().items()})
+    return app.response_class(text, mimetype='text/plain; version=0.0.4')
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
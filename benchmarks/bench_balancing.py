@@ -0,0 +1,126 @@
+"""
+Compare the index-based step 4 samplers with imblearn's fit_resample.
+
+Every sampler is run on the scaled features of a synthetic dataset, once
+through ``balancing.resample`` (row indices plus synthetic rows, gathered
+block by block) and once through the equivalent imblearn sampler, which
+returns a resampled copy. The script prints whether both give the same
+rows (in any order: combined samplers list original rows before synthetic
+ones, imblearn's ENN groups them by class), the wall-clock time and peak
+traced memory of each. ``--classes 3`` splits the majority class to check
+multi-class targets.
+
+Usage:
+    python benchmarks/bench_balancing.py --rows 100000 --cols 200 --ratio 0.5
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT, 'models'))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from balancing import SAMPLERS, balancing_options, resample, resampled_blocks, resampled_target, sampling_strategy
+from dataset_cache import load_dataset
+from kernels import MedianMinMaxScaler
+from synthetic import DATA_DIR, TARGET, generate_dataset
+
+
+def imblearn_sampler(options, y):
+    from imblearn.combine import SMOTEENN, SMOTETomek
+    from imblearn.over_sampling import SMOTE, RandomOverSampler
+    from imblearn.under_sampling import NearMiss, RandomUnderSampler, TomekLinks
+
+    sampler, seed = options['sampler'], options['seed']
+    strategy = sampling_strategy(y, options['ratio'], SAMPLERS[sampler]['kind'])
+    return {
+        'rus': lambda: RandomUnderSampler(sampling_strategy=strategy, random_state=seed),
+        'ros': lambda: RandomOverSampler(sampling_strategy=strategy, random_state=seed),
+        'smote': lambda: SMOTE(sampling_strategy=strategy, random_state=seed),
+        'tomek': lambda: TomekLinks(),
+        'nearmiss': lambda: NearMiss(sampling_strategy=strategy),
+        'smote_tomek': lambda: SMOTETomek(sampling_strategy=strategy, random_state=seed),
+        'smote_enn': lambda: SMOTEENN(sampling_strategy=strategy, random_state=seed),
+    }[sampler]()
+
+
+def gathered(X, y, options):
+    """Resample by index and consume the rows block by block, as step 4 writes them"""
+    resampled = resample(X, y, options)
+    checksum = sum(float(block.sum()) for block in resampled_blocks(X, resampled))
+    return resampled, checksum
+
+
+def copied(X, y, options):
+    return imblearn_sampler(options, y).fit_resample(X, y)
+
+
+def measure(func, *args):
+    """Run ``func`` once for time and once under tracemalloc for peak memory"""
+    start = time.perf_counter()
+    result = func(*args)
+    seconds = time.perf_counter() - start
+    del result
+    tracemalloc.start()
+    result = func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, seconds, peak
+
+
+def sorted_rows(X, y):
+    table = np.column_stack([X, y])
+    return table[np.lexsort(table.T[::-1])]
+
+
+def same_rows(X, y, resampled, X_ref, y_ref):
+    X_res = np.vstack(list(resampled_blocks(X, resampled)))
+    y_res = resampled_target(y, resampled)
+    if len(y_res) != len(y_ref):
+        return False
+    return np.allclose(sorted_rows(X_res, y_res), sorted_rows(X_ref, np.asarray(y_ref)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare index-based balancing with imblearn")
+    parser.add_argument("--rows", type=int, default=20_000, help="Rows of the dataset")
+    parser.add_argument("--cols", type=int, default=60, help="Columns including the target")
+    parser.add_argument("--classes", type=int, default=2, help="Number of target classes")
+    parser.add_argument("--ratio", type=float, default=None, help="Minority/majority ratio after balancing")
+    parser.add_argument("--samplers", nargs="+", choices=sorted(SAMPLERS), default=list(SAMPLERS))
+    parser.add_argument("--seed", type=int, default=0, help="Random seed of the dataset")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="Where generated datasets are kept")
+    args = parser.parse_args(argv)
+    warnings.simplefilter("ignore")
+
+    path = generate_dataset(args.rows, args.cols, seed=args.seed, output_dir=args.data_dir)
+    df = load_dataset(path, drop_empty=True)
+    X = MedianMinMaxScaler().fit_transform(df.drop(columns=[TARGET]).select_dtypes(include="number"))
+    y = df[TARGET].to_numpy().astype(int)
+    if args.classes > 2:
+        # Kelas mayoritas dipecah supaya target menjadi multi-kelas
+        majority = np.flatnonzero(y == 0)
+        y[majority] = np.arange(len(majority)) % (args.classes - 1) * 2
+    classes, counts = np.unique(y, return_counts=True)
+    print(f"=== {X.shape[0]} baris x {X.shape[1]} fitur, kelas {dict(zip(classes.tolist(), counts.tolist()))} ===")
+
+    # Import imblearn/sklearn sebelum diukur
+    copied(X[:200], y[:200], balancing_options('rus'))
+    for sampler in args.samplers:
+        options = balancing_options(sampler, None if sampler == 'tomek' else args.ratio)
+        (resampled, _), seconds, peak = measure(gathered, X, y, options)
+        (X_ref, y_ref), ref_seconds, ref_peak = measure(copied, X, y, options)
+        same = same_rows(X, y, resampled, X_ref, y_ref)
+        print(f"{sampler:<12} indeks {seconds:8.3f}s {peak / 2**20:8.1f} MB  "
+              f"imblearn {ref_seconds:8.3f}s {ref_peak / 2**20:8.1f} MB  "
+              f"{len(y_ref):>8} baris  {'sama' if same else 'BERBEDA'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Compare the compact preprocessing mode with the float64 path.
+
+First the numerical check on a small dataset: the compact scaled matrix
+must decode to exactly the float64 values for its int8 columns and to the
+float64 values rounded once to float32 for the others, the ANOVA scores
+must match ``f_classif`` on the same decoded matrix to 1e-9 and the float64
+path's F-scores to 1e-6 (relative), with the same features selected, and
+RUS must keep the same rows.
+
+Then every mode runs steps 2-4 (parse, imputation + scaling, ANOVA, RUS with
+the balanced rows gathered block by block) on a large synthetic dataset in
+a fresh interpreter, printing per stage the time, the resident memory after
+the stage and the peak so far (VmRSS / VmHWM from Linux /proc), plus the
+size of the scaled matrix. A mode that runs out of memory is reported as
+failed.
+
+Usage:
+    python benchmarks/bench_compact.py --rows 10000000 --check-rows 200000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'models'))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from synthetic import TARGET, generate_dataset
+
+MODES = ("float64", "float32", "compact")
+
+
+def process_memory_mb():
+    """Current and peak resident memory of this process in MB"""
+    with open('/proc/self/status') as f:
+        status = dict(line.split(':', 1) for line in f)
+    return int(status['VmRSS'].split()[0]) / 1024, int(status['VmHWM'].split()[0]) / 1024
+
+
+def check(path):
+    """Numerical equivalence of the compact path with the float64 path"""
+    from balancing import resample
+    from dataset_cache import load_dataset
+    from feature_selection import score_features, select_features
+    from preprocessing import fit_preprocessing, split_features
+
+    df = load_dataset(path, drop_empty=True)
+    X = df.select_dtypes(include="number")
+    reference = fit_preprocessing(X, dtype="float64")
+    compact = fit_preprocessing(X, dtype="compact")
+    X_64, X_c = reference['X_scaled'], compact['X_scaled']
+
+    code = X_c.is_code
+    exact = np.array_equal(np.asarray(X_c)[:, code], X_64[:, code])
+    rounded = np.array_equal(X_c.values[:, X_c.position[~code]], X_64[:, ~code].astype(np.float32))
+    print(f"{code.sum()} kolom int8, {(~code).sum()} kolom float32, matriks {X_c.nbytes / X_64.nbytes:.0%} "
+          f"dari float64")
+    print(f"kolom int8 vs float64 (identik): {'sama' if exact else 'BERBEDA'}")
+    print(f"kolom float32 vs float64 dibulatkan ke float32: {'sama' if rounded else 'BERBEDA'}")
+
+    columns, X_64, y = split_features(df, reference, TARGET)
+    _, X_c, _ = split_features(df, compact, TARGET)
+    scores_64, pvalues_64 = score_features(X_64, y, 'anova')
+    scores_c, pvalues_c = score_features(X_c, y, 'anova')
+    scores_d, pvalues_d = score_features(np.asarray(X_c), y, 'anova')
+    kernel = (np.allclose(scores_c, scores_d, rtol=1e-9, atol=0, equal_nan=True)
+              and np.allclose(pvalues_c, pvalues_d, rtol=1e-9, atol=1e-300, equal_nan=True))
+    # Kolom float32 membawa selisih pembulatan inputnya (~1e-7) ke skor F; p-value di ekor
+    # distribusi memperbesar selisih relatif itu, jadi yang dibandingkan skor F dan seleksinya
+    close = np.allclose(scores_c, scores_64, rtol=1e-6, atol=0, equal_nan=True)
+    same_selection = np.array_equal(select_features(pvalues_c, scores_c), select_features(pvalues_64, scores_64))
+    print(f"ANOVA compact vs f_classif pada matriks yang sama (rtol 1e-9): {'sama' if kernel else 'BERBEDA'}")
+    print(f"skor F compact vs float64 (rtol 1e-6): {'sama' if close else 'BERBEDA'}")
+    print(f"fitur terpilih: {'sama' if same_selection else 'BERBEDA'}")
+    same_rows = np.array_equal(resample(X_c, y)['indices'], resample(X_64, y)['indices'])
+    print(f"baris RUS: {'sama' if same_rows else 'BERBEDA'}")
+
+
+def probe(path, mode):
+    """Run steps 2-4 in this process and print one JSON record per stage"""
+    from balancing import resample, resampled_blocks
+    from dataset_cache import load_dataset
+    from feature_selection import score_features
+    from preprocessing import fit_preprocessing, split_features
+    # Import sklearn/imblearn di depan supaya tidak terhitung di stage pertama yang memakainya
+    import imblearn.under_sampling
+    import sklearn.feature_selection
+
+    def report(stage, start, **extra):
+        current, peak = process_memory_mb()
+        print(json.dumps({'stage': stage, 'seconds': time.perf_counter() - start, 'rss_mb': current,
+                          'peak_mb': peak, **extra}), flush=True)
+
+    start = time.perf_counter()
+    df = load_dataset(path, drop_empty=True)
+    report('parse', start, frame_mb=df.memory_usage(deep=True).sum() / 2**20)
+
+    start = time.perf_counter()
+    artifact = fit_preprocessing(df.select_dtypes(include="number"), dtype=mode)
+    report('preprocess', start, matrix_mb=artifact['X_scaled'].nbytes / 2**20)
+
+    start = time.perf_counter()
+    columns, X_scl, y = split_features(df, artifact, TARGET)
+    score_features(X_scl, y, 'anova', n_jobs=1)
+    report('anova', start)
+
+    start = time.perf_counter()
+    resampled = resample(X_scl, y)
+    rows = sum(len(block) for block in resampled_blocks(X_scl, resampled))
+    report('rus', start, rows=rows)
+
+
+def run_probe(path, mode):
+    """Records of probe() run in a fresh interpreter, and its exit code"""
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), "--probe", mode, path],
+                            capture_output=True, text=True)
+    records = [json.loads(line) for line in output.stdout.splitlines() if line.startswith('{')]
+    return records, output.returncode
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the compact preprocessing mode with float64")
+    parser.add_argument("--rows", type=int, default=10_000_000, help="Rows of the large dataset")
+    parser.add_argument("--check-rows", type=int, default=200_000, help="Rows of the equivalence check dataset")
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=MODES)
+    parser.add_argument("--probe", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    warnings.simplefilter("ignore")
+
+    if args.probe:
+        probe(args.probe[1], args.probe[0])
+        return
+
+    print(f"=== Cek ekuivalensi, {args.check_rows} baris x 36 kolom ===")
+    check(generate_dataset(args.check_rows, 36))
+
+    path = generate_dataset(args.rows, 36)
+    print(f"\n=== Memori step 2-4, {args.rows} baris x 36 kolom ({os.path.getsize(path) / 2**30:.1f} GB CSV) ===")
+    for mode in args.modes:
+        records, returncode = run_probe(path, mode)
+        for record in records:
+            extra = ""
+            if 'frame_mb' in record:
+                extra = f"  frame {record['frame_mb']:8.1f} MB"
+            elif 'matrix_mb' in record:
+                extra = f"  matriks {record['matrix_mb']:8.1f} MB"
+            print(f"{mode:<8} {record['stage']:<11} {record['seconds']:8.2f}s  RSS {record['rss_mb']:8.1f} MB  "
+                  f"puncak {record['peak_mb']:8.1f} MB{extra}")
+        if returncode != 0:
+            print(f"{mode:<8} gagal setelah {records[-1]['stage'] if records else 'start'} "
+                  f"(exit {returncode}, kemungkinan kehabisan memori)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark the step 3 feature scorers, serially and over column blocks.
+
+Every scorer is run on the scaled features of a synthetic dataset with one
+worker and with ``--jobs`` workers; the timings and whether both runs give
+the same scores are printed, plus the number of features each selection
+policy keeps. Stability selection is then timed for both resampling
+methods with ``--resamples`` resamples.
+
+Usage:
+    python benchmarks/bench_feature_selection.py --rows 20000 --cols 300 --jobs 4 --resamples 200
+"""
+import argparse
+import os
+import sys
+import time
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT, 'models'))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from dataset_cache import load_dataset
+from feature_selection import (CORRECTIONS, SCORERS, STABILITY_METHODS, score_features, select_features,
+                               selection_policy, stability_options, stability_selection, stable_features)
+from kernels import MedianMinMaxScaler
+from synthetic import DATA_DIR, TARGET, generate_dataset
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the step 3 feature scorers")
+    parser.add_argument("--rows", type=int, default=20_000, help="Rows of the dataset")
+    parser.add_argument("--cols", type=int, default=300, help="Columns including the target")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Parallel workers")
+    parser.add_argument("--scorers", nargs="+", choices=sorted(SCORERS), default=sorted(SCORERS))
+    parser.add_argument("--resamples", type=int, default=200, help="Stability selection resamples, 0 to skip")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="Where generated datasets are kept")
+    args = parser.parse_args(argv)
+    warnings.simplefilter("ignore")
+
+    path = generate_dataset(args.rows, args.cols, seed=args.seed, output_dir=args.data_dir)
+    df = load_dataset(path, drop_empty=True)
+    X = MedianMinMaxScaler().fit_transform(df.drop(columns=[TARGET]).select_dtypes(include="number"))
+    y = df[TARGET].to_numpy()
+    print(f"=== {X.shape[0]} baris x {X.shape[1]} fitur, {args.jobs} worker ===")
+
+    for scorer in args.scorers:
+        # Import sklearn/scipy sebelum diukur
+        score_features(X[:100, :2], y[:100], scorer, n_jobs=1)
+        (scores, pvalues), serial = timed(score_features, X, y, scorer, n_jobs=1)
+        (scores_par, pvalues_par), parallel = timed(score_features, X, y, scorer, n_jobs=args.jobs)
+        same = np.allclose(scores, scores_par, equal_nan=True) and np.allclose(pvalues, pvalues_par, equal_nan=True)
+        selected = {correction: len(select_features(pvalues, scores, selection_policy(correction=correction)))
+                    for correction in CORRECTIONS}
+        print(f"{scorer:<14} serial {serial:8.3f}s  paralel {parallel:8.3f}s  x{serial / parallel:.2f}  "
+              f"{'sama' if same else 'BERBEDA'}  terpilih {selected}")
+
+    if args.resamples:
+        print()
+        for method in STABILITY_METHODS:
+            options = stability_options(args.resamples, method)
+            frequency, serial = timed(stability_selection, X, y, options, n_jobs=1)
+            frequency_par, parallel = timed(stability_selection, X, y, options, n_jobs=args.jobs)
+            print(f"stabilitas {method:<10} serial {serial:8.3f}s  paralel {parallel:8.3f}s  "
+                  f"{'sama' if np.array_equal(frequency, frequency_par) else 'BERBEDA'}  "
+                  f"stabil {len(stable_features(frequency, options))} fitur")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Measure cold start: importing app.py, the first request of every step and
+preloading, each in a fresh interpreter.
+
+Usage:
+    python benchmarks/bench_import.py [--repeat N] [--top 15]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Dijalankan di interpreter baru; mencetak JSON berisi waktu per fase
+_PROBE = """
+import json, os, sys, time
+os.chdir({root!r})
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+result = {{'import_app': imported - start}}
+if {preload}:
+    result['preload'] = app.preload_modules()
+else:
+    from pipeline import STEP_MODULES, step_function
+    for step in STEP_MODULES:
+        t = time.perf_counter()
+        step_function(step)
+        result['first_use_step' + step] = time.perf_counter() - t
+result['heavy_loaded'] = sorted(m for m in ('sklearn', 'imblearn', 'matplotlib', 'scipy') if m in sys.modules)
+print(json.dumps(result))
+"""
+
+
+def probe(preload):
+    code = _PROBE.format(root=ROOT, preload=preload)
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(top):
+    """Modules with the highest cumulative import time when importing app"""
+    code = f"import os, sys; os.chdir({ROOT!r}); sys.path.insert(0, {ROOT!r}); import app"
+    output = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True)
+    rows = []
+    for line in output.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        try:
+            rows.append((int(cumulative), name.strip()))
+        except ValueError:
+            continue
+    return sorted(rows, reverse=True)[:top]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark application cold start")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per measurement")
+    parser.add_argument("--top", type=int, default=15, help="Slowest imports to list")
+    args = parser.parse_args(argv)
+
+    for preload in (False, True):
+        runs = [probe(preload) for _ in range(args.repeat)]
+        print(f"=== {'Dengan preload_modules()' if preload else 'Lazy (default)'}, median dari {args.repeat} run ===")
+        for key in runs[0]:
+            if key == 'heavy_loaded':
+                continue
+            print(f"{key:<18} {statistics.median(run[key] for run in runs) * 1000:9.1f} ms")
+        print(f"{'heavy_loaded':<18} {runs[0]['heavy_loaded']}")
+
+    print(f"\n=== {args.top} import terlama saat import app (kumulatif) ===")
+    for cumulative, name in slowest_imports(args.top):
+        print(f"{cumulative / 1000:9.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Benchmark incremental recomputation of a re-uploaded dataset.
+
+A base version is generated and run through the full pipeline. A new version
+is derived from it by dropping, correcting and appending rows, then run twice
+with cold in-memory caches: linked to the base version (incremental) and from
+scratch. Timings are printed and the step 1-4 outputs of both runs are
+compared.
+
+Usage:
+    python benchmarks/bench_incremental.py --rows 100000 --cols 200 --append 300 --modify 50
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT, 'models'))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pandas as pd
+
+from artifacts import find_table, load_table
+from dataset_cache import dataset_cache
+from feature_selection import clear_score_cache
+from incremental import clear_state_cache, link_versions
+from pipeline import preload_modules, run_full_pipeline
+from preprocessing import clear_preprocessing_cache
+from synthetic import DATA_DIR, generate_dataset
+
+TABLES = ('2_scaled_data', '3_selected_features', '4_rus_cleaned_data')
+
+
+def derive_version(base_path, extra_path, path, append, modify, drop, seed=0):
+    """
+    Write a new version of a CSV file
+
+    ``drop`` rows are removed, ``modify`` rows are replaced by rows of
+    ``extra_path`` and ``append`` more of its rows are added at the end.
+    """
+    with open(base_path) as f:
+        header, *rows = f.read().splitlines(True)
+    with open(extra_path) as f:
+        extra = f.read().splitlines(True)[1:]
+    rng = np.random.default_rng(seed)
+    changed = rng.choice(len(rows), size=modify + drop, replace=False)
+    for i, row in zip(changed[:modify], extra[append:append + modify]):
+        rows[i] = row
+    dropped = set(changed[modify:].tolist())
+    rows = [row for i, row in enumerate(rows) if i not in dropped] + extra[:append]
+    with open(path, "w") as f:
+        f.write(header + "".join(rows))
+    return path
+
+
+def timed_run(path, output_dir):
+    dataset_cache.clear()
+    clear_preprocessing_cache()
+    clear_state_cache()
+    clear_score_cache()
+    start = time.perf_counter()
+    result = run_full_pipeline(path, output_dir=output_dir)
+    return result, time.perf_counter() - start
+
+
+def compare_outputs(result, reference, output_dir, reference_dir):
+    """Print whether both runs wrote the same tables and selected the same features"""
+    for name in TABLES:
+        a = load_table(find_table(output_dir, name))
+        b = load_table(find_table(reference_dir, name))
+        same = list(a.columns) == list(b.columns) and np.array_equal(a.to_numpy(), b.to_numpy(), equal_nan=True)
+        print(f"{name:<22} {'sama' if same else 'BERBEDA'}")
+    same = pd.read_csv(os.path.join(output_dir, "1_missing_values_analysis.csv")).equals(
+        pd.read_csv(os.path.join(reference_dir, "1_missing_values_analysis.csv")))
+    print(f"{'1_missing_values':<22} {'sama' if same else 'BERBEDA'}")
+
+    a = pd.DataFrame(result['steps']['3']['feature_analysis_table'])
+    b = pd.DataFrame(reference['steps']['3']['feature_analysis_table'])
+    error = np.nanmax(np.abs(a['f_score'] - b['f_score']) / np.abs(b['f_score'])) if len(b) else 0.0
+    print(f"{'anova top 10':<22} {'sama' if list(a['feature']) == list(b['feature']) else 'BERBEDA'} "
+          f"(selisih relatif F-score maks {error:.1e})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark incremental recomputation")
+    parser.add_argument("--rows", type=int, default=100_000, help="Rows of the base version")
+    parser.add_argument("--cols", type=int, default=200, help="Columns including the target")
+    parser.add_argument("--append", type=int, default=300, help="Rows appended in the new version")
+    parser.add_argument("--modify", type=int, default=50, help="Rows corrected in the new version")
+    parser.add_argument("--drop", type=int, default=20, help="Rows removed in the new version")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="Where generated datasets are kept")
+    args = parser.parse_args(argv)
+    warnings.simplefilter("ignore")
+    preload_modules()
+
+    base_path = generate_dataset(args.rows, args.cols, seed=args.seed, output_dir=args.data_dir)
+    extra_path = generate_dataset(args.append + args.modify, args.cols, seed=args.seed + 1, output_dir=args.data_dir)
+    work_dir = tempfile.mkdtemp(prefix="bench_incremental_")
+    try:
+        new_path = derive_version(base_path, extra_path, os.path.join(work_dir, "new.csv"),
+                                  args.append, args.modify, args.drop, args.seed)
+        base_dir, inc_dir, full_dir = (os.path.join(work_dir, name) for name in ("base", "incremental", "full"))
+
+        _, seconds = timed_run(base_path, base_dir)
+        print(f"=== {args.rows} baris x {args.cols} kolom, +{args.append} / ~{args.modify} / -{args.drop} baris ===")
+        print(f"versi dasar (dari nol)  {seconds:8.3f}s")
+
+        link_versions(inc_dir, base_path, base_dir)
+        incremental, inc_seconds = timed_run(new_path, inc_dir)
+        full, full_seconds = timed_run(new_path, full_dir)
+        print(f"versi baru inkremental {inc_seconds:8.3f}s  {incremental.get('incremental')}")
+        print(f"versi baru dari nol    {full_seconds:8.3f}s  x{full_seconds / inc_seconds:.2f}")
+        for stage in ('preprocess', 'row_state', 'missing_report', 'anova'):
+            print(f"  {stage:<16} {incremental['timings'][stage]['seconds']:8.3f}s vs {full['timings'][stage]['seconds']:8.3f}s")
+
+        print()
+        compare_outputs(incremental, full, inc_dir, full_dir)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark CSV ingestion with and without the dataset schema.
+
+Three parsers read the same synthetic dataset (36 columns, the schema of the
+bundled CSV): pandas with type inference (the previous path), the schema
+dtypes with pandas' C parser and the schema dtypes with pyarrow's
+multithreaded reader. Each parser runs in a fresh interpreter so its peak
+resident memory (VmHWM from Linux /proc) is not shared with the others; the
+script prints parse time, peak RSS (and the RSS before parsing) and the memory
+of the resulting frame, and checks that every parser yields the same values as
+inference.
+
+Usage:
+    python benchmarks/bench_ingest.py --rows 100000 1000000 --repeat 3
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'models'))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pandas as pd
+
+from schemas import NA_VALUES, read_csv
+from synthetic import generate_dataset
+
+PARSERS = ('inferensi', 'skema c', 'skema pyarrow')
+
+_PROBE = """
+import json, sys, time
+sys.path.insert(0, {models!r})
+import pandas as pd
+from schemas import NA_VALUES, read_csv
+def high_water_mb():
+    # VmHWM dimulai ulang saat exec, beda dengan ru_maxrss yang mewarisi puncak proses induk
+    with open('/proc/self/status') as f:
+        return next(int(line.split()[1]) for line in f if line.startswith('VmHWM')) / 1024
+before = high_water_mb()
+start = time.perf_counter()
+if {parser!r} == 'inferensi':
+    frame = pd.read_csv({path!r}, na_values=NA_VALUES)
+else:
+    frame = read_csv({path!r}, engine={engine!r})
+seconds = time.perf_counter() - start
+print(json.dumps({{'seconds': seconds, 'peak_mb': high_water_mb(), 'base_mb': before,
+                  'frame_mb': frame.memory_usage(deep=True).sum() / 1024 / 1024}}))
+"""
+
+
+def probe(path, parser):
+    """Parse ``path`` once in a fresh interpreter"""
+    engine = parser.split()[-1] if parser != 'inferensi' else None
+    code = _PROBE.format(models=os.path.join(ROOT, 'models'), path=path, parser=parser, engine=engine)
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def same_values(path):
+    """Every schema parser yields the values of type inference"""
+    expected = pd.read_csv(path, na_values=NA_VALUES)
+    checks = {}
+    for engine in ('c', 'pyarrow'):
+        frame = read_csv(path, engine=engine)
+        checks[engine] = (list(frame.columns) == list(expected.columns) and all(
+            np.array_equal(frame[col].to_numpy(dtype=float), expected[col].to_numpy(dtype=float), equal_nan=True)
+            for col in expected.columns))
+    return checks
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark schema-driven CSV ingestion")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000], help="Dataset sizes")
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh interpreters per parser (best time)")
+    args = parser.parse_args(argv)
+
+    for rows in args.rows:
+        path = generate_dataset(rows, 36)
+        print(f"=== {rows} baris x 36 kolom ({os.path.getsize(path) / 1024 / 1024:.1f} MB) ===")
+        for name in PARSERS:
+            runs = [probe(path, name) for _ in range(args.repeat)]
+            best = min(runs, key=lambda run: run['seconds'])
+            print(f"{name:<14} {best['seconds']:8.3f}s  puncak RSS {best['peak_mb']:7.1f} MB "
+                  f"(awal {best['base_mb']:5.1f})  frame {best['frame_mb']:7.1f} MB")
+        for engine, same in same_values(path).items():
+            print(f"nilai skema {engine} vs inferensi: {'sama' if same else 'BERBEDA'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Compare JSON encode time of the pipeline results: Flask's default provider
+versus NumpyJSONProvider, plus gzip size of the response body.
+
+Usage:
+    python benchmarks/bench_json_encode.py [path/to/dataset.csv] [--repeat N]
+"""
+import argparse
+import gzip
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT, 'models'))
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from json_provider import NumpyJSONProvider, GZIP_LEVEL, orjson
+from pipeline import run_full_pipeline
+
+
+def best_of(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark JSON encoding of pipeline results")
+    parser.add_argument("path", nargs="?", default=os.path.join(ROOT, "dataset/risk_factors_cervical_cancer.csv"))
+    parser.add_argument("--repeat", type=int, default=50, help="Encode repetitions, best time is reported")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        result = run_full_pipeline(args.path, output_dir=output_dir)
+
+    app = Flask(__name__)
+    providers = {
+        'flask default': DefaultJSONProvider(app),
+        'numpy provider' + (' (orjson)' if orjson is not None else ' (stdlib)'): NumpyJSONProvider(app)
+    }
+
+    print(f"=== JSON encode: {os.path.basename(args.path)}, best of {args.repeat} ===")
+    with app.app_context():
+        for name, provider in providers.items():
+            seconds = best_of(lambda: provider.response(result).get_data(), args.repeat)
+            body = provider.response(result).get_data()
+            gz_seconds = best_of(lambda: gzip.compress(body, compresslevel=GZIP_LEVEL), args.repeat)
+            gz_size = len(gzip.compress(body, compresslevel=GZIP_LEVEL))
+            print(f"{name:<24} encode {seconds * 1000:8.3f} ms  {len(body):>9} bytes  "
+                  f"gzip {gz_seconds * 1000:7.3f} ms  {gz_size:>8} bytes")
+
+
+if __name__ == "__main__":
+    main()
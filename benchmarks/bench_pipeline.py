@@ -0,0 +1,274 @@
+"""
+Benchmark steps 1-4 on synthetic datasets of growing size.
+
+For every dataset size each step function is timed end to end (cold caches,
+fresh output directory), then its work is repeated stage by stage (parse,
+preprocess, score, resample, write, plot, serialize) with the same building
+blocks the step uses. Results are written as JSON so runs from different
+commits can be compared with ``--compare``.
+
+Usage:
+    python benchmarks/bench_pipeline.py --rows 1000 100000 --cols 36 200
+    python benchmarks/bench_pipeline.py --compare benchmarks/results/old.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT, 'models'))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pandas as pd
+import sklearn
+from flask import Flask
+
+from charts import PREVIEW_DPI
+from dataset_cache import dataset_cache, load_dataset
+from feature_selection import clear_score_cache
+from incremental import clear_state_cache
+from json_provider import NumpyJSONProvider
+from pipeline import STEP_MODULES, preload_modules, step_function, step_module
+from preprocessing import clear_preprocessing_cache, fit_preprocessing, split_features
+from synthetic import DATA_DIR, TARGET, dataset_name, generate_dataset
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+STAGES = ('parse', 'preprocess', 'score', 'resample', 'write', 'plot', 'serialize')
+
+_provider = NumpyJSONProvider(Flask(__name__))
+
+
+class StageTimer:
+    """Accumulate wall-clock seconds per named stage"""
+
+    def __init__(self):
+        self.seconds = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] = self.seconds.get(name, 0.0) + time.perf_counter() - start
+
+
+def reset_caches():
+    dataset_cache.clear()
+    clear_preprocessing_cache()
+    clear_state_cache()
+    clear_score_cache()
+
+
+def warm_up():
+    """Import the step modules and render once so imports and font loading are not timed"""
+    preload_modules()
+    module = step_module('4')
+    module.render_rus_chart(module.rus_chart_data([2, 1], [1, 1]), dpi=PREVIEW_DPI)
+
+
+def run_step(step, path, output_dir):
+    """Call the step function the way the web app does (return_json=True)"""
+    return step_function(step)(path=path, return_json=True, output_dir=output_dir)
+
+
+def _scaled(timer, path):
+    with timer.stage('parse'):
+        df = load_dataset(path, drop_empty=True)
+        X = df.select_dtypes(include="number")
+    with timer.stage('preprocess'):
+        artifact = fit_preprocessing(X)
+        columns, X_scl, y = split_features(df, artifact, TARGET)
+    return X, artifact['X_scaled'], columns, X_scl, y
+
+
+def stage_breakdown(step, path, output_dir):
+    """
+    Repeat one step stage by stage
+
+    Returns:
+        dict: Stage name -> seconds (only the stages the step has)
+    """
+    module = step_module(step)
+    timer = StageTimer()
+
+    if step == '1':
+        with timer.stage('parse'):
+            df = load_dataset(path)
+        with timer.stage('score'):
+            _, missing_df = module.missing_value_table(df)
+        with timer.stage('write'):
+            output_file = module.save_missing_value_table(missing_df, output_dir)
+        with timer.stage('serialize'):
+            _provider.dumps_bytes(module.missing_value_result(missing_df, output_file))
+
+    elif step == '2':
+        X, X_scaled, _, _, _ = _scaled(timer, path)
+        with timer.stage('write'):
+            output_file = module.save_scaled_data(X, X_scaled, output_dir)
+        with timer.stage('serialize'):
+            _provider.dumps_bytes(module.scaling_result(X, X_scaled, output_file))
+
+    elif step == '3':
+        _, _, columns, X_scl, y = _scaled(timer, path)
+        with timer.stage('score'):
+            scores, pvalues = module.anova_scores(X_scl, y)
+            idx = module.select_features(pvalues)
+            selected_features = columns.to_numpy()[idx]
+            metrics_df = module.anova_metrics(columns, scores, pvalues, selected_features)
+        with timer.stage('write'):
+            selected_data, output_file = module.save_selected_features(X_scl, idx, selected_features, y, output_dir)
+        with timer.stage('plot'):
+            module.render_anova_chart(module.anova_chart_data(metrics_df), dpi=PREVIEW_DPI)
+        with timer.stage('serialize'):
+            _provider.dumps_bytes(module.anova_result(columns, selected_features, metrics_df,
+                                                      selected_data, output_file, TARGET))
+
+    else:
+        _, _, columns, X_scl, y = _scaled(timer, path)
+        with timer.stage('resample'):
+            resampled = module.balance_resample(X_scl, y)
+            uniq, cnt = np.unique(y, return_counts=True)
+            uniq_res, cnt_res = np.unique(module.resampled_target(y, resampled), return_counts=True)
+        with timer.stage('write'):
+            balanced_df, output_file = module.save_balanced_data(X_scl, y, resampled, columns, output_dir)
+        with timer.stage('plot'):
+            module.render_rus_chart(module.rus_chart_data(cnt, cnt_res), dpi=PREVIEW_DPI)
+        with timer.stage('serialize'):
+            _provider.dumps_bytes(module.rus_result(columns, uniq, cnt, uniq_res, cnt_res,
+                                                    balanced_df, output_file, TARGET))
+
+    return {name: round(timer.seconds[name], 6) for name in STAGES if name in timer.seconds}
+
+
+def bench_step(step, path, repeat):
+    """
+    Time one step end to end and per stage, best of ``repeat`` cold runs
+
+    Returns:
+        dict: End-to-end seconds (best and all runs) and per-stage seconds
+    """
+    runs = []
+    stages = None
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as output_dir:
+            reset_caches()
+            start = time.perf_counter()
+            run_step(step, path, output_dir)
+            runs.append(round(time.perf_counter() - start, 6))
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            reset_caches()
+            breakdown = stage_breakdown(step, path, output_dir)
+        if stages is None:
+            stages = breakdown
+        else:
+            stages = {name: min(stages[name], seconds) for name, seconds in breakdown.items()}
+
+    return {'seconds': min(runs), 'runs': runs, 'stages': stages}
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment():
+    return {
+        'commit': git_commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'sklearn': sklearn.__version__
+    }
+
+
+def compare(current, baseline_file):
+    """Print the end-to-end ratio against a previous results file"""
+    with open(baseline_file) as f:
+        baseline = json.load(f)
+    previous = {(r['rows'], r['cols'], r['positive_rate'], r['step']): r for r in baseline['results']}
+
+    print(f"\n=== Dibandingkan dengan {baseline['environment'].get('commit')} ({baseline_file}) ===")
+    for result in current['results']:
+        old = previous.get((result['rows'], result['cols'], result['positive_rate'], result['step']))
+        if old is None:
+            continue
+        ratio = result['seconds'] / old['seconds'] if old['seconds'] else float('nan')
+        print(f"{result['rows']:>9} x {result['cols']:<5} step {result['step']}  "
+              f"{old['seconds']:9.4f}s -> {result['seconds']:9.4f}s  x{ratio:.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark steps 1-4 on synthetic datasets")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 10_000, 100_000],
+                        help="Dataset sizes in rows (10^3 - 10^7)")
+    parser.add_argument("--cols", type=int, nargs="+", default=[36, 200],
+                        help="Dataset widths in columns including the target (30 - 1000)")
+    parser.add_argument("--positive-rate", type=float, default=None,
+                        help="Share of Biopsy == 1 rows, default the bundled dataset's rate")
+    parser.add_argument("--steps", nargs="+", choices=sorted(STEP_MODULES), default=sorted(STEP_MODULES))
+    parser.add_argument("--repeat", type=int, default=3, help="Cold runs per step, best time is kept")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed of the generated data")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="Where generated datasets are kept")
+    parser.add_argument("--output", default=None, help="Results JSON file (default benchmarks/results/<commit>-<time>.json)")
+    parser.add_argument("--compare", default=None, help="Previous results JSON to compare against")
+    parser.add_argument("--keep-data", action="store_true", help="Keep generated datasets for later runs")
+    args = parser.parse_args(argv)
+    # Peringatan sklearn (fitur konstan) tidak relevan untuk pengukuran waktu
+    warnings.simplefilter("ignore")
+    warm_up()
+
+    env = environment()
+    report = {'environment': env, 'parameters': vars(args), 'results': []}
+
+    for n_rows in args.rows:
+        for n_cols in args.cols:
+            existed = os.path.exists(os.path.join(args.data_dir, dataset_name(n_rows, n_cols, args.positive_rate, args.seed)))
+            path = generate_dataset(n_rows, n_cols, args.positive_rate, args.seed, args.data_dir)
+            size = os.path.getsize(path)
+            print(f"=== {n_rows} baris x {n_cols} kolom ({size / 1024 / 1024:.1f} MB) ===")
+            for step in args.steps:
+                result = bench_step(step, path, args.repeat)
+                report['results'].append({
+                    'rows': n_rows,
+                    'cols': n_cols,
+                    'positive_rate': args.positive_rate,
+                    'file_bytes': size,
+                    'step': step,
+                    **result
+                })
+                stages = "  ".join(f"{name} {seconds:.3f}" for name, seconds in result['stages'].items())
+                print(f"step {step}: {result['seconds']:8.3f}s  [{stages}]")
+            if not args.keep_data and not existed:
+                os.remove(path)
+    reset_caches()
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{env['commit'] or 'nocommit'}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nHasil tersimpan di: {output}")
+
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
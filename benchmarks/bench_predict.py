@@ -0,0 +1,178 @@
+"""
+Load-test the /predict endpoint with and without micro-batching.
+
+The script uploads a dataset, trains a step 5 model on it, then serves the
+app with werkzeug's threaded server and fires single-record requests from
+``--clients`` concurrent clients, once with micro-batching disabled
+(``PREDICT_MAX_BATCH=1``) and once enabled, plus batch requests of
+``--batch`` records. It prints latency percentiles, throughput and the mean
+micro-batch size of each run, and checks that the served probabilities
+equal scoring the step 2 scaled matrix with the bundled model directly.
+
+werkzeug's threaded server serves concurrent requests from one process like
+a gunicorn ``gthread`` worker (gunicorn.conf.py), so this measures one such
+worker. Sync workers handle one request at a time and bypass the batcher.
+
+Usage:
+    python benchmarks/bench_predict.py --clients 16 --requests 2000
+"""
+import argparse
+import http.client
+import io
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.append(os.path.join(ROOT, 'models'))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pandas as pd
+
+from synthetic import DATA_DIR, SOURCE_DATASET, TARGET, generate_dataset
+
+WORK_DIR = os.path.join(DATA_DIR, "predict")
+
+
+def start_app(max_wait_ms):
+    """Import the app with its uploads, outputs and job store under WORK_DIR"""
+    os.environ['JOB_DB'] = os.path.join(WORK_DIR, "jobs.sqlite3")
+    os.environ['PREDICT_MAX_WAIT_MS'] = str(max_wait_ms)
+    import app as app_module
+
+    app_module.app.config['UPLOAD_FOLDER'] = os.path.join(WORK_DIR, "uploads")
+    app_module.app.config['OUTPUT_FOLDER'] = os.path.join(WORK_DIR, "output")
+    os.makedirs(app_module.app.config['UPLOAD_FOLDER'], exist_ok=True)
+    return app_module
+
+
+def train(client, path, models):
+    """Upload the dataset and run step 5 through the job queue"""
+    with open(path, 'rb') as f:
+        upload = client.post('/upload', data={'file': (io.BytesIO(f.read()), os.path.basename(path))},
+                             content_type='multipart/form-data').get_json()
+    dataset_id = upload['dataset_id']
+    job = client.post('/process', json={'step': '5', 'models': models, 'dataset_id': dataset_id}).get_json()
+    while True:
+        status = client.get(f"/jobs/{job['job_id']}").get_json()
+        if status['status'] in ('done', 'failed'):
+            break
+        time.sleep(0.2)
+    if status['status'] != 'done':
+        raise RuntimeError(status.get('error'))
+    return dataset_id, status['result']
+
+
+def post(port, dataset_id, body, content_type='application/json'):
+    conn = http.client.HTTPConnection('127.0.0.1', port)
+    try:
+        conn.request('POST', f'/predict?dataset_id={dataset_id}', body=body, headers={'Content-Type': content_type})
+        response = conn.getresponse()
+        payload = response.read()
+    finally:
+        conn.close()
+    if response.status != 200:
+        raise RuntimeError(f"/predict returned {response.status}: {payload[:200]}")
+    return json.loads(payload)
+
+
+def load_test(port, dataset_id, bodies, clients):
+    """Send every body once from ``clients`` threads; returns per-request latency in seconds"""
+    latencies = []
+    lock = threading.Lock()
+    position = iter(range(len(bodies)))
+
+    def client():
+        own = []
+        while True:
+            with lock:
+                i = next(position, None)
+            if i is None:
+                break
+            start = time.perf_counter()
+            post(port, dataset_id, bodies[i])
+            own.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(own)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return np.array(latencies), time.perf_counter() - start
+
+
+def report(name, latencies, seconds, records, before, after):
+    p50, p95, p99 = np.percentile(latencies * 1000, [50, 95, 99])
+    batches = after['batches'] - before['batches']
+    mean_batch = f"{(after['records'] - before['records']) / batches:5.1f}" if batches else "    -"
+    print(f"{name:<22} p50 {p50:7.2f} ms  p95 {p95:7.2f} ms  p99 {p99:7.2f} ms  "
+          f"{len(latencies) / seconds:8.1f} req/s  {records / seconds:9.1f} record/s  batch rata-rata {mean_batch}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test /predict with and without micro-batching")
+    parser.add_argument("--rows", type=int, default=None, help="Rows of a synthetic dataset (default: bundled)")
+    parser.add_argument("--cols", type=int, default=60, help="Columns of the synthetic dataset")
+    parser.add_argument("--models", nargs="+", default=["random_forest"], help="Step 5 models to train")
+    parser.add_argument("--clients", type=int, default=16, help="Concurrent clients")
+    parser.add_argument("--requests", type=int, default=2000, help="Single-record requests per run")
+    parser.add_argument("--batch", type=int, default=256, help="Records per batch request")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0, help="Micro-batch wait window")
+    args = parser.parse_args(argv)
+    warnings.simplefilter("ignore")
+    logging.disable(logging.WARNING)
+
+    path = SOURCE_DATASET if args.rows is None else generate_dataset(args.rows, args.cols)
+    app_module = start_app(args.max_wait_ms)
+    from werkzeug.serving import make_server
+    from inference import load_bundle
+    from preprocessing import scaled_features
+
+    dataset_id, result = train(app_module.app.test_client(), path, args.models)
+    output_dir = app_module.output_dir_for(dataset_id, app_module.app.config['OUTPUT_FOLDER'])
+    bundle = load_bundle(output_dir)
+    print(f"=== {result['message']}, {len(bundle['features'])} fitur, {args.clients} client ===")
+
+    server = make_server('127.0.0.1', 0, app_module.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_port
+
+    # Hasil /predict untuk semua baris harus sama dengan model pada matriks scaled step 2
+    frame = pd.read_csv(path, dtype=str, keep_default_na=False)
+    served = post(port, dataset_id, frame.to_csv(index=False), 'text/csv')
+    columns, X_scl, _ = scaled_features(app_module.dataset_path(dataset_id, app_module.app.config['UPLOAD_FOLDER']),
+                                        TARGET, output_dir)
+    idx = pd.Index(columns.astype(str)).get_indexer(bundle['features'])
+    expected = bundle['estimator'].predict_proba(X_scl[:, idx])
+    proba = np.array([list(record['probabilities'].values()) for record in served['predictions']])
+    print(f"probabilitas /predict vs model langsung: {'sama' if np.allclose(proba, expected) else 'BERBEDA'}")
+
+    records = frame.drop(columns=[TARGET]).to_dict(orient='records')
+    singles = [json.dumps({'record': records[i % len(records)]}) for i in range(args.requests)]
+    batches = [json.dumps({'records': [records[(i + j) % len(records)] for j in range(args.batch)]})
+               for i in range(max(1, args.requests // args.batch))]
+    batcher = app_module.predict_batcher
+    # Pemanasan: koneksi, bundle dan thread batcher
+    load_test(port, dataset_id, singles[:args.clients * 4], args.clients)
+
+    for name, max_batch, bodies, size in (('tanpa micro-batching', 1, singles, 1),
+                                          ('micro-batching', 64, singles, 1),
+                                          (f'batch {args.batch} record', 64, batches, args.batch)):
+        batcher.max_batch = max_batch
+        before = batcher.stats()
+        latencies, seconds = load_test(port, dataset_id, bodies, args.clients)
+        report(name, latencies, seconds, len(bodies) * size, before, batcher.stats())
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Compare the sparse preprocessing path with the dense buffer on wide datasets.
+
+First the numerical check: with the sparse path on, the scaled matrix must
+hold exactly the dense values (float64 and float32), ANOVA from the per-class
+moments must match ``f_classif`` on the dense float64 matrix to 1e-9
+(relative), with the same features selected, and RUS must keep the same rows.
+
+Then steps 2-4 (imputation + scaling, ANOVA, RUS with the balanced rows
+gathered block by block) run on a wide synthetic dataset in a fresh
+interpreter per path: dense (SPARSE_DENSITY=0) and automatic (the kernel
+picks the sparse columns from their measured density). Per stage it prints
+the time and the peak resident memory of that stage (VmHWM from Linux /proc,
+reset before every stage), plus the size of the scaled matrix.
+
+Usage:
+    python benchmarks/bench_sparse.py --rows 200000 --cols 500 --check-rows 20000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'models'))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from synthetic import TARGET, generate_dataset
+
+PATHS = {'dense': {'SPARSE_DENSITY': '0'}, 'otomatis': {}}
+
+
+def reset_peak():
+    """Restart VmHWM at the current resident memory (Linux >= 4.0)"""
+    with open('/proc/self/clear_refs', 'w') as f:
+        f.write('5')
+
+
+def process_memory_mb():
+    """Current and peak resident memory of this process in MB"""
+    with open('/proc/self/status') as f:
+        status = dict(line.split(':', 1) for line in f)
+    return int(status['VmRSS'].split()[0]) / 1024, int(status['VmHWM'].split()[0]) / 1024
+
+
+def check(path):
+    """Numerical equivalence of the sparse path with the dense buffer"""
+    import kernels
+    from balancing import resample
+    from dataset_cache import load_dataset
+    from feature_selection import score_features, select_features
+    from preprocessing import fit_preprocessing, split_features
+    from sklearn.feature_selection import f_classif
+
+    df = load_dataset(path, drop_empty=True)
+    X = df.select_dtypes(include="number")
+    density = kernels.SPARSE_DENSITY
+    for dtype in ("float64", "float32"):
+        kernels.SPARSE_DENSITY = 0
+        dense = fit_preprocessing(X, dtype=dtype)['X_scaled']
+        kernels.SPARSE_DENSITY = density
+        sparse = fit_preprocessing(X, dtype=dtype)['X_scaled']
+        same = isinstance(sparse, kernels.SparseMatrix) and np.array_equal(np.asarray(sparse), dense)
+        print(f"{dtype}: {sparse.is_sparse.sum()} dari {sparse.shape[1]} kolom sparse (densitas "
+              f"{sparse.density:.1%}), matriks {sparse.nbytes / dense.nbytes:.0%} dari dense; "
+              f"nilai: {'sama' if same else 'BERBEDA'}")
+
+    reference = fit_preprocessing(X, dtype="float64")
+    columns, X_sparse, y = split_features(df, reference, TARGET)
+    X_dense = np.asarray(X_sparse)
+    scores, pvalues = score_features(X_sparse, y, 'anova')
+    expected, expected_p = f_classif(X_dense, y)
+    close = (np.allclose(scores, expected, rtol=1e-9, atol=0, equal_nan=True)
+             and np.allclose(pvalues, expected_p, rtol=1e-9, atol=1e-300, equal_nan=True))
+    same_selection = np.array_equal(select_features(pvalues, scores), select_features(expected_p, expected))
+    print(f"ANOVA sparse vs f_classif dense (rtol 1e-9): {'sama' if close else 'BERBEDA'}")
+    print(f"fitur terpilih: {'sama' if same_selection else 'BERBEDA'}")
+    same_rows = np.array_equal(resample(X_sparse, y)['indices'], resample(X_dense, y)['indices'])
+    print(f"baris RUS: {'sama' if same_rows else 'BERBEDA'}")
+
+
+def probe(path):
+    """Run steps 2-4 in this process and print one JSON record per stage"""
+    from balancing import resample, resampled_blocks
+    from dataset_cache import load_dataset
+    from feature_selection import score_features
+    from preprocessing import fit_preprocessing, split_features
+    # Import sklearn/imblearn/scipy di depan supaya tidak terhitung di stage pertama yang memakainya
+    import imblearn.under_sampling
+    import scipy.sparse
+    import sklearn.feature_selection
+
+    def report(stage, start, **extra):
+        current, peak = process_memory_mb()
+        print(json.dumps({'stage': stage, 'seconds': time.perf_counter() - start, 'rss_mb': current,
+                          'peak_mb': peak, **extra}), flush=True)
+
+    df = load_dataset(path, drop_empty=True)
+    X = df.select_dtypes(include="number")
+
+    reset_peak()
+    start = time.perf_counter()
+    artifact = fit_preprocessing(X, dtype="float64")
+    report('preprocess', start, matrix_mb=artifact['X_scaled'].nbytes / 2**20)
+
+    columns, X_scl, y = split_features(df, artifact, TARGET)
+    reset_peak()
+    start = time.perf_counter()
+    score_features(X_scl, y, 'anova', n_jobs=1)
+    report('anova', start)
+
+    reset_peak()
+    start = time.perf_counter()
+    resampled = resample(X_scl, y)
+    rows = sum(len(block) for block in resampled_blocks(X_scl, resampled))
+    report('rus', start, rows=rows)
+
+
+def run_probe(path, env):
+    """Records of probe() run in a fresh interpreter with extra environment variables"""
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), "--probe", path],
+                            capture_output=True, text=True, env={**os.environ, **env})
+    records = [json.loads(line) for line in output.stdout.splitlines() if line.startswith('{')]
+    return records, output.returncode
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the sparse preprocessing path with the dense buffer")
+    parser.add_argument("--rows", type=int, default=200_000, help="Rows of the large dataset")
+    parser.add_argument("--cols", type=int, default=500, help="Columns of both datasets, including the target")
+    parser.add_argument("--check-rows", type=int, default=20_000, help="Rows of the equivalence check dataset")
+    parser.add_argument("--probe", metavar="PATH", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    warnings.simplefilter("ignore")
+
+    if args.probe:
+        probe(args.probe)
+        return
+
+    print(f"=== Cek ekuivalensi, {args.check_rows} baris x {args.cols} kolom ===")
+    check(generate_dataset(args.check_rows, args.cols))
+
+    path = generate_dataset(args.rows, args.cols)
+    print(f"\n=== Step 2-4, {args.rows} baris x {args.cols} kolom ===")
+    for name, env in PATHS.items():
+        records, returncode = run_probe(path, env)
+        for record in records:
+            extra = f"  matriks {record['matrix_mb']:8.1f} MB" if 'matrix_mb' in record else ""
+            print(f"{name:<9} {record['stage']:<11} {record['seconds']:8.2f}s  puncak stage "
+                  f"{record['peak_mb']:8.1f} MB  RSS {record['rss_mb']:8.1f} MB{extra}")
+        if returncode != 0:
+            print(f"{name:<9} gagal setelah {records[-1]['stage'] if records else 'start'} "
+                  f"(exit {returncode}, kemungkinan kehabisan memori)")
+
+
+if __name__ == "__main__":
+    main()
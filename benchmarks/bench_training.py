@@ -0,0 +1,96 @@
+"""
+Compare step 5 successive halving with an exhaustive cross-validated grid.
+
+Both searches run on the selected, scaled features of a synthetic dataset
+with the step 4 sampler applied inside every training fold. The exhaustive
+grid fits every candidate on every full fold; successive halving drops
+poor candidates on subsampled folds first. The script prints the number of
+fits, wall-clock time with one and ``--jobs`` workers, and the best
+candidate and score each search finds.
+
+Usage:
+    python benchmarks/bench_training.py --rows 20000 --cols 60 --jobs 4
+"""
+import argparse
+import os
+import sys
+import time
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT, 'models'))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import joblib
+import numpy as np
+
+from balancing import SAMPLERS, balancing_options
+from dataset_cache import load_dataset
+from feature_selection import anova_f, select_features
+from kernels import MedianMinMaxScaler
+from synthetic import DATA_DIR, TARGET, generate_dataset
+from training import (METRICS, MODELS, candidates, evaluate_fold, fold_indices, successive_halving,
+                      training_options)
+
+
+def exhaustive(X, y, options, balancing, n_jobs):
+    """Every candidate of every model on every full fold"""
+    classes = np.unique(y)
+    splits = fold_indices(y, options['folds'], options['seed'])
+    tasks = [(model, params, train, test) for model in options['models'] for params in candidates(model)
+             for train, test in splits]
+    outputs = joblib.Parallel(n_jobs=n_jobs)(
+        joblib.delayed(evaluate_fold)(X, y, model, params, train, test, balancing, options['seed'], classes)
+        for model, params, train, test in tasks)
+    scores = {}
+    for (model, params, _, _), output in zip(tasks, outputs):
+        scores.setdefault((model, str(params)), []).append(output[options['metric']])
+    (model, params), values = max(scores.items(), key=lambda item: np.mean(item[1]))
+    return len(tasks), model, params, float(np.mean(values))
+
+
+def halving(X, y, options, balancing, n_jobs):
+    search = successive_halving(X, y, options, balancing, n_jobs)
+    model = max(search['best'], key=lambda name: search['best'][name]['score'])
+    return len(search['history']), model, str(search['best'][model]['params']), search['best'][model]['score']
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare successive halving with an exhaustive grid")
+    parser.add_argument("--rows", type=int, default=20_000, help="Rows of the dataset")
+    parser.add_argument("--cols", type=int, default=60, help="Columns including the target")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Parallel workers")
+    parser.add_argument("--models", nargs="+", choices=sorted(MODELS), default=list(MODELS))
+    parser.add_argument("--folds", type=int, default=5, help="Cross-validation folds")
+    parser.add_argument("--metric", choices=METRICS, default="roc_auc", help="Selection metric")
+    parser.add_argument("--sampler", choices=sorted(SAMPLERS), default="rus", help="In-fold balancing")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed of the dataset")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="Where generated datasets are kept")
+    args = parser.parse_args(argv)
+    warnings.simplefilter("ignore")
+
+    path = generate_dataset(args.rows, args.cols, seed=args.seed, output_dir=args.data_dir)
+    df = load_dataset(path, drop_empty=True)
+    X = MedianMinMaxScaler().fit_transform(df.drop(columns=[TARGET]).select_dtypes(include="number"))
+    y = df[TARGET].to_numpy()
+    scores, pvalues = anova_f(X, y)
+    X = np.ascontiguousarray(X[:, select_features(pvalues, scores)])
+    options = training_options(args.models, args.folds, args.metric)
+    balancing = balancing_options(args.sampler)
+    print(f"=== {X.shape[0]} baris x {X.shape[1]} fitur terpilih, {args.folds} fold, balancing {args.sampler} ===")
+
+    for name, search in (('exhaustive', exhaustive), ('halving', halving)):
+        (fits, model, params, score), serial = timed(search, X, y, options, balancing, 1)
+        _, parallel = timed(search, X, y, options, balancing, args.jobs)
+        print(f"{name:<11} {fits:4d} fit  serial {serial:8.2f}s  paralel ({args.jobs}) {parallel:8.2f}s  "
+              f"terbaik {model} {params} {args.metric}={score:.4f}")
+
+
+if __name__ == "__main__":
+    main()
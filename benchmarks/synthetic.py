@@ -0,0 +1,127 @@
+"""
+Generate synthetic datasets with the schema of the bundled cervical cancer CSV.
+
+Rows are bootstrapped from the source dataset per class, so every column keeps
+its value distribution, "?" missing markers and the missing-value pattern
+shared between columns (e.g. all STDs columns missing together). Columns beyond
+the source width are extra copies of the source features, each copy drawn from
+its own bootstrap so it is not an exact duplicate. ``Biopsy`` stays the last
+column and its positive rate is configurable.
+
+Usage:
+    python benchmarks/synthetic.py --rows 100000 --cols 200 --positive-rate 0.05
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE_DATASET = os.path.join(ROOT, "dataset", "risk_factors_cervical_cancer.csv")
+DATA_DIR = os.path.join(ROOT, "benchmarks", "data")
+TARGET = "Biopsy"
+CHUNK_ROWS = 50_000
+
+
+def load_source(path=SOURCE_DATASET, target=TARGET):
+    """
+    Read the source dataset as raw CSV tokens
+
+    Returns:
+        tuple: (feature names, feature token matrix, target tokens)
+    """
+    df = pd.read_csv(path, dtype=str, keep_default_na=False)
+    features = [col for col in df.columns if col != target]
+    return features, df[features].to_numpy(dtype=object), df[target].to_numpy(dtype=object)
+
+
+def synthetic_columns(features, n_cols):
+    """
+    Column names for a synthetic dataset of ``n_cols`` columns including the target
+
+    Returns:
+        list: Feature names; copies past the source width get a `` (k)`` suffix
+    """
+    names = []
+    for j in range(n_cols - 1):
+        base, copy = features[j % len(features)], j // len(features)
+        names.append(base if copy == 0 else f"{base} ({copy})")
+    return names + [TARGET]
+
+
+def dataset_name(n_rows, n_cols, positive_rate, seed):
+    rate = "src" if positive_rate is None else f"{positive_rate:g}"
+    return f"synthetic_{n_rows}x{n_cols}_p{rate}_s{seed}.csv"
+
+
+def generate_dataset(n_rows, n_cols, positive_rate=None, seed=0, output_dir=DATA_DIR,
+                     source=SOURCE_DATASET, overwrite=False):
+    """
+    Write a synthetic CSV, reusing an existing file with the same parameters
+
+    Args:
+        n_rows (int): Number of data rows
+        n_cols (int): Number of columns including the target (at least 2)
+        positive_rate (float): Share of ``Biopsy == 1`` rows; None keeps the
+            source rate (about 6.4%)
+        seed (int): Random seed
+        output_dir (str): Directory for generated files
+        source (str): Source dataset to bootstrap from
+        overwrite (bool): Regenerate even if the file exists
+
+    Returns:
+        str: Path of the CSV file
+    """
+    if n_cols < 2:
+        raise ValueError("n_cols must include at least one feature and the target")
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, dataset_name(n_rows, n_cols, positive_rate, seed))
+    if os.path.exists(path) and not overwrite:
+        return path
+
+    features, values, target = load_source(source)
+    positive = np.flatnonzero(target == "1")
+    negative = np.flatnonzero(target != "1")
+    if positive_rate is None:
+        positive_rate = len(positive) / len(target)
+
+    n_features = n_cols - 1
+    copies = -(-n_features // len(features))
+    rng = np.random.default_rng(seed)
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(",".join(synthetic_columns(features, n_cols)) + "\n")
+        for start in range(0, n_rows, CHUNK_ROWS):
+            m = min(CHUNK_ROWS, n_rows - start)
+            is_positive = rng.random(m) < positive_rate
+            blocks = []
+            for _ in range(copies):
+                # Bootstrap baris per kelas supaya pola missing value antar kolom tetap terjaga
+                rows = np.where(is_positive, rng.choice(positive, m), rng.choice(negative, m))
+                blocks.append(values[rows])
+            block = np.hstack(blocks)[:, :n_features]
+            labels = np.where(is_positive, "1", "0")
+            f.write("".join(",".join(row) + "," + label + "\n" for row, label in zip(block.tolist(), labels)))
+    os.replace(tmp_path, path)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic cervical cancer dataset")
+    parser.add_argument("--rows", type=int, default=10_000, help="Number of rows")
+    parser.add_argument("--cols", type=int, default=36, help="Number of columns including the target")
+    parser.add_argument("--positive-rate", type=float, default=None, help="Share of Biopsy == 1 rows")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--output-dir", default=DATA_DIR, help="Output directory")
+    parser.add_argument("--overwrite", action="store_true", help="Regenerate an existing file")
+    args = parser.parse_args(argv)
+
+    path = generate_dataset(args.rows, args.cols, args.positive_rate, args.seed, args.output_dir,
+                            overwrite=args.overwrite)
+    print(f"Dataset tersimpan di: {path} ({os.path.getsize(path) / 1024 / 1024:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
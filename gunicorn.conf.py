@@ -0,0 +1,25 @@
+# Konfigurasi gunicorn: gunicorn -c gunicorn.conf.py app:app
+#
+# Aplikasi dan semua step (sklearn, imblearn, matplotlib) di-import sekali di
+# proses master, lalu worker hasil fork memakai modul yang sama secara
+# copy-on-write, sehingga worker baru langsung siap saat autoscaling.
+import gc
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "models"))
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.environ.get("GUNICORN_WORKERS", "2"))
+# Worker berthread: request /predict yang bersamaan di satu worker bisa digabung oleh MicroBatcher
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", "4"))
+preload_app = True
+
+
+def when_ready(server):
+    from pipeline import preload_modules
+
+    server.log.info(f"Step modules preloaded in {preload_modules():.2f}s")
+    # Objek yang sudah ada tidak dipindai GC lagi, jadi halaman memorinya tetap dibagi setelah fork
+    gc.freeze()
@@ -1,79 +1,109 @@
 import pandas as pd
 import os
-import numpy as np
+from dataset_cache import load_dataset
+from serialization import frame_records
+from instrumentation import timed_stage
 
-def step1_missing_value(path="dataset/risk_factors_cervical_cancer.csv", return_json=False):
+@timed_stage('missing_count', step='1')
+def missing_value_table(df):
+    """
+    Count missing values per column
+
+    Args:
+        df (pandas.DataFrame): Parsed dataset
+
+    Returns:
+        tuple: (missing counts sorted descending, table of columns with missing values)
+    """
+    return missing_counts_table(df.isna().sum(), len(df))
+
+def missing_counts_table(counts, n_rows):
+    """
+    Build the missing value table from per-column counts
+
+    Args:
+        counts (pandas.Series): Missing values per column
+        n_rows (int): Number of rows in the dataset
+
+    Returns:
+        tuple: (missing counts sorted descending, table of columns with missing values)
+    """
+    missing = counts.sort_values(ascending=False)
+
+    missing_df = pd.DataFrame({
+        'feature': missing.index,
+        'missing_count': missing.values,
+        'missing_percentage': (missing.values / n_rows) * 100
+    })
+    missing_df = missing_df[missing_df['missing_count'] > 0]
+    return missing, missing_df
+
+@timed_stage('write', step='1')
+def save_missing_value_table(missing_df, output_dir="output"):
+    """
+    Save the missing value table to CSV
+
+    Args:
+        missing_df (pandas.DataFrame): Table from missing_value_table
+        output_dir (str): Output directory
+
+    Returns:
+        str: Path of the written CSV file
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    output_file = os.path.join(output_dir, "1_missing_values_analysis.csv")
+    missing_df.to_csv(output_file, index=False)
+    return output_file
+
+@timed_stage('json', step='1')
+def missing_value_result(missing_df, output_file):
+    """
+    Build the JSON API result for step 1
+
+    Args:
+        missing_df (pandas.DataFrame): Table from missing_value_table
+        output_file (str): Path of the written CSV file
+
+    Returns:
+        dict: Structured data for JSON response
+    """
+    missing_summary = frame_records(missing_df, ['feature', 'missing_count', 'missing_percentage'])
+
+    return {
+        'message': 'Missing value analysis completed',
+        'output_file': output_file,
+        'missing_summary': missing_summary,
+        'total_missing_features': int(len(missing_df)),
+        'sample_output': missing_summary[:10]
+    }
+
+def step1_missing_value(path="dataset/risk_factors_cervical_cancer.csv", return_json=False, output_dir="output"):
     """
     Analyze missing values in dataset
-    
+
     Args:
         path (str): Path to CSV file
         return_json (bool): If True, return structured data for web API
-    
+        output_dir (str): Output directory
+
     Returns:
         dict or None: If return_json=True, returns structured data for JSON response
     """
-    df = pd.read_csv(path, na_values=["?", "NA", "NaN", ""])
-    missing = df.isna().sum().sort_values(ascending=False)
-    
+    df = load_dataset(path)
+    missing, missing_df = missing_value_table(df)
+
     if not return_json:
         # Original behavior - print to console
         print("=== Step 1: Cek Missing Value ===")
         print(missing[missing > 0])
-    
-    missing_df = pd.DataFrame({
-        'feature': missing.index,
-        'missing_count': missing.values,
-        'missing_percentage': (missing.values / len(df)) * 100
-    })
-    missing_df = missing_df[missing_df['missing_count'] > 0]
-    
-    os.makedirs("output", exist_ok=True)
-    output_file = "output/1_missing_values_analysis.csv"
-    missing_df.to_csv(output_file, index=False)
-    
+
+    output_file = save_missing_value_table(missing_df, output_dir)
+
     if not return_json:
         print(f"\nOutput tersimpan di: {output_file}")
     else:
         # Return structured data for JSON API
-        def convert_numpy_types(obj):
-            """Convert numpy types to Python native types for JSON serialization"""
-            if isinstance(obj, np.integer):
-                return int(obj)
-            elif isinstance(obj, np.floating):
-                return float(obj)
-            elif isinstance(obj, np.bool_):
-                return bool(obj)
-            elif isinstance(obj, np.ndarray):
-                return obj.tolist()
-            elif pd.isna(obj):
-                return None
-            return obj
-        
-        # Convert dataframes to JSON-compatible format
-        missing_summary = []
-        for _, row in missing_df.iterrows():
-            missing_summary.append({
-                'feature': str(row['feature']),
-                'missing_count': convert_numpy_types(row['missing_count']),
-                'missing_percentage': convert_numpy_types(row['missing_percentage'])
-            })
-        
-        sample_output = []
-        for _, row in missing_df.head(10).iterrows():
-            sample_output.append({
-                'feature': str(row['feature']),
-                'missing_count': convert_numpy_types(row['missing_count']),
-                'missing_percentage': convert_numpy_types(row['missing_percentage'])
-            })
-        
-        return {
-            'message': 'Missing value analysis completed',
-            'output_file': output_file,
-            'missing_summary': missing_summary,
-            'total_missing_features': int(len(missing_df)),
-            'sample_output': sample_output
-        }
+        return missing_value_result(missing_df, output_file)
 
 if __name__ == "__main__":
     step1_missing_value()
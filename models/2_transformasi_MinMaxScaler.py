@@ -1,110 +1,146 @@
 import pandas as pd
-import os
 import numpy as np
-from sklearn.impute import SimpleImputer
-from sklearn.preprocessing import MinMaxScaler
+from dataset_cache import load_dataset
+from preprocessing import load_preprocessing
+from artifacts import TableWriter, save_table
+from balancing import GATHER_CHUNK
+from kernels import BlockMatrix
+from serialization import frame_records
+from instrumentation import timed_stage
 
-def step2_minmax_scaler(path="dataset/risk_factors_cervical_cancer.csv", return_json=False):
+@timed_stage('write', step='2')
+def save_scaled_data(X, X_scaled, output_dir="output", fmt=None):
+    """
+    Save the scaled feature matrix as an artifact (CSV is produced on download)
+
+    Args:
+        X (pandas.DataFrame): Numeric features before scaling
+        X_scaled (numpy.ndarray or kernels.BlockMatrix): Scaled feature matrix
+        output_dir (str): Output directory
+        fmt (str): Artifact format, default ARTIFACT_FORMAT
+
+    Returns:
+        str: Path of the written artifact
+    """
+    if isinstance(X_scaled, BlockMatrix):
+        # Matriks compact/sparse ditulis per blok baris, tanpa matriks dense utuh
+        writer = TableWriter(output_dir, "2_scaled_data", X.columns, n_rows=len(X_scaled), fmt=fmt)
+        for start in range(0, len(X_scaled), GATHER_CHUNK):
+            writer.write(X_scaled.to_frame(X.columns, slice(start, start + GATHER_CHUNK)))
+        return writer.close()
+    # Bungkus buffer hasil kernel tanpa menyalin
+    scaled_df = pd.DataFrame(X_scaled, columns=X.columns, copy=False)
+    return save_table(scaled_df, output_dir, "2_scaled_data", fmt)
+
+def scaling_stats(X, X_scaled):
+    """
+    Compute the per-column ranges shown in the step 2 result
+
+    Args:
+        X (pandas.DataFrame): Numeric features before scaling
+        X_scaled (numpy.ndarray): Scaled feature matrix
+
+    Returns:
+        dict: Original and scaled min/max per column plus the row count
+    """
+    return {
+        'original_min': X.min().to_numpy(),
+        'original_max': X.max().to_numpy(),
+        'scaled_min': X_scaled.min(axis=0),
+        'scaled_max': X_scaled.max(axis=0),
+        'total_rows': X_scaled.shape[0]
+    }
+
+@timed_stage('json', step='2')
+def scaling_result(X, X_scaled, output_file, stats=None):
+    """
+    Build the JSON API result for step 2
+
+    Args:
+        X (pandas.DataFrame): Numeric features before scaling
+        X_scaled (numpy.ndarray): Scaled feature matrix
+        output_file (str): Path of the written artifact
+        stats (dict): Output of scaling_stats; pass it when X and X_scaled
+            only hold the first rows (streaming mode)
+
+    Returns:
+        dict: Structured data for JSON response
+    """
+    # Tabel sebelum dan sesudah scaling untuk tampilan web
+    before_table = frame_records(X.head(5), row_label='Row')
+    after_table = frame_records(X_scaled[:5], X.columns, row_label='Row')
+
+    if stats is None:
+        stats = scaling_stats(X, X_scaled)
+
+    # Ringkasan per fitur; min/max asli yang kosong (kolom semua NaN) ditampilkan 0
+    original_min = np.asarray(stats['original_min'], dtype=float)
+    original_max = np.asarray(stats['original_max'], dtype=float)
+    original_min = np.where(np.isnan(original_min), 0.0, original_min)
+    original_max = np.where(np.isnan(original_max), 0.0, original_max)
+    scaled_min = np.asarray(stats['scaled_min'], dtype=float)
+    scaled_max = np.asarray(stats['scaled_max'], dtype=float)
+
+    feature_comparison = frame_records(pd.DataFrame({
+        'feature': X.columns,
+        'original_min': original_min,
+        'original_max': original_max,
+        'scaled_min': scaled_min,
+        'scaled_max': scaled_max,
+        'range_reduction': [f'{orig:.2f} → {scaled:.2f}' for orig, scaled in
+                            zip(original_max - original_min, scaled_max - scaled_min)]
+    }))
+
+    return {
+        'message': 'MinMax scaling completed successfully',
+        'output_file': output_file,
+        'before_scaling_table': before_table,
+        'after_scaling_table': after_table,
+        'feature_comparison': feature_comparison,
+        'summary_stats': {
+            'total_rows': int(stats['total_rows']),
+            'numeric_features': len(X.columns),
+            'feature_names': list(X.columns),
+            'scaling_range': '0 to 1 (MinMax normalized)',
+            'missing_values_handled': True,
+            'data_types_normalized': 'All numeric features scaled'
+        }
+    }
+
+def step2_minmax_scaler(path="dataset/risk_factors_cervical_cancer.csv", return_json=False, output_dir="output",
+                        dtype=None):
     """
     Apply MinMax scaling to numeric features in dataset
-    
+
     Args:
         path (str): Path to CSV file
         return_json (bool): If True, return structured data for web API
-    
+        output_dir (str): Output directory
+        dtype (str): Buffer type, float64, float32 or compact (default PREPROCESS_DTYPE)
+
     Returns:
         dict or None: If return_json=True, returns structured data for JSON response
     """
-    df = pd.read_csv(path, na_values=["?", "NA", "NaN", ""])
-    df = df.dropna(axis=1, how="all")
+    df = load_dataset(path, drop_empty=True)
     X = df.select_dtypes(include="number")
 
-    imputer = SimpleImputer(strategy="median")
-    X_imp = imputer.fit_transform(X)
+    # imputasi median + MinMaxScaler, di-fit sekali per versi dataset
+    artifact = load_preprocessing(path, output_dir, dtype)
+    X_scaled = artifact['X_scaled']
 
-    scaler = MinMaxScaler()
-    X_scaled = scaler.fit_transform(X_imp)
-    
     if not return_json:
         # Original behavior - print to console
         print("=== Step 2: Transformasi MinMaxScaler ===")
         print("Sebelum skala (5 baris):\n", X.head())
         print("\nSesudah skala (5 baris):\n", X_scaled[:5])
-    
-    scaled_df = pd.DataFrame(X_scaled, columns=X.columns)
-    os.makedirs("output", exist_ok=True)
-    output_file = "output/2_scaled_data.csv"
-    scaled_df.to_csv(output_file, index=False)
-    
+
+    output_file = save_scaled_data(X, X_scaled, output_dir)
+
     if not return_json:
         print(f"\nOutput tersimpan di: {output_file}")
     else:
         # Return structured data for JSON API
-        def convert_numpy_types(obj):
-            """Convert numpy types to Python native types for JSON serialization"""
-            if isinstance(obj, np.integer):
-                return int(obj)
-            elif isinstance(obj, np.floating):
-                if pd.isna(obj) or np.isnan(obj):
-                    return None
-                return float(obj)
-            elif isinstance(obj, np.bool_):
-                return bool(obj)
-            elif isinstance(obj, np.ndarray):
-                return obj.tolist()
-            elif pd.isna(obj):
-                return None
-            return obj
-        
-        # Create table format for web display
-        # Convert before scaling data to table format
-        before_table = []
-        for idx, (_, row) in enumerate(X.head(5).iterrows()):
-            row_data = {'row': f'Row {idx+1}'}
-            for col in X.columns:
-                row_data[col] = convert_numpy_types(row[col])
-            before_table.append(row_data)
-        
-        # Convert after scaling data to table format  
-        after_table = []
-        for i in range(5):
-            row_data = {'row': f'Row {i+1}'}
-            for j, col in enumerate(X.columns):
-                row_data[col] = convert_numpy_types(X_scaled[i][j])
-            after_table.append(row_data)
-        
-        # Create feature comparison summary
-        feature_comparison = []
-        for col in X.columns:
-            min_val = float(X[col].min()) if not pd.isna(X[col].min()) else 0
-            max_val = float(X[col].max()) if not pd.isna(X[col].max()) else 0
-            min_scaled = float(X_scaled[:, X.columns.get_loc(col)].min())
-            max_scaled = float(X_scaled[:, X.columns.get_loc(col)].max())
-            
-            feature_comparison.append({
-                'feature': col,
-                'original_min': convert_numpy_types(min_val),
-                'original_max': convert_numpy_types(max_val),
-                'scaled_min': convert_numpy_types(min_scaled),
-                'scaled_max': convert_numpy_types(max_scaled),
-                'range_reduction': f'{max_val - min_val:.2f} → {max_scaled - min_scaled:.2f}'
-            })
-        
-        return {
-            'message': 'MinMax scaling completed successfully',
-            'output_file': output_file,
-            'before_scaling_table': before_table,
-            'after_scaling_table': after_table,
-            'feature_comparison': feature_comparison,
-            'summary_stats': {
-                'total_rows': int(X_scaled.shape[0]),
-                'numeric_features': len(X.columns),
-                'feature_names': list(X.columns),
-                'scaling_range': '0 to 1 (MinMax normalized)',
-                'missing_values_handled': True,
-                'data_types_normalized': 'All numeric features scaled'
-            }
-        }
+        return scaling_result(X, X_scaled, output_file)
 
 if __name__ == "__main__":
-    step2_minmax_scaler()
\ No newline at end of file
+    step2_minmax_scaler()
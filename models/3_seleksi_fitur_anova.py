@@ -1,190 +1,368 @@
 import pandas as pd
 import numpy as np
 import os
-import matplotlib
-import matplotlib.pyplot as plt
-from sklearn.impute import SimpleImputer
-from sklearn.preprocessing import MinMaxScaler
-from sklearn.feature_selection import SelectKBest, f_classif
-import base64
 import io
 import logging
+from dataset_cache import load_dataset
+from preprocessing import load_preprocessing, split_features
+from feature_selection import (SCORERS, adjust_pvalues, check_scorer, check_stability, describe_policy,
+                               feature_scores, rank_features, save_selection, score_key, select_features,
+                               selection_policy, stability_frequency, stable_features)
+from charts import save_chart_data, FULL_DPI
+from artifacts import save_table
+from kernels import BlockMatrix
+from serialization import frame_records
+from instrumentation import timed_stage
 
 # Disable matplotlib font debug messages
 matplotlib_logger = logging.getLogger('matplotlib.font_manager')
 matplotlib_logger.setLevel(logging.ERROR)
 
-def step3_anova(path="dataset/risk_factors_cervical_cancer.csv", target="Biopsy", return_json=False):
+@timed_stage('score', step='3')
+def score_features(X_scl, y, scorer=None, key=None, output_dir=None):
     """
-    Perform ANOVA feature selection on dataset
-    
+    Score every feature against the target
+
+    Scoring runs in parallel over column blocks and is cached per dataset
+    version, scaler and scorer (see ``feature_selection.feature_scores``).
+
+    Args:
+        X_scl (numpy.ndarray): Imputed and scaled feature matrix
+        y (pandas.Series): Target values
+        scorer (str): anova, chi2, mutual_info or pointbiserial (default FEATURE_SCORER)
+        key (tuple): Cache key from feature_selection.score_key, None to skip the cache
+        output_dir (str): Directory for the persisted scores
+
+    Returns:
+        tuple: (scores, p-values)
+    """
+    return feature_scores(X_scl, y, scorer, key, output_dir)
+
+@timed_stage('stability', step='3')
+def stability_frequencies(X_scl, y, options, policy=None, key=None):
+    """
+    Selection frequency of every feature over bootstrap or RUS resamples
+
+    Args:
+        X_scl (numpy.ndarray): Imputed and scaled feature matrix
+        y (pandas.Series): Target values
+        options (dict): Output of feature_selection.stability_options
+        policy (dict): Selection policy applied to every resample
+        key (tuple): Cache key from feature_selection.score_key, None to skip the cache
+
+    Returns:
+        numpy.ndarray: Fraction of resamples that selected each feature
+    """
+    return stability_frequency(X_scl, y, options, policy, key)
+
+def anova_scores(X_scl, y):
+    """
+    Score every feature against the target with the ANOVA F-test
+
+    Args:
+        X_scl (numpy.ndarray): Imputed and scaled feature matrix
+        y (pandas.Series): Target values
+
+    Returns:
+        tuple: (F-scores, p-values)
+    """
+    return score_features(X_scl, y, 'anova')
+
+def anova_metrics(columns, scores, pvalues, selected_features, policy=None, frequency=None):
+    """
+    Build the per-feature metrics table, best features first
+
+    Args:
+        columns (pandas.Index): Feature names
+        scores (numpy.ndarray): Scores of the active scorer (F-scores for ANOVA)
+        pvalues (numpy.ndarray): p-values (NaN when the scorer has none)
+        selected_features (numpy.ndarray): Names of the selected features
+        policy (dict): Selection policy, its correction fills 'p_adjusted'
+        frequency (numpy.ndarray): Stability selection frequency per feature, if computed
+
+    Returns:
+        pandas.DataFrame: Metrics table sorted by p-value, or by score when
+        there are no p-values
+    """
+    metrics_df = pd.DataFrame({
+        'feature': columns,
+        'p_value': pvalues,
+        'f_score': scores,
+        'selected': columns.isin(selected_features),
+        'p_adjusted': adjust_pvalues(pvalues, (policy or selection_policy())['correction'])
+    })
+    if frequency is not None:
+        metrics_df['frequency'] = frequency
+    if np.isfinite(np.asarray(pvalues, dtype=float)).any():
+        return metrics_df.sort_values('p_value')
+    return metrics_df.iloc[rank_features(scores, None)]
+
+@timed_stage('write', step='3')
+def save_selected_features(X_scl, idx, selected_features, y, output_dir="output", fmt=None, scorer=None,
+                           policy=None, stability=None):
+    """
+    Save the selected scaled features plus target as an artifact
+
+    The scorer, policy and stability options are recorded with it (see
+    feature_selection.save_selection) for step 5's cross-validation.
+
+    Args:
+        X_scl (numpy.ndarray or kernels.BlockMatrix): Imputed and scaled feature matrix
+        idx (numpy.ndarray): Column indices of the selected features
+        selected_features (numpy.ndarray): Names of the selected features
+        y (pandas.Series): Target values
+        output_dir (str): Output directory
+        fmt (str): Artifact format, default ARTIFACT_FORMAT
+        scorer (str): Scorer the features were selected with
+        policy (dict): Selection policy
+        stability (dict): Stability selection options, None for a single run
+
+    Returns:
+        tuple: (selected data frame, path of the written artifact)
+    """
+    selected = X_scl[:, idx]
+    if isinstance(selected, BlockMatrix):
+        selected_data = selected.to_frame(selected_features)
+    else:
+        selected_data = pd.DataFrame(selected, columns=selected_features)
+    selected_data['target'] = y
+
+    output_file = save_table(selected_data, output_dir, "3_selected_features", fmt)
+    save_selection(scorer, policy, stability, output_dir)
+    return selected_data, output_file
+
+def anova_chart_data(metrics_df, scorer=None, policy=None):
+    """
+    Extract the data the feature selection chart is rendered from
+
+    Args:
+        metrics_df (pandas.DataFrame): Table from anova_metrics
+        scorer (str): Name of the scorer the scores come from
+        policy (dict): Selection policy, its alpha is drawn as threshold
+
+    Returns:
+        dict: p-values, scores and selection flags in table order
+    """
+    scorer = check_scorer(scorer)
+    return {
+        'p_value': metrics_df['p_value'].tolist(),
+        'f_score': metrics_df['f_score'].tolist(),
+        'selected': metrics_df['selected'].tolist(),
+        'scorer': scorer,
+        'name': SCORERS[scorer]['name'],
+        'label': SCORERS[scorer]['label'],
+        'alpha': (policy or selection_policy())['alpha']
+    }
+
+@timed_stage('render', step='3')
+def render_anova_chart(chart_data, fmt="png", dpi=FULL_DPI):
+    """
+    Render the feature selection chart: p-values (when the scorer has them) and scores
+
+    Uses the object-oriented Figure API so charts can be rendered from
+    several threads at once.
+
+    Args:
+        chart_data (dict): Data from anova_chart_data
+        fmt (str): Image format passed to savefig
+        dpi (int): Resolution of the rendered image
+
+    Returns:
+        bytes: Encoded image
+    """
+    from matplotlib.figure import Figure
+
+    p_value = np.asarray(chart_data['p_value'], dtype=float)
+    f_score = np.asarray(chart_data['f_score'], dtype=float)
+    label = chart_data.get('label', 'F-Score')
+    name = chart_data.get('name', 'ANOVA')
+    alpha = chart_data.get('alpha', 0.05)
+    has_pvalues = np.isfinite(p_value).any()
+
+    fig = Figure(figsize=(12, 8))
+    if has_pvalues:
+        ax = fig.add_subplot(2, 1, 1)
+        ax.bar(range(len(p_value)), -np.log10(p_value))
+        ax.axhline(y=-np.log10(alpha), color='r', linestyle='--', label=f'p-value = {alpha:g}')
+        ax.set_xlabel('Feature Index')
+        ax.set_ylabel('-log10(p-value)')
+        ax.set_title(f'{name} P-values by Feature')
+        ax.legend()
+
+    ax = fig.add_subplot(2, 1, 2) if has_pvalues else fig.add_subplot(1, 1, 1)
+    colors = ['red' if x else 'blue' for x in chart_data['selected']]
+    ax.bar(range(len(f_score)), f_score, color=colors)
+    ax.set_xlabel('Feature Index')
+    ax.set_ylabel(label)
+    ax.set_title(f'{name} {label}s by Feature (Red = Selected)')
+
+    fig.tight_layout()
+    img_buffer = io.BytesIO()
+    fig.savefig(img_buffer, format=fmt, dpi=dpi, bbox_inches='tight')
+    return img_buffer.getvalue()
+
+def save_anova_chart(image, output_dir="output"):
+    """
+    Write a rendered ANOVA chart to disk
+
+    Args:
+        image (bytes): PNG bytes from render_anova_chart
+        output_dir (str): Output directory
+
+    Returns:
+        str: Path of the written PNG file
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    png_file = os.path.join(output_dir, "3_anova_selection.png")
+    with open(png_file, 'wb') as f:
+        f.write(image)
+    return png_file
+
+@timed_stage('json', step='3')
+def anova_result(columns, selected_features, metrics_df, selected_data, output_file, target, scorer=None,
+                 policy=None, stability=None):
+    """
+    Build the JSON API result for step 3
+
+    Args:
+        columns (pandas.Index): Feature names
+        selected_features (numpy.ndarray): Names of the selected features
+        metrics_df (pandas.DataFrame): Table from anova_metrics
+        selected_data (pandas.DataFrame): Selected features plus target
+        output_file (str): Path of the written artifact
+        target (str): Target column name
+        scorer (str): Name of the scorer, default FEATURE_SCORER
+        policy (dict): Selection policy, default p-value < 0.05 or top 10
+        stability (dict): Stability selection options when features were
+            selected by frequency ('frequency' column of metrics_df)
+
+    Returns:
+        dict: Structured data for JSON response
+    """
+    scorer = check_scorer(scorer)
+    policy = policy or selection_policy()
+    alpha = policy['alpha']
+
+    # Tabel analisis fitur (10 fitur terbaik)
+    top = metrics_df.head(10)
+    feature_analysis_table = frame_records(pd.DataFrame({
+        'feature': top['feature'].astype(str),
+        'p_value': top['p_value'],
+        'f_score': top['f_score'],
+        'selected': top['selected'].astype(bool),
+        'significance': np.where(top['p_adjusted'] < alpha, 'Significant', 'Not Significant')
+    }))
+
+    # Ringkasan fitur terpilih, metrik diambil lewat index (bukan filter per fitur)
+    lookup = metrics_df.drop_duplicates('feature').set_index('feature')
+    found = pd.Index(selected_features).isin(lookup.index)
+    selected_metrics = lookup.reindex(np.asarray(selected_features)[found])
+    selected_features_summary = frame_records(pd.DataFrame({
+        'rank': np.flatnonzero(found) + 1,
+        'feature': [str(feat) for feat in selected_metrics.index],
+        'f_score': selected_metrics['f_score'].to_numpy(),
+        'p_value': selected_metrics['p_value'].to_numpy(),
+        'significance_level': np.where(selected_metrics['p_adjusted'] < alpha, f'p < {alpha:g}', f'p ≥ {alpha:g}')
+    }))
+
+    # Contoh output fitur terpilih
+    sample_output_table = frame_records(selected_data.head(5), list(selected_features) + ['target'],
+                                        row_label='Row')
+
+    result = {
+        'message': f"{SCORERS[scorer]['name']} feature selection completed successfully",
+        'output_file': output_file,
+        'feature_analysis_table': feature_analysis_table,
+        'selected_features_summary': selected_features_summary,
+        'sample_output_table': sample_output_table,
+        'summary_stats': {
+            'total_features_analyzed': len(columns),
+            'features_selected': len(selected_features),
+            'selection_criteria': describe_policy(policy, scorer),
+            'scorer': scorer,
+            'target_column': target,
+            'selection_rate': f"{(len(selected_features) / len(columns)) * 100:.1f}%"
+        },
+        'chart_name': 'anova'
+    }
+    if stability is not None:
+        # Frekuensi terpilih per fitur di semua resample
+        stable = metrics_df.sort_values('frequency', ascending=False, kind='stable').head(15)
+        result['stability_table'] = frame_records(pd.DataFrame({
+            'feature': stable['feature'].astype(str),
+            'frequency': stable['frequency'],
+            'p_value': stable['p_value'],
+            'selected': stable['selected'].astype(bool)
+        }))
+        result['summary_stats']['selection_criteria'] = (
+            f"selected in ≥ {stability['threshold']:.0%} of {stability['resamples']} {stability['method']} "
+            f"resamples ({describe_policy(policy, scorer)})")
+        result['summary_stats']['stability'] = stability
+        result['message'] = 'ANOVA stability selection completed successfully'
+    return result
+
+def step3_anova(path="dataset/risk_factors_cervical_cancer.csv", target="Biopsy", return_json=False, output_dir="output",
+                scorer=None, policy=None, stability=None, dtype=None):
+    """
+    Perform feature selection on dataset (ANOVA F-test by default)
+
     Args:
         path (str): Path to CSV file
         target (str): Target column name
         return_json (bool): If True, return structured data for web API
-    
+        output_dir (str): Output directory
+        scorer (str): anova, chi2, mutual_info or pointbiserial (default FEATURE_SCORER)
+        policy (dict): Output of feature_selection.selection_policy
+        stability (dict): Output of feature_selection.stability_options to
+            select features by their frequency over resamples (anova only)
+        dtype (str): Buffer type, float64, float32 or compact (default PREPROCESS_DTYPE)
+
     Returns:
         dict or None: If return_json=True, returns structured data for JSON response
     """
-    df = pd.read_csv(path, na_values=["?", "NA", "NaN", ""])
-    df = df.dropna(axis=1, how="all")
-
-    # X dan y
-    X = df.drop(columns=[target], errors="ignore")
-    y = df[target] if target in df.columns else df.iloc[:, -1]
+    scorer = check_scorer(scorer)
+    policy = policy or selection_policy()
+    check_stability(scorer, stability)
 
-    # imputasi dan scaling
-    imputer = SimpleImputer(strategy="median")
-    X_imp = imputer.fit_transform(X)
-    scaler = MinMaxScaler()
-    X_scl = scaler.fit_transform(X_imp)
+    # X dan y, sudah diimputasi dan di-scaling oleh artefak step 2
+    artifact = load_preprocessing(path, output_dir=output_dir, dtype=dtype)
+    columns, X_scl, y = split_features(load_dataset(path, drop_empty=True), artifact, target)
 
-    # Seleksi fitur dengan ANOVA
-    skb = SelectKBest(score_func=f_classif, k="all")
-    skb.fit(X_scl, y)
-    pvalues = skb.pvalues_
+    # Seleksi fitur, skor di-cache per dataset, scaler dan scorer
+    key = score_key(artifact, scorer, target)
+    scores, pvalues = score_features(X_scl, y, scorer, key, output_dir)
+    frequency = None
+    if stability is not None:
+        frequency = stability_frequencies(X_scl, y, stability, policy, key)
+        idx = stable_features(frequency, stability, policy)
+    else:
+        idx = select_features(pvalues, scores, policy)
+    selected_features = columns.to_numpy()[idx]
 
-    mask = np.isfinite(pvalues) & (pvalues < 0.05)
-    idx = np.where(mask)[0] if np.any(mask) else np.argsort(pvalues)[:10]
-    selected_features = X.columns.to_numpy()[idx]
-    
     if not return_json:
         # Original behavior - print to console
-        print("=== Step 3: Seleksi Fitur (ANOVA) ===")
+        print(f"=== Step 3: Seleksi Fitur ({SCORERS[scorer]['name']}) ===")
         print("Fitur terpilih:", list(selected_features))
-    
-    selected_data = pd.DataFrame(X_scl[:, idx], columns=selected_features)
-    selected_data['target'] = y
-    
-    os.makedirs("output", exist_ok=True)
-    
-    csv_file = "output/3_selected_features.csv"
-    selected_data.to_csv(csv_file, index=False)
-    
+
+    selected_data, output_file = save_selected_features(X_scl, idx, selected_features, y, output_dir,
+                                                        scorer=scorer, policy=policy, stability=stability)
+
     if not return_json:
-        print(f"\nOutput CSV tersimpan di: {csv_file}")
-    
-    metrics_df = pd.DataFrame({
-        'feature': X.columns,
-        'p_value': skb.pvalues_,
-        'f_score': skb.scores_,
-        'selected': X.columns.isin(selected_features)
-    }).sort_values('p_value')
-    
-    plt.figure(figsize=(12, 8))
-    plt.subplot(2, 1, 1)
-    plt.bar(range(len(metrics_df)), -np.log10(metrics_df['p_value']))
-    plt.axhline(y=-np.log10(0.05), color='r', linestyle='--', label='p-value = 0.05')
-    plt.xlabel('Feature Index')
-    plt.ylabel('-log10(p-value)')
-    plt.title('ANOVA P-values by Feature')
-    plt.legend()
-    
-    plt.subplot(2, 1, 2)
-    colors = ['red' if x else 'blue' for x in metrics_df['selected']]
-    plt.bar(range(len(metrics_df)), metrics_df['f_score'], color=colors)
-    plt.xlabel('Feature Index')
-    plt.ylabel('F-Score')
-    plt.title('ANOVA F-Scores by Feature (Red = Selected)')
-    
-    plt.tight_layout()
-    png_file = "output/3_anova_selection.png"
-    plt.savefig(png_file, dpi=300, bbox_inches='tight')
-    plt.close()
-    
+        print(f"\nOutput tersimpan di: {output_file}")
+
+    metrics_df = anova_metrics(columns, scores, pvalues, selected_features, policy, frequency)
+
+    # Data grafik disimpan, gambar baru dirender saat diminta
+    chart_data = anova_chart_data(metrics_df, scorer, policy)
+    save_chart_data('anova', chart_data, output_dir)
+
     if not return_json:
+        png_file = save_anova_chart(render_anova_chart(chart_data), output_dir)
         print(f"Grafik PNG tersimpan di: {png_file}")
     else:
         # Return structured data for JSON API
-        def convert_numpy_types(obj):
-            """Convert numpy types to Python native types for JSON serialization"""
-            if isinstance(obj, np.integer):
-                return int(obj)
-            elif isinstance(obj, np.floating):
-                if pd.isna(obj) or np.isnan(obj):
-                    return None
-                return float(obj)
-            if isinstance(obj, np.bool_):
-                return bool(obj)
-            elif isinstance(obj, np.ndarray):
-                return obj.tolist()
-            elif pd.isna(obj):
-                return None
-            return obj
-        
-        # Generate base64 encoded chart for web display
-        img_buffer = io.BytesIO()
-        plt.figure(figsize=(12, 8))
-        plt.subplot(2, 1, 1)
-        plt.bar(range(len(metrics_df)), -np.log10(metrics_df['p_value']))
-        plt.axhline(y=-np.log10(0.05), color='r', linestyle='--', label='p-value = 0.05')
-        plt.xlabel('Feature Index')
-        plt.ylabel('-log10(p-value)')
-        plt.title('ANOVA P-values by Feature')
-        plt.legend()
-        
-        plt.subplot(2, 1, 2)
-        colors = ['red' if x else 'blue' for x in metrics_df['selected']]
-        plt.bar(range(len(metrics_df)), metrics_df['f_score'], color=colors)
-        plt.xlabel('Feature Index')
-        plt.ylabel('F-Score')
-        plt.title('ANOVA F-Scores by Feature (Red = Selected)')
-        
-        plt.tight_layout()
-        plt.savefig(img_buffer, format='png', dpi=300, bbox_inches='tight')
-        plt.close()
-        
-        img_base64 = base64.b64encode(img_buffer.getvalue()).decode('utf-8')
-        
-        # Create feature analysis table
-        feature_analysis_table = []
-        for _, row in metrics_df.head(10).iterrows():
-            feature_analysis_table.append({
-                'feature': str(row['feature']),
-                'p_value': convert_numpy_types(row['p_value']),
-                'f_score': convert_numpy_types(row['f_score']),
-                'selected': bool(row['selected']),
-                'significance': 'Significant' if row['p_value'] < 0.05 else 'Not Significant'
-            })
-        
-        # Create selected features summary
-        selected_features_summary = []
-        for i, feat in enumerate(selected_features):
-            features_indices = metrics_df[metrics_df['feature'] == feat]
-            if not features_indices.empty:
-                row = features_indices.iloc[0]
-                selected_features_summary.append({
-                    'rank': i + 1,
-                    'feature': str(feat),
-                    'f_score': convert_numpy_types(row['f_score']),
-                    'p_value': convert_numpy_types(row['p_value']),
-                    'significance_level': 'p < 0.05' if row['p_value'] < 0.05 else 'p ≥ 0.05'
-                })
-        
-        # Create sample output table for selected features
-        sample_output_table = []
-        for i in range(min(5, len(selected_data))):
-            row_data = {'row': f'Row {i+1}'}
-            for col in selected_features:
-                row_data[str(col)] = convert_numpy_types(selected_data.iloc[i][col])
-            row_data['target'] = convert_numpy_types(selected_data.iloc[i]['target'])
-            sample_output_table.append(row_data)
-        
-        return {
-            'message': 'ANOVA feature selection completed successfully',
-            'output_file': csv_file,
-            'chart_base64': f"data:image/png;base64,{img_base64}",
-            'feature_analysis_table': feature_analysis_table,
-            'selected_features_summary': selected_features_summary,
-            'sample_output_table': sample_output_table,
-            'summary_stats': {
-                'total_features_analyzed': len(X.columns),
-                'features_selected': len(selected_features),
-                'selection_criteria': 'p-value < 0.05 or top 10',
-                'target_column': target,
-                'selection_rate': f"{(len(selected_features) / len(X.columns)) * 100:.1f}%"
-            }
-        }
+        return anova_result(columns, selected_features, metrics_df, selected_data, output_file, target,
+                            scorer, policy, stability)
 
 if __name__ == "__main__":
-    step3_anova()
\ No newline at end of file
+    step3_anova()
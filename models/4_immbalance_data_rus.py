@@ -1,180 +1,258 @@
 import pandas as pd
 import numpy as np
 import os
-import matplotlib
-import matplotlib.pyplot as plt
-from sklearn.impute import SimpleImputer
-from sklearn.preprocessing import MinMaxScaler
-from imblearn.under_sampling import RandomUnderSampler
-import base64
 import io
 import logging
+from preprocessing import scaled_features
+from charts import save_chart_data, FULL_DPI
+from balancing import SAMPLERS, balancing_options, resample, resampled_blocks, resampled_head, resampled_target
+from artifacts import TableWriter
+from serialization import frame_records
+from instrumentation import timed_stage
 
 # Disable matplotlib font debug messages
 matplotlib_logger = logging.getLogger('matplotlib.font_manager')
 matplotlib_logger.setLevel(logging.ERROR)
 
-def step4_rus(path="dataset/risk_factors_cervical_cancer.csv", target="Biopsy", return_json=False):
+@timed_stage('balance', step='4')
+def balance_resample(X_scl, y, options=None):
     """
-    Perform Random Under Sampling (RUS) balancing on dataset
-    
+    Balance classes with the configured sampler
+
+    Args:
+        X_scl (numpy.ndarray): Imputed and scaled feature matrix
+        y (pandas.Series): Target values
+        options (dict): Output of balancing.balancing_options, default RUS
+
+    Returns:
+        dict: Selected row indices plus synthetic rows (see balancing.resample)
+    """
+    return resample(X_scl, y, options)
+
+@timed_stage('write', step='4')
+def save_balanced_data(X_scl, y, resampled, columns, output_dir="output", fmt=None):
+    """
+    Save the balanced dataset plus target as an artifact
+
+    Rows are gathered from the scaled matrix block by block, the resampled
+    matrix is never built as a whole.
+
+    Args:
+        X_scl (numpy.ndarray): Imputed and scaled feature matrix
+        y (pandas.Series): Target values
+        resampled (dict): Output of balance_resample
+        columns (pandas.Index): Feature names
+        output_dir (str): Output directory
+        fmt (str): Artifact format, default ARTIFACT_FORMAT
+
+    Returns:
+        tuple: (first rows of the balanced data, path of the written artifact)
+    """
+    y_res = resampled_target(y, resampled)
+    writer = TableWriter(output_dir, "4_rus_cleaned_data", list(columns) + ['target'], n_rows=len(y_res), fmt=fmt)
+    start = 0
+    for block in resampled_blocks(X_scl, resampled):
+        balanced = pd.DataFrame(block, columns=columns)
+        balanced['target'] = y_res[start:start + len(block)]
+        writer.write(balanced)
+        start += len(block)
+    output_file = writer.close()
+    return resampled_head(X_scl, y, resampled, columns), output_file
+
+def rus_chart_data(cnt, cnt_res, classes=None, sampler='rus'):
+    """
+    Extract the data the balancing chart is rendered from
+
+    Args:
+        cnt (numpy.ndarray): Class counts before balancing
+        cnt_res (numpy.ndarray): Class counts after balancing
+        classes (numpy.ndarray): Class labels, default 0..n-1
+        sampler (str): Sampler name in balancing.SAMPLERS
+
+    Returns:
+        dict: Class labels and counts before and after balancing
+    """
+    classes = range(len(cnt)) if classes is None else classes
+    return {
+        'cnt': [int(c) for c in cnt],
+        'cnt_res': [int(c) for c in cnt_res],
+        'classes': [f'Class {klass}' for klass in classes],
+        'sampler': sampler
+    }
+
+@timed_stage('render', step='4')
+def render_rus_chart(chart_data, fmt="png", dpi=FULL_DPI):
+    """
+    Render the class distribution chart before and after balancing
+
+    Uses the object-oriented Figure API so charts can be rendered from
+    several threads at once.
+
+    Args:
+        chart_data (dict): Data from rus_chart_data
+        fmt (str): Image format passed to savefig
+        dpi (int): Resolution of the rendered image
+
+    Returns:
+        bytes: Encoded image
+    """
+    from matplotlib.figure import Figure
+
+    classes = chart_data.get('classes') or [f'Class {i}' for i in range(len(chart_data['cnt']))]
+    short = SAMPLERS[chart_data.get('sampler', 'rus')]['short']
+    palette = ['skyblue', 'orange', 'lightgreen', 'salmon', 'plum', 'khaki']
+    colors = [palette[i % len(palette)] for i in range(len(classes))]
+
+    fig = Figure(figsize=(12, 6))
+    for position, (key, when) in enumerate([('cnt', 'Sebelum'), ('cnt_res', 'Sesudah')], start=1):
+        ax = fig.add_subplot(1, 2, position)
+        counts = chart_data[key]
+        ax.bar(classes, counts, color=colors)
+        ax.set_title(f'Distribusi {when} {short}')
+        ax.set_ylabel('Jumlah Sample')
+        for i, v in enumerate(counts):
+            ax.text(i, v + 0.01*v, str(v), ha='center', va='bottom')
+
+    fig.tight_layout()
+    img_buffer = io.BytesIO()
+    fig.savefig(img_buffer, format=fmt, dpi=dpi, bbox_inches='tight')
+    return img_buffer.getvalue()
+
+def save_rus_chart(image, output_dir="output"):
+    """
+    Write a rendered RUS chart to disk
+
+    Args:
+        image (bytes): PNG bytes from render_rus_chart
+        output_dir (str): Output directory
+
+    Returns:
+        str: Path of the written PNG file
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    png_file = os.path.join(output_dir, "4_rus_balance.png")
+    with open(png_file, 'wb') as f:
+        f.write(image)
+    return png_file
+
+@timed_stage('json', step='4')
+def rus_result(columns, uniq, cnt, uniq_res, cnt_res, balanced_df, output_file, target, balancing=None):
+    """
+    Build the JSON API result for step 4
+
+    Args:
+        columns (pandas.Index): Feature names
+        uniq (numpy.ndarray): Classes before RUS
+        cnt (numpy.ndarray): Class counts before RUS
+        uniq_res (numpy.ndarray): Classes after RUS
+        cnt_res (numpy.ndarray): Class counts after RUS
+        balanced_df (pandas.DataFrame): First rows of the balanced data plus target
+        output_file (str): Path of the written artifact
+        target (str): Target column name
+        balancing (dict): Output of balancing.balancing_options, default RUS
+
+    Returns:
+        dict: Structured data for JSON response
+    """
+    balancing = balancing or balancing_options()
+    sampler = SAMPLERS[balancing['sampler']]
+
+    # Create class distribution comparison table
+    before = dict(zip(np.asarray(uniq).tolist(), np.asarray(cnt).tolist()))
+    after = dict(zip(np.asarray(uniq_res).tolist(), np.asarray(cnt_res).tolist()))
+    distribution_comparison = []
+    for klass in sorted(set(before) | set(after)):
+        before_rus = int(before.get(klass, 0))
+        after_rus = int(after.get(klass, 0))
+        distribution_comparison.append({
+            'class': f'Class {klass}',
+            'before_rus': before_rus,
+            'after_rus': after_rus,
+            'change': after_rus - before_rus,
+            'percentage_change': f"{((after_rus - before_rus) / before_rus) * 100:.1f}%" if before_rus > 0 else "New samples"
+        })
+
+    # Contoh output data seimbang (8 fitur pertama + target)
+    sample_output_table = frame_records(balanced_df.head(10), list(columns[:8]) + ['target'], row_label='Row')
+
+    # Calculate balancing metrics
+    imbalance_ratio_before = max(cnt) / min(cnt) if len(cnt) > 1 else 1
+    imbalance_ratio_after = max(cnt_res) / min(cnt_res) if len(cnt_res) > 1 else 1
+
+    return {
+        'message': f"{sampler['short']} data balancing completed successfully",
+        'output_file': output_file,
+        'distribution_comparison': distribution_comparison,
+        'sample_output_table': sample_output_table,
+        'summary_stats': {
+            'total_samples_before': int(np.sum(cnt)),
+            'total_samples_after': int(np.sum(cnt_res)),
+            'total_features': len(columns),
+            'target_column': target,
+            'classes': [str(cls) for cls in uniq_res],
+            'imbalance_ratio_before': float(imbalance_ratio_before),
+            'imbalance_ratio_after': float(imbalance_ratio_after),
+            'balancing_status': 'Balanced' if imbalance_ratio_after <= 1.05 else f'Ratio: {imbalance_ratio_after:.2f}:1',
+            'sampler': balancing['sampler'],
+            'sampler_name': sampler['name'],
+            'ratio': balancing['ratio'],
+            'seed': balancing['seed']
+        },
+        'chart_name': 'rus'
+    }
+
+def step4_rus(path="dataset/risk_factors_cervical_cancer.csv", target="Biopsy", return_json=False, output_dir="output",
+              balancing=None, dtype=None):
+    """
+    Balance the classes of a dataset, Random Under Sampling (RUS) by default
+
     Args:
         path (str): Path to CSV file
         target (str): Target column name
-        return_json (bool): If True, return structured data for web API
-    
+        return_json (bool): If True, return structured data for JSON response
+        output_dir (str): Output directory
+        balancing (dict): Output of balancing.balancing_options (sampler,
+            ratio, seed)
+        dtype (str): Buffer type, float64, float32 or compact (default PREPROCESS_DTYPE)
+
     Returns:
         dict or None: If return_json=True, returns structured data for JSON response
     """
-    df = pd.read_csv(path, na_values=["?", "NA", "NaN", ""])
-    df = df.dropna(axis=1, how="all")
+    balancing = balancing or balancing_options()
+    short = SAMPLERS[balancing['sampler']]['short']
 
-    # X dan y
-    X = df.drop(columns=[target], errors="ignore")
-    y = df[target] if target in df.columns else df.iloc[:, -1]
+    # X dan y, sudah diimputasi dan di-scaling oleh artefak step 2
+    columns, X_scl, y = scaled_features(path, target, output_dir, dtype)
 
-    # imputasi + scaling
-    imputer = SimpleImputer(strategy="median")
-    X_imp = imputer.fit_transform(X)
-    scaler = MinMaxScaler()
-    X_scl = scaler.fit_transform(X_imp)
-
-    # RUS (Random Under Sampling)
-    rus = RandomUnderSampler(random_state=42)
-    X_res, y_res = rus.fit_resample(X_scl, y)
+    # Resampling hanya menghasilkan indeks baris (plus baris sintetis untuk SMOTE)
+    resampled = balance_resample(X_scl, y, balancing)
 
     if not return_json:
-        print("=== Step 4: Imbalanced Data (RUS) ===")
-    
+        print(f"=== Step 4: Imbalanced Data ({short}) ===")
+
     uniq, cnt = np.unique(y, return_counts=True)
-    uniq_res, cnt_res = np.unique(y_res, return_counts=True)
-    
+    uniq_res, cnt_res = np.unique(resampled_target(y, resampled), return_counts=True)
+
     if not return_json:
-        print("Distribusi sebelum RUS:", dict(zip(uniq, cnt)))
-        print("Distribusi sesudah RUS:", dict(zip(uniq_res, cnt_res)))
-    
-    os.makedirs("output", exist_ok=True)
-    
-    balanced_df = pd.DataFrame(X_res, columns=X.columns)
-    balanced_df['target'] = y_res
-    
-    csv_file = "output/4_rus_cleaned_data.csv"
-    balanced_df.to_csv(csv_file, index=False)
-    
+        print(f"Distribusi sebelum {short}:", dict(zip(uniq, cnt)))
+        print(f"Distribusi sesudah {short}:", dict(zip(uniq_res, cnt_res)))
+
+    balanced_df, output_file = save_balanced_data(X_scl, y, resampled, columns, output_dir)
+
     if not return_json:
-        print(f"\nOutput CSV tersimpan di: {csv_file}")
-    
-    plt.figure(figsize=(12, 6))
-    
-    plt.subplot(1, 2, 1)
-    before_counts = dict(zip(['Class 0', 'Class 1'], cnt))
-    plt.bar(before_counts.keys(), before_counts.values(), color=['skyblue', 'orange'])
-    plt.title('Distribusi Sebelum RUS')
-    plt.ylabel('Jumlah Sample')
-    for i, v in enumerate(before_counts.values()):
-        plt.text(i, v + 0.01*v, str(v), ha='center', va='bottom')
-    
-    plt.subplot(1, 2, 2)
-    after_counts = dict(zip(['Class 0', 'Class 1'], cnt_res))
-    plt.bar(after_counts.keys(), after_counts.values(), color=['skyblue', 'orange'])
-    plt.title('Distribusi Sesudah RUS')
-    plt.ylabel('Jumlah Sample')
-    for i, v in enumerate(after_counts.values()):
-        plt.text(i, v + 0.01*v, str(v), ha='center', va='bottom')
-    
-    plt.tight_layout()
-    png_file = "output/4_rus_balance.png"
-    plt.savefig(png_file, dpi=300, bbox_inches='tight')
-    plt.close()
-    
+        print(f"\nOutput tersimpan di: {output_file}")
+
+    # Data grafik disimpan, gambar baru dirender saat diminta
+    after = dict(zip(uniq_res, cnt_res))
+    chart_data = rus_chart_data(cnt, [after.get(klass, 0) for klass in uniq], uniq, balancing['sampler'])
+    save_chart_data('rus', chart_data, output_dir)
+
     if not return_json:
+        png_file = save_rus_chart(render_rus_chart(chart_data), output_dir)
         print(f"Grafik PNG tersimpan di: {png_file}")
     else:
         # Return structured data for JSON API
-        def convert_numpy_types(obj):
-            """Convert numpy types to Python native types for JSON serialization"""
-            if isinstance(obj, np.integer):
-                return int(obj)
-            elif isinstance(obj, np.floating):
-                if pd.isna(obj) or np.isnan(obj):
-                    return None
-                return float(obj)
-            if isinstance(obj, np.bool_):
-                return bool(obj)
-            elif isinstance(obj, np.ndarray):
-                return obj.tolist()
-            elif pd.isna(obj):
-                return None
-            return obj
-        
-        # Generate base64 encoded chart for web display
-        img_buffer = io.BytesIO()
-        plt.figure(figsize=(12, 6))
-        
-        plt.subplot(1, 2, 1)
-        before_counts = dict(zip(['Class 0', 'Class 1'], cnt))
-        plt.bar(before_counts.keys(), before_counts.values(), color=['skyblue', 'orange'])
-        plt.title('Distribusi Sebelum RUS')
-        plt.ylabel('Jumlah Sample')
-        for i, v in enumerate(before_counts.values()):
-            plt.text(i, v + 0.01*v, str(v), ha='center', va='bottom')
-        
-        plt.subplot(1, 2, 2)
-        after_counts = dict(zip(['Class 0', 'Class 1'], cnt_res))
-        plt.bar(after_counts.keys(), after_counts.values(), color=['skyblue', 'orange'])
-        plt.title('Distribusi Sesudah RUS')
-        plt.ylabel('Jumlah Sample')
-        for i, v in enumerate(after_counts.values()):
-            plt.text(i, v + 0.01*v, str(v), ha='center', va='bottom')
-        
-        plt.tight_layout()
-        plt.savefig(img_buffer, format='png', dpi=300, bbox_inches='tight')
-        plt.close()
-        
-        img_base64 = base64.b64encode(img_buffer.getvalue()).decode('utf-8')
-        
-        # Create class distribution comparison table
-        distribution_comparison = []
-        for klass in [0, 1]:
-            distribution_comparison.append({
-                'class': f'Class {klass}',
-                'before_rus': int(cnt[np.where(uniq == klass)[0][0]]) if klass in uniq else 0,
-                'after_rus': int(cnt_res[np.where(uniq_res == klass)[0][0]]),
-                'change': int(cnt_res[np.where(uniq_res == klass)[0][0]]) - (int(cnt[np.where(uniq == klass)[0][0]]) if klass in uniq else 0),
-                'percentage_change': f"{((int(cnt_res[np.where(uniq_res == klass)[0][0]]) - (int(cnt[np.where(uniq == klass)[0][0]]) if klass in uniq else 0)) / (int(cnt[np.where(uniq == klass)[0][0]]) if klass in uniq else 1)) * 100:.1f}%" if (int(cnt[np.where(uniq == klass)[0][0]]) if klass in uniq else 0) > 0 else "New samples"
-            })
-        
-        # Create sample output table for balanced data
-        sample_output_table = []
-        for i in range(min(10, len(balanced_df))):
-            row_data = {'row': f'Row {i+1}'}
-            # Add first few features
-            for j, col in enumerate(X.columns[:8]):
-                row_data[str(col)] = convert_numpy_types(balanced_df.iloc[i, j])
-            row_data['target'] = convert_numpy_types(balanced_df.iloc[i]['target'])
-            sample_output_table.append(row_data)
-        
-        # Calculate balancing metrics
-        imbalance_ratio_before = max(cnt) / min(cnt) if len(cnt) > 1 else 1
-        imbalance_ratio_after = max(cnt_res) / min(cnt_res) if len(cnt_res) > 1 else 1
-        
-        return {
-            'message': 'RUS data balancing completed successfully',
-            'output_file': csv_file,
-            'chart_base64': f"data:image/png;base64,{img_base64}",
-            'distribution_comparison': distribution_comparison,
-            'sample_output_table': sample_output_table,
-            'summary_stats': {
-                'total_samples_before': int(np.sum(cnt)),
-                'total_samples_after': int(np.sum(cnt_res)),
-                'total_features': len(X.columns),
-                'target_column': target,
-                'classes': [str(cls) for cls in uniq_res],
-                'imbalance_ratio_before': float(imbalance_ratio_before),
-                'imbalance_ratio_after': float(imbalance_ratio_after),
-                'balancing_status': 'Balanced' if imbalance_ratio_after <= 1.05 else f'Ratio: {imbalance_ratio_after:.2f}:1'
-            }
-        }
+        return rus_result(columns, uniq, cnt, uniq_res, cnt_res, balanced_df, output_file, target, balancing)
 
 if __name__ == "__main__":
-    step4_rus()
\ No newline at end of file
+    step4_rus()
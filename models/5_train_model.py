@@ -0,0 +1,432 @@
+import pandas as pd
+import numpy as np
+import os
+import io
+import logging
+import joblib
+from functools import partial
+from dataset_cache import load_dataset
+from preprocessing import load_preprocessing, split_features
+from feature_selection import (feature_scores, load_selection, score_features, score_key, select_features,
+                               selection_policy, stability_selection, stable_features)
+from balancing import SAMPLERS, balancing_options
+from training import METRICS, MODEL_FILE, MODELS, best_model, fit_model, successive_halving, training_options
+from kernels import MedianMinMaxScaler
+from inference import feature_scaler
+from charts import save_chart_data, FULL_DPI
+from artifacts import find_table, load_table
+from serialization import frame_records
+from instrumentation import timed_stage
+
+# Disable matplotlib font debug messages
+matplotlib_logger = logging.getLogger('matplotlib.font_manager')
+matplotlib_logger.setLevel(logging.ERROR)
+
+def selected_positions(columns, X_scl, y, artifact, target, output_dir="output"):
+    """
+    Positions of the features step 3 selected, with the options it used
+
+    Reads the columns of the step 3 artifact and the scorer, policy and
+    stability options recorded next to it (see
+    feature_selection.save_selection); when step 3 has not run yet the
+    default ANOVA selection is used.
+
+    Args:
+        columns (pandas.Index): Feature names
+        X_scl (numpy.ndarray): Imputed and scaled feature matrix
+        y (pandas.Series): Target values
+        artifact (dict): Preprocessing artifact from step 2
+        target (str): Target column name
+        output_dir (str): Output directory
+
+    Returns:
+        tuple: (column positions of the selected features, (scorer, policy,
+        stability options or None))
+
+    Raises:
+        ValueError: If the step 3 features were saved without their options,
+            so the cross-validation cannot repeat that selection
+    """
+    selected_file = find_table(output_dir, "3_selected_features")
+    if selected_file is not None:
+        selection = load_selection(output_dir)
+        if selection is None:
+            raise ValueError("Step 3 selection options are unknown, run step 3 again before training")
+        names = [name for name in load_table(selected_file).columns if name != 'target']
+        positions = pd.Index(columns.astype(str)).get_indexer(names)
+        if len(positions) and (positions >= 0).all():
+            return positions, selection
+    # Step 3 belum dijalankan: pakai seleksi ANOVA default dari cache skor
+    scores, pvalues = feature_scores(X_scl, y, 'anova', score_key(artifact, 'anova', target), output_dir)
+    return select_features(pvalues, scores), ('anova', selection_policy(), None)
+
+def fold_features(X, y, scorer=None, policy=None, stability=None):
+    """
+    Step 3 feature selection on the training rows of one fold
+
+    Args:
+        X (numpy.ndarray): Scaled features of the training rows
+        y (numpy.ndarray): Target values of the training rows
+        scorer (str): Step 3 scorer
+        policy (dict): Step 3 selection policy
+        stability (dict): Step 3 stability selection options, None for a single run
+
+    Returns:
+        numpy.ndarray: Column positions of the selected features
+    """
+    if stability is not None:
+        # Seed resample sama dengan step 3, jadi hasil per fold deterministik
+        return stable_features(stability_selection(X, y, stability, policy, n_jobs=1), stability, policy)
+    scores, pvalues = score_features(X, y, scorer, n_jobs=1)
+    return select_features(pvalues, scores, policy)
+
+@timed_stage('train', step='5')
+def cross_validate_models(X, y, options=None, balancing=None, n_jobs=None, selection=None):
+    """
+    Cross-validate the candidate models with successive halving
+
+    Features are selected inside every training fold with the step 3
+    options (see fold_features), so the scores are not inflated by a
+    selection that saw the test rows and describe the same selection as the
+    refit model.
+
+    Args:
+        X (numpy.ndarray): All scaled features
+        y (pandas.Series): Target values
+        options (dict): Output of training.training_options
+        balancing (dict): Step 4 sampler applied inside every training fold
+        n_jobs (int): Parallel workers, default TRAINING_JOBS
+        selection (tuple): Step 3 (scorer, policy, stability options), default ANOVA
+
+    Returns:
+        dict: Search result (see training.successive_halving)
+    """
+    scorer, policy, stability = selection or (None, None, None)
+    return successive_halving(X, np.asarray(y), options, balancing, n_jobs,
+                              select=partial(fold_features, scorer=scorer, policy=policy, stability=stability))
+
+@timed_stage('refit', step='5')
+def refit_best_model(X, y, search, options, balancing):
+    """
+    Refit the best model on every row, balanced with the step 4 sampler
+
+    Returns:
+        tuple: (model name, fitted estimator)
+    """
+    model = best_model(search)
+    estimator = fit_model(X, np.asarray(y), model, search['best'][model]['params'], balancing, options['seed'])
+    return model, estimator
+
+def bundle_preprocessor(artifact, df):
+    """
+    Fitted imputation + scaling kernel of a step 2 artifact
+
+    Artifacts written before the fused kernel only hold sklearn's imputer and
+    scaler; the kernel is then fit on the same numeric columns, which gives
+    the same parameters.
+
+    Args:
+        artifact (dict): Preprocessing artifact from step 2
+        df (pandas.DataFrame): Dataset with all-NaN columns dropped
+
+    Returns:
+        MedianMinMaxScaler: Fitted scaler over all numeric columns
+    """
+    preprocessor = artifact.get('preprocessor')
+    if preprocessor is None:
+        preprocessor = MedianMinMaxScaler().fit(df.select_dtypes(include="number"))
+    return preprocessor
+
+def save_best_model(model, estimator, features, target, search, options, balancing, preprocessor,
+                    output_dir="output"):
+    """
+    Persist the best model with everything needed to score new rows
+
+    The bundle carries the step 2 imputation + scaling restricted to the
+    selected features, so /predict can score raw records with it alone.
+
+    Args:
+        model (str): Name in training.MODELS
+        estimator: Fitted classifier
+        features (list): Feature names the model expects, in order
+        target (str): Target column name
+        search (dict): Output of cross_validate_models
+        options (dict): Training options
+        balancing (dict): Balancing options used for training
+        preprocessor (MedianMinMaxScaler): Fitted step 2 scaler
+        output_dir (str): Output directory
+
+    Returns:
+        str: Path of the written joblib file
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    model_file = os.path.join(output_dir, MODEL_FILE)
+    joblib.dump({
+        'model': model,
+        'estimator': estimator,
+        'preprocessor': feature_scaler(preprocessor, features),
+        'params': search['best'][model]['params'],
+        'features': list(features),
+        'target': target,
+        'classes': search['classes'],
+        'metric': options['metric'],
+        'cv_score': search['best'][model]['score'],
+        'balancing': balancing
+    }, model_file)
+    return model_file
+
+def training_history(search):
+    """
+    One row per evaluated candidate, rung and fold
+
+    Returns:
+        pandas.DataFrame: Rung, model, params, fold, metrics and timings
+    """
+    history = pd.DataFrame(search['history'])
+    history['params'] = history['params'].map(format_params)
+    return history[['rung', 'model', 'candidate', 'params', 'fold', *METRICS,
+                    'fit_seconds', 'score_seconds', 'train_rows', 'features']]
+
+@timed_stage('write', step='5')
+def save_training_results(history, output_dir="output"):
+    """
+    Save the cross-validation history to CSV
+
+    Args:
+        history (pandas.DataFrame): Table from training_history
+        output_dir (str): Output directory
+
+    Returns:
+        str: Path of the written CSV file
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    output_file = os.path.join(output_dir, "5_cv_results.csv")
+    history.to_csv(output_file, index=False)
+    return output_file
+
+def format_params(params):
+    """Hyperparameters as a short ``key=value`` string"""
+    return ", ".join(f"{key}={value}" for key, value in sorted(params.items())) or "default"
+
+def model_summary(search, metric):
+    """
+    Mean and standard deviation over folds of every model's best candidate
+
+    Returns:
+        pandas.DataFrame: One row per model, best first
+    """
+    rows = []
+    for model, best in search['best'].items():
+        folds = pd.DataFrame(best['folds'])
+        row = {'model': model, 'name': MODELS[model]['name'], 'params': format_params(best['params'])}
+        for name in METRICS:
+            row[name] = float(folds[name].mean())
+            row[f'{name}_std'] = float(folds[name].std(ddof=0))
+        row['fit_seconds'] = float(folds['fit_seconds'].sum())
+        rows.append(row)
+    return pd.DataFrame(rows).sort_values(metric, ascending=False, na_position='last').reset_index(drop=True)
+
+def training_chart_data(search, metric):
+    """
+    Extract the data the training chart is rendered from
+
+    Args:
+        search (dict): Output of cross_validate_models
+        metric (str): Metric the models are compared on
+
+    Returns:
+        dict: Per-fold scores of every model's best candidate
+    """
+    return {
+        'metric': metric,
+        'models': [MODELS[model]['name'] for model in search['best']],
+        'scores': [[float(record[metric]) for record in best['folds']] for best in search['best'].values()]
+    }
+
+@timed_stage('render', step='5')
+def render_training_chart(chart_data, fmt="png", dpi=FULL_DPI):
+    """
+    Render the cross-validated score of every model, with its folds
+
+    Uses the object-oriented Figure API so charts can be rendered from
+    several threads at once.
+
+    Args:
+        chart_data (dict): Data from training_chart_data
+        fmt (str): Image format passed to savefig
+        dpi (int): Resolution of the rendered image
+
+    Returns:
+        bytes: Encoded image
+    """
+    from matplotlib.figure import Figure
+
+    models = chart_data['models']
+    scores = [np.asarray(values, dtype=float) for values in chart_data['scores']]
+    means = [np.nanmean(values) if len(values) else 0.0 for values in scores]
+    stds = [np.nanstd(values) if len(values) else 0.0 for values in scores]
+
+    fig = Figure(figsize=(10, 6))
+    ax = fig.add_subplot(1, 1, 1)
+    ax.bar(models, means, yerr=stds, capsize=6, color='skyblue')
+    for i, values in enumerate(scores):
+        ax.scatter(np.full(len(values), i), values, color='orange', zorder=3, s=18)
+        ax.text(i, means[i] / 2, f'{means[i]:.3f}', ha='center', va='center')
+    ax.set_ylabel(chart_data['metric'])
+    ax.set_title(f"Cross-Validation {chart_data['metric']} per Model (titik = fold)")
+
+    fig.tight_layout()
+    img_buffer = io.BytesIO()
+    fig.savefig(img_buffer, format=fmt, dpi=dpi, bbox_inches='tight')
+    return img_buffer.getvalue()
+
+def save_training_chart(image, output_dir="output"):
+    """
+    Write a rendered training chart to disk
+
+    Args:
+        image (bytes): PNG bytes from render_training_chart
+        output_dir (str): Output directory
+
+    Returns:
+        str: Path of the written PNG file
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    png_file = os.path.join(output_dir, "5_training.png")
+    with open(png_file, 'wb') as f:
+        f.write(image)
+    return png_file
+
+@timed_stage('json', step='5')
+def training_result(search, model, features, output_file, model_file, target, options, balancing):
+    """
+    Build the JSON API result for step 5
+
+    Args:
+        search (dict): Output of cross_validate_models
+        model (str): Name of the best model
+        features (list): Feature names the models were trained on
+        output_file (str): Path of the cross-validation CSV
+        model_file (str): Path of the persisted best model
+        target (str): Target column name
+        options (dict): Training options
+        balancing (dict): Balancing options applied inside the folds
+
+    Returns:
+        dict: Structured data for JSON response
+    """
+    metric = options['metric']
+    summary = model_summary(search, metric)
+    model_comparison = frame_records(summary, ['model', 'name', 'params', *METRICS,
+                                               f'{metric}_std', 'fit_seconds'])
+
+    # Metrik per fold dari kandidat terbaik tiap model
+    fold_metrics = frame_records(pd.DataFrame([
+        {'model': MODELS[name]['name'], **{key: record[key] for key in
+                                           ('fold', *METRICS, 'fit_seconds', 'score_seconds', 'train_rows',
+                                            'features')}}
+        for name, best in search['best'].items() for record in best['folds']
+    ]))
+
+    history = pd.DataFrame(search['history'])
+    halving = [{
+        'rung': int(rung),
+        'train_rows': int(search['rungs'][rung]),
+        'candidates': int(group[['model', 'candidate']].drop_duplicates().shape[0]),
+        'fits': int(len(group)),
+        'fit_seconds': float(group['fit_seconds'].sum())
+    } for rung, group in history.groupby('rung')]
+
+    best = search['best'][model]
+    return {
+        'message': f"{MODELS[model]['name']} selected by {options['folds']}-fold cross-validation ({metric})",
+        'output_file': output_file,
+        'model_file': model_file,
+        'model_comparison': model_comparison,
+        'fold_metrics': fold_metrics,
+        'halving': halving,
+        'summary_stats': {
+            'best_model': model,
+            'best_model_name': MODELS[model]['name'],
+            'best_params': format_params(best['params']),
+            'metric': metric,
+            'cv_score': float(best['score']),
+            'folds': options['folds'],
+            'features_used': len(features),
+            'features': list(features),
+            'models_compared': len(search['best']),
+            'total_fits': int(len(history)),
+            'candidates': int(history[['model', 'candidate']].drop_duplicates().shape[0]),
+            'sampler': balancing['sampler'],
+            'sampler_name': SAMPLERS[balancing['sampler']]['name'],
+            'target_column': target
+        },
+        'chart_name': 'training'
+    }
+
+def step5_train(path="dataset/risk_factors_cervical_cancer.csv", target="Biopsy", return_json=False, output_dir="output",
+                options=None, balancing=None, dtype=None):
+    """
+    Train and cross-validate risk classifiers on the step 3 features
+
+    Every training fold repeats the step 3 selection with the scorer,
+    policy and stability options recorded by step 3.
+
+    Args:
+        path (str): Path to CSV file
+        target (str): Target column name
+        return_json (bool): If True, return structured data for JSON response
+        output_dir (str): Output directory
+        options (dict): Output of training.training_options (models, folds,
+            metric, halving factor, seed)
+        balancing (dict): Output of balancing.balancing_options, applied
+            inside every training fold
+        dtype (str): Buffer type, float64, float32 or compact (default PREPROCESS_DTYPE)
+
+    Returns:
+        dict or None: If return_json=True, returns structured data for JSON response
+
+    Raises:
+        ValueError: If the step 3 features were saved without their selection options
+    """
+    options = options or training_options()
+    balancing = balancing or balancing_options()
+
+    # X dan y, sudah diimputasi dan di-scaling oleh artefak step 2
+    artifact = load_preprocessing(path, output_dir=output_dir, dtype=dtype)
+    df = load_dataset(path, drop_empty=True)
+    columns, X_scl, y = split_features(df, artifact, target)
+    idx, selection = selected_positions(columns, X_scl, y, artifact, target, output_dir)
+    features = list(columns[idx])
+    X = np.ascontiguousarray(X_scl)
+
+    # Cross-validation dengan seleksi fitur step 3 dan balancing di dalam fold, lalu fit ulang pada fitur step 3
+    search = cross_validate_models(X, y, options, balancing, selection=selection)
+    model, estimator = refit_best_model(X[:, idx], y, search, options, balancing)
+
+    if not return_json:
+        print("=== Step 5: Training Model ===")
+        print(model_summary(search, options['metric'])[['name', 'params', options['metric']]].to_string(index=False))
+        print(f"Model terbaik: {MODELS[model]['name']}")
+
+    model_file = save_best_model(model, estimator, features, target, search, options, balancing,
+                                 bundle_preprocessor(artifact, df), output_dir)
+    output_file = save_training_results(training_history(search), output_dir)
+
+    if not return_json:
+        print(f"\nOutput tersimpan di: {output_file}")
+        print(f"Model tersimpan di: {model_file}")
+
+    # Data grafik disimpan, gambar baru dirender saat diminta
+    chart_data = training_chart_data(search, options['metric'])
+    save_chart_data('training', chart_data, output_dir)
+
+    if not return_json:
+        png_file = save_training_chart(render_training_chart(chart_data), output_dir)
+        print(f"Grafik PNG tersimpan di: {png_file}")
+    else:
+        # Return structured data for JSON API
+        return training_result(search, model, features, output_file, model_file, target, options, balancing)
+
+if __name__ == "__main__":
+    step5_train()
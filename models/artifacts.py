@@ -0,0 +1,266 @@
+import json
+import logging
+import os
+import uuid
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# Format artefak internal: ekstensi file per format
+FORMAT_EXTENSIONS = {
+    'npy': '.npy',
+    'npy32': '.npy',
+    'feather': '.feather',
+    'parquet': '.parquet',
+    'csv': '.csv'
+}
+ARROW_FORMATS = ('feather', 'parquet')
+DEFAULT_FORMAT = os.environ.get("ARTIFACT_FORMAT", "npy")
+
+COLUMNS_SUFFIX = ".columns.json"
+
+
+def available_formats():
+    """
+    Formats usable in this environment
+
+    Returns:
+        list: Format names; feather and parquet need pyarrow
+    """
+    return [fmt for fmt in FORMAT_EXTENSIONS if pa is not None or fmt not in ARROW_FORMATS]
+
+
+def resolve_format(fmt=None):
+    """
+    Pick the artifact format, falling back to npy when pyarrow is missing
+
+    Args:
+        fmt (str): Requested format, or None for ARTIFACT_FORMAT
+
+    Returns:
+        str: Usable format name
+    """
+    fmt = fmt or DEFAULT_FORMAT
+    if fmt not in FORMAT_EXTENSIONS:
+        raise ValueError(f"Unknown artifact format: {fmt}")
+    if fmt in ARROW_FORMATS and pa is None:
+        logger.warning(f"pyarrow is not installed, writing {fmt} artifacts as npy")
+        return 'npy'
+    return fmt
+
+
+def artifact_path(output_dir, name, fmt=None):
+    """
+    Path of an artifact in a given format
+
+    Args:
+        output_dir (str): Output directory
+        name (str): Artifact name without extension (e.g. ``2_scaled_data``)
+        fmt (str): Artifact format
+
+    Returns:
+        str: Artifact path
+    """
+    return os.path.join(output_dir, name + FORMAT_EXTENSIONS[resolve_format(fmt)])
+
+
+def temp_path(path):
+    """
+    Unique temporary file name next to path, renamed over it once complete
+
+    The name holds the process id and a random part, so concurrent writers
+    in different threads or processes never share a temporary file.
+    """
+    return f"{path}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+
+
+class TableWriter:
+    """
+    Incremental writer for a numeric table artifact
+
+    Rows are appended chunk by chunk with ``write`` so callers never need the
+    whole table in memory. ``n_rows`` must be known up front for npy, which
+    is written into a memory-mapped file.
+    """
+
+    def __init__(self, output_dir, name, columns, n_rows=None, fmt=None):
+        self.fmt = resolve_format(fmt)
+        self.columns = [str(col) for col in columns]
+        self.path = artifact_path(output_dir, name, self.fmt)
+        self.rows_written = 0
+        self._tmp_path = temp_path(self.path)
+        self._dtypes = None
+        self._handle = None
+        os.makedirs(output_dir, exist_ok=True)
+
+        if self.fmt.startswith('npy'):
+            if n_rows is None:
+                raise ValueError("npy artifacts need the row count up front")
+            dtype = np.float32 if self.fmt == 'npy32' else np.float64
+            self._handle = np.lib.format.open_memmap(self._tmp_path, mode='w+', dtype=dtype,
+                                                     shape=(n_rows, len(self.columns)))
+        elif self.fmt == 'csv':
+            self._handle = open(self._tmp_path, 'w', newline='')
+
+    def write(self, frame):
+        """
+        Append rows
+
+        Args:
+            frame (pandas.DataFrame): Rows with the writer's columns in order
+        """
+        if self._dtypes is None:
+            self._dtypes = [str(dtype) for dtype in frame.dtypes]
+
+        if self.fmt.startswith('npy'):
+            self._handle[self.rows_written:self.rows_written + len(frame)] = frame.to_numpy(dtype=float)
+        elif self.fmt == 'csv':
+            frame.to_csv(self._handle, header=(self.rows_written == 0), index=False)
+        else:
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._handle is None:
+                if self.fmt == 'parquet':
+                    self._handle = pq.ParquetWriter(self._tmp_path, table.schema)
+                else:
+                    self._handle = pa.ipc.new_file(self._tmp_path, table.schema)
+            if self.fmt == 'parquet':
+                self._handle.write_table(table)
+            else:
+                self._handle.write(table)
+        self.rows_written += len(frame)
+
+    def close(self):
+        """
+        Finish the artifact and move it into place
+
+        Returns:
+            str: Artifact path
+        """
+        if self.fmt.startswith('npy'):
+            self._handle.flush()
+            del self._handle
+            with open(self.path + COLUMNS_SUFFIX, 'w') as f:
+                json.dump({'columns': self.columns, 'dtypes': self._dtypes}, f)
+        elif self.fmt == 'csv':
+            if self.rows_written == 0:
+                pd.DataFrame(columns=self.columns).to_csv(self._handle, index=False)
+            self._handle.close()
+        elif self._handle is not None:
+            self._handle.close()
+        else:
+            empty = pd.DataFrame(columns=self.columns)
+            if self.fmt == 'parquet':
+                empty.to_parquet(self._tmp_path, index=False)
+            else:
+                feather.write_feather(empty, self._tmp_path)
+        self._handle = None
+        os.replace(self._tmp_path, self.path)
+        return self.path
+
+
+def save_table(frame, output_dir, name, fmt=None):
+    """
+    Write a whole table artifact
+
+    Args:
+        frame (pandas.DataFrame): Numeric table
+        output_dir (str): Output directory
+        name (str): Artifact name without extension
+        fmt (str): Artifact format, default ARTIFACT_FORMAT
+
+    Returns:
+        str: Artifact path
+    """
+    writer = TableWriter(output_dir, name, frame.columns, n_rows=len(frame), fmt=fmt)
+    writer.write(frame)
+    return writer.close()
+
+
+def find_table(output_dir, name):
+    """
+    Locate the newest artifact called ``name`` in any format
+
+    Args:
+        output_dir (str): Output directory
+        name (str): Artifact name without extension
+
+    Returns:
+        str or None: Artifact path
+    """
+    candidates = []
+    for ext in set(FORMAT_EXTENSIONS.values()):
+        path = os.path.join(output_dir, name + ext)
+        if os.path.exists(path):
+            candidates.append(path)
+    # Jika mtime sama, artefak biner menang atas hasil export CSV
+    return max(candidates, key=lambda path: (os.path.getmtime(path), not path.endswith('.csv'))) if candidates else None
+
+
+def load_table(path, mmap=True):
+    """
+    Read a table artifact back
+
+    npy artifacts are memory-mapped, so columns are only paged in when used.
+
+    Args:
+        path (str): Artifact path
+        mmap (bool): Memory-map npy files instead of reading them
+
+    Returns:
+        pandas.DataFrame: Table with the original column names and dtypes
+    """
+    ext = os.path.splitext(path)[1]
+    if ext == '.npy':
+        with open(path + COLUMNS_SUFFIX) as f:
+            meta = json.load(f)
+        matrix = np.load(path, mmap_mode='r' if mmap else None)
+        frame = pd.DataFrame(matrix, columns=meta['columns'], copy=False)
+        dtypes = meta.get('dtypes') or []
+        for col, dtype in zip(meta['columns'], dtypes):
+            # Kolom integer (mis. target) disimpan sebagai float, kembalikan tipenya
+            if dtype.startswith('int') and not frame[col].isna().any():
+                frame[col] = frame[col].astype(dtype)
+        return frame
+    if ext == '.feather':
+        return feather.read_feather(path)
+    if ext == '.parquet':
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+
+def export_csv(output_dir, name):
+    """
+    Produce ``<name>.csv`` from the stored artifact, reusing a fresh export
+
+    Args:
+        output_dir (str): Output directory
+        name (str): Artifact name without extension
+
+    Returns:
+        str or None: Path of the CSV file, or None if there is no artifact
+    """
+    source = find_table(output_dir, name)
+    if source is None:
+        return None
+    csv_path = os.path.join(output_dir, name + '.csv')
+    if source == csv_path:
+        return csv_path
+    if os.path.exists(csv_path) and os.path.getmtime(csv_path) >= os.path.getmtime(source):
+        return csv_path
+
+    tmp_path = temp_path(csv_path)
+    load_table(source).to_csv(tmp_path, index=False)
+    os.replace(tmp_path, csv_path)
+    # Samakan mtime supaya export ini dianggap sama baru dengan artefaknya
+    mtime = os.path.getmtime(source)
+    os.utime(csv_path, (mtime, mtime))
+    return csv_path
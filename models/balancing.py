@@ -0,0 +1,230 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_SAMPLER = os.environ.get("BALANCING_SAMPLER", "rus")
+DEFAULT_SEED = 42
+SMOTE_NEIGHBORS = 5
+# Baris per blok saat hasil resampling ditulis
+GATHER_CHUNK = 65_536
+
+# Registry sampler. kind: under (kelas mayoritas dikurangi), over (kelas minoritas
+# ditambah), clean (hanya membuang baris ambigu, tanpa rasio)
+SAMPLERS = {
+    'rus': {'short': 'RUS', 'name': 'Random Under Sampling', 'kind': 'under'},
+    'ros': {'short': 'ROS', 'name': 'Random Over Sampling', 'kind': 'over'},
+    'smote': {'short': 'SMOTE', 'name': 'SMOTE', 'kind': 'over'},
+    'tomek': {'short': 'Tomek', 'name': 'Tomek Links', 'kind': 'clean'},
+    'nearmiss': {'short': 'NearMiss', 'name': 'NearMiss', 'kind': 'under'},
+    'smote_tomek': {'short': 'SMOTE-Tomek', 'name': 'SMOTE + Tomek Links', 'kind': 'over'},
+    'smote_enn': {'short': 'SMOTE-ENN', 'name': 'SMOTE + ENN', 'kind': 'over'},
+}
+
+
+def balancing_options(sampler=None, ratio=None, seed=None):
+    """
+    Build and validate step 4 balancing options
+
+    Args:
+        sampler (str): Name in SAMPLERS, default BALANCING_SAMPLER (rus)
+        ratio (float): Desired minority/majority size ratio after resampling,
+            None to balance fully; not used by tomek
+        seed (int): Random seed, default 42
+
+    Returns:
+        dict: Options with 'sampler', 'ratio' and 'seed'
+
+    Raises:
+        ValueError: If an option is invalid
+    """
+    sampler = sampler or DEFAULT_SAMPLER
+    if sampler not in SAMPLERS:
+        raise ValueError(f"Unknown sampler {sampler!r}, expected one of {sorted(SAMPLERS)}")
+    try:
+        ratio = None if ratio in (None, "") else float(ratio)
+    except (TypeError, ValueError):
+        raise ValueError("ratio must be a number")
+    if ratio is not None and not 0 < ratio <= 1:
+        raise ValueError("ratio must be in (0, 1]")
+    try:
+        seed = DEFAULT_SEED if seed in (None, "") else int(seed)
+    except (TypeError, ValueError):
+        raise ValueError("seed must be an integer")
+    return {'sampler': sampler, 'ratio': ratio, 'seed': seed}
+
+
+def sampling_strategy(y, ratio, kind):
+    """
+    imblearn sampling strategy for a ratio, also for multi-class targets
+
+    Under-sampling cuts every class to at most minority / ratio rows,
+    over-sampling grows every class to at least majority * ratio rows.
+
+    Args:
+        y (numpy.ndarray): Target values
+        ratio (float): Desired minority/majority ratio, None for 'auto'
+        kind (str): under or over
+
+    Returns:
+        str or dict: 'auto' or class -> target row count
+    """
+    if ratio is None:
+        return 'auto'
+    classes, counts = np.unique(y, return_counts=True)
+    if kind == 'under':
+        limit = int(counts.min() / ratio)
+        return {klass: int(min(count, limit)) for klass, count in zip(classes, counts)}
+    target = int(np.ceil(counts.max() * ratio))
+    return {klass: int(max(count, target)) for klass, count in zip(classes, counts)}
+
+
+def tomek_links(X, y, classes=None):
+    """
+    Mask of rows that are in a Tomek link, as ``imblearn.under_sampling.TomekLinks``
+
+    Two rows form a link when they are each other's nearest neighbour and
+    have different classes. Only rows of ``classes`` are marked.
+
+    Args:
+        X (numpy.ndarray): Feature matrix
+        y (numpy.ndarray): Target values
+        classes (list): Classes whose linked rows are removed, default all
+            but the minority class
+
+    Returns:
+        numpy.ndarray: Boolean mask of the rows to remove
+    """
+    from sklearn.neighbors import NearestNeighbors
+
+    if classes is None:
+        uniq, counts = np.unique(y, return_counts=True)
+        classes = [klass for klass in uniq if klass != uniq[np.argmin(counts)]]
+    nns = NearestNeighbors(n_neighbors=2).fit(X).kneighbors(X, return_distance=False)[:, 1]
+    linked = (y[nns] != y) & (nns[nns] == np.arange(len(y)))
+    return linked & np.isin(y, classes)
+
+
+def _proxy(y):
+    # Sampler acak yang tidak melihat nilai X cukup diberi satu kolom kosong
+    return np.zeros((len(y), 1))
+
+
+def _selected(indices, X_extra=None, y_extra=None):
+    return {'indices': np.asarray(indices, dtype=np.intp), 'X_extra': X_extra, 'y_extra': y_extra}
+
+
+def _smote(X, y, strategy, seed):
+    from imblearn.over_sampling import SMOTE
+
+    smote = SMOTE(sampling_strategy=strategy, random_state=seed, k_neighbors=SMOTE_NEIGHBORS)
+    X_res, y_res = smote.fit_resample(X, y)
+    # SMOTE menaruh baris asli di depan, baris sintetis di belakang
+    return X_res[len(y):].copy(), np.asarray(y_res)[len(y):]
+
+
+def _clean_combined(X, y, X_extra, y_extra, method):
+    """Clean the original plus synthetic rows; indices >= len(X) refer to synthetic rows"""
+    X_all = np.vstack([X, X_extra])
+    y_all = np.concatenate([y, y_extra])
+    if method == 'tomek':
+        keep = np.flatnonzero(~tomek_links(X_all, y_all, classes=np.unique(y_all)))
+    else:
+        from imblearn.under_sampling import EditedNearestNeighbours
+
+        enn = EditedNearestNeighbours(sampling_strategy='all')
+        enn.fit_resample(X_all, y_all)
+        keep = np.sort(enn.sample_indices_)
+    n = len(y)
+    synthetic = keep[keep >= n] - n
+    return _selected(keep[keep < n], X_extra[synthetic], y_extra[synthetic])
+
+
+def resample(X, y, options=None):
+    """
+    Balance classes, returning row indices instead of a resampled copy
+
+    Samplers that only select rows (rus, ros, tomek, nearmiss) return the
+    selected row positions; SMOTE-based samplers also return the synthetic
+    rows. The resampled matrix is ``X[indices]`` followed by ``X_extra``.
+
+    Args:
+        X (numpy.ndarray or kernels.BlockMatrix): Imputed and scaled feature matrix
+        y (pandas.Series or numpy.ndarray): Target values, any number of classes
+        options (dict): Output of balancing_options, defaults when None
+
+    Returns:
+        dict: 'indices', 'X_extra' and 'y_extra' (None for selection samplers)
+    """
+    options = options or balancing_options()
+    sampler, seed = options['sampler'], options['seed']
+    y = np.asarray(y)
+    strategy = sampling_strategy(y, options['ratio'], SAMPLERS[sampler]['kind'])
+
+    if sampler == 'rus':
+        from imblearn.under_sampling import RandomUnderSampler
+
+        rus = RandomUnderSampler(sampling_strategy=strategy, random_state=seed)
+        rus.fit_resample(_proxy(y), y)
+        return _selected(rus.sample_indices_)
+    if sampler == 'ros':
+        from imblearn.over_sampling import RandomOverSampler
+
+        ros = RandomOverSampler(sampling_strategy=strategy, random_state=seed)
+        ros.fit_resample(_proxy(y), y)
+        return _selected(ros.sample_indices_)
+
+    # Sampler berikut melihat nilai fitur, matriks compact/sparse dibuat dense
+    X = np.asarray(X)
+    if sampler == 'tomek':
+        return _selected(np.flatnonzero(~tomek_links(X, y)))
+    if sampler == 'nearmiss':
+        from imblearn.under_sampling import NearMiss
+
+        near_miss = NearMiss(sampling_strategy=strategy)
+        near_miss.fit_resample(X, y)
+        return _selected(near_miss.sample_indices_)
+
+    X_extra, y_extra = _smote(X, y, strategy, seed)
+    if sampler == 'smote':
+        return _selected(np.arange(len(y)), X_extra, y_extra)
+    return _clean_combined(X, y, X_extra, y_extra, 'tomek' if sampler == 'smote_tomek' else 'enn')
+
+
+def resampled_target(y, resampled):
+    """Target values of the resampled rows, in output order"""
+    y_sel = np.asarray(y)[resampled['indices']]
+    if resampled['y_extra'] is None:
+        return y_sel
+    return np.concatenate([y_sel, resampled['y_extra']])
+
+
+def resampled_blocks(X, resampled, chunk=GATHER_CHUNK):
+    """
+    Yield the resampled feature rows block by block
+
+    Selected rows are gathered from X one block at a time, so the full
+    resampled matrix never exists in memory.
+
+    Args:
+        X (numpy.ndarray): Feature matrix the indices refer to
+        resampled (dict): Output of resample
+        chunk (int): Rows per block
+
+    Yields:
+        numpy.ndarray: Rows of the resampled matrix
+    """
+    indices = resampled['indices']
+    for start in range(0, len(indices), chunk):
+        yield X[indices[start:start + chunk]]
+    if resampled['X_extra'] is not None:
+        for start in range(0, len(resampled['X_extra']), chunk):
+            yield resampled['X_extra'][start:start + chunk]
+
+
+def resampled_head(X, y, resampled, columns, n=10):
+    """First n resampled rows plus target as a data frame, for previews"""
+    head = np.vstack(list(resampled_blocks(X, {**resampled, 'indices': resampled['indices'][:n]}, chunk=n)))[:n]
+    frame = pd.DataFrame(head, columns=columns)
+    frame['target'] = resampled_target(y, resampled)[:n]
+    return frame
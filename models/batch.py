@@ -0,0 +1,300 @@
+import argparse
+import glob
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from dataset_cache import file_digest
+from storage import DATASET_ID_LENGTH, output_dir_for
+from pipeline import PipelineError, add_pipeline_arguments, pipeline_options, preload_modules, run_full_pipeline
+
+logger = logging.getLogger(__name__)
+
+# Satu proses per core; di dalam proses DAG cukup satu thread supaya core tidak berebut
+DEFAULT_PROCESSES = os.cpu_count() or 1
+DEFAULT_THREADS = 1
+# Penanda output lengkap di folder tiap dataset, ditulis paling akhir
+DONE_FILE = "batch_done.json"
+SUMMARY_FILE = "batch_summary"
+
+# Status per dataset di laporan
+DONE = "done"
+SKIPPED = "skipped"
+DUPLICATE = "duplicate"
+FAILED = "failed"
+
+
+def find_datasets(sources):
+    """
+    Expand directories, glob patterns and file names into CSV paths
+
+    Args:
+        sources (list): Directories (all ``*.csv`` inside), glob patterns or
+            file paths
+
+    Returns:
+        list: Unique paths in the order given, each directory or pattern sorted
+    """
+    paths, seen = [], set()
+    for source in sources:
+        if os.path.isdir(source):
+            found = sorted(glob.glob(os.path.join(source, "*.csv")))
+        elif glob.has_magic(source):
+            found = sorted(path for path in glob.glob(source, recursive=True) if os.path.isfile(path))
+        else:
+            found = [source]
+        for path in found:
+            if os.path.realpath(path) not in seen:
+                seen.add(os.path.realpath(path))
+                paths.append(path)
+    return paths
+
+
+def options_key(options):
+    """Stable text form of pipeline options, stored with finished outputs"""
+    return json.dumps(options, sort_keys=True, default=str)
+
+
+def completed_run(output_dir, key):
+    """
+    Marker of a finished run with the same options, if any
+
+    Args:
+        output_dir (str): Output directory of the dataset
+        key (str): Output of options_key
+
+    Returns:
+        dict or None: Stored marker, or None when the outputs must be (re)built
+    """
+    try:
+        with open(os.path.join(output_dir, DONE_FILE)) as f:
+            marker = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return marker if marker.get('options') == key else None
+
+
+def write_marker(output_dir, marker):
+    # Tulis ke file sementara lalu rename, jadi penanda tidak pernah setengah jadi
+    fd, tmp_path = tempfile.mkstemp(suffix=".part", dir=output_dir)
+    with os.fdopen(fd, "w") as f:
+        json.dump(marker, f, indent=2, default=str)
+    os.replace(tmp_path, os.path.join(output_dir, DONE_FILE))
+
+
+def dataset_summary(result):
+    """
+    Headline numbers of one pipeline result for the batch report
+
+    Returns:
+        dict: Rows, features, selected features, balanced rows and, when
+            step 5 ran, the best model and its cross-validated score
+    """
+    steps = result['steps']
+    summary = {
+        'rows': steps['2']['summary_stats']['total_rows'],
+        'features': steps['3']['summary_stats']['total_features_analyzed'],
+        'selected_features': steps['3']['summary_stats']['features_selected'],
+        'balanced_rows': steps['4']['summary_stats']['total_samples_after']
+    }
+    if '5' in steps:
+        summary['best_model'] = steps['5']['summary_stats']['best_model']
+        summary['cv_score'] = steps['5']['summary_stats']['cv_score']
+    return summary
+
+
+def process_dataset(path, dataset_id, output_dir, options, key, threads=DEFAULT_THREADS):
+    """
+    Run the full pipeline on one dataset; errors are returned, not raised
+
+    Args:
+        path (str): CSV file
+        dataset_id (str): Content hash prefix of the file
+        output_dir (str): Output namespace of the dataset
+        options (dict): Output of pipeline.pipeline_options
+        key (str): Output of options_key, stored in the completion marker
+        threads (int): DAG thread pool size inside this process
+
+    Returns:
+        dict: Report record with status done or failed
+    """
+    record = {'path': path, 'dataset_id': dataset_id, 'output_dir': output_dir}
+    start = time.perf_counter()
+    try:
+        os.makedirs(output_dir, exist_ok=True)
+        # Output lama dengan opsi lain tidak lagi lengkap begitu ditimpa
+        if os.path.exists(os.path.join(output_dir, DONE_FILE)):
+            os.remove(os.path.join(output_dir, DONE_FILE))
+        result = run_full_pipeline(path, output_dir=output_dir, max_workers=threads, **options)
+        record.update(status=DONE, seconds=round(time.perf_counter() - start, 3), **dataset_summary(result))
+        write_marker(output_dir, {**record, 'options': key, 'finished_at': time.time()})
+    except PipelineError as e:
+        record.update(status=FAILED, seconds=round(time.perf_counter() - start, 3), stage=e.stage,
+                      error=str(e.error))
+    except Exception as e:
+        record.update(status=FAILED, seconds=round(time.perf_counter() - start, 3), error=f"{type(e).__name__}: {e}")
+    return record
+
+
+def run_batch(paths, output_root="output", options=None, processes=DEFAULT_PROCESSES, threads=DEFAULT_THREADS,
+              force=False, on_done=None):
+    """
+    Run the pipeline over many datasets in a process pool
+
+    Every dataset gets its own output directory named after its content hash,
+    so the run can be resumed: datasets whose outputs were completed with the
+    same options are skipped unless ``force`` is set, and files with the same
+    content are only processed once.
+
+    Args:
+        paths (list): CSV files
+        output_root (str): Root of the per-dataset output directories
+        options (dict): Output of pipeline.pipeline_options
+        processes (int): Worker processes
+        threads (int): DAG threads per worker process
+        force (bool): Reprocess datasets that already have complete outputs
+        on_done (callable): Called with every finished record
+
+    Returns:
+        list: One report record per path, in input order
+    """
+    options = options or {}
+    key = options_key(options)
+    records = [None] * len(paths)
+    pending = {}
+    for i, path in enumerate(paths):
+        try:
+            dataset_id = file_digest(path)[:DATASET_ID_LENGTH]
+        except OSError as e:
+            records[i] = {'path': path, 'status': FAILED, 'error': f"{type(e).__name__}: {e}"}
+            continue
+        output_dir = output_dir_for(dataset_id, output_root)
+        marker = None if force else completed_run(output_dir, key)
+        if marker is not None:
+            records[i] = {**{name: value for name, value in marker.items() if name not in ('options', 'finished_at')},
+                          'path': path, 'status': SKIPPED}
+        elif dataset_id in pending:
+            records[i] = {'path': path, 'dataset_id': dataset_id, 'output_dir': output_dir, 'status': DUPLICATE,
+                          'same_as': paths[pending[dataset_id][0]]}
+        else:
+            pending[dataset_id] = (i, output_dir)
+
+    # Salinan dilaporkan setelah file pertamanya selesai
+    for record in records:
+        if record is not None and record['status'] != DUPLICATE and on_done:
+            on_done(record)
+    if not pending:
+        return records
+
+    if processes > 1:
+        # Modul step dimuat sekali sebelum fork, dipakai bersama oleh semua worker
+        preload_modules()
+    with ProcessPoolExecutor(max_workers=min(processes, len(pending))) as pool:
+        futures = {pool.submit(process_dataset, paths[i], dataset_id, output_dir, options, key, threads):
+                   (i, dataset_id, output_dir) for dataset_id, (i, output_dir) in pending.items()}
+        for future in as_completed(futures):
+            i, dataset_id, output_dir = futures[future]
+            try:
+                record = future.result()
+            except Exception as e:
+                # Proses worker mati (mis. kehabisan memori): dataset lain tetap dilaporkan
+                record = {'path': paths[i], 'dataset_id': dataset_id, 'output_dir': output_dir,
+                          'status': FAILED, 'error': f"{type(e).__name__}: {e}"}
+            records[i] = record
+            if on_done:
+                on_done(record)
+
+    # Salinan dengan isi sama mengikuti hasil file pertama
+    for i, record in enumerate(records):
+        if record['status'] != DUPLICATE:
+            continue
+        if records[pending[record['dataset_id']][0]]['status'] == FAILED:
+            records[i] = {**record, 'status': FAILED, 'error': 'Same content as a failed dataset'}
+        if on_done:
+            on_done(records[i])
+    return records
+
+
+def write_summary(records, output_root="output", seconds=None):
+    """
+    Write the consolidated report as JSON and CSV
+
+    Args:
+        records (list): Output of run_batch
+        output_root (str): Root output directory
+        seconds (float): Wall-clock time of the run
+
+    Returns:
+        tuple: (JSON path, CSV path)
+    """
+    os.makedirs(output_root, exist_ok=True)
+    counts = pd.Series([record['status'] for record in records], dtype=object).value_counts()
+    json_file = os.path.join(output_root, f"{SUMMARY_FILE}.json")
+    with open(json_file, "w") as f:
+        json.dump({
+            'datasets': len(records),
+            'counts': {status: int(counts.get(status, 0)) for status in (DONE, SKIPPED, DUPLICATE, FAILED)},
+            'seconds': seconds,
+            'records': records
+        }, f, indent=2, default=str)
+    csv_file = os.path.join(output_root, f"{SUMMARY_FILE}.csv")
+    pd.DataFrame(records).convert_dtypes().to_csv(csv_file, index=False)
+    return json_file, csv_file
+
+
+def print_record(record):
+    if record['status'] in (DONE, SKIPPED):
+        detail = (f"{record.get('rows', '-')} baris, {record.get('selected_features', '-')}/"
+                  f"{record.get('features', '-')} fitur terpilih, {record.get('balanced_rows', '-')} baris seimbang")
+        if record.get('best_model'):
+            detail += f", {record['best_model']} {record['cv_score']:.4f}"
+    elif record['status'] == DUPLICATE:
+        detail = f"isi sama dengan {record['same_as']}"
+    else:
+        detail = f"{record.get('stage') or ''} {record['error']}".strip()
+    seconds = f"{record['seconds']:8.2f}s" if record['status'] == DONE else " " * 9
+    print(f"{record['status']:<9} {seconds}  {record['path']}: {detail}", flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the pipeline over many CSV files in parallel")
+    parser.add_argument("sources", nargs="+", help="CSV files, directories or glob patterns")
+    parser.add_argument("--output-dir", default="output", help="Root of the per-dataset output directories")
+    parser.add_argument("--processes", type=int, default=DEFAULT_PROCESSES, help="Worker processes (default: cores)")
+    parser.add_argument("--threads", type=int, default=DEFAULT_THREADS, help="Pipeline threads per process")
+    parser.add_argument("--force", action="store_true", help="Reprocess datasets with complete outputs")
+    add_pipeline_arguments(parser)
+    args = parser.parse_args(argv)
+    try:
+        options = pipeline_options(args)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.processes < 1 or args.threads < 1:
+        parser.error("--processes and --threads must be positive")
+
+    paths = find_datasets(args.sources)
+    if not paths:
+        parser.error("No CSV files found")
+
+    print(f"=== Batch: {len(paths)} dataset, {args.processes} proses ===")
+    start = time.perf_counter()
+    records = run_batch(paths, args.output_dir, options, args.processes, args.threads, args.force,
+                        on_done=print_record)
+    seconds = round(time.perf_counter() - start, 3)
+    json_file, csv_file = write_summary(records, args.output_dir, seconds)
+
+    counts = pd.Series([record['status'] for record in records], dtype=object).value_counts()
+    print(f"\nSelesai dalam {seconds:.2f}s: " + ", ".join(f"{status} {count}" for status, count in counts.items()))
+    print(f"Laporan tersimpan di: {json_file} dan {csv_file}")
+    if counts.get(FAILED, 0):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
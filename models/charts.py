@@ -0,0 +1,167 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+from artifacts import temp_path
+
+logger = logging.getLogger(__name__)
+
+# Grafik yang tersedia: nama -> (id step, fungsi render, file data grafik)
+CHART_SOURCES = {
+    'anova': ('3', "render_anova_chart", "3_anova_chart.json"),
+    'rus': ('4', "render_rus_chart", "4_rus_chart.json"),
+    'training': ('5', "render_training_chart", "5_training_chart.json")
+}
+
+CHART_FORMATS = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml'
+}
+
+PREVIEW_DPI = 100
+FULL_DPI = 300
+MIN_DPI = 36
+MAX_DPI = 300
+
+CHART_CACHE_MAX_BYTES = int(os.environ.get("CHART_CACHE_MAX_MB", "64")) * 1024 * 1024
+
+
+class ChartNotFoundError(Exception):
+    """Raised when the data for a chart has not been produced yet"""
+
+
+class _RenderedChartCache:
+    """In-memory LRU of rendered chart bytes bounded by total size"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            image = self._entries.get(key)
+            if image is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return image
+
+    def put(self, key, image):
+        if len(image) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = image
+            self.current_bytes += len(image)
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'current_bytes': self.current_bytes,
+                'max_bytes': self.max_bytes
+            }
+
+
+chart_cache = _RenderedChartCache(CHART_CACHE_MAX_BYTES)
+
+
+def save_chart_data(name, data, output_dir="output"):
+    """
+    Persist the small input data a chart is rendered from
+
+    Args:
+        name (str): Chart name (key of CHART_SOURCES)
+        data (dict): JSON-serializable chart input
+        output_dir (str): Output directory
+
+    Returns:
+        str: Path of the written JSON file
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    data_file = os.path.join(output_dir, CHART_SOURCES[name][2])
+    tmp_file = temp_path(data_file)
+    with open(tmp_file, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp_file, data_file)
+    return data_file
+
+
+def get_chart(name, output_dir="output", dpi=PREVIEW_DPI, fmt="png"):
+    """
+    Return a rendered chart, rendering it only on a cache miss
+
+    Rendered bytes are cached in memory and under ``<output_dir>/charts/``,
+    keyed by the hash of the chart data plus DPI and format.
+
+    Args:
+        name (str): Chart name (key of CHART_SOURCES)
+        output_dir (str): Output directory holding the chart data
+        dpi (int): Resolution, clamped to MIN_DPI..MAX_DPI
+        fmt (str): Image format, one of CHART_FORMATS
+
+    Returns:
+        tuple: (image bytes, mimetype, cache key)
+
+    Raises:
+        ChartNotFoundError: If the chart or its data does not exist
+        ValueError: If the format is not supported
+    """
+    if name not in CHART_SOURCES:
+        raise ChartNotFoundError(f"Unknown chart: {name}")
+    if fmt not in CHART_FORMATS:
+        raise ValueError(f"Unsupported chart format: {fmt}")
+    dpi = max(MIN_DPI, min(MAX_DPI, int(dpi)))
+
+    step, func_name, data_name = CHART_SOURCES[name]
+    data_file = os.path.join(output_dir, data_name)
+    if not os.path.exists(data_file):
+        raise ChartNotFoundError(f"No data for chart '{name}' yet")
+
+    with open(data_file, 'rb') as f:
+        raw = f.read()
+    data_hash = hashlib.sha256(raw).hexdigest()[:16]
+    key = f"{name}-{data_hash}-{dpi}.{fmt}"
+
+    image = chart_cache.get(key)
+    if image is not None:
+        return image, CHART_FORMATS[fmt], key
+
+    cache_file = os.path.join(output_dir, "charts", key)
+    if os.path.exists(cache_file):
+        with open(cache_file, 'rb') as f:
+            image = f.read()
+    else:
+        from pipeline import step_module
+
+        module = step_module(step)
+        logger.info(f"Rendering chart {key}")
+        image = getattr(module, func_name)(json.loads(raw), fmt=fmt, dpi=dpi)
+
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        tmp_file = temp_path(cache_file)
+        with open(tmp_file, 'wb') as f:
+            f.write(image)
+        os.replace(tmp_file, cache_file)
+
+    chart_cache.put(key, image)
+    return image, CHART_FORMATS[fmt], key
@@ -0,0 +1,166 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from instrumentation import stage_timer
+from schemas import NA_VALUES, read_csv
+
+DEFAULT_MAX_BYTES = int(os.environ.get("DATASET_CACHE_MAX_MB", "512")) * 1024 * 1024
+
+
+def file_digest(path, block_size=1024 * 1024):
+    """
+    Compute the SHA-256 digest of a file's content
+
+    Args:
+        path (str): Path to file
+        block_size (int): Number of bytes read per iteration
+
+    Returns:
+        str: Hex digest of the file content
+    """
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+class DatasetCache:
+    """
+    Process-wide LRU cache of parsed CSV datasets
+
+    Entries are keyed by file content hash and na_values, so a re-uploaded file
+    with identical bytes is a hit and an overwritten file is a miss. The cache
+    holds both the raw parsed frame and the variant with all-NaN columns dropped.
+    Callers receive shallow copies and must not modify values in place.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._digests = {}
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def digest(self, path):
+        """
+        Return the content hash of path, memoized on (path, mtime, size)
+
+        Args:
+            path (str): Path to file
+
+        Returns:
+            str: Hex digest of the file content
+        """
+        st = os.stat(path)
+        stamp = (os.path.abspath(path), st.st_mtime_ns, st.st_size, st.st_ino)
+        with self._lock:
+            digest = self._digests.get(stamp)
+        if digest is None:
+            digest = file_digest(path)
+            with self._lock:
+                if len(self._digests) >= 1024:
+                    self._digests.clear()
+                self._digests[stamp] = digest
+        return digest
+
+    def get(self, path, na_values=NA_VALUES, drop_empty=False):
+        """
+        Return the parsed dataset for path, parsing it only on a cache miss
+
+        Args:
+            path (str): Path to CSV file
+            na_values (list): Strings recognized as missing values
+            drop_empty (bool): If True, drop columns where every value is missing
+
+        Returns:
+            pandas.DataFrame: Shallow copy of the cached frame
+        """
+        digest = self.digest(path)
+        na_key = tuple(na_values)
+        key = (digest, na_key, drop_empty)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                frame = entry[0]
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return frame.copy(deep=False)
+            self.misses += 1
+
+        if drop_empty:
+            frame = self.get(path, na_values=na_values).dropna(axis=1, how="all")
+        else:
+            with stage_timer('parse'):
+                frame = read_csv(path, na_values=na_values)
+
+        self._store(key, frame)
+        return frame.copy(deep=False)
+
+    def _store(self, key, frame):
+        size = int(frame.memory_usage(index=True, deep=True).sum())
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = (frame, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes and self._entries:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        """Drop all cached frames and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self._digests.clear()
+            self.current_bytes = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self):
+        """
+        Report cache usage
+
+        Returns:
+            dict: Hit/miss/eviction counts and memory usage
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': (self.hits / total) if total else 0.0,
+                'entries': len(self._entries),
+                'current_bytes': self.current_bytes,
+                'max_bytes': self.max_bytes
+            }
+
+
+dataset_cache = DatasetCache()
+
+
+def load_dataset(path, na_values=NA_VALUES, drop_empty=False):
+    """
+    Load a CSV dataset through the shared process-wide cache
+
+    Args:
+        path (str): Path to CSV file
+        na_values (list): Strings recognized as missing values
+        drop_empty (bool): If True, drop columns where every value is missing
+
+    Returns:
+        pandas.DataFrame: Parsed dataset
+    """
+    return dataset_cache.get(path, na_values=na_values, drop_empty=drop_empty)
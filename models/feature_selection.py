@@ -0,0 +1,633 @@
+import os
+import json
+import logging
+import threading
+from collections import OrderedDict
+from functools import partial
+
+import joblib
+import numpy as np
+
+from artifacts import temp_path
+from kernels import COMPACT, BlockMatrix
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SCORER = os.environ.get("FEATURE_SCORER", "anova")
+DEFAULT_ALPHA = 0.05
+FALLBACK_K = 10
+CORRECTIONS = ("none", "bonferroni", "fdr")
+# Jumlah worker untuk scoring per blok kolom
+DEFAULT_JOBS = int(os.environ.get("SCORING_JOBS", min(4, os.cpu_count() or 1)))
+SCORES_FILE = "3_scores_{scorer}.joblib"
+SELECTION_FILE = "3_selection.json"
+MI_NEIGHBORS = 3
+RANDOM_STATE = 42
+STABILITY_METHODS = ("bootstrap", "rus")
+DEFAULT_RESAMPLES = 200
+DEFAULT_THRESHOLD = 0.6
+# Resample per batch: satu perkalian matriks (batch x baris) @ (baris x fitur) per kelas
+RESAMPLE_BATCH = 25
+
+# Skor per (dataset, scaler, scorer, target)
+_scores = OrderedDict()
+_scores_lock = threading.Lock()
+MAX_SCORES = 16
+
+
+def anova_f(X, y):
+    """ANOVA F-test per column (``sklearn.feature_selection.f_classif``)"""
+    from sklearn.feature_selection import f_classif
+
+    return f_classif(X, y)
+
+
+def block_anova(X, y):
+    """
+    ANOVA F-test per column of a ``kernels.BlockMatrix``
+
+    Per-class sums and the sums of squares come from the matrix blocks (one
+    decoded column at a time, only the nonzeros of sparse columns), so the
+    dense float64 matrix is never built.
+    """
+    from streaming import anova_from_stats
+
+    classes, labels = np.unique(y, return_inverse=True)
+    class_sum, sumsq = X.class_moments(labels, len(classes))
+    class_count = dict(enumerate(np.bincount(labels, minlength=len(classes))))
+    return anova_from_stats(class_count, dict(enumerate(class_sum)), sumsq)
+
+
+def _dense_score(score, X, y):
+    return score(np.asarray(X), y)
+
+
+def chi_squared(X, y):
+    """Chi-squared statistic per column, needs non-negative (scaled) features"""
+    from sklearn.feature_selection import chi2
+
+    return chi2(X, y)
+
+
+def mutual_information(X, y):
+    """
+    Mutual information per column, without p-values
+
+    Every column is scored on its own with a fixed seed, so the result does
+    not depend on how the columns are split into blocks.
+    """
+    from sklearn.feature_selection import mutual_info_classif
+
+    scores = np.array([
+        mutual_info_classif(X[:, [j]], y, discrete_features=False, n_neighbors=MI_NEIGHBORS,
+                            random_state=RANDOM_STATE)[0]
+        for j in range(X.shape[1])
+    ])
+    return scores, np.full(X.shape[1], np.nan)
+
+
+def point_biserial(X, y):
+    """
+    Absolute point-biserial correlation per column and its two-sided p-value
+
+    Same as ``scipy.stats.pointbiserialr`` (Pearson r against a binary target).
+    """
+    from scipy.special import stdtr
+
+    classes = np.unique(y)
+    if len(classes) != 2:
+        raise ValueError(f"Point-biserial scoring needs a binary target, got {len(classes)} classes")
+    y = (np.asarray(y) == classes[1]).astype(float)
+    n = len(y)
+    y_c = y - y.mean()
+    X_c = X - X.mean(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r = (y_c @ X_c) / np.sqrt(np.einsum('ij,ij->j', X_c, X_c) * (y_c @ y_c))
+        r = np.clip(r, -1.0, 1.0)
+        t = r * np.sqrt((n - 2) / (1.0 - r * r))
+    pvalues = 2 * stdtr(n - 2, -np.abs(t))
+    return np.abs(r), pvalues
+
+
+# Registry scorer: nama -> fungsi (X, y) -> (skor, p-value) plus cara paralelnya.
+# min_cells: di bawah ukuran ini scoring dijalankan serial (overhead paralel lebih besar).
+# blocks: versi untuk BlockMatrix (compact/sparse); scorer tanpa itu menerima blok kolom dense
+SCORERS = {
+    'anova': {'score': anova_f, 'name': 'ANOVA', 'label': 'F-Score', 'prefer': 'threads',
+              'min_cells': 20_000_000, 'blocks': block_anova},
+    'chi2': {'score': chi_squared, 'name': 'Chi-squared', 'label': 'Chi² Score', 'prefer': 'threads',
+             'min_cells': 20_000_000},
+    'mutual_info': {'score': mutual_information, 'name': 'Mutual information', 'label': 'Mutual Information',
+                    'prefer': 'processes', 'min_cells': 0},
+    'pointbiserial': {'score': point_biserial, 'name': 'Point-biserial', 'label': '|r|', 'prefer': 'threads',
+                      'min_cells': 20_000_000},
+}
+
+
+def check_scorer(scorer):
+    """
+    Resolve a scorer name, None meaning the default
+
+    Raises:
+        ValueError: If the scorer is unknown
+    """
+    scorer = scorer or DEFAULT_SCORER
+    if scorer not in SCORERS:
+        raise ValueError(f"Unknown scorer {scorer!r}, expected one of {sorted(SCORERS)}")
+    return scorer
+
+
+def selection_policy(alpha=None, k=None, correction=None):
+    """
+    Build and validate a feature selection policy
+
+    Features whose (corrected) p-value is below ``alpha`` are selected, at
+    most the ``k`` best of them. When none qualify, or the scorer has no
+    p-values, the ``k`` (default 10) best scored features are selected.
+
+    Args:
+        alpha (float): Significance level, default 0.05
+        k (int): Maximum number of selected features, None for no limit
+        correction (str): Multiple-testing correction: none, bonferroni or fdr
+            (Benjamini-Hochberg)
+
+    Returns:
+        dict: Policy with 'alpha', 'k' and 'correction'
+
+    Raises:
+        ValueError: If an option is out of range
+    """
+    try:
+        alpha = DEFAULT_ALPHA if alpha in (None, "") else float(alpha)
+    except (TypeError, ValueError):
+        raise ValueError("alpha must be a number")
+    if not 0 < alpha <= 1:
+        raise ValueError("alpha must be in (0, 1]")
+    try:
+        k = None if k in (None, "") else int(k)
+    except (TypeError, ValueError):
+        raise ValueError("k must be an integer")
+    if k is not None and k < 1:
+        raise ValueError("k must be positive")
+    correction = correction or "none"
+    if correction not in CORRECTIONS:
+        raise ValueError(f"Invalid correction, expected one of {list(CORRECTIONS)}")
+    return {'alpha': alpha, 'k': k, 'correction': correction}
+
+
+def describe_policy(policy, scorer=None):
+    """Human readable selection criteria, e.g. 'p-value < 0.05 or top 10'"""
+    policy = policy or selection_policy()
+    if check_scorer(scorer) == 'mutual_info':
+        return f"top {policy['k'] or FALLBACK_K} by score"
+    criteria = f"p-value < {policy['alpha']:g}"
+    if policy['correction'] != "none":
+        criteria += f" ({policy['correction']})"
+    if policy['k'] is not None:
+        criteria += f", best {policy['k']}"
+    return f"{criteria} or top {policy['k'] or FALLBACK_K}"
+
+
+def adjust_pvalues(pvalues, correction="none"):
+    """
+    Correct p-values for multiple testing, NaN entries are left out
+
+    Args:
+        pvalues (numpy.ndarray): Raw p-values
+        correction (str): none, bonferroni or fdr (Benjamini-Hochberg)
+
+    Returns:
+        numpy.ndarray: Corrected p-values
+    """
+    pvalues = np.asarray(pvalues, dtype=float)
+    if correction == "none":
+        return pvalues
+    adjusted = np.full_like(pvalues, np.nan)
+    finite = np.flatnonzero(np.isfinite(pvalues))
+    m = finite.size
+    if m == 0:
+        return adjusted
+    if correction == "bonferroni":
+        adjusted[finite] = np.minimum(pvalues[finite] * m, 1.0)
+        return adjusted
+    order = finite[np.argsort(pvalues[finite], kind="stable")]
+    ranked = pvalues[order] * m / np.arange(1, m + 1)
+    adjusted[order] = np.minimum(np.minimum.accumulate(ranked[::-1])[::-1], 1.0)
+    return adjusted
+
+
+def rank_features(scores, pvalues):
+    """Feature indices from best to worst: by p-value when available (ties by score), else by score"""
+    scores = -np.asarray(scores, dtype=float)
+    if pvalues is not None and np.isfinite(pvalues).any():
+        return np.lexsort((scores, pvalues))
+    return np.argsort(scores, kind="stable")
+
+
+def select_features(pvalues, scores=None, policy=None):
+    """
+    Apply a selection policy to the feature scores
+
+    With the default policy this is the original rule: p-value < 0.05, or the
+    10 best when none qualify.
+
+    Args:
+        pvalues (numpy.ndarray): p-values per feature (NaN when the scorer has none)
+        scores (numpy.ndarray): Scores per feature, used when there are no p-values
+        policy (dict): Output of selection_policy, default policy when None
+
+    Returns:
+        numpy.ndarray: Column indices of the selected features
+    """
+    policy = policy or selection_policy()
+    adjusted = adjust_pvalues(pvalues, policy['correction'])
+    # Urutkan dengan p-value mentah: urutannya sama dengan p-value terkoreksi,
+    # tetapi nilai terkoreksi yang sama (ikatan) tetap dibedakan
+    order = rank_features(scores if scores is not None else -adjusted, np.asarray(pvalues, dtype=float))
+    mask = np.isfinite(adjusted) & (adjusted < policy['alpha'])
+    if np.any(mask):
+        if policy['k'] is not None and mask.sum() > policy['k']:
+            return np.sort(order[mask[order]][:policy['k']])
+        return np.where(mask)[0]
+    return order[:policy['k'] or FALLBACK_K]
+
+
+def column_blocks(n_cols, n_jobs, n_cells, min_cells):
+    """Split column indices into contiguous blocks, one block when parallelism does not pay off"""
+    if n_jobs <= 1 or n_cols < 2 or n_cells < min_cells:
+        return [slice(0, n_cols)]
+    n_blocks = min(n_cols, n_jobs * 4)
+    bounds = np.linspace(0, n_cols, n_blocks + 1).astype(int)
+    return [slice(start, stop) for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+
+
+def score_features(X, y, scorer=None, n_jobs=None):
+    """
+    Score every feature against the target, in parallel over column blocks
+
+    Args:
+        X (numpy.ndarray or kernels.BlockMatrix): Imputed and scaled feature matrix
+        y (pandas.Series or numpy.ndarray): Target values
+        scorer (str): Name in SCORERS, default FEATURE_SCORER
+        n_jobs (int): Parallel workers, default SCORING_JOBS
+
+    Returns:
+        tuple: (scores, p-values); p-values are NaN for scorers without a test
+    """
+    spec = SCORERS[check_scorer(scorer)]
+    score = spec['score']
+    if isinstance(X, BlockMatrix):
+        score = spec.get('blocks') or partial(_dense_score, spec['score'])
+    y = np.asarray(y)
+    n_jobs = n_jobs or DEFAULT_JOBS
+    blocks = column_blocks(X.shape[1], n_jobs, X.size, spec['min_cells'])
+    if len(blocks) == 1:
+        parts = [score(X, y)]
+    else:
+        parts = joblib.Parallel(n_jobs=min(n_jobs, len(blocks)), prefer=spec['prefer'])(
+            joblib.delayed(score)(X[:, block], y) for block in blocks)
+    scores = np.concatenate([np.asarray(part[0], dtype=float) for part in parts])
+    pvalues = np.concatenate([np.asarray(part[1], dtype=float) for part in parts])
+    return scores, pvalues
+
+
+def score_key(artifact, scorer, target):
+    """
+    Cache key of a score vector: dataset version, scaler, scorer and target
+
+    Returns:
+        tuple or None: Key, or None when the artifact has no dataset digest
+    """
+    if artifact is None or artifact.get('dataset_digest') is None:
+        return None
+    preprocessor = artifact.get('preprocessor')
+    dtype = COMPACT if getattr(preprocessor, 'compact', False) else getattr(preprocessor, 'dtype', '')
+    scaler = f"{type(preprocessor).__name__}:{dtype}" if preprocessor else "legacy"
+    return (artifact['dataset_digest'], scaler, check_scorer(scorer), str(target))
+
+
+def _remember(key, scored):
+    with _scores_lock:
+        _scores[key] = scored
+        _scores.move_to_end(key)
+        while len(_scores) > MAX_SCORES:
+            _scores.popitem(last=False)
+
+
+def cached_scores(key, output_dir=None):
+    """
+    Look up a score vector in memory or on disk
+
+    Args:
+        key (tuple): Output of score_key
+        output_dir (str): Directory holding ``3_scores_<scorer>.joblib``
+
+    Returns:
+        tuple or None: (scores, p-values), or None when they must be computed
+    """
+    with _scores_lock:
+        scored = _scores.get(key)
+        if scored is not None:
+            _scores.move_to_end(key)
+            return scored
+    if output_dir is None:
+        return None
+    scores_file = os.path.join(output_dir, SCORES_FILE.format(scorer=key[2]))
+    if os.path.exists(scores_file):
+        try:
+            stored = joblib.load(scores_file)
+            if stored.get('key') == key:
+                scored = (stored['scores'], stored['pvalues'])
+                _remember(key, scored)
+                return scored
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable scores {scores_file}: {e}")
+    return None
+
+
+def store_scores(key, scored, output_dir=None):
+    """
+    Keep a score vector in memory and, with output_dir, on disk
+
+    Args:
+        key (tuple): Output of score_key
+        scored (tuple): (scores, p-values)
+        output_dir (str): Output directory
+    """
+    _remember(key, scored)
+    if output_dir is not None:
+        os.makedirs(output_dir, exist_ok=True)
+        joblib.dump({'key': key, 'scores': scored[0], 'pvalues': scored[1]},
+                    os.path.join(output_dir, SCORES_FILE.format(scorer=key[2])))
+
+
+def feature_scores(X, y, scorer=None, key=None, output_dir=None, n_jobs=None):
+    """
+    Score features, reusing the cached result for the same key
+
+    Args:
+        X (numpy.ndarray): Imputed and scaled feature matrix
+        y (pandas.Series or numpy.ndarray): Target values
+        scorer (str): Name in SCORERS, default FEATURE_SCORER
+        key (tuple): Output of score_key, None to skip the cache
+        output_dir (str): Directory for the persisted scores
+        n_jobs (int): Parallel workers, default SCORING_JOBS
+
+    Returns:
+        tuple: (scores, p-values)
+    """
+    scored = cached_scores(key, output_dir) if key is not None else None
+    if scored is None:
+        scored = score_features(X, y, scorer, n_jobs)
+        if key is not None:
+            store_scores(key, scored, output_dir)
+    return scored
+
+
+def stability_options(resamples=None, method=None, threshold=None):
+    """
+    Build and validate stability selection options
+
+    Args:
+        resamples (int): Number of resampled subsets, default 200
+        method (str): bootstrap (stratified, with replacement) or rus
+            (majority classes undersampled to the minority size)
+        threshold (float): Selection frequency a feature needs to be stable,
+            default 0.6
+
+    Returns:
+        dict: Options with 'resamples', 'method' and 'threshold'
+
+    Raises:
+        ValueError: If an option is out of range
+    """
+    try:
+        resamples = DEFAULT_RESAMPLES if resamples in (None, "") else int(resamples)
+    except (TypeError, ValueError):
+        raise ValueError("resamples must be an integer")
+    if not 1 <= resamples <= 10_000:
+        raise ValueError("resamples must be between 1 and 10000")
+    method = method or "bootstrap"
+    if method not in STABILITY_METHODS:
+        raise ValueError(f"Invalid resample method, expected one of {list(STABILITY_METHODS)}")
+    try:
+        threshold = DEFAULT_THRESHOLD if threshold in (None, "") else float(threshold)
+    except (TypeError, ValueError):
+        raise ValueError("threshold must be a number")
+    if not 0 < threshold <= 1:
+        raise ValueError("threshold must be in (0, 1]")
+    return {'resamples': resamples, 'method': method, 'threshold': threshold}
+
+
+def resample_weights(rng, sizes, method, n_resamples):
+    """
+    Row weights of a batch of stratified resamples, one matrix per class
+
+    Each class keeps its size under ``bootstrap`` (multinomial counts) and is
+    cut to the minority size under ``rus`` (0/1 weights), so the per-class
+    row counts are the same in every resample.
+
+    Args:
+        rng (numpy.random.Generator): Random generator of this batch
+        sizes (list): Rows per class
+        method (str): bootstrap or rus
+        n_resamples (int): Resamples in the batch
+
+    Returns:
+        tuple: (list of (n_resamples, rows) weight matrices, list of class counts)
+    """
+    weights, counts = [], []
+    minority = min(sizes)
+    for n in sizes:
+        if method == "bootstrap":
+            w = rng.multinomial(n, np.full(n, 1.0 / n), size=n_resamples).astype(float)
+            counts.append(n)
+        elif n == minority:
+            w = np.ones((n_resamples, n))
+            counts.append(n)
+        else:
+            w = np.zeros((n_resamples, n))
+            keep = np.argpartition(rng.random((n_resamples, n)), minority - 1, axis=1)[:, :minority]
+            np.put_along_axis(w, keep, 1.0, axis=1)
+            counts.append(minority)
+        weights.append(w)
+    return weights, counts
+
+
+def _stability_batch(blocks, method, policy, seed, n_resamples):
+    """Number of resamples of one batch that select each feature"""
+    from streaming import anova_from_stats
+
+    rng = np.random.default_rng(seed)
+    weights, counts = resample_weights(rng, [len(X_k) for X_k, _ in blocks], method, n_resamples)
+    # Statistik cukup per kelas: sum dan sum of squares berbobot, tanpa menyalin baris
+    class_count = dict(enumerate(counts))
+    class_sum = {k: w @ X_k for k, (w, (X_k, _)) in enumerate(zip(weights, blocks))}
+    sumsq = sum(w @ X_sq for w, (_, X_sq) in zip(weights, blocks))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scores, pvalues = anova_from_stats(class_count, class_sum, sumsq)
+    selected = np.zeros(scores.shape[1])
+    for row_scores, row_pvalues in zip(scores, pvalues):
+        selected[select_features(row_pvalues, row_scores, policy)] += 1
+    return selected
+
+
+def stability_selection(X, y, options=None, policy=None, random_state=RANDOM_STATE, n_jobs=None):
+    """
+    Per-feature selection frequency of ANOVA over resampled subsets
+
+    The rows of every class are gathered once together with their squares;
+    each resample is a weight vector over them, so its per-class sums and
+    sums of squares are one matrix product and ANOVA F follows from those
+    statistics (O(rows x features) per resample, no refit). Batches of
+    resamples run in parallel threads with independent seeds, so the result
+    does not depend on ``n_jobs``.
+
+    Args:
+        X (numpy.ndarray): Imputed and scaled feature matrix
+        y (pandas.Series or numpy.ndarray): Target values
+        options (dict): Output of stability_options, defaults when None
+        policy (dict): Selection policy applied to every resample
+        random_state (int): Seed of the resamples
+        n_jobs (int): Parallel workers, default SCORING_JOBS
+
+    Returns:
+        numpy.ndarray: Fraction of resamples that selected each feature
+    """
+    options = options or stability_options()
+    policy = policy or selection_policy()
+    y = np.asarray(y)
+    blocks = []
+    for klass in np.unique(y):
+        X_k = np.ascontiguousarray(X[y == klass], dtype=float)
+        blocks.append((X_k, X_k * X_k))
+
+    n_resamples = options['resamples']
+    sizes = [min(RESAMPLE_BATCH, n_resamples - start) for start in range(0, n_resamples, RESAMPLE_BATCH)]
+    seeds = np.random.SeedSequence(random_state).spawn(len(sizes))
+    n_jobs = min(n_jobs or DEFAULT_JOBS, len(sizes))
+    if n_jobs <= 1:
+        parts = [_stability_batch(blocks, options['method'], policy, seed, size) for seed, size in zip(seeds, sizes)]
+    else:
+        parts = joblib.Parallel(n_jobs=n_jobs, prefer="threads")(
+            joblib.delayed(_stability_batch)(blocks, options['method'], policy, seed, size)
+            for seed, size in zip(seeds, sizes))
+    return np.sum(parts, axis=0) / n_resamples
+
+
+def stable_features(frequency, options=None, policy=None):
+    """
+    Select the features whose selection frequency reaches the threshold
+
+    Args:
+        frequency (numpy.ndarray): Output of stability_selection
+        options (dict): Stability options (threshold)
+        policy (dict): Selection policy, its k caps the selection
+
+    Returns:
+        numpy.ndarray: Column indices of the stable features, or the k
+        (default 10) most frequently selected when none reach the threshold
+    """
+    options = options or stability_options()
+    policy = policy or selection_policy()
+    order = np.argsort(-frequency, kind="stable")
+    mask = frequency >= options['threshold']
+    if np.any(mask):
+        if policy['k'] is not None and mask.sum() > policy['k']:
+            return np.sort(order[:policy['k']])
+        return np.where(mask)[0]
+    return order[:policy['k'] or FALLBACK_K]
+
+
+def stability_frequency(X, y, options=None, policy=None, key=None, n_jobs=None):
+    """
+    Selection frequencies, reusing the in-memory result for the same key
+
+    Args:
+        X (numpy.ndarray): Imputed and scaled feature matrix
+        y (pandas.Series or numpy.ndarray): Target values
+        options (dict): Output of stability_options
+        policy (dict): Selection policy applied to every resample
+        key (tuple): Output of score_key for the anova scorer, None to skip the cache
+        n_jobs (int): Parallel workers, default SCORING_JOBS
+
+    Returns:
+        numpy.ndarray: Fraction of resamples that selected each feature
+    """
+    options = options or stability_options()
+    policy = policy or selection_policy()
+    if key is not None:
+        key = key + ('stability', options['method'], options['resamples'], policy['alpha'], policy['k'],
+                     policy['correction'])
+        with _scores_lock:
+            frequency = _scores.get(key)
+        if frequency is not None:
+            return frequency
+    frequency = stability_selection(X, y, options, policy, n_jobs=n_jobs)
+    if key is not None:
+        _remember(key, frequency)
+    return frequency
+
+
+def check_stability(scorer, stability):
+    """
+    Reject stability selection with a scorer other than ANOVA
+
+    Raises:
+        ValueError: If stability is requested for another scorer
+    """
+    if stability is not None and check_scorer(scorer) != 'anova':
+        raise ValueError("Stability selection only supports the anova scorer")
+
+
+def save_selection(scorer=None, policy=None, stability=None, output_dir="output"):
+    """
+    Record the options the step 3 features were selected with
+
+    Written next to ``3_selected_features`` so step 5 can repeat the same
+    selection inside every cross-validation fold (see load_selection).
+
+    Args:
+        scorer (str): Scorer name, default FEATURE_SCORER
+        policy (dict): Output of selection_policy
+        stability (dict): Output of stability_options, None for a single run
+        output_dir (str): Output directory
+
+    Returns:
+        str: Path of the written JSON file
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    selection_file = os.path.join(output_dir, SELECTION_FILE)
+    tmp_file = temp_path(selection_file)
+    with open(tmp_file, 'w') as f:
+        json.dump({'scorer': check_scorer(scorer), 'policy': policy or selection_policy(),
+                   'stability': stability}, f)
+    os.replace(tmp_file, selection_file)
+    return selection_file
+
+
+def load_selection(output_dir="output"):
+    """
+    Options recorded by save_selection
+
+    Args:
+        output_dir (str): Output directory
+
+    Returns:
+        tuple or None: (scorer, policy, stability options or None), or None
+        when step 3 has not recorded its options
+    """
+    selection_file = os.path.join(output_dir, SELECTION_FILE)
+    if not os.path.exists(selection_file):
+        return None
+    with open(selection_file) as f:
+        record = json.load(f)
+    stability = record.get('stability')
+    return (check_scorer(record['scorer']), selection_policy(**record['policy']),
+            stability_options(**stability) if stability else None)
+
+
+def clear_score_cache():
+    """Forget all score vectors kept in memory (files on disk are kept)"""
+    with _scores_lock:
+        _scores.clear()
@@ -0,0 +1,582 @@
+import copy
+import io
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from artifacts import COLUMNS_SUFFIX, find_table
+from dataset_cache import NA_VALUES, dataset_cache, load_dataset
+from instrumentation import timed_stage
+from kernels import MedianMinMaxScaler
+from schemas import read_csv
+from streaming import QuantileSketch, anova_from_stats
+
+logger = logging.getLogger(__name__)
+
+STATE_FILE = "row_state.joblib"
+LINEAGE_FILE = "lineage.json"
+DEFAULT_TARGET = "Biopsy"
+# Di atas porsi baris berubah ini, hitung dari nol lebih murah daripada delta
+MAX_DELTA_FRACTION = float(os.environ.get("INCREMENTAL_MAX_DELTA", "0.5"))
+
+# State per versi dataset (content hash), sama seperti artefak preprocessing
+_states = OrderedDict()
+_states_lock = threading.Lock()
+_build_locks = {}
+MAX_STATES = 4
+
+
+def row_hashes(df):
+    """
+    Hash every row of a parsed dataset
+
+    Numeric columns are hashed as float64, so rows of a column that turns
+    from int to float (because a new row has a missing value) still match.
+
+    Args:
+        df (pandas.DataFrame): Parsed dataset
+
+    Returns:
+        numpy.ndarray: uint64 hash per row
+    """
+    canonical = pd.DataFrame({
+        col: df[col].to_numpy(dtype=float) if pd.api.types.is_numeric_dtype(df[col])
+        else df[col].astype(str).to_numpy(dtype=object)
+        for col in df.columns
+    })
+    return pd.util.hash_pandas_object(canonical, index=False).to_numpy()
+
+
+def _occurrence(hashes):
+    # Urutan kemunculan tiap hash, supaya baris duplikat dicocokkan satu per satu
+    return pd.Series(hashes).groupby(hashes).cumcount().to_numpy()
+
+
+def diff_rows(old_hashes, new_hashes):
+    """
+    Match the rows of two dataset versions by content
+
+    Duplicate rows are matched by occurrence: the second copy of a row in the
+    new version matches the second copy in the old one.
+
+    Args:
+        old_hashes (numpy.ndarray): Row hashes of the base version
+        new_hashes (numpy.ndarray): Row hashes of the new version
+
+    Returns:
+        tuple: (kept positions in the new version, their positions in the base
+        version, added positions in the new version, removed positions in the
+        base version)
+    """
+    old_keys = pd.MultiIndex.from_arrays([old_hashes, _occurrence(old_hashes)])
+    new_keys = pd.MultiIndex.from_arrays([new_hashes, _occurrence(new_hashes)])
+    match = old_keys.get_indexer(new_keys)
+
+    kept = np.flatnonzero(match >= 0)
+    matched = np.zeros(len(old_hashes), dtype=bool)
+    matched[match[kept]] = True
+    return kept, match[kept], np.flatnonzero(match < 0), np.flatnonzero(~matched)
+
+
+def _layout(data, target):
+    """Feature and target columns like split_features, or None if the data is not all numeric"""
+    if data.shape[1] == 0 or data.select_dtypes(include="number").shape[1] != data.shape[1]:
+        return None
+    target_col = target if target in data.columns else data.columns[-1]
+    if data[target_col].isna().any():
+        return None
+    features = np.array([j for j, col in enumerate(data.columns) if col != target], dtype=np.intp)
+    return features, target_col
+
+
+def class_moments(X, y):
+    """
+    Per-class sufficient statistics of the raw (unimputed) features
+
+    Args:
+        X (numpy.ndarray): Feature matrix with NaN for missing values
+        y (numpy.ndarray): Target values
+
+    Returns:
+        dict: Class -> rows, non-missing count, sum and sum of squares per feature
+    """
+    observed = ~np.isnan(X)
+    values = np.where(observed, X, 0.0)
+    classes, codes = np.unique(y, return_inverse=True)
+    moments = {}
+    for i, klass in enumerate(classes):
+        rows = codes == i
+        moments[klass] = {
+            'rows': int(rows.sum()),
+            'count': observed[rows].sum(axis=0),
+            'sum': values[rows].sum(axis=0),
+            'sumsq': (values[rows] ** 2).sum(axis=0)
+        }
+    return moments
+
+
+def _add_moments(moments, other, sign):
+    for klass, stats in other.items():
+        current = moments.get(klass)
+        if current is None:
+            if sign < 0:
+                raise ValueError(f"Removed rows of class {klass!r} were not counted")
+            moments[klass] = {key: value for key, value in stats.items()}
+            continue
+        for key, value in stats.items():
+            current[key] = current[key] + sign * value
+        if current['rows'] < 0:
+            raise ValueError(f"More rows of class {klass!r} removed than counted")
+        if current['rows'] == 0:
+            del moments[klass]
+
+
+@timed_stage('row_state')
+def build_state(df, data, target=DEFAULT_TARGET, digest=None):
+    """
+    Compute the mergeable statistics of a dataset from scratch
+
+    Args:
+        df (pandas.DataFrame): Parsed dataset
+        data (pandas.DataFrame): Same dataset with all-NaN columns dropped
+        target (str): Target column name
+        digest (str): Content hash of the dataset
+
+    Returns:
+        dict or None: Row state, or None when the data has non-numeric columns
+    """
+    layout = _layout(data, target)
+    if layout is None:
+        return None
+    features, target_col = layout
+
+    X = data.to_numpy(dtype=float)
+    sketches = {}
+    for j, col in enumerate(data.columns):
+        sketches[col] = QuantileSketch()
+        sketches[col].update(X[:, j])
+
+    return {
+        'dataset_digest': digest,
+        'columns': list(df.columns),
+        'numeric_columns': list(data.columns),
+        'target': target,
+        'n_rows': len(df),
+        'row_hashes': row_hashes(df),
+        'missing': df.isna().sum(),
+        'sketches': sketches,
+        'moments': class_moments(X[:, features], data[target_col].to_numpy()),
+        'delta': None
+    }
+
+
+def read_rows(path, positions, n_rows):
+    """
+    Parse only some data rows of a CSV file
+
+    Lines are picked by position, so this relies on one row per line; when
+    the line count does not match the row count (quoted line breaks, blank
+    lines) the whole file is parsed instead.
+
+    Args:
+        path (str): Path to CSV file
+        positions (numpy.ndarray): Row positions to parse
+        n_rows (int): Number of data rows the file is known to have
+
+    Returns:
+        pandas.DataFrame: The requested rows, in the given order
+    """
+    with open(path, newline='') as f:
+        header = f.readline()
+        lines = f.readlines()
+    if len(lines) != n_rows:
+        return load_dataset(path).iloc[positions]
+    text = header + "".join(lines[i] if lines[i].endswith("\n") else lines[i] + "\n" for i in positions)
+    return read_csv(io.BytesIO(text.encode()), na_values=NA_VALUES)
+
+
+@timed_stage('row_state')
+def update_state(base, base_path, df, data, digest=None, max_delta=MAX_DELTA_FRACTION):
+    """
+    Derive the statistics of a new dataset version from its base version
+
+    Only the added and removed rows are read: missing counts, the exact
+    value sketches (median, min, max) and the per-class moments are updated
+    by subtracting removed rows and adding new ones.
+
+    Args:
+        base (dict): Row state of the base version
+        base_path (str): CSV file of the base version (for the removed rows)
+        df (pandas.DataFrame): Parsed new dataset
+        data (pandas.DataFrame): New dataset with all-NaN columns dropped
+        digest (str): Content hash of the new dataset
+        max_delta (float): Largest share of changed rows worth updating
+
+    Returns:
+        dict or None: Row state with a 'delta' entry, or None when the schema
+        changed or too many rows differ
+    """
+    if base['columns'] != list(df.columns) or base['numeric_columns'] != list(data.columns):
+        logger.info("Columns changed since the base version, recomputing from scratch")
+        return None
+    layout = _layout(data, base['target'])
+    if layout is None:
+        return None
+    features, target_col = layout
+
+    hashes = row_hashes(df)
+    kept, base_rows, added, removed = diff_rows(base['row_hashes'], hashes)
+    if added.size + removed.size > max_delta * max(len(df), 1):
+        logger.info(f"{added.size} rows added and {removed.size} removed, recomputing from scratch")
+        return None
+
+    columns = base['numeric_columns']
+    removed_df = read_rows(base_path, removed, base['n_rows'])
+    added_df = df.iloc[added]
+    X_removed = removed_df[columns].to_numpy(dtype=float)
+    X_added = added_df[columns].to_numpy(dtype=float)
+
+    missing = base['missing'] - removed_df.isna().sum() + added_df.isna().sum()
+    sketches = copy.deepcopy(base['sketches'])
+    for j, col in enumerate(columns):
+        sketches[col].remove(X_removed[:, j])
+        sketches[col].update(X_added[:, j])
+    moments = copy.deepcopy(base['moments'])
+    _add_moments(moments, class_moments(X_removed[:, features], removed_df[target_col].to_numpy()), -1)
+    _add_moments(moments, class_moments(X_added[:, features], added_df[target_col].to_numpy()), 1)
+
+    state = dict(base, dataset_digest=digest, n_rows=len(df), row_hashes=hashes, missing=missing,
+                 sketches=sketches, moments=moments)
+
+    # Stage yang input-nya sama persis dengan versi dasar
+    unchanged = []
+    if len(df) == base['n_rows'] and missing.equals(base['missing']):
+        unchanged.append('missing')
+    old, new = scaling_kernel(base), scaling_kernel(state)
+    if all(np.array_equal(getattr(old, key), getattr(new, key), equal_nan=True)
+           for key in ('statistics_', 'scale_', 'min_')):
+        unchanged.append('scaling')
+    if {k: m['rows'] for k, m in moments.items()} == {k: m['rows'] for k, m in base['moments'].items()}:
+        unchanged.append('class_counts')
+
+    state['delta'] = {
+        'base_digest': base['dataset_digest'],
+        'base_n_rows': base['n_rows'],
+        'rows_added': int(added.size),
+        'rows_removed': int(removed.size),
+        'rows_kept': int(kept.size),
+        'kept_rows': kept,
+        'base_rows': base_rows,
+        'added_rows': added,
+        'unchanged': unchanged
+    }
+    return state
+
+
+def scaling_kernel(state, dtype=None):
+    """
+    Fitted preprocessing kernel with the parameters of the value sketches
+
+    Args:
+        state (dict): Row state
+        dtype (str): Buffer type of the kernel (default PREPROCESS_DTYPE)
+
+    Returns:
+        MedianMinMaxScaler: Kernel equal to one fitted on the whole version
+    """
+    columns = state['numeric_columns']
+    bounds = np.array([state['sketches'][col].bounds() for col in columns], dtype=float).reshape(-1, 2)
+    medians = np.array([state['sketches'][col].median() for col in columns], dtype=float)
+    return MedianMinMaxScaler.from_stats(columns, medians, bounds[:, 0], bounds[:, 1], state['n_rows'],
+                                        dtype)
+
+
+def delta_anova(state, columns, target=DEFAULT_TARGET):
+    """
+    ANOVA F-test on the imputed and scaled features, from the per-class moments
+
+    Imputation adds the median for every missing value and MinMax scaling is
+    affine, so the scaled per-class sums and sums of squares follow from the
+    raw ones without touching the rows. Matches ``f_classif`` up to floating
+    point rounding; constant features get NaN like in ``f_classif``.
+
+    Args:
+        state (dict): Row state
+        columns (pandas.Index): Feature columns in the order to score them
+        target (str): Target column name
+
+    Returns:
+        tuple or None: (F-scores, p-values), or None when the state was built
+        for another target or other columns
+    """
+    if state['target'] != target:
+        return None
+    kernel = scaling_kernel(state)
+    names = list(kernel.feature_names_in_)
+    features = np.array([j for j, col in enumerate(names) if col != target], dtype=np.intp)
+    if [names[j] for j in features] != list(columns):
+        return None
+
+    median = kernel.statistics_[features]
+    a = kernel.scale_[features]
+    b = kernel.min_[features]
+    class_count, class_sum, sumsq = {}, {}, np.zeros(features.size)
+    for klass, stats in state['moments'].items():
+        n = stats['rows']
+        filled = n - stats['count']
+        s = stats['sum'] + filled * median
+        q = stats['sumsq'] + filled * median ** 2
+        class_count[klass] = n
+        class_sum[klass] = a * s + b * n
+        sumsq += a * a * q + 2 * a * b * s + b * b * n
+
+    scores, pvalues = anova_from_stats(class_count, class_sum, sumsq)
+    constant = kernel.data_range_[features] == 0
+    scores[constant] = np.nan
+    pvalues[constant] = np.nan
+    return scores, pvalues
+
+
+def link_versions(output_dir, base_path, base_output_dir):
+    """
+    Record the dataset version a new upload was derived from
+
+    Args:
+        output_dir (str): Output directory of the new version
+        base_path (str): CSV file of the base version
+        base_output_dir (str): Output directory of the base version
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, LINEAGE_FILE), 'w') as f:
+        json.dump({'base_path': base_path, 'base_output_dir': base_output_dir}, f)
+
+
+def linked_base(output_dir):
+    """
+    Return the base version recorded by link_versions
+
+    Args:
+        output_dir (str): Output directory of the new version
+
+    Returns:
+        tuple or None: (base CSV path, base output directory) if the base
+        dataset still exists
+    """
+    try:
+        with open(os.path.join(output_dir, LINEAGE_FILE)) as f:
+            lineage = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not os.path.exists(lineage['base_path']):
+        return None
+    return lineage['base_path'], lineage['base_output_dir']
+
+
+def _remember(digest, state):
+    with _states_lock:
+        _states[digest] = state
+        _states.move_to_end(digest)
+        while len(_states) > MAX_STATES:
+            _states.popitem(last=False)
+
+
+def cached_state(digest, output_dir="output"):
+    """
+    Look up the row state of a dataset version in memory or on disk
+
+    Args:
+        digest (str): Content hash of the dataset
+        output_dir (str): Directory holding the persisted state
+
+    Returns:
+        dict or None: Row state
+    """
+    with _states_lock:
+        state = _states.get(digest)
+        if state is not None:
+            _states.move_to_end(digest)
+            return state
+
+    state_file = os.path.join(output_dir, STATE_FILE)
+    if os.path.exists(state_file):
+        try:
+            stored = joblib.load(state_file)
+            if stored.get('dataset_digest') == digest:
+                _remember(digest, stored)
+                return stored
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable row state {state_file}: {e}")
+    return None
+
+
+def load_state(path, output_dir="output", target=DEFAULT_TARGET):
+    """
+    Return the row state of a dataset, computing it only once per version
+
+    When the output directory is linked to a base version whose state is
+    available, the state is updated from the row delta; otherwise it is
+    computed from scratch. It is kept in memory and in
+    ``<output_dir>/row_state.joblib`` so the next version can build on it.
+
+    Args:
+        path (str): Path to CSV file
+        output_dir (str): Output directory of this version
+        target (str): Target column name used when the state is computed
+
+    Returns:
+        dict or None: Row state, or None when the data has non-numeric columns
+    """
+    digest = dataset_cache.digest(path)
+    state = cached_state(digest, output_dir)
+    if state is not None:
+        return state
+
+    with _states_lock:
+        build_lock = _build_locks.setdefault(digest, threading.Lock())
+    try:
+        with build_lock:
+            state = cached_state(digest, output_dir)
+            if state is not None:
+                return state
+
+            df = load_dataset(path)
+            data = load_dataset(path, drop_empty=True)
+            base = linked_base(output_dir)
+            if base is not None:
+                base_path, base_output_dir = base
+                base_state = cached_state(dataset_cache.digest(base_path), base_output_dir)
+                if base_state is not None and base_state['target'] == target:
+                    try:
+                        state = update_state(base_state, base_path, df, data, digest)
+                    except ValueError as e:
+                        logger.warning(f"Row delta against {base_path} failed, recomputing: {e}")
+                    if state is not None:
+                        state['delta']['base_output_dir'] = base_output_dir
+            if state is None:
+                state = build_state(df, data, target, digest)
+            if state is not None:
+                os.makedirs(output_dir, exist_ok=True)
+                joblib.dump(state, os.path.join(output_dir, STATE_FILE))
+                _remember(digest, state)
+    finally:
+        with _states_lock:
+            _build_locks.pop(digest, None)
+    return state
+
+
+def clear_state_cache():
+    """Forget all row states kept in memory (files on disk are kept)"""
+    with _states_lock:
+        _states.clear()
+
+
+def base_scaled_rows(delta, data, kernel, n_checked=64):
+    """
+    Scaled rows of the base version for the rows kept in the new version
+
+    They are gathered from the base's memory-mapped ``2_scaled_data.npy``,
+    so only the kept rows are paged in. A sample of them is transformed again
+    from the new data and must match exactly, which guards against an
+    artifact left by another dataset in a shared output directory.
+
+    Args:
+        delta (dict): The 'delta' entry of a row state
+        data (pandas.DataFrame): New dataset with all-NaN columns dropped
+        kernel (MedianMinMaxScaler): Preprocessing kernel, equal to the base version's
+        n_checked (int): Number of kept rows to verify
+
+    Returns:
+        numpy.ndarray or None: Scaled kept rows in new-version order, or None
+        when the base artifact cannot be used
+    """
+    table = find_table(delta['base_output_dir'], "2_scaled_data")
+    if table is None or not table.endswith(".npy"):
+        return None
+    with open(table + COLUMNS_SUFFIX) as f:
+        meta = json.load(f)
+    matrix = np.load(table, mmap_mode='r')
+    columns = list(kernel.feature_names_in_)
+    # Artefak disk berisi nilai float, bukan kode compact
+    if (kernel.compact or meta['columns'] != [str(col) for col in columns] or matrix.dtype != kernel.dtype or
+            matrix.shape[0] != delta['base_n_rows']):
+        return None
+
+    rows = matrix[delta['base_rows']]
+    sample = np.unique(np.linspace(0, len(rows) - 1, min(n_checked, len(rows))).astype(np.intp))
+    expected = kernel.transform(data[columns].iloc[delta['kept_rows'][sample]])
+    if not np.array_equal(rows[sample], expected, equal_nan=True):
+        logger.warning(f"{table} does not match the base dataset, transforming all rows")
+        return None
+    return rows
+
+
+@timed_stage('derive')
+def derive_preprocessing(path, output_dir="output", dtype=None):
+    """
+    Build the step 2 preprocessing artifact from the row delta instead of refitting
+
+    Medians and ranges come from the updated value sketches. When they did
+    not change, the scaled rows of the base version are reused and only the
+    added rows are transformed; otherwise all rows are transformed with the
+    new parameters, which still skips fitting.
+
+    Args:
+        path (str): Path to CSV file
+        output_dir (str): Output directory of this version
+        dtype (str): Buffer type of the scaled matrix (default PREPROCESS_DTYPE)
+
+    Returns:
+        dict or None: Fitted artifact, or None when the dataset is not a
+        derived version
+    """
+    from preprocessing import build_artifact
+
+    if linked_base(output_dir) is None:
+        return None
+    state = load_state(path, output_dir)
+    if state is None or state['delta'] is None:
+        return None
+
+    delta = state['delta']
+    kernel = scaling_kernel(state, dtype)
+    columns = list(kernel.feature_names_in_)
+    data = load_dataset(path, drop_empty=True)[columns]
+    kept = base_scaled_rows(delta, data, kernel) if 'scaling' in delta['unchanged'] else None
+
+    if kept is not None:
+        X_scaled = np.empty((len(data), len(columns)), dtype=kernel.dtype, order='F')
+        X_scaled[delta['kept_rows']] = kept
+        X_scaled[delta['added_rows']] = kernel.transform(data.iloc[delta['added_rows']])
+    else:
+        X_scaled = kernel.transform(data)
+
+    return build_artifact(columns, kernel, X_scaled, state['dataset_digest'])
+
+
+def delta_summary(state):
+    """
+    Describe how a derived version was computed, for API results
+
+    Args:
+        state (dict): Row state
+
+    Returns:
+        dict or None: Row counts and reused stages, or None when the state
+        was computed from scratch
+    """
+    if state is None or state['delta'] is None:
+        return None
+    delta = state['delta']
+    return {
+        'base_digest': delta['base_digest'],
+        'rows_added': delta['rows_added'],
+        'rows_removed': delta['rows_removed'],
+        'rows_kept': delta['rows_kept'],
+        'unchanged': delta['unchanged']
+    }
@@ -0,0 +1,287 @@
+import io
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from dataset_cache import NA_VALUES
+from schemas import header_columns, read_csv
+from instrumentation import stage_timer
+from kernels import MedianMinMaxScaler
+from training import MODEL_FILE
+
+logger = logging.getLogger(__name__)
+
+# Record tunggal yang datang bersamaan digabung sampai MAX_BATCH baris atau MAX_WAIT detik
+MAX_BATCH = 64
+MAX_WAIT = 0.005
+# Bundle model yang disimpan di memori per worker
+MAX_BUNDLES = 4
+
+_bundles = OrderedDict()
+_bundles_lock = threading.Lock()
+
+
+def feature_scaler(preprocessor, features):
+    """
+    Restrict a fitted step 2 scaler to the features a model was trained on
+
+    Args:
+        preprocessor (MedianMinMaxScaler): Scaler fitted on all numeric columns
+        features (list): Selected feature names, in model order
+
+    Returns:
+        MedianMinMaxScaler: Fitted scaler over ``features`` only, with dense output
+
+    Raises:
+        ValueError: If a feature was not fitted by the preprocessor
+    """
+    positions = pd.Index(preprocessor.feature_names_in_.astype(str)).get_indexer([str(name) for name in features])
+    if (positions < 0).any():
+        raise ValueError("Selected features are not numeric columns of the preprocessing artifact")
+    return MedianMinMaxScaler.from_stats(features, preprocessor.statistics_[positions],
+                                         preprocessor.data_min_[positions], preprocessor.data_max_[positions],
+                                         preprocessor.n_samples_seen_, preprocessor.dtype, sparse_density=0)
+
+
+def load_bundle(output_dir="output"):
+    """
+    Load the step 5 model bundle of a dataset, once per worker
+
+    The bundle stays in memory until its file changes (step 5 ran again).
+
+    Args:
+        output_dir (str): Output directory of the dataset
+
+    Returns:
+        dict: Bundle written by step 5 (model, estimator, preprocessor,
+            features, target, classes, ...)
+
+    Raises:
+        FileNotFoundError: If step 5 has not run for this dataset
+        ValueError: If the bundle predates the inference path
+    """
+    model_file = os.path.join(output_dir, MODEL_FILE)
+    mtime = os.stat(model_file).st_mtime_ns
+    with _bundles_lock:
+        cached = _bundles.get(model_file)
+        if cached is not None and cached[0] == mtime:
+            _bundles.move_to_end(model_file)
+            return cached[1]
+
+    bundle = joblib.load(model_file)
+    if 'preprocessor' not in bundle:
+        raise ValueError("Model bundle has no preprocessing, run step 5 again")
+    with _bundles_lock:
+        _bundles[model_file] = (mtime, bundle)
+        _bundles.move_to_end(model_file)
+        while len(_bundles) > MAX_BUNDLES:
+            _bundles.popitem(last=False)
+    return bundle
+
+
+def clear_bundle_cache():
+    """Forget all model bundles kept in memory"""
+    with _bundles_lock:
+        _bundles.clear()
+
+
+def feature_matrix(frame, features):
+    """
+    Raw feature values in model order, missing markers as NaN
+
+    Args:
+        frame (pandas.DataFrame): Input rows, extra columns are ignored
+        features (list): Feature names the model expects
+
+    Returns:
+        numpy.ndarray: Float matrix of shape (rows, features)
+
+    Raises:
+        ValueError: If a feature column is absent or not numeric
+    """
+    if frame.empty:
+        raise ValueError("No records to score")
+    missing = [name for name in features if name not in frame.columns]
+    if missing:
+        raise ValueError(f"Missing feature columns: {missing}")
+    # Nilai kosong / '?' diimputasi median seperti saat training
+    values = frame[list(features)].replace(NA_VALUES, np.nan)
+    try:
+        return values.apply(pd.to_numeric).to_numpy(dtype=float)
+    except (TypeError, ValueError):
+        raise ValueError("Feature values must be numeric")
+
+
+def records_matrix(records, features):
+    """
+    Feature matrix of JSON records (one dict per patient)
+
+    Raises:
+        ValueError: If the records are malformed
+    """
+    if isinstance(records, dict):
+        records = [records]
+    if not isinstance(records, list) or not all(isinstance(record, dict) for record in records):
+        raise ValueError("records must be an object or a list of objects")
+    return feature_matrix(pd.DataFrame.from_records(records), features)
+
+
+def csv_matrix(content, features):
+    """
+    Feature matrix of CSV bytes with a header row
+
+    Raises:
+        ValueError: If the CSV cannot be parsed or lacks feature columns
+    """
+    buffer = io.BytesIO(content)
+    header = header_columns(buffer)
+    missing = [name for name in features if name not in header]
+    if header and missing:
+        raise ValueError(f"Missing feature columns: {missing}")
+    # Hanya kolom fitur yang dikonversi
+    wanted = set(features)
+    usecols = [name for name in header if name in wanted] or None
+    try:
+        frame = read_csv(buffer, na_values=NA_VALUES, usecols=usecols)
+    except (pd.errors.ParserError, pd.errors.EmptyDataError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid CSV: {e}")
+    return feature_matrix(frame, features)
+
+
+def predict_rows(bundle, X):
+    """
+    Impute, scale and score raw feature rows in one vectorized call
+
+    Args:
+        bundle (dict): Output of load_bundle
+        X (numpy.ndarray): Raw features in bundle['features'] order
+
+    Returns:
+        tuple: (predicted labels, class probabilities of shape (rows, classes))
+    """
+    with stage_timer('predict', step='predict'):
+        proba = bundle['estimator'].predict_proba(bundle['preprocessor'].transform(X))
+        return bundle['estimator'].classes_[proba.argmax(axis=1)], proba
+
+
+def prediction_records(bundle, labels, proba):
+    """One dict per row with the predicted label and the probability of every class"""
+    classes = [str(klass) for klass in bundle['estimator'].classes_.tolist()]
+    return [{'prediction': label, 'probabilities': dict(zip(classes, row))}
+            for label, row in zip(labels.tolist(), proba.tolist())]
+
+
+class MicroBatcher:
+    """
+    Coalesce concurrent small scoring requests into vectorized batches
+
+    Requests are queued with their bundle; a background thread waits at most
+    ``max_wait`` seconds after the first queued request (or until
+    ``max_batch`` rows are waiting), stacks the rows of every request for the
+    same bundle and scores them with a single ``predict_rows`` call. The
+    thread is started lazily per process, so it is safe under pre-fork
+    servers.
+    """
+
+    def __init__(self, max_batch=MAX_BATCH, max_wait=MAX_WAIT):
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._pending = deque()
+        self._rows = 0
+        self._cond = threading.Condition()
+        self._pid = None
+        self._batches = 0
+        self._records = 0
+
+    def _ensure_worker(self):
+        if self._pid != os.getpid():
+            self._pending.clear()
+            self._rows = 0
+            threading.Thread(target=self._run, name="predict-batcher", daemon=True).start()
+            self._pid = os.getpid()
+
+    def submit(self, bundle, X):
+        """
+        Queue rows for scoring
+
+        Args:
+            bundle (dict): Output of load_bundle
+            X (numpy.ndarray): Raw feature rows
+
+        Returns:
+            concurrent.futures.Future: Resolves to (labels, probabilities) of X
+        """
+        future = Future()
+        with self._cond:
+            self._ensure_worker()
+            self._pending.append((bundle, X, future))
+            self._rows += len(X)
+            self._cond.notify()
+        return future
+
+    def _take(self):
+        with self._cond:
+            while not self._pending:
+                self._cond.wait()
+            deadline = time.monotonic() + self.max_wait
+            while self._rows < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch, rows, taken = [], 0, 0
+            while self._pending and (not batch or rows + len(self._pending[0][1]) <= self.max_batch):
+                item = self._pending.popleft()
+                taken += len(item[1])
+                # Future yang sudah dibatalkan pemanggil tidak di-score
+                if item[2].set_running_or_notify_cancel():
+                    batch.append(item)
+                    rows += len(item[1])
+            self._rows -= taken
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._take()
+            if not batch:
+                continue
+            # Request untuk model berbeda di-score terpisah
+            groups = OrderedDict()
+            for bundle, X, future in batch:
+                groups.setdefault(id(bundle), (bundle, []))[1].append((X, future))
+            for bundle, items in groups.values():
+                self._score(bundle, items)
+
+    def _score(self, bundle, items):
+        try:
+            labels, proba = predict_rows(bundle, np.vstack([X for X, _ in items]))
+        except Exception as e:
+            logger.error(f"Batched prediction failed: {e}", exc_info=True)
+            for _, future in items:
+                future.set_exception(e)
+            return
+        with self._cond:
+            self._batches += 1
+            self._records += len(labels)
+        start = 0
+        for X, future in items:
+            future.set_result((labels[start:start + len(X)], proba[start:start + len(X)]))
+            start += len(X)
+
+    def stats(self):
+        """Batches scored, records scored and mean batch size in this process"""
+        with self._cond:
+            return {
+                'batches': self._batches,
+                'records': self._records,
+                'mean_batch': self._records / self._batches if self._batches else 0.0,
+                'max_batch': self.max_batch,
+                'max_wait_ms': self.max_wait * 1000
+            }
@@ -0,0 +1,323 @@
+import contextvars
+import cProfile
+import functools
+import io
+import os
+import pstats
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# Bucket histogram Prometheus: detik per stage dan puncak memori per stage
+SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+BYTES_BUCKETS = tuple(2 ** power for power in range(16, 36, 2))
+
+PROFILE_TOP_FUNCTIONS = 30
+
+_session = contextvars.ContextVar("profile_session", default=None)
+_frames = threading.local()
+
+# Jumlah sesi profil aktif yang menyalakan tracemalloc
+_tracing_sessions = 0
+_tracing_lock = threading.Lock()
+
+
+class _Histogram:
+    """Cumulative Prometheus histogram for one label set"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+class StageMetrics:
+    """
+    Per-process registry of stage timings and peak memory
+
+    Every worker process keeps its own numbers; scrape each worker (or run a
+    single worker) to see all of them.
+    """
+
+    def __init__(self):
+        self._seconds = {}
+        self._peak_bytes = {}
+        self._lock = threading.Lock()
+
+    def observe(self, step, stage, seconds, peak_bytes=None):
+        """
+        Record one finished stage
+
+        Args:
+            step (str): Step label (``1``-``4``, ``shared``, ``stream``)
+            stage (str): Stage label (parse, preprocess, anova, rus, ...)
+            seconds (float): Wall-clock duration
+            peak_bytes (int): Peak traced memory above the stage's start, if
+                tracemalloc was tracing
+        """
+        key = (step, stage)
+        with self._lock:
+            self._seconds.setdefault(key, _Histogram(SECONDS_BUCKETS)).observe(seconds)
+            if peak_bytes is not None:
+                self._peak_bytes.setdefault(key, _Histogram(BYTES_BUCKETS)).observe(peak_bytes)
+
+    def clear(self):
+        with self._lock:
+            self._seconds.clear()
+            self._peak_bytes.clear()
+
+    def render(self):
+        """
+        Format all histograms in the Prometheus text exposition format
+
+        Returns:
+            str: Metrics text
+        """
+        lines = []
+        with self._lock:
+            for name, help_text, histograms in (
+                ("pipeline_stage_seconds", "Wall-clock seconds per pipeline stage", self._seconds),
+                ("pipeline_stage_peak_memory_bytes",
+                 "Peak traced memory per pipeline stage (only while tracemalloc is tracing)", self._peak_bytes)
+            ):
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} histogram")
+                for (step, stage), histogram in sorted(histograms.items()):
+                    labels = f'step="{step}",stage="{stage}"'
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+                    lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                    lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+                    lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = StageMetrics()
+
+
+def format_gauge(name, help_text, values):
+    """
+    Format one Prometheus gauge
+
+    Args:
+        name (str): Metric name
+        help_text (str): HELP line
+        values (dict or number): A single value, or label string -> value
+            (e.g. ``{'status="done"': 3}``)
+
+    Returns:
+        str: Metrics text
+    """
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+    if isinstance(values, dict):
+        lines += [f"{name}{{{labels}}} {value}" for labels, value in sorted(values.items())]
+    else:
+        lines.append(f"{name} {values}")
+    return "\n".join(lines) + "\n"
+
+
+def process_memory():
+    """
+    Current and peak resident memory of this process
+
+    Returns:
+        tuple: (current RSS bytes or None, peak RSS bytes)
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    try:
+        with open("/proc/self/statm") as f:
+            current = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        current = None
+    return current, peak
+
+
+@contextmanager
+def stage_timer(stage, step="shared"):
+    """
+    Time a block and record it as a pipeline stage
+
+    When tracemalloc is tracing, the peak memory allocated above the level at
+    the start of the block is recorded too. tracemalloc is process wide, so
+    peaks of stages running concurrently in other threads overlap.
+
+    Args:
+        stage (str): Stage label
+        step (str): Step label
+    """
+    stack = getattr(_frames, "stack", None)
+    if stack is None:
+        stack = _frames.stack = []
+
+    tracing = tracemalloc.is_tracing()
+    frame = {'child_peak': 0}
+    if tracing:
+        frame['start'], frame['outer_peak'] = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+    stack.append(frame)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        stack.pop()
+        peak_bytes = None
+        if tracing and tracemalloc.is_tracing():
+            _, peak = tracemalloc.get_traced_memory()
+            absolute_peak = max(peak, frame['child_peak'])
+            peak_bytes = max(0, absolute_peak - frame['start'])
+            # Puncak stage induk sebelum stage ini mulai hilang karena reset_peak, teruskan ke induk
+            if stack:
+                stack[-1]['child_peak'] = max(stack[-1]['child_peak'], frame['outer_peak'], absolute_peak)
+
+        metrics.observe(step, stage, seconds, peak_bytes)
+        session = _session.get()
+        if session is not None:
+            session.record(step, stage, seconds, peak_bytes)
+
+
+def timed_stage(stage, step="shared"):
+    """
+    Decorator form of ``stage_timer``
+
+    Args:
+        stage (str): Stage label
+        step (str): Step label
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage_timer(stage, step):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class ProfileSession:
+    """
+    Collect a per-stage breakdown and a cProfile summary for one run
+
+    Used as a context manager around a pipeline run. Only the calling thread
+    is profiled, so ``pipeline.run_dag`` runs the stages of a profiled run in
+    that thread (see ``profiling``). When another profiler is already active
+    (another profiled run, a debugger) the cProfile summary is skipped and
+    only the stage breakdown is collected. tracemalloc is switched on for the
+    duration if it was off.
+    """
+
+    def __init__(self):
+        self.stages = []
+        self._lock = threading.Lock()
+        self._token = None
+        self._profiler = None
+        self._started_tracing = False
+
+    def __enter__(self):
+        global _tracing_sessions
+        with _tracing_lock:
+            if _tracing_sessions or not tracemalloc.is_tracing():
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                _tracing_sessions += 1
+                self._started_tracing = True
+        self._token = _session.set(self)
+        self._profiler = _start_profiler()
+        return self
+
+    def __exit__(self, *exc):
+        global _tracing_sessions
+        if self._profiler is not None:
+            self._profiler.disable()
+        _session.reset(self._token)
+        if self._started_tracing:
+            with _tracing_lock:
+                _tracing_sessions -= 1
+                if not _tracing_sessions:
+                    tracemalloc.stop()
+        return False
+
+    def record(self, step, stage, seconds, peak_bytes):
+        with self._lock:
+            self.stages.append({
+                'step': step,
+                'stage': stage,
+                'seconds': round(seconds, 6),
+                'peak_memory_bytes': peak_bytes
+            })
+
+    def summary(self, limit=PROFILE_TOP_FUNCTIONS):
+        """
+        Per-stage breakdown plus the functions with the highest cumulative time
+
+        Args:
+            limit (int): Number of cProfile rows to return
+
+        Returns:
+            dict: JSON-ready breakdown
+        """
+        breakdown = {}
+        for entry in self.stages:
+            key = f"{entry['step']}:{entry['stage']}"
+            total = breakdown.setdefault(key, {'step': entry['step'], 'stage': entry['stage'], 'calls': 0,
+                                               'seconds': 0.0, 'peak_memory_bytes': 0})
+            total['calls'] += 1
+            total['seconds'] = round(total['seconds'] + entry['seconds'], 6)
+            total['peak_memory_bytes'] = max(total['peak_memory_bytes'], entry['peak_memory_bytes'] or 0)
+
+        functions = []
+        if self._profiler is not None:
+            stats = pstats.Stats(self._profiler, stream=io.StringIO())
+            stats.sort_stats("cumulative")
+            for func in stats.fcn_list[:limit]:
+                primitive_calls, calls, total_time, cumulative_time, _ = stats.stats[func]
+                filename, line, name = func
+                functions.append({
+                    'function': f"{os.path.basename(filename)}:{line}({name})" if line else name,
+                    'calls': calls,
+                    'primitive_calls': primitive_calls,
+                    'total_seconds': round(total_time, 6),
+                    'cumulative_seconds': round(cumulative_time, 6)
+                })
+
+        return {
+            'stages': sorted(breakdown.values(), key=lambda item: -item['seconds']),
+            'cprofile': functions,
+            'cprofile_skipped': self._profiler is None
+        }
+
+
+def profiling():
+    """True when the current context belongs to a ProfileSession"""
+    return _session.get() is not None
+
+
+def _profiler_active():
+    # Sejak Python 3.12 cProfile memakai sys.monitoring: satu profiler untuk seluruh proses
+    monitoring = getattr(sys, "monitoring", None)
+    if monitoring is not None:
+        return monitoring.get_tool(monitoring.PROFILER_ID) is not None
+    return sys.getprofile() is not None
+
+
+def _start_profiler():
+    """Enable cProfile for the calling thread, or return None when another profiler is active"""
+    if _profiler_active():
+        return None
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Profiler lain mulai di antara pengecekan dan enable
+        return None
+    return profiler
@@ -0,0 +1,224 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Status job
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    stage TEXT,
+    params TEXT,
+    result TEXT,
+    error TEXT,
+    worker_pid INTEGER,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+)
+"""
+
+
+class QueueFullError(Exception):
+    """Raised when the number of unfinished jobs reaches the queue limit"""
+
+
+class JobQueue:
+    """
+    Bounded background job queue with a SQLite-backed job store
+
+    Jobs execute on a thread pool inside the process that accepted them, while
+    their status, progress, result and timing live in SQLite so that any
+    worker process sharing the database file can answer status polls. No
+    external broker is needed.
+    """
+
+    def __init__(self, db_path="output/jobs.sqlite3", max_workers=2, max_pending=32,
+                 retention_seconds=3600):
+        self.db_path = db_path
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.retention_seconds = retention_seconds
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(_SCHEMA)
+        self.recover_orphans()
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _get_executor(self):
+        # Thread pool dibuat per proses (aman untuk worker gunicorn hasil fork)
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job")
+                self._pid = os.getpid()
+            return self._executor
+
+    def _update(self, job_id, **fields):
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self._connect() as conn:
+            conn.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+
+    def submit(self, kind, func, params=None):
+        """
+        Enqueue a job and return immediately
+
+        Args:
+            kind (str): Job type, e.g. the processing step id
+            func (callable): Called as func(report); report(progress, stage)
+                updates the job's progress (0..1) and current stage name.
+                The return value must be JSON serializable.
+            params (dict): Job parameters stored for reference
+
+        Returns:
+            str: Job id
+
+        Raises:
+            QueueFullError: If too many jobs are queued or running
+        """
+        self.prune()
+        with self._connect() as conn:
+            unfinished = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status IN (?, ?)", (QUEUED, RUNNING)
+            ).fetchone()[0]
+            if unfinished >= self.max_pending:
+                raise QueueFullError(f"Job queue is full ({unfinished} unfinished jobs)")
+
+            job_id = uuid.uuid4().hex
+            conn.execute(
+                "INSERT INTO jobs (id, kind, status, params, worker_pid, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, kind, QUEUED, json.dumps(params or {}), os.getpid(), time.time())
+            )
+
+        self._get_executor().submit(self._run, job_id, func)
+        logger.info(f"Job {job_id} ({kind}) queued")
+        return job_id
+
+    def _run(self, job_id, func):
+        self._update(job_id, status=RUNNING, started_at=time.time())
+
+        def report(progress, stage=None):
+            self._update(job_id, progress=float(progress), stage=stage)
+
+        try:
+            result = func(report)
+            self._update(job_id, status=DONE, progress=1.0, result=json.dumps(result),
+                         finished_at=time.time())
+            logger.info(f"Job {job_id} finished")
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {str(e)}", exc_info=True)
+            self._update(job_id, status=FAILED, error=str(e), finished_at=time.time())
+
+    def get(self, job_id):
+        """
+        Return the status of a job
+
+        Args:
+            job_id (str): Job id
+
+        Returns:
+            dict or None: Status, progress, result, error and timing, or None if unknown
+        """
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+
+        created, started, finished = row['created_at'], row['started_at'], row['finished_at']
+        now = time.time()
+        job = {
+            'job_id': row['id'],
+            'kind': row['kind'],
+            'status': row['status'],
+            'progress': row['progress'],
+            'stage': row['stage'],
+            'params': json.loads(row['params']) if row['params'] else {},
+            'timing': {
+                'created_at': created,
+                'started_at': started,
+                'finished_at': finished,
+                'queue_seconds': ((started or now) - created),
+                'run_seconds': ((finished or now) - started) if started else None
+            }
+        }
+        if row['status'] == DONE:
+            job['result'] = json.loads(row['result'])
+        if row['status'] == FAILED:
+            job['error'] = row['error']
+        return job
+
+    def stats(self):
+        """
+        Count jobs per status
+
+        Returns:
+            dict: Status -> number of jobs
+        """
+        with self._connect() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    def prune(self):
+        """Delete finished jobs older than the retention period"""
+        cutoff = time.time() - self.retention_seconds
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?", (DONE, FAILED, cutoff)
+            )
+
+    def recover_orphans(self):
+        """Fail unfinished jobs whose owning process no longer exists (run at startup)"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, worker_pid FROM jobs WHERE status IN (?, ?)", (QUEUED, RUNNING)
+            ).fetchall()
+        for job_id, pid in rows:
+            if pid != os.getpid() and pid_alive(pid):
+                continue
+            self._update(job_id, status=FAILED, error="Worker process exited before the job finished",
+                         finished_at=time.time())
+
+
+def pid_alive(pid):
+    """
+    Check whether a process id refers to a running process
+    """
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
@@ -0,0 +1,152 @@
+import gzip
+import math
+import os
+
+import numpy as np
+import pandas as pd
+from flask import request
+from flask.json.provider import DefaultJSONProvider, _default
+
+from serialization import column_values, frame_records, series_dict, to_native
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+GZIP_MIN_BYTES = int(os.environ.get("GZIP_MIN_BYTES", "1024"))
+GZIP_LEVEL = 6
+
+
+def encode_default(obj):
+    """
+    Convert objects the JSON encoder does not know natively
+
+    Args:
+        obj: numpy array/scalar, pandas object or anything Flask handles
+
+    Returns:
+        JSON-ready Python value
+    """
+    if isinstance(obj, pd.DataFrame):
+        return frame_records(obj)
+    if isinstance(obj, pd.Series):
+        return series_dict(obj)
+    if isinstance(obj, pd.Index):
+        return column_values(obj.to_numpy())
+    if isinstance(obj, np.ndarray):
+        if obj.ndim == 1:
+            return column_values(obj)
+        return [encode_default(row) for row in obj]
+    if isinstance(obj, np.generic) or obj is pd.NA or obj is pd.NaT:
+        return to_native(obj)
+    return _default(obj)
+
+
+def finite_floats(obj):
+    """
+    Replace NaN and infinite floats in nested dicts/lists with None
+
+    The standard library encoder writes float values (np.float64 included)
+    itself as ``NaN``/``Infinity``, which is not valid JSON; orjson writes null.
+
+    Args:
+        obj: Data to serialize
+
+    Returns:
+        The same structure with non-finite floats as None
+    """
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {key: finite_floats(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [finite_floats(value) for value in obj]
+    return obj
+
+
+class NumpyJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider that encodes numpy and pandas objects directly
+
+    Uses orjson when it is installed (arrays are encoded natively, NaN becomes
+    null) and falls back to the standard library encoder otherwise. Key
+    sorting and debug indentation follow Flask's defaults.
+    """
+
+    default = staticmethod(encode_default)
+
+    def _orjson_options(self, indent=False):
+        options = (orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS |
+                   orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS)
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dumps_bytes(self, obj, indent=False):
+        """
+        Serialize to UTF-8 bytes
+
+        Args:
+            obj: Data to serialize
+            indent (bool): Pretty-print with two spaces
+
+        Returns:
+            bytes: JSON document
+        """
+        if orjson is not None:
+            try:
+                return orjson.dumps(obj, default=self.default, option=self._orjson_options(indent))
+            except orjson.JSONEncodeError:
+                # mis. integer di luar 64 bit, serahkan ke encoder standar
+                pass
+        obj = finite_floats(obj)
+        if indent:
+            return super().dumps(obj, indent=2).encode()
+        return super().dumps(obj, separators=(",", ":")).encode()
+
+    def dumps(self, obj, **kwargs):
+        if orjson is not None and not kwargs:
+            return self.dumps_bytes(obj).decode()
+        return super().dumps(finite_floats(obj), **kwargs)
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(self.dumps_bytes(obj, indent) + b"\n", mimetype=self.mimetype)
+
+
+def compress_response(response):
+    """
+    Gzip a JSON response when the client accepts it and it is large enough
+
+    Meant to be registered with ``app.after_request``.
+
+    Args:
+        response (flask.Response): Outgoing response
+
+    Returns:
+        flask.Response: The same response, compressed in place if applicable
+    """
+    if response.direct_passthrough or not response.is_json:
+        return response
+    response.vary.add('Accept-Encoding')
+    if (response.status_code < 200 or response.status_code >= 300 or
+            'Content-Encoding' in response.headers or
+            'gzip' not in request.headers.get('Accept-Encoding', '').lower()):
+        return response
+
+    body = response.get_data()
+    if len(body) < GZIP_MIN_BYTES:
+        return response
+
+    response.set_data(gzip.compress(body, compresslevel=GZIP_LEVEL))
+    response.headers['Content-Encoding'] = 'gzip'
+    return response
@@ -0,0 +1,571 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# Tipe buffer hasil preprocessing bila run tidak memberi opsi dtype: float64 (sama persis dengan sklearn),
+# float32 (setengah memori) atau compact (kolom bernilai bulat sebagai kode int8, sisanya float32)
+DEFAULT_DTYPE = os.environ.get("PREPROCESS_DTYPE", "float64")
+COMPACT = "compact"
+DTYPES = ("float64", "float32", COMPACT)
+INT8_MIN, INT8_MAX = np.iinfo(np.int8).min, np.iinfo(np.int8).max
+
+# Kolom dengan proporsi nilai non-nol (setelah scaling) <= SPARSE_DENSITY disimpan sebagai CSC;
+# SPARSE_DENSITY=0 mematikan jalur sparse
+SPARSE_DENSITY = float(os.environ.get("SPARSE_DENSITY", "0.1"))
+
+
+def check_dtype(dtype=None):
+    """
+    Validate a preprocessing buffer type
+
+    Args:
+        dtype (str): float64, float32 or compact (default PREPROCESS_DTYPE)
+
+    Returns:
+        str: Canonical buffer type name
+
+    Raises:
+        ValueError: If the buffer type is unknown
+    """
+    dtype = dtype or DEFAULT_DTYPE
+    try:
+        name = COMPACT if isinstance(dtype, str) and dtype == COMPACT else np.dtype(dtype).name
+    except TypeError:
+        name = None
+    if name not in DTYPES:
+        raise ValueError(f"dtype must be one of {list(DTYPES)}")
+    return name
+
+
+class BlockMatrix:
+    """
+    Scaled feature matrix stored as typed column blocks
+
+    Subclasses keep every column in one of their blocks and implement
+    ``column``, ``_rows``, ``_select`` and ``_reduce``. Selecting columns
+    (``X[:, cols]``) shares the blocks. Selecting rows (``X[rows]``,
+    ``X[rows, cols]``) and ``numpy.asarray(X)`` give a dense array, so code
+    written for ndarrays keeps working.
+    """
+
+    ndim = 2
+
+    def __len__(self):
+        return self.shape[0]
+
+    @property
+    def size(self):
+        return self.shape[0] * self.shape[1]
+
+    def __array__(self, dtype=None, copy=None):
+        dense = self.to_dense()
+        return dense if dtype is None else dense.astype(dtype, copy=False)
+
+    def to_dense(self):
+        """All values as one column-major ndarray (float32 for compact columns)"""
+        return self._rows(slice(None))
+
+    def __getitem__(self, key):
+        rows, cols = key if isinstance(key, tuple) else (key, slice(None))
+        matrix = self
+        if not (isinstance(cols, slice) and cols == slice(None)):
+            idx = np.arange(self.shape[1])[cols]
+            if np.ndim(idx) == 0:
+                return self.column(idx)[rows]
+            matrix = self._select(idx)
+        if isinstance(rows, slice) and rows == slice(None):
+            return matrix
+        if not isinstance(rows, slice) and np.ndim(rows) == 0:
+            return matrix._rows([rows])[0]
+        return matrix._rows(rows)
+
+    def min(self, axis=0):
+        """Minimum per column (only ``axis=0``)"""
+        if axis != 0:
+            raise ValueError(f"{type(self).__name__} only reduces over rows (axis=0)")
+        return self._reduce('min')
+
+    def max(self, axis=0):
+        """Maximum per column (only ``axis=0``)"""
+        if axis != 0:
+            raise ValueError(f"{type(self).__name__} only reduces over rows (axis=0)")
+        return self._reduce('max')
+
+    def class_moments(self, labels, n_classes):
+        """
+        Per-class sums and total sums of squares of every column
+
+        Args:
+            labels (numpy.ndarray): Class position (0 .. n_classes - 1) of every row
+            n_classes (int): Number of classes
+
+        Returns:
+            tuple: (sums of shape (n_classes, columns), sums of squares per column)
+        """
+        class_sum = np.empty((n_classes, self.shape[1]))
+        sumsq = np.empty(self.shape[1])
+        for j in range(self.shape[1]):
+            values = self.column(j)
+            class_sum[:, j] = np.bincount(labels, weights=values, minlength=n_classes)
+            sumsq[j] = values @ values
+        return class_sum, sumsq
+
+
+class CompactMatrix(BlockMatrix):
+    """
+    Scaled feature matrix with a storage type per column
+
+    Columns whose imputed values are integers in the int8 range (0/1 flags,
+    counts, ages) are kept as int8 codes plus the scaler's affine map:
+    ``code * scale + offset`` computed in float64 is exactly the value of the
+    float64 kernel. All other columns are kept as float32. Dense rows are
+    float64.
+    """
+
+    def __init__(self, codes, scale, offset, values, is_code, position):
+        self.codes = codes
+        self.scale = scale
+        self.offset = offset
+        self.values = values
+        self.is_code = is_code
+        self.position = position
+        self.shape = (len(codes), len(is_code))
+
+    @property
+    def nbytes(self):
+        """Bytes of the code and float32 buffers"""
+        return self.codes.nbytes + self.values.nbytes
+
+    def _select(self, idx):
+        return CompactMatrix(self.codes, self.scale, self.offset, self.values, self.is_code[idx],
+                             self.position[idx])
+
+    def column(self, j):
+        """Float64 values of column ``j``"""
+        p = self.position[j]
+        if self.is_code[j]:
+            return self.codes[:, p] * self.scale[p] + self.offset[p]
+        return self.values[:, p].astype(np.float64)
+
+    def _rows(self, rows):
+        codes, values = self.codes[rows], self.values[rows]
+        out = np.empty((len(codes), self.shape[1]), order='F')
+        for j, p in enumerate(self.position):
+            if self.is_code[j]:
+                np.multiply(codes[:, p], self.scale[p], out=out[:, j])
+                out[:, j] += self.offset[p]
+            else:
+                out[:, j] = values[:, p]
+        return out
+
+    def _reduce(self, name):
+        out = np.empty(self.shape[1])
+        for j, p in enumerate(self.position):
+            if self.is_code[j]:
+                # scale > 0, jadi kode terkecil/terbesar memberi nilai terkecil/terbesar
+                out[j] = getattr(self.codes[:, p], name)() * self.scale[p] + self.offset[p]
+            else:
+                out[j] = getattr(self.values[:, p], name)()
+        return out
+
+    def to_frame(self, columns, rows=slice(None)):
+        """
+        Rows as a data frame that keeps the compact types where they are exact
+
+        Codes whose map is the identity (0/1 flags, all-zero columns) stay
+        int8, other codes are decoded to float64 and float32 columns stay
+        float32.
+
+        Args:
+            columns (list): Column names
+            rows (slice or numpy.ndarray): Rows to take, default all
+
+        Returns:
+            pandas.DataFrame: Scaled values
+        """
+        data = {}
+        for j, p in enumerate(self.position):
+            if not self.is_code[j]:
+                data[j] = self.values[rows, p]
+            elif self.scale[p] == 1 and self.offset[p] == 0:
+                data[j] = self.codes[rows, p]
+            else:
+                data[j] = self.codes[rows, p] * self.scale[p] + self.offset[p]
+        frame = pd.DataFrame(data)
+        frame.columns = list(columns)
+        return frame
+
+
+class SparseMatrix(BlockMatrix):
+    """
+    Scaled feature matrix whose mostly-zero columns are a CSC block
+
+    Columns with few nonzero scaled values (indicator columns such as
+    ``STDs:*`` and ``Dx:*``, whose minimum is also their median) keep only
+    their nonzero values in a ``scipy.sparse`` CSC matrix; the other columns
+    stay in a column-major buffer. Both blocks hold exactly the values of the
+    dense kernel, in its dtype, and dense rows have that dtype too.
+    """
+
+    def __init__(self, dense, sparse, is_sparse, position):
+        self.dense = dense
+        self.sparse = sparse
+        self.is_sparse = is_sparse
+        self.position = position
+        self.dtype = dense.dtype
+        self.shape = (len(dense), len(is_sparse))
+
+    @property
+    def nbytes(self):
+        """Bytes of the dense buffer and of the CSC arrays"""
+        return self.dense.nbytes + self.sparse.data.nbytes + self.sparse.indices.nbytes + self.sparse.indptr.nbytes
+
+    @property
+    def density(self):
+        """Fraction of nonzero values in the sparse block"""
+        cells = self.sparse.shape[0] * self.sparse.shape[1]
+        return self.sparse.nnz / cells if cells else 0.0
+
+    def _select(self, idx):
+        return SparseMatrix(self.dense, self.sparse, self.is_sparse[idx], self.position[idx])
+
+    def _nonzero(self, p):
+        start, end = self.sparse.indptr[p], self.sparse.indptr[p + 1]
+        return self.sparse.indices[start:end], self.sparse.data[start:end]
+
+    def column(self, j):
+        """Float64 values of column ``j``"""
+        p = self.position[j]
+        if not self.is_sparse[j]:
+            return np.asarray(self.dense[:, p], dtype=np.float64)
+        out = np.zeros(self.shape[0])
+        indices, data = self._nonzero(p)
+        out[indices] = data
+        return out
+
+    def _rows(self, rows):
+        dense = self.dense[rows]
+        out = np.empty((len(dense), self.shape[1]), dtype=self.dtype, order='F')
+        if (~self.is_sparse).any():
+            out[:, ~self.is_sparse] = dense[:, self.position[~self.is_sparse]]
+        if self.is_sparse.any():
+            block = self.sparse if isinstance(rows, slice) and rows == slice(None) else self.sparse[rows]
+            out[:, self.is_sparse] = block[:, self.position[self.is_sparse]].toarray()
+        return out
+
+    def _reduce(self, name):
+        out = np.empty(self.shape[1])
+        for j, p in enumerate(self.position):
+            if not self.is_sparse[j]:
+                out[j] = getattr(self.dense[:, p], name)()
+                continue
+            _, data = self._nonzero(p)
+            # Nol implisit ikut dihitung bila kolom punya nilai nol
+            candidates = [getattr(data, name)()] if data.size else []
+            if data.size < self.shape[0]:
+                candidates.append(0.0)
+            out[j] = getattr(np, name)(candidates)
+        return out
+
+    def class_moments(self, labels, n_classes):
+        """
+        Per-class sums and total sums of squares, from the nonzeros of sparse columns
+
+        Args:
+            labels (numpy.ndarray): Class position (0 .. n_classes - 1) of every row
+            n_classes (int): Number of classes
+
+        Returns:
+            tuple: (sums of shape (n_classes, columns), sums of squares per column)
+        """
+        class_sum = np.empty((n_classes, self.shape[1]))
+        sumsq = np.empty(self.shape[1])
+        for j, p in enumerate(self.position):
+            if self.is_sparse[j]:
+                indices, values = self._nonzero(p)
+                values = np.asarray(values, dtype=np.float64)
+                labels_j = labels[indices]
+            else:
+                values, labels_j = self.column(j), labels
+            class_sum[:, j] = np.bincount(labels_j, weights=values, minlength=n_classes)
+            sumsq[j] = values @ values
+        return class_sum, sumsq
+
+    def to_frame(self, columns, rows=slice(None)):
+        """
+        Rows as a dense data frame of the kernel dtype
+
+        Args:
+            columns (list): Column names
+            rows (slice or numpy.ndarray): Rows to take, default all
+
+        Returns:
+            pandas.DataFrame: Scaled values
+        """
+        frame = pd.DataFrame(self._rows(rows), copy=False)
+        frame.columns = list(columns)
+        return frame
+
+
+def _int8_valued(observed):
+    """Whether observed (non-NaN) values are all integers in the int8 range"""
+    return bool(observed.size == 0 or (observed.min() >= INT8_MIN and observed.max() <= INT8_MAX
+                                       and np.array_equal(np.trunc(observed), observed)))
+
+
+def _fill_scale(values, median, scale, offset):
+    missing = np.isnan(values)
+    if missing.any():
+        values[missing] = median
+    values *= scale
+    values += offset
+
+
+def _leading(buffer, n_cols):
+    # Slot yang tidak terpakai dilepas dengan menyalin kolom yang terisi saja
+    return buffer if n_cols == buffer.shape[1] else np.array(buffer[:, :n_cols], order='F')
+
+
+class _DensePacker:
+    """
+    Collects the scaled float64/float32 columns of one pass
+
+    Columns are written to the front of a column-major buffer. A column with
+    at most ``density`` nonzero scaled values goes to the CSC parts instead
+    and its slot is reused by the next column.
+    """
+
+    def __init__(self, n_rows, n_cols, dtype, density):
+        self.out = np.empty((n_rows, n_cols), dtype=dtype, order='F')
+        self.limit = density * n_rows if density > 0 and n_rows else -1
+        self.index_dtype = np.int32 if n_rows <= np.iinfo(np.int32).max else np.int64
+        self.is_sparse = np.zeros(n_cols, dtype=bool)
+        self.position = np.empty(n_cols, dtype=np.intp)
+        self.indices, self.data = [], []
+        self.n_dense = 0
+
+    def add(self, j, values, observed, median, scale, offset):
+        slot = self.out[:, self.n_dense]
+        slot[...] = values
+        _fill_scale(slot, median, scale, offset)
+        if self.limit >= 0 and np.count_nonzero(slot) <= self.limit:
+            nonzero = np.flatnonzero(slot)
+            self.is_sparse[j] = True
+            self.position[j] = len(self.indices)
+            self.indices.append(nonzero.astype(self.index_dtype))
+            self.data.append(slot[nonzero])
+        else:
+            self.position[j] = self.n_dense
+            self.n_dense += 1
+
+    def finish(self):
+        if not self.is_sparse.any():
+            return self.out
+        from scipy import sparse
+
+        indptr = np.zeros(len(self.indices) + 1, dtype=np.int64)
+        np.cumsum([len(rows) for rows in self.indices], out=indptr[1:])
+        if indptr[-1] <= np.iinfo(self.index_dtype).max:
+            indptr = indptr.astype(self.index_dtype)
+        block = sparse.csc_matrix((np.concatenate(self.data), np.concatenate(self.indices), indptr),
+                                  shape=(len(self.out), len(self.indices)))
+        return SparseMatrix(_leading(self.out, self.n_dense), block, self.is_sparse, self.position)
+
+
+class _CompactPacker:
+    """Collects the int8 code and float32 columns of one pass"""
+
+    def __init__(self, n_rows, n_cols):
+        self.codes = np.empty((n_rows, n_cols), dtype=np.int8, order='F')
+        self.values = np.empty((n_rows, n_cols), dtype=np.float32, order='F')
+        self.is_code = np.zeros(n_cols, dtype=bool)
+        self.position = np.empty(n_cols, dtype=np.intp)
+        self.scale, self.offset = [], []
+        self.n_values = 0
+
+    def add(self, j, values, observed, median, scale, offset):
+        # Kolom jadi kode int8 bila nilainya dan mediannya bulat dalam rentang int8
+        if _int8_valued(observed) and median % 1 == 0 and INT8_MIN <= median <= INT8_MAX:
+            self.is_code[j] = True
+            self.position[j] = len(self.scale)
+            self.codes[:, len(self.scale)] = np.where(np.isnan(values), median, values)
+            self.scale.append(scale)
+            self.offset.append(offset)
+        else:
+            # Di-scale dalam float64, dibulatkan ke float32 sekali
+            buffer = np.array(values, dtype=float)
+            _fill_scale(buffer, median, scale, offset)
+            self.position[j] = self.n_values
+            self.values[:, self.n_values] = buffer
+            self.n_values += 1
+
+    def finish(self):
+        return CompactMatrix(_leading(self.codes, len(self.scale)), np.array(self.scale, dtype=float),
+                             np.array(self.offset, dtype=float), _leading(self.values, self.n_values),
+                             self.is_code, self.position)
+
+
+class MedianMinMaxScaler:
+    """
+    Median imputation followed by MinMax scaling in a single pass
+
+    Drop-in for ``SimpleImputer(strategy="median")`` + ``MinMaxScaler()``:
+    ``fit``, ``transform`` and ``fit_transform`` take a DataFrame or array and
+    the fitted parameters use the sklearn attribute names (``statistics_``,
+    ``data_min_``, ``data_max_``, ``data_range_``, ``scale_``, ``min_``).
+
+    Every input column is converted once. A single partition of its observed
+    values yields min, median and max, then the same copy is imputed and
+    scaled into a column-major buffer. With float64 the result is identical
+    to the sklearn pair. Columns without observed values are filled with 0
+    (sklearn's ``keep_empty_features=True``). With dtype ``compact`` the
+    output is a CompactMatrix instead.
+
+    With float64/float32, columns whose scaled values are at most
+    ``sparse_density`` nonzero go to a CSC block and the output is a
+    SparseMatrix; the values are the same as the dense buffer's.
+    """
+
+    # Kernel lama (sebelum mode compact dan jalur sparse) tidak punya atribut ini di pickle-nya
+    compact = False
+    sparse_density = 0.0
+
+    def __init__(self, dtype=None, sparse_density=None):
+        name = check_dtype(dtype)
+        self.compact = name == COMPACT
+        # Mode compact: kolom non-bulat disimpan float32
+        self.dtype = np.dtype(np.float32 if self.compact else name)
+        self.sparse_density = SPARSE_DENSITY if sparse_density is None else float(sparse_density)
+
+    @property
+    def mode(self):
+        """Buffer type name: float64, float32 or compact"""
+        return COMPACT if self.compact else self.dtype.name
+
+    @classmethod
+    def from_stats(cls, columns, medians, data_min, data_max, n_samples=None, dtype=None, sparse_density=None):
+        """
+        Build a fitted scaler from known column statistics
+
+        Args:
+            columns (list): Column names
+            medians (numpy.ndarray): Median per column
+            data_min (numpy.ndarray): Minimum per column
+            data_max (numpy.ndarray): Maximum per column
+            n_samples (int): Number of rows the statistics describe
+            dtype (str): Output buffer type
+            sparse_density (float): Largest nonzero fraction of a CSC column,
+                0 for dense output (default SPARSE_DENSITY)
+
+        Returns:
+            MedianMinMaxScaler: Fitted scaler
+        """
+        scaler = cls(dtype, sparse_density)
+        scaler._set_params(columns, np.asarray(medians, dtype=float), np.asarray(data_min, dtype=float),
+                           np.asarray(data_max, dtype=float), n_samples)
+        return scaler
+
+    @staticmethod
+    def _scaling(data_min, data_max):
+        # Sama dengan _handle_zeros_in_scale milik sklearn: rentang ~0 dianggap 1
+        range_ = np.asarray(data_max - data_min, dtype=float)
+        scale = 1.0 / np.where(range_ < 10 * np.finfo(range_.dtype).eps, 1.0, range_)
+        return scale, 0.0 - data_min * scale
+
+    def _set_params(self, columns, medians, data_min, data_max, n_samples):
+        self.feature_names_in_ = np.asarray(columns, dtype=object)
+        self.n_features_in_ = len(columns)
+        self.n_samples_seen_ = n_samples
+        self.statistics_ = medians
+        self.data_min_ = data_min
+        self.data_max_ = data_max
+        self.data_range_ = data_max - data_min
+        self.scale_, self.min_ = self._scaling(data_min, data_max)
+
+    @staticmethod
+    def _columns(X):
+        if isinstance(X, pd.DataFrame):
+            return list(X.columns), lambda j: X.iloc[:, j].to_numpy(dtype=float)
+        X = np.asarray(X)
+        return list(range(X.shape[1])), lambda j: X[:, j]
+
+    @staticmethod
+    def _column_stats(values):
+        """Min, median and max of one column from a single partition of its observed values"""
+        return MedianMinMaxScaler._observed_stats(values[~np.isnan(values)])
+
+    @staticmethod
+    def _observed_stats(observed):
+        n = observed.size
+        if n == 0:
+            return 0.0, 0.0, 0.0
+        lo, hi = (n - 1) // 2, n // 2
+        observed.partition(sorted({0, lo, hi, n - 1}))
+        return observed[0], (observed[lo] + observed[hi]) / 2, observed[n - 1]
+
+    def fit(self, X):
+        """
+        Learn medians and ranges without keeping a transformed copy
+
+        Args:
+            X (pandas.DataFrame or numpy.ndarray): Features, NaN for missing values
+
+        Returns:
+            MedianMinMaxScaler: self
+        """
+        columns, column = self._columns(X)
+        stats = np.array([self._column_stats(np.asarray(column(j), dtype=float)) for j in range(len(columns))],
+                         dtype=float).reshape(-1, 3)
+        self._set_params(columns, stats[:, 1], stats[:, 0], stats[:, 2], len(X))
+        return self
+
+    def _packer(self, n_rows, n_cols):
+        if self.compact:
+            return _CompactPacker(n_rows, n_cols)
+        return _DensePacker(n_rows, n_cols, self.dtype, self.sparse_density)
+
+    def _scale(self, X, fit):
+        columns, column = self._columns(X)
+        if not fit and len(columns) != self.n_features_in_:
+            raise ValueError(f"X has {len(columns)} features, the scaler was fitted with {self.n_features_in_}")
+        packer = self._packer(len(X), len(columns))
+        stats = np.empty((len(columns), 3))
+        for j in range(len(columns)):
+            values = np.asarray(column(j), dtype=float)
+            observed = values[~np.isnan(values)] if fit or self.compact else None
+            if fit:
+                # Partition mengubah urutan observed, cek int8 di packer tidak bergantung urutan
+                stats[j] = self._observed_stats(observed)
+                median = stats[j, 1]
+                scale, offset = self._scaling(stats[j, 0], stats[j, 2])
+            else:
+                median, scale, offset = self.statistics_[j], self.scale_[j], self.min_[j]
+            packer.add(j, values, observed, median, scale, offset)
+        if fit:
+            self._set_params(columns, stats[:, 1], stats[:, 0], stats[:, 2], len(X))
+        return packer.finish()
+
+    def transform(self, X):
+        """
+        Impute and scale into a new column-major buffer
+
+        Args:
+            X (pandas.DataFrame or numpy.ndarray): Features with the fitted columns in order
+
+        Returns:
+            numpy.ndarray, CompactMatrix or SparseMatrix: Scaled matrix of type ``dtype``
+        """
+        return self._scale(X, fit=False)
+
+    def fit_transform(self, X):
+        """
+        Fit and transform in one pass over the columns
+
+        Args:
+            X (pandas.DataFrame or numpy.ndarray): Features, NaN for missing values
+
+        Returns:
+            numpy.ndarray, CompactMatrix or SparseMatrix: Scaled matrix of type ``dtype``
+        """
+        return self._scale(X, fit=True)
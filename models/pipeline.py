@@ -0,0 +1,568 @@
+import argparse
+import contextvars
+import importlib.util
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import numpy as np
+
+from artifacts import FORMAT_EXTENSIONS
+from balancing import SAMPLERS, balancing_options, resampled_target
+from charts import FULL_DPI, get_chart, save_chart_data
+from dataset_cache import dataset_cache, load_dataset
+from feature_selection import CORRECTIONS, SCORERS, STABILITY_METHODS, selection_policy, stability_options
+from instrumentation import profiling
+from kernels import DTYPES, check_dtype
+from training import METRICS, MODELS, training_options
+from preprocessing import (
+    cached_preprocessing,
+    fit_preprocessing,
+    scale_artifact,
+    split_features,
+    store_preprocessing,
+)
+
+logger = logging.getLogger(__name__)
+
+MODELS_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+
+_module_lock = threading.Lock()
+
+# Registry step: id -> (nama modul, file di folder models, fungsi step)
+STEP_MODULES = {
+    '1': ("step1", "1_cek_missing_value.py", "step1_missing_value"),
+    '2': ("step2", "2_transformasi_MinMaxScaler.py", "step2_minmax_scaler"),
+    '3': ("step3", "3_seleksi_fitur_anova.py", "step3_anova"),
+    '4': ("step4", "4_immbalance_data_rus.py", "step4_rus"),
+    '5': ("step5", "5_train_model.py", "step5_train")
+}
+
+# Dependensi berat yang baru di-import saat pertama kali dipakai
+HEAVY_MODULES = (
+    "sklearn.feature_selection",
+    "imblearn.under_sampling",
+    "imblearn.over_sampling",
+    "sklearn.linear_model",
+    "sklearn.ensemble",
+    "scipy.special",
+    "matplotlib.figure",
+    "matplotlib.backends.backend_agg",
+)
+
+
+def load_step_module(name, filename):
+    """
+    Load a numbered step module (e.g. ``1_cek_missing_value.py``) once per process
+
+    Args:
+        name (str): Module name to register in sys.modules
+        filename (str): File name inside the models directory
+
+    Returns:
+        module: Loaded module
+    """
+    with _module_lock:
+        module = sys.modules.get(name)
+        if module is None:
+            spec = importlib.util.spec_from_file_location(name, os.path.join(MODELS_DIR, filename))
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            sys.modules[name] = module
+        return module
+
+
+def step_module(step):
+    """
+    Return the module of a step, loading it on first use
+
+    Args:
+        step (str): Step id, ``1``-``4``
+
+    Returns:
+        module: Loaded step module
+    """
+    name, filename, _ = STEP_MODULES[step]
+    return load_step_module(name, filename)
+
+
+def step_function(step):
+    """
+    Return the entry point of a step (e.g. ``step3_anova``), loading it on first use
+
+    Args:
+        step (str): Step id, ``1``-``4``
+
+    Returns:
+        callable: Step function
+    """
+    return getattr(step_module(step), STEP_MODULES[step][2])
+
+
+def preload_modules():
+    """
+    Import all step modules and their heavy dependencies now
+
+    Meant for a pre-fork server process, so forked workers share the imported
+    modules copy-on-write instead of each importing them on first request.
+
+    Returns:
+        float: Seconds spent importing
+    """
+    start = time.perf_counter()
+    for step in STEP_MODULES:
+        step_module(step)
+    for name in HEAVY_MODULES:
+        importlib.import_module(name)
+    return time.perf_counter() - start
+
+
+class PipelineError(Exception):
+    """Raised when a pipeline stage fails"""
+
+    def __init__(self, stage, error):
+        super().__init__(f"Stage '{stage}' failed: {error}")
+        self.stage = stage
+        self.error = error
+
+
+def run_inline(func, *args):
+    """Call func(*args) in the calling thread and return its outcome as a finished Future"""
+    future = Future()
+    try:
+        future.set_result(func(*args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+def run_dag(stages, max_workers=DEFAULT_WORKERS, on_stage_done=None):
+    """
+    Run stages as a dependency graph on a thread pool
+
+    Every stage starts as soon as all of its dependencies have finished, so
+    independent stages run concurrently. Inside a profiled run (see
+    ``instrumentation.ProfileSession``) the stages run one by one in the
+    calling thread.
+
+    Args:
+        stages (dict): Stage name -> (callable, list of dependency names). The
+            callable receives a dict of dependency name -> dependency result.
+        max_workers (int): Size of the thread pool
+        on_stage_done (callable): Optional callback(stage, completed, total)
+            invoked after every finished stage
+
+    Returns:
+        tuple: (stage results, stage timings with start offset and duration in seconds)
+    """
+    for name, (_, deps) in stages.items():
+        missing = [d for d in deps if d not in stages]
+        if missing:
+            raise ValueError(f"Stage '{name}' depends on unknown stages: {missing}")
+
+    results = {}
+    timings = {}
+    pending = dict(stages)
+    running = {}
+    t0 = time.perf_counter()
+
+    def timed(func, inputs):
+        start = time.perf_counter()
+        value = func(inputs)
+        return value, start, time.perf_counter()
+
+    # Run dengan ?profile=1: cProfile hanya memprofil thread pemanggil, jadi stage dijalankan berurutan di sana
+    profiled = profiling()
+    with ThreadPoolExecutor(max_workers=1 if profiled else max_workers) as pool:
+        submit = run_inline if profiled else pool.submit
+        while pending or running:
+            ready = [name for name, (_, deps) in pending.items() if all(d in results for d in deps)]
+            for name in ready:
+                func, deps = pending.pop(name)
+                # Salin context supaya variabel context (mis. sesi profil) ikut ke thread stage
+                context = contextvars.copy_context()
+                running[submit(context.run, timed, func, {d: results[d] for d in deps})] = name
+
+            if not running:
+                raise ValueError(f"Dependency cycle between stages: {sorted(pending)}")
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    value, start, end = future.result()
+                except Exception as e:
+                    for other in running:
+                        other.cancel()
+                    raise PipelineError(name, e) from e
+                results[name] = value
+                timings[name] = {
+                    'start': round(start - t0, 6),
+                    'seconds': round(end - start, 6)
+                }
+                if on_stage_done is not None:
+                    on_stage_done(name, len(results), len(stages))
+
+    return results, timings
+
+
+def build_stages(path, target="Biopsy", output_dir="output", render_charts=False, fmt=None, scorer=None,
+                 policy=None, stability=None, balancing=None, training=None, dtype=None):
+    """
+    Describe the preprocessing steps, plus optional model training, as a dependency graph
+
+    Parsing, dropping empty columns and the fused imputation + scaling kernel
+    are shared stages that run once; the missing-value report, scaled output, ANOVA scoring,
+    class balancing and chart rendering are independent leaves.
+
+    The ``row_state`` stage keeps mergeable statistics of every dataset
+    version. For a version linked to an earlier upload (see
+    ``incremental.link_versions``) imputation, scaling, missing counts and
+    ANOVA are updated from the changed rows instead of recomputed.
+
+    Args:
+        path (str): Path to CSV file
+        target (str): Target column name
+        output_dir (str): Output directory
+        render_charts (bool): If True, also render the step 3 and 4 charts to
+            PNG files; otherwise only their data is saved for lazy rendering
+        fmt (str): Artifact format for steps 2-4, default ARTIFACT_FORMAT
+        scorer (str): Step 3 feature scorer, default FEATURE_SCORER
+        policy (dict): Step 3 selection policy (see feature_selection.selection_policy)
+        stability (dict): Step 3 stability selection options, None to select
+            from a single ANOVA run (see feature_selection.stability_options)
+        balancing (dict): Step 4 sampler, ratio and seed (see balancing.balancing_options)
+        training (dict): Step 5 training options (see training.training_options),
+            None to stop after step 4
+        dtype (str): Buffer type of the scaled matrix, float64, float32 or
+            compact (default PREPROCESS_DTYPE)
+
+    Returns:
+        dict: Stage name -> (callable, list of dependency names)
+    """
+    from feature_selection import check_scorer, check_stability, score_key, stable_features
+    from incremental import delta_anova, derive_preprocessing, load_state
+
+    scorer = check_scorer(scorer)
+    policy = policy or selection_policy()
+    check_stability(scorer, stability)
+    balancing = balancing or balancing_options()
+    dtype = check_dtype(dtype)
+
+    step1 = step_module('1')
+    step2 = step_module('2')
+    step3 = step_module('3')
+    step4 = step_module('4')
+
+    def parse(_):
+        return load_dataset(path)
+
+    def drop_empty(_):
+        return load_dataset(path, drop_empty=True)
+
+    def preprocess(inputs):
+        digest = dataset_cache.digest(path)
+        artifact = cached_preprocessing(digest, output_dir, dtype)
+        if artifact is None:
+            # Versi turunan: parameter dari delta baris, tanpa fit ulang
+            artifact = derive_preprocessing(path, output_dir, dtype)
+            if artifact is None:
+                X = inputs['drop_empty'].select_dtypes(include="number")
+                artifact = fit_preprocessing(X, dataset_digest=digest, dtype=dtype)
+            store_preprocessing(artifact, output_dir)
+        return scale_artifact(artifact, inputs['drop_empty'])
+
+    def split(inputs):
+        return split_features(inputs['drop_empty'], inputs['preprocess'], target)
+
+    def row_state(_):
+        return load_state(path, output_dir, target)
+
+    def missing_report(inputs):
+        state = inputs['row_state']
+        if state is not None and state['delta'] is not None:
+            _, missing_df = step1.missing_counts_table(state['missing'], state['n_rows'])
+        else:
+            _, missing_df = step1.missing_value_table(inputs['parse'])
+        output_file = step1.save_missing_value_table(missing_df, output_dir)
+        return {'missing_df': missing_df, 'output_file': output_file}
+
+    def scaled_output(inputs):
+        X = inputs['drop_empty'].select_dtypes(include="number")
+        X_scaled = inputs['preprocess']['X_scaled']
+        output_file = step2.save_scaled_data(X, X_scaled, output_dir, fmt)
+        return {'X': X, 'X_scaled': X_scaled, 'output_file': output_file}
+
+    def anova(inputs):
+        columns, X_scl, y = inputs['split']
+        state = inputs['row_state']
+        scored = None
+        if scorer == 'anova' and state is not None and state['delta'] is not None:
+            scored = delta_anova(state, columns, target)
+        key = score_key(inputs['preprocess'], scorer, target)
+        if scored is None:
+            scored = step3.score_features(X_scl, y, scorer, key, output_dir)
+        scores, pvalues = scored
+        frequency = None
+        if stability is not None:
+            frequency = step3.stability_frequencies(X_scl, y, stability, policy, key)
+            idx = stable_features(frequency, stability, policy)
+        else:
+            idx = step3.select_features(pvalues, scores, policy)
+        selected_features = columns.to_numpy()[idx]
+        selected_data, output_file = step3.save_selected_features(X_scl, idx, selected_features, y, output_dir, fmt,
+                                                                  scorer, policy, stability)
+        metrics_df = step3.anova_metrics(columns, scores, pvalues, selected_features, policy, frequency)
+        save_chart_data('anova', step3.anova_chart_data(metrics_df, scorer, policy), output_dir)
+        return {
+            'columns': columns,
+            'selected_features': selected_features,
+            'metrics_df': metrics_df,
+            'selected_data': selected_data,
+            'output_file': output_file,
+            'target': target,
+            'scorer': scorer,
+            'policy': policy,
+            'stability': stability
+        }
+
+    def rus(inputs):
+        columns, X_scl, y = inputs['split']
+        resampled = step4.balance_resample(X_scl, y, balancing)
+        uniq, cnt = np.unique(y, return_counts=True)
+        uniq_res, cnt_res = np.unique(resampled_target(y, resampled), return_counts=True)
+        balanced_df, output_file = step4.save_balanced_data(X_scl, y, resampled, columns, output_dir, fmt)
+        after = dict(zip(uniq_res, cnt_res))
+        save_chart_data('rus', step4.rus_chart_data(cnt, [after.get(klass, 0) for klass in uniq], uniq,
+                                                    balancing['sampler']), output_dir)
+        return {
+            'columns': columns,
+            'uniq': uniq,
+            'cnt': cnt,
+            'uniq_res': uniq_res,
+            'cnt_res': cnt_res,
+            'balanced_df': balanced_df,
+            'output_file': output_file,
+            'target': target,
+            'balancing': balancing
+        }
+
+    # Render lewat cache grafik supaya permintaan web berikutnya tidak render ulang
+    def anova_chart(_):
+        chart, _, _ = get_chart('anova', output_dir, dpi=FULL_DPI)
+        return step3.save_anova_chart(chart, output_dir)
+
+    def rus_chart(_):
+        chart, _, _ = get_chart('rus', output_dir, dpi=FULL_DPI)
+        return step4.save_rus_chart(chart, output_dir)
+
+    def train(inputs):
+        step5 = step_module('5')
+        columns, X_scl, y = inputs['split']
+        features = list(inputs['anova']['selected_features'])
+        X = np.ascontiguousarray(X_scl)
+        search = step5.cross_validate_models(X, y, training, balancing, selection=(scorer, policy, stability))
+        model, estimator = step5.refit_best_model(X[:, columns.get_indexer(features)], y, search, training,
+                                                  balancing)
+        preprocessor = step5.bundle_preprocessor(inputs['preprocess'], inputs['drop_empty'])
+        model_file = step5.save_best_model(model, estimator, features, target, search, training, balancing,
+                                           preprocessor, output_dir)
+        output_file = step5.save_training_results(step5.training_history(search), output_dir)
+        save_chart_data('training', step5.training_chart_data(search, training['metric']), output_dir)
+        return {
+            'search': search,
+            'model': model,
+            'features': features,
+            'output_file': output_file,
+            'model_file': model_file,
+            'target': target,
+            'options': training,
+            'balancing': balancing
+        }
+
+    def train_chart(_):
+        chart, _, _ = get_chart('training', output_dir, dpi=FULL_DPI)
+        return step_module('5').save_training_chart(chart, output_dir)
+
+    stages = {
+        'parse': (parse, []),
+        'drop_empty': (drop_empty, ['parse']),
+        'preprocess': (preprocess, ['drop_empty']),
+        'split': (split, ['drop_empty', 'preprocess']),
+        'row_state': (row_state, ['drop_empty']),
+        'missing_report': (missing_report, ['parse', 'row_state']),
+        'scaled_output': (scaled_output, ['drop_empty', 'preprocess']),
+        'anova': (anova, ['preprocess', 'split', 'row_state']),
+        'rus': (rus, ['split']),
+    }
+    if training is not None:
+        stages['train'] = (train, ['drop_empty', 'preprocess', 'split', 'anova'])
+    if render_charts:
+        stages['anova_chart'] = (anova_chart, ['anova'])
+        stages['rus_chart'] = (rus_chart, ['rus'])
+        if training is not None:
+            stages['train_chart'] = (train_chart, ['train'])
+    return stages
+
+
+def run_full_pipeline(path="dataset/risk_factors_cervical_cancer.csv", target="Biopsy",
+                      output_dir="output", render_charts=False, max_workers=DEFAULT_WORKERS,
+                      on_stage_done=None, fmt=None, scorer=None, policy=None, stability=None, balancing=None,
+                      training=None, dtype=None):
+    """
+    Run steps 1-4, and step 5 when training options are given, in a single pass over the dataset
+
+    Args:
+        path (str): Path to CSV file
+        target (str): Target column name
+        output_dir (str): Output directory
+        render_charts (bool): If True, also render the step 3 and 4 charts to PNG files
+        max_workers (int): Size of the thread pool for independent stages
+        on_stage_done (callable): Optional callback(stage, completed, total)
+        fmt (str): Artifact format for steps 2-4, default ARTIFACT_FORMAT
+        scorer (str): Step 3 feature scorer, default FEATURE_SCORER
+        policy (dict): Step 3 selection policy (see feature_selection.selection_policy)
+        stability (dict): Step 3 stability selection options (see feature_selection.stability_options)
+        balancing (dict): Step 4 sampler, ratio and seed (see balancing.balancing_options)
+        training (dict): Step 5 training options (see training.training_options)
+        dtype (str): Buffer type of the scaled matrix (default PREPROCESS_DTYPE)
+
+    Returns:
+        dict: Per-step JSON results, per-stage timings and total wall-clock time
+    """
+    from incremental import delta_summary
+
+    step1 = step_module('1')
+    step2 = step_module('2')
+    step3 = step_module('3')
+    step4 = step_module('4')
+
+    t0 = time.perf_counter()
+    stages = build_stages(path, target, output_dir, render_charts, fmt, scorer, policy, stability, balancing,
+                          training, dtype)
+    results, timings = run_dag(stages, max_workers=max_workers, on_stage_done=on_stage_done)
+
+    # Susun hasil JSON per step
+    start = time.perf_counter()
+    missing = results['missing_report']
+    scaled = results['scaled_output']
+    steps = {
+        '1': step1.missing_value_result(missing['missing_df'], missing['output_file']),
+        '2': step2.scaling_result(scaled['X'], scaled['X_scaled'], scaled['output_file']),
+        '3': step3.anova_result(**results['anova']),
+        '4': step4.rus_result(**results['rus'])
+    }
+    if 'train' in results:
+        steps['5'] = step_module('5').training_result(**results['train'])
+    end = time.perf_counter()
+    timings['serialize'] = {'start': round(start - t0, 6), 'seconds': round(end - start, 6)}
+
+    result = {
+        'message': 'Full pipeline completed successfully',
+        'steps': steps,
+        'timings': timings,
+        'total_seconds': round(end - t0, 6)
+    }
+    incremental = delta_summary(results['row_state'])
+    if incremental is not None:
+        result['incremental'] = incremental
+    return result
+
+
+def add_pipeline_arguments(parser):
+    """Add the target, artifact, feature selection, balancing and training options to a CLI parser"""
+    parser.add_argument("--target", default="Biopsy", help="Target column name")
+    parser.add_argument("--no-charts", action="store_true", help="Skip rendering the chart PNG files")
+    parser.add_argument("--format", choices=FORMAT_EXTENSIONS, default=None, help="Artifact format for steps 2-4")
+    parser.add_argument("--dtype", choices=DTYPES, default=None,
+                        help="Buffer type of the scaled matrix (default PREPROCESS_DTYPE or float64)")
+    parser.add_argument("--scorer", choices=sorted(SCORERS), default=None, help="Step 3 feature scorer")
+    parser.add_argument("--alpha", type=float, default=None, help="Step 3 significance level (default 0.05)")
+    parser.add_argument("--k", type=int, default=None, help="Maximum number of selected features")
+    parser.add_argument("--correction", choices=CORRECTIONS, default=None, help="Multiple-testing correction")
+    parser.add_argument("--stability", action="store_true", help="Select step 3 features by stability selection")
+    parser.add_argument("--resamples", type=int, default=None, help="Stability selection resamples (default 200)")
+    parser.add_argument("--resample-method", choices=STABILITY_METHODS, default=None, help="Stability resampling")
+    parser.add_argument("--stability-threshold", type=float, default=None,
+                        help="Selection frequency a stable feature needs (default 0.6)")
+    parser.add_argument("--sampler", choices=sorted(SAMPLERS), default=None, help="Step 4 balancing sampler")
+    parser.add_argument("--ratio", type=float, default=None,
+                        help="Step 4 minority/majority ratio after balancing (default fully balanced)")
+    parser.add_argument("--seed", type=int, default=None, help="Step 4 random seed (default 42)")
+    parser.add_argument("--train", action="store_true", help="Also train and cross-validate models (step 5)")
+    parser.add_argument("--models", nargs="+", choices=sorted(MODELS), default=None, help="Step 5 models")
+    parser.add_argument("--folds", type=int, default=None, help="Step 5 cross-validation folds (default 5)")
+    parser.add_argument("--metric", choices=METRICS, default=None, help="Step 5 model selection metric")
+
+
+def pipeline_options(args):
+    """
+    Keyword arguments of run_full_pipeline from parsed add_pipeline_arguments options
+
+    Returns:
+        dict: target, render_charts, fmt, dtype, scorer, policy, stability, balancing and training
+
+    Raises:
+        ValueError: If an option is invalid
+    """
+    return {
+        'target': args.target,
+        'render_charts': not args.no_charts,
+        'fmt': args.format,
+        'dtype': check_dtype(args.dtype),
+        'scorer': args.scorer,
+        'policy': selection_policy(args.alpha, args.k, args.correction),
+        'stability': (stability_options(args.resamples, args.resample_method, args.stability_threshold)
+                      if args.stability else None),
+        'balancing': balancing_options(args.sampler, args.ratio, args.seed),
+        'training': training_options(args.models, args.folds, args.metric, seed=args.seed) if args.train else None
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run steps 1-4 of the preprocessing pipeline in one pass")
+    parser.add_argument("path", nargs="?", default="dataset/risk_factors_cervical_cancer.csv", help="Path to CSV file")
+    parser.add_argument("--output-dir", default="output", help="Output directory")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Thread pool size")
+    parser.add_argument("--base", default=None, help="Previous version of the CSV file, to update results incrementally")
+    parser.add_argument("--base-output-dir", default=None, help="Output directory of the previous version")
+    add_pipeline_arguments(parser)
+    parser.add_argument("--json", action="store_true", help="Print per-step results as JSON")
+    args = parser.parse_args(argv)
+    try:
+        options = pipeline_options(args)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.base:
+        from incremental import link_versions
+
+        if not args.base_output_dir:
+            parser.error("--base needs --base-output-dir")
+        link_versions(args.output_dir, args.base, args.base_output_dir)
+
+    result = run_full_pipeline(args.path, output_dir=args.output_dir, max_workers=args.workers, **options)
+
+    if args.json:
+        print(json.dumps(result, indent=2, default=str))
+        return
+
+    print("=== Full Pipeline ===")
+    for stage, timing in sorted(result['timings'].items(), key=lambda item: item[1]['start']):
+        print(f"{stage:<16} mulai {timing['start']:8.3f}s  durasi {timing['seconds']:8.3f}s")
+    print(f"Total: {result['total_seconds']:.3f}s")
+    if 'incremental' in result:
+        delta = result['incremental']
+        print(f"Inkremental: {delta['rows_added']} baris ditambah, {delta['rows_removed']} dihapus, "
+              f"{delta['rows_kept']} dipakai ulang (tidak berubah: {', '.join(delta['unchanged']) or '-'})")
+    for step, step_result in result['steps'].items():
+        print(f"Step {step}: {step_result['output_file']}")
+
+
+if __name__ == "__main__":
+    main()
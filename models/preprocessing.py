@@ -0,0 +1,255 @@
+import os
+import logging
+import threading
+from collections import OrderedDict
+
+import joblib
+import numpy as np
+
+from dataset_cache import dataset_cache, load_dataset
+from instrumentation import timed_stage
+from kernels import MedianMinMaxScaler, check_dtype
+
+logger = logging.getLogger(__name__)
+
+PREPROCESSING_FILE = "2_preprocessing.joblib"
+
+# Artefak yang sudah di-fit (tanpa matriks hasil scaling), disimpan per versi dataset (content hash) dan tipe buffer
+_artifacts = OrderedDict()
+_artifacts_lock = threading.Lock()
+_fit_locks = {}
+MAX_ARTIFACTS = 4
+
+
+def build_artifact(columns, preprocessor, X_scaled, dataset_digest=None):
+    """
+    Bundle a fitted preprocessor and the scaled matrix of one run
+
+    Only the fitted part is persisted and cached (see fitted_artifact); the
+    scaled matrix lives for the run that computed it. The buffer type of
+    the preprocessor is recorded so a run asking for another one refits.
+
+    Args:
+        columns (list): Names of the fitted columns
+        preprocessor (MedianMinMaxScaler): Fitted imputation + scaling kernel
+        X_scaled (numpy.ndarray): Scaled matrix
+        dataset_digest (str): Content hash of the dataset the artifact belongs to
+
+    Returns:
+        dict: Artifact with the scaled matrix
+    """
+    return {
+        'dataset_digest': dataset_digest,
+        'dtype': preprocessor.mode,
+        'columns': list(columns),
+        'preprocessor': preprocessor,
+        'X_scaled': X_scaled
+    }
+
+
+def fitted_artifact(artifact):
+    """The persisted part of an artifact: digest, buffer type, columns and fitted preprocessor"""
+    return {key: value for key, value in artifact.items() if key != 'X_scaled'}
+
+
+def scale_artifact(artifact, df):
+    """
+    Attach the scaled matrix of a dataset to a fitted artifact
+
+    The matrix is not stored with the artifact; it is recomputed with one
+    ``transform`` pass of the fitted preprocessor.
+
+    Args:
+        artifact (dict): Fitted artifact, with or without scaled matrix
+        df (pandas.DataFrame): Dataset with all-NaN columns dropped
+
+    Returns:
+        dict: Artifact with the scaled matrix
+    """
+    if artifact.get('X_scaled') is not None:
+        return artifact
+    return dict(artifact, X_scaled=_transform(artifact['preprocessor'], df[artifact['columns']]))
+
+
+@timed_stage('transform')
+def _transform(preprocessor, X):
+    return preprocessor.transform(X)
+
+
+@timed_stage('preprocess')
+def fit_preprocessing(X, dataset_digest=None, dtype=None):
+    """
+    Fit median imputation and MinMax scaling on numeric features
+
+    Args:
+        X (pandas.DataFrame): Numeric features (all-NaN columns already dropped)
+        dataset_digest (str): Content hash of the dataset the artifact belongs to
+        dtype (str): Buffer type, float64, float32 or compact (default PREPROCESS_DTYPE)
+
+    Returns:
+        dict: Fitted artifact with preprocessor, column names and scaled matrix
+    """
+    logger.info(f"Fitting median imputation + MinMax scaling on {X.shape[1]} columns")
+    preprocessor = MedianMinMaxScaler(dtype)
+    X_scaled = preprocessor.fit_transform(X)
+    return build_artifact(X.columns, preprocessor, X_scaled, dataset_digest)
+
+
+def _remember(key, artifact):
+    with _artifacts_lock:
+        _artifacts[key] = artifact
+        _artifacts.move_to_end(key)
+        while len(_artifacts) > MAX_ARTIFACTS:
+            _artifacts.popitem(last=False)
+
+
+def cached_preprocessing(digest, output_dir="output", dtype=None):
+    """
+    Look up an already fitted artifact in memory or on disk
+
+    Args:
+        digest (str): Content hash of the dataset
+        output_dir (str): Directory holding the persisted artifact
+        dtype (str): Buffer type the artifact must have (default PREPROCESS_DTYPE)
+
+    Returns:
+        dict or None: Fitted artifact without scaled matrix (see
+        scale_artifact), or None when it must be fit
+    """
+    key = (digest, check_dtype(dtype))
+    with _artifacts_lock:
+        artifact = _artifacts.get(key)
+        if artifact is not None:
+            _artifacts.move_to_end(key)
+            return artifact
+
+    artifact_file = os.path.join(output_dir, PREPROCESSING_FILE)
+    if os.path.exists(artifact_file):
+        try:
+            stored = fitted_artifact(joblib.load(artifact_file))
+            # Artefak dengan tipe buffer lain (atau tanpa catatan tipe) di-fit ulang
+            if (stored.get('dataset_digest'), stored.get('dtype')) == key and stored.get('preprocessor') is not None:
+                _remember(key, stored)
+                return stored
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable preprocessing artifact {artifact_file}: {e}")
+    return None
+
+
+def store_preprocessing(artifact, output_dir="output"):
+    """
+    Persist the fitted part of an artifact and keep it in memory
+
+    The scaled matrix is left out: step 2 writes it as ``2_scaled_data``
+    and later runs recompute it from the fitted preprocessor.
+
+    Args:
+        artifact (dict): Fitted artifact
+        output_dir (str): Output directory
+    """
+    fitted = fitted_artifact(artifact)
+    os.makedirs(output_dir, exist_ok=True)
+    joblib.dump(fitted, os.path.join(output_dir, PREPROCESSING_FILE))
+    _remember((fitted['dataset_digest'], fitted['dtype']), fitted)
+
+
+def load_preprocessing(path, output_dir="output", dtype=None):
+    """
+    Return the preprocessing artifact of a dataset, fitting it only once
+
+    The fitted artifact is looked up in memory first, then in
+    ``<output_dir>/2_preprocessing.joblib``. When neither matches both the
+    dataset's content hash and the buffer type it is derived from the linked
+    base version (see ``incremental.derive_preprocessing``) or, failing
+    that, refit. A cached artifact gets its scaled matrix from one
+    ``transform`` pass.
+
+    Args:
+        path (str): Path to CSV file
+        output_dir (str): Directory holding the persisted artifact
+        dtype (str): Buffer type, float64, float32 or compact (default PREPROCESS_DTYPE)
+
+    Returns:
+        dict: Artifact with the scaled matrix (see fit_preprocessing)
+    """
+    digest = dataset_cache.digest(path)
+    dtype = check_dtype(dtype)
+    key = (digest, dtype)
+
+    with _artifacts_lock:
+        artifact = _artifacts.get(key)
+        if artifact is not None:
+            _artifacts.move_to_end(key)
+            return scale_artifact(artifact, load_dataset(path, drop_empty=True))
+        fit_lock = _fit_locks.setdefault(key, threading.Lock())
+
+    try:
+        with fit_lock:
+            artifact = cached_preprocessing(digest, output_dir, dtype)
+            if artifact is None:
+                from incremental import derive_preprocessing
+
+                # Versi turunan dari upload sebelumnya: parameter dari delta baris, tanpa fit ulang
+                artifact = derive_preprocessing(path, output_dir, dtype)
+                if artifact is None:
+                    df = load_dataset(path, drop_empty=True)
+                    artifact = fit_preprocessing(df.select_dtypes(include="number"), dataset_digest=digest,
+                                                 dtype=dtype)
+                store_preprocessing(artifact, output_dir)
+    finally:
+        with _artifacts_lock:
+            _fit_locks.pop(key, None)
+    return scale_artifact(artifact, load_dataset(path, drop_empty=True))
+
+
+def clear_preprocessing_cache():
+    """Forget all fitted artifacts kept in memory (files on disk are kept)"""
+    with _artifacts_lock:
+        _artifacts.clear()
+
+
+def split_features(df, artifact, target="Biopsy"):
+    """
+    Split a parsed dataset into scaled features and target
+
+    Args:
+        df (pandas.DataFrame): Dataset with all-NaN columns dropped
+        artifact (dict): Fitted artifact for this dataset
+        target (str): Target column name
+
+    Returns:
+        tuple: (feature columns, scaled feature matrix, target series)
+    """
+    # X dan y
+    X = df.drop(columns=[target], errors="ignore")
+    y = df[target] if target in df.columns else df.iloc[:, -1]
+
+    positions = {col: i for i, col in enumerate(artifact['columns'])}
+    if not all(col in positions for col in X.columns):
+        # Kolom non-numerik: fit ulang khusus untuk X ini
+        artifact = fit_preprocessing(X, dtype=artifact.get('dtype'))
+        return X.columns, artifact['X_scaled'], y
+
+    idx = np.array([positions[col] for col in X.columns], dtype=np.intp)
+    if len(idx) and np.array_equal(idx, np.arange(idx[0], idx[0] + len(idx))):
+        # Kolom berurutan (target di ujung): view tanpa menyalin matriks
+        return X.columns, artifact['X_scaled'][:, idx[0]:idx[0] + len(idx)], y
+    return X.columns, artifact['X_scaled'][:, idx], y
+
+
+def scaled_features(path, target="Biopsy", output_dir="output", dtype=None):
+    """
+    Split a dataset into scaled features and target using the shared artifact
+
+    Args:
+        path (str): Path to CSV file
+        target (str): Target column name
+        output_dir (str): Directory holding the persisted artifact
+        dtype (str): Buffer type of the scaled matrix (default PREPROCESS_DTYPE)
+
+    Returns:
+        tuple: (feature columns, scaled feature matrix, target series)
+    """
+    df = load_dataset(path, drop_empty=True)
+    artifact = load_preprocessing(path, output_dir=output_dir, dtype=dtype)
+    return split_features(df, artifact, target)
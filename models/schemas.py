@@ -0,0 +1,201 @@
+import csv
+import os
+import logging
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = None
+
+logger = logging.getLogger(__name__)
+
+# Penanda missing value yang dipakai oleh semua step
+NA_VALUES = ["?", "NA", "NaN", ""]
+
+# Parser CSV untuk dataset dengan skema: pyarrow (multi-thread) atau c (parser pandas)
+DEFAULT_ENGINE = os.environ.get("CSV_ENGINE", "pyarrow")
+ENGINES = ("pyarrow", "c")
+
+# Flag biner tanpa missing value muat di int8 (Age di int16); kolom bilangan bulat dengan '?'
+# butuh NaN, jadi float32 (tepat untuk bilangan bulat sampai 2^24); kolom pecahan tetap
+# float64 karena float32 membulatkan nilainya. Kolom hanya dipersempit bila semua nilainya
+# tidak berubah, selain itu tetap float64
+_CERVICAL_FLOAT64 = ['Smokes (years)', 'Smokes (packs/year)', 'Hormonal Contraceptives (years)', 'IUD (years)']
+_CERVICAL_INT8 = ['STDs: Number of diagnosis', 'Dx:Cancer', 'Dx:CIN', 'Dx:HPV', 'Dx', 'Hinselmann', 'Schiller',
+                  'Citology', 'Biopsy']
+_CERVICAL_ORDER = [
+    'Age', 'Number of sexual partners', 'First sexual intercourse', 'Num of pregnancies', 'Smokes',
+    'Smokes (years)', 'Smokes (packs/year)', 'Hormonal Contraceptives', 'Hormonal Contraceptives (years)', 'IUD',
+    'IUD (years)', 'STDs', 'STDs (number)', 'STDs:condylomatosis', 'STDs:cervical condylomatosis',
+    'STDs:vaginal condylomatosis', 'STDs:vulvo-perineal condylomatosis', 'STDs:syphilis',
+    'STDs:pelvic inflammatory disease', 'STDs:genital herpes', 'STDs:molluscum contagiosum', 'STDs:AIDS',
+    'STDs:HIV', 'STDs:Hepatitis B', 'STDs:HPV', 'STDs: Number of diagnosis', 'STDs: Time since first diagnosis',
+    'STDs: Time since last diagnosis', 'Dx:Cancer', 'Dx:CIN', 'Dx:HPV', 'Dx', 'Hinselmann', 'Schiller',
+    'Citology', 'Biopsy',
+]
+
+
+def _cervical_dtype(name):
+    if name == 'Age':
+        return 'int16'
+    if name in _CERVICAL_INT8:
+        return 'int8'
+    if name in _CERVICAL_FLOAT64:
+        return 'float64'
+    return 'float32'
+
+
+# Registry skema dataset yang dikenal: kolom (urutan file) -> dtype, dan kolom target.
+# Dataset dikenali dari header; upload lain dibaca dengan inferensi tipe biasa
+SCHEMAS = {
+    'risk_factors_cervical_cancer': {
+        'target': 'Biopsy',
+        'columns': {name: _cervical_dtype(name) for name in _CERVICAL_ORDER},
+    },
+}
+
+
+def check_engine(engine=None):
+    """
+    Validate a CSV engine name
+
+    Raises:
+        ValueError: If the engine is unknown
+    """
+    engine = engine or DEFAULT_ENGINE
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown CSV engine {engine!r}, expected one of {list(ENGINES)}")
+    return engine
+
+
+def header_columns(source):
+    """
+    Column names from the first line of a CSV file or buffer
+
+    Args:
+        source (str or file-like): Path, or a buffer positioned at the header
+
+    Returns:
+        list: Column names, empty for an empty file
+    """
+    if isinstance(source, str):
+        with open(source, newline='', encoding='utf-8', errors='replace') as f:
+            line = f.readline()
+    else:
+        position = source.tell()
+        line = source.readline()
+        source.seek(position)
+        if isinstance(line, bytes):
+            line = line.decode('utf-8', errors='replace')
+    return next(csv.reader([line]), [])
+
+
+def match_schema(columns):
+    """
+    Name of the registered schema whose columns are exactly ``columns``
+
+    Returns:
+        str or None: Key in SCHEMAS, or None for unknown datasets
+    """
+    columns = list(columns)
+    for name, schema in SCHEMAS.items():
+        if list(schema['columns']) == columns:
+            return name
+    return None
+
+
+def _narrow_columns(frame, dtypes):
+    # Parser c: kolom dibaca float64 lalu dipersempit hanya bila nilainya tidak berubah, karena
+    # parser c tidak mengecek overflow int8/int16 dan float32 membulatkan nilai seperti 2.3
+    for col, dtype in dtypes.items():
+        dtype = np.dtype(dtype)
+        if col not in frame.columns or frame[col].dtype == dtype:
+            continue
+        values = frame[col].to_numpy()
+        if dtype.kind == 'i':
+            info = np.iinfo(dtype)
+            if (not len(values) or np.isnan(values).any() or (values % 1 != 0).any()
+                    or values.min() < info.min or values.max() > info.max):
+                # Nilai di luar skema: kolom tetap float64 (tanpa kehilangan nilai)
+                continue
+            frame[col] = values.astype(dtype)
+        else:
+            narrow = values.astype(dtype)
+            if np.array_equal(narrow, values, equal_nan=True):
+                frame[col] = narrow
+    return frame
+
+
+def _read_pyarrow(source, dtypes, na_values, usecols):
+    # pyarrow menolak integer di luar rentang; kolom float dibaca float64 lalu dipersempit
+    wide = {col: 'float64' if np.dtype(dtype).kind == 'f' else dtype for col, dtype in dtypes.items()}
+    read_options = pa_csv.ReadOptions(use_threads=True)
+    convert_options = pa_csv.ConvertOptions(
+        column_types={col: pa.from_numpy_dtype(np.dtype(dtype)) for col, dtype in wide.items()},
+        null_values=list(na_values),
+        strings_can_be_null=True,
+        include_columns=usecols
+    )
+    table = pa_csv.read_csv(source, read_options=read_options, convert_options=convert_options)
+    # Dipersempit per kolom di tabel arrow, jadi hanya satu kolom float64 ekstra di memori
+    for col, dtype in dtypes.items():
+        if wide[col] == dtype or col not in table.column_names:
+            continue
+        position = table.column_names.index(col)
+        values = table.column(position)
+        narrow = pc.cast(values, pa.from_numpy_dtype(np.dtype(dtype)), safe=False)
+        if pc.all(pc.equal(pc.cast(narrow, values.type), values)).as_py() is not False:
+            table = table.set_column(position, col, narrow)
+    # Kolom integer dengan null menjadi float64 di to_pandas, nilainya tetap utuh
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+def _read_schema(source, schema, na_values, usecols, engine):
+    dtypes = schema['columns'] if usecols is None else {col: schema['columns'][col] for col in usecols}
+    if engine == 'pyarrow' and pa is not None:
+        return _read_pyarrow(source, dtypes, na_values, usecols)
+    wide = dict.fromkeys(dtypes, 'float64')
+    return _narrow_columns(pd.read_csv(source, na_values=list(na_values), dtype=wide, usecols=usecols), dtypes)
+
+
+def read_csv(source, na_values=NA_VALUES, usecols=None, engine=None, schema=None):
+    """
+    Parse a CSV file, with explicit narrow dtypes when its schema is known
+
+    The header is matched against SCHEMAS. A known dataset is parsed with
+    the registered dtypes (pyarrow's multithreaded reader by default) and
+    only the ``usecols`` columns are converted. A column is narrowed only
+    when all of its values survive the narrow dtype unchanged; otherwise it
+    stays float64. When the values do not parse as numbers, or the dataset is
+    unknown, pandas infers the types as before.
+
+    Args:
+        source (str or file-like): Path or buffer of the CSV data
+        na_values (list): Strings recognized as missing values
+        usecols (list): Columns to keep, in file order; None keeps all
+        engine (str): pyarrow or c, default CSV_ENGINE
+        schema (str): Schema name to use; None detects it from the header
+
+    Returns:
+        pandas.DataFrame: Parsed data
+    """
+    engine = check_engine(engine)
+    seekable = isinstance(source, str) or source.seekable()
+    if schema is None and seekable:
+        schema = match_schema(header_columns(source))
+
+    if schema is not None:
+        position = None if isinstance(source, str) else source.tell()
+        try:
+            return _read_schema(source, SCHEMAS[schema], na_values, usecols, engine)
+        except (ValueError, TypeError, KeyError) as e:
+            # ArrowInvalid turunan ValueError: nilai tidak cocok dengan skema
+            logger.info(f"CSV does not fit schema {schema!r}, inferring dtypes: {e}")
+            if position is not None:
+                source.seek(position)
+    return pd.read_csv(source, na_values=list(na_values), usecols=usecols)
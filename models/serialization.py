@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+
+
+def to_native(value):
+    """
+    Convert a single numpy/pandas scalar to a JSON-ready Python value
+
+    Args:
+        value: Scalar value
+
+    Returns:
+        Python int, float, bool, str or None (for NaN/NA)
+    """
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if value is None or (not isinstance(value, (str, bytes)) and pd.isna(value)):
+        return None
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def column_values(values):
+    """
+    Convert a whole column to JSON-ready Python values
+
+    Args:
+        values (pandas.Series or numpy.ndarray): Column values
+
+    Returns:
+        list: Native values with NaN/NA as None
+    """
+    if isinstance(values, pd.Series):
+        values = values.to_numpy() if values.dtype.kind in "biuf" else values.astype(object).to_numpy()
+    values = np.asarray(values)
+
+    if values.dtype.kind in "biu":
+        return values.tolist()
+    if values.dtype.kind == "f":
+        result = values.tolist()
+        for i in np.flatnonzero(np.isnan(values)):
+            result[i] = None
+        return result
+    return [to_native(value) for value in values.tolist()]
+
+
+def frame_records(frame, columns=None, row_label=None):
+    """
+    Convert a table to a list of JSON-ready records, one column at a time
+
+    Args:
+        frame (pandas.DataFrame or numpy.ndarray): Table to convert
+        columns (list): Column names; required for a numpy matrix, otherwise
+            a subset of the frame's columns (default all)
+        row_label (str): If given, every record starts with
+            ``'row': f'{row_label} {n}'`` counting from 1
+
+    Returns:
+        list: One dict per row, keyed by column name as str
+    """
+    if isinstance(frame, pd.DataFrame):
+        columns = list(frame.columns if columns is None else columns)
+        data = [column_values(frame[col]) for col in columns]
+        n_rows = len(frame)
+    else:
+        matrix = np.asarray(frame)
+        data = [column_values(matrix[:, j]) for j in range(len(columns))]
+        n_rows = matrix.shape[0]
+
+    keys = [str(col) for col in columns]
+    records = [dict(zip(keys, values)) for values in zip(*data)] if keys else [{} for _ in range(n_rows)]
+    if row_label is not None:
+        records = [{'row': f'{row_label} {i + 1}', **record} for i, record in enumerate(records)]
+    return records
+
+
+def series_dict(series):
+    """
+    Convert a Series to a JSON-ready dict keyed by its index as str
+
+    Args:
+        series (pandas.Series): Values to convert
+
+    Returns:
+        dict: Index label -> native value
+    """
+    return dict(zip((str(key) for key in series.index), column_values(series)))
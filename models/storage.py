@@ -0,0 +1,244 @@
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from dataset_cache import file_digest
+from jobs import pid_alive
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_DIR = "uploads"
+OUTPUT_DIR = "output"
+
+# Dataset id = 16 karakter pertama SHA-256 dari isi file
+DATASET_ID_LENGTH = 16
+_DATASET_ID_RE = re.compile(r"^[0-9a-f]{%d}$" % DATASET_ID_LENGTH)
+
+# Lease dataset yang sedang dipakai job: <output_root>/.leases/<dataset_id>.<pid>.<acak>
+LEASE_DIR = ".leases"
+
+_gc_lock = threading.Lock()
+_last_gc = 0.0
+
+
+def is_valid_dataset_id(dataset_id):
+    """
+    Check that a dataset id is well formed (safe to use in paths)
+
+    Args:
+        dataset_id (str): Dataset id from a request
+
+    Returns:
+        bool: True if the id is a lowercase hex digest prefix
+    """
+    return isinstance(dataset_id, str) and bool(_DATASET_ID_RE.match(dataset_id))
+
+
+def dataset_path(dataset_id, upload_dir=UPLOAD_DIR):
+    """
+    Return the path of the uploaded CSV for a dataset id
+
+    Args:
+        dataset_id (str): Dataset id
+        upload_dir (str): Upload directory
+
+    Returns:
+        str: Path to the stored CSV file
+    """
+    return os.path.join(upload_dir, f"{dataset_id}.csv")
+
+
+def output_dir_for(dataset_id, output_root=OUTPUT_DIR):
+    """
+    Return the output directory for a dataset id
+
+    Args:
+        dataset_id (str): Dataset id
+        output_root (str): Root output directory
+
+    Returns:
+        str: Per-dataset output directory
+    """
+    return os.path.join(output_root, dataset_id)
+
+
+def store_upload(file, upload_dir=UPLOAD_DIR):
+    """
+    Save an uploaded file under its content hash
+
+    Identical uploads map to the same dataset id, so their parsed frames,
+    preprocessing artifacts and outputs are shared.
+
+    Args:
+        file (werkzeug.datastructures.FileStorage): Uploaded file
+        upload_dir (str): Upload directory
+
+    Returns:
+        str: Dataset id
+    """
+    os.makedirs(upload_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(suffix=".part", dir=upload_dir)
+    os.close(fd)
+    try:
+        file.save(tmp_path)
+        return store_file(tmp_path, upload_dir)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def store_file(src_path, upload_dir=UPLOAD_DIR, digest=None):
+    """
+    Move a file into content-addressed storage
+
+    Args:
+        src_path (str): File to store; it is moved, not copied
+        upload_dir (str): Upload directory
+        digest (str): Precomputed SHA-256 hex digest of the file, if known
+
+    Returns:
+        str: Dataset id
+    """
+    dataset_id = (digest or file_digest(src_path))[:DATASET_ID_LENGTH]
+    target = dataset_path(dataset_id, upload_dir)
+    if os.path.exists(target):
+        os.remove(src_path)
+        touch(dataset_id, upload_dir)
+    else:
+        os.replace(src_path, target)
+    return dataset_id
+
+
+def touch(dataset_id, upload_dir=UPLOAD_DIR, output_root=OUTPUT_DIR):
+    """
+    Mark a dataset as recently used so garbage collection keeps it
+
+    Args:
+        dataset_id (str): Dataset id
+        upload_dir (str): Upload directory
+        output_root (str): Root output directory
+    """
+    for path in (dataset_path(dataset_id, upload_dir), output_dir_for(dataset_id, output_root)):
+        if os.path.exists(path):
+            os.utime(path, None)
+
+
+@contextmanager
+def dataset_in_use(dataset_id, upload_dir=UPLOAD_DIR, output_root=OUTPUT_DIR):
+    """
+    Keep garbage collection away from a dataset while a job works on it
+
+    A lease file tagged with the process id is held for the duration of the
+    block, so sweeps in any worker process skip the dataset. Leases of exited
+    processes are ignored. The dataset is touched again on exit, so its idle
+    time starts when the job ends.
+
+    Args:
+        dataset_id (str): Dataset id
+        upload_dir (str): Upload directory
+        output_root (str): Root output directory
+    """
+    lease_dir = os.path.join(output_root, LEASE_DIR)
+    os.makedirs(lease_dir, exist_ok=True)
+    lease = os.path.join(lease_dir, f"{dataset_id}.{os.getpid()}.{uuid.uuid4().hex}")
+    open(lease, "w").close()
+    try:
+        yield
+    finally:
+        os.remove(lease)
+        touch(dataset_id, upload_dir, output_root)
+
+
+def leased_datasets(output_root=OUTPUT_DIR):
+    """
+    Dataset ids held by a live process through dataset_in_use
+
+    Leases left behind by exited processes are removed.
+
+    Args:
+        output_root (str): Root output directory
+
+    Returns:
+        set: Dataset ids in use
+    """
+    lease_dir = os.path.join(output_root, LEASE_DIR)
+    if not os.path.isdir(lease_dir):
+        return set()
+    leased = set()
+    for name in os.listdir(lease_dir):
+        dataset_id, _, rest = name.partition(".")
+        pid = rest.partition(".")[0]
+        if pid.isdigit() and pid_alive(int(pid)):
+            leased.add(dataset_id)
+        else:
+            try:
+                os.remove(os.path.join(lease_dir, name))
+            except FileNotFoundError:
+                pass
+    return leased
+
+
+def collect_garbage(ttl_seconds, upload_dir=UPLOAD_DIR, output_root=OUTPUT_DIR, min_interval=0):
+    """
+    Delete uploads and per-dataset outputs not used within the TTL
+
+    Datasets leased by a running job (see dataset_in_use) are kept.
+
+    Args:
+        ttl_seconds (float): Maximum idle time of a dataset
+        upload_dir (str): Upload directory
+        output_root (str): Root output directory
+        min_interval (float): Skip the sweep if the last one ran more recently
+
+    Returns:
+        list: Dataset ids that were removed
+    """
+    global _last_gc
+    with _gc_lock:
+        now = time.time()
+        if now - _last_gc < min_interval:
+            return []
+        _last_gc = now
+
+    cutoff = time.time() - ttl_seconds
+    last_used = {}
+
+    if os.path.isdir(upload_dir):
+        for name in os.listdir(upload_dir):
+            dataset_id, ext = os.path.splitext(name)
+            path = os.path.join(upload_dir, name)
+            if ext == ".csv" and is_valid_dataset_id(dataset_id):
+                last_used[dataset_id] = os.path.getmtime(path)
+            elif (ext == ".part" or name.startswith("chunked-")) and os.path.getmtime(path) < cutoff:
+                # Upload yang terputus dan tidak pernah dilanjutkan
+                os.remove(path)
+    if os.path.isdir(output_root):
+        for name in os.listdir(output_root):
+            path = os.path.join(output_root, name)
+            if is_valid_dataset_id(name) and os.path.isdir(path):
+                last_used[name] = max(last_used.get(name, 0), os.path.getmtime(path))
+
+    # Lease dibaca setelah mtime: job yang mulai di antara keduanya tetap terlihat
+    in_use = leased_datasets(output_root)
+    removed = []
+    for dataset_id, mtime in last_used.items():
+        if mtime >= cutoff or dataset_id in in_use:
+            continue
+        upload = dataset_path(dataset_id, upload_dir)
+        if os.path.exists(upload) and os.path.getmtime(upload) >= cutoff:
+            # Dipakai lagi sejak dipindai
+            continue
+        if os.path.exists(upload):
+            os.remove(upload)
+        shutil.rmtree(output_dir_for(dataset_id, output_root), ignore_errors=True)
+        removed.append(dataset_id)
+
+    if removed:
+        logger.info(f"Garbage collected {len(removed)} datasets older than {ttl_seconds}s")
+    return removed
@@ -0,0 +1,630 @@
+import argparse
+import json
+import logging
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from artifacts import FORMAT_EXTENSIONS, TableWriter
+from balancing import balancing_options
+from charts import save_chart_data
+from dataset_cache import NA_VALUES
+from feature_selection import save_selection
+from instrumentation import timed_stage
+from pipeline import step_module
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNKSIZE = int(os.environ.get("STREAMING_CHUNKSIZE", "50000"))
+MEDIAN_MODES = ("exact", "approx")
+APPROX_CENTROIDS = 2048
+HEAD_ROWS = 10
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch of weighted centroids
+
+    With ``max_centroids=None`` every distinct value is kept with its count, so
+    quantiles are exact and memory grows with the number of distinct values.
+    Otherwise neighbouring centroids are merged once the limit is exceeded,
+    which bounds memory and gives an approximate quantile.
+    """
+
+    def __init__(self, max_centroids=None):
+        self.max_centroids = max_centroids
+        self.values = np.empty(0)
+        self.weights = np.empty(0)
+
+    @property
+    def count(self):
+        return int(self.weights.sum())
+
+    def update(self, x):
+        """
+        Add the non-missing values of one chunk
+
+        Args:
+            x (numpy.ndarray): 1-D float array, NaN values are ignored
+        """
+        x = x[~np.isnan(x)]
+        if x.size == 0:
+            return
+        values, counts = np.unique(x, return_counts=True)
+        self._merge(values, counts.astype(float))
+
+    def merge(self, other):
+        """Fold another sketch of the same column into this one"""
+        self._merge(other.values, other.weights)
+
+    def remove(self, x):
+        """
+        Take back values added earlier (exact sketches only)
+
+        Args:
+            x (numpy.ndarray): 1-D float array, NaN values are ignored
+
+        Raises:
+            ValueError: If the sketch is approximate or a value was never added
+        """
+        x = x[~np.isnan(x)]
+        if x.size == 0:
+            return
+        if self.max_centroids:
+            raise ValueError("Values cannot be removed from an approximate sketch")
+        values, counts = np.unique(x, return_counts=True)
+        pos = np.searchsorted(self.values, values)
+        found = pos < self.values.size
+        found[found] = self.values[pos[found]] == values[found]
+        if not found.all() or np.any(self.weights[pos] < counts):
+            raise ValueError("Removed values were not counted by this sketch")
+        self.weights[pos] -= counts
+        keep = self.weights > 0
+        self.values = self.values[keep]
+        self.weights = self.weights[keep]
+
+    def bounds(self):
+        """Smallest and largest value seen so far, NaN when the sketch is empty"""
+        if self.values.size == 0:
+            return np.nan, np.nan
+        return self.values[0], self.values[-1]
+
+    def _merge(self, values, weights):
+        values = np.concatenate([self.values, values])
+        weights = np.concatenate([self.weights, weights])
+        self.values, inverse = np.unique(values, return_inverse=True)
+        self.weights = np.bincount(inverse, weights=weights)
+        if self.max_centroids and self.values.size > self.max_centroids:
+            self._compress()
+
+    def _compress(self):
+        # Kelompokkan centroid per kuantil bobot, lalu ambil rata-rata berbobot
+        cum = np.cumsum(self.weights)
+        bucket = np.minimum(((cum - self.weights / 2) / cum[-1] * self.max_centroids).astype(np.intp),
+                            self.max_centroids - 1)
+        weights = np.bincount(bucket, weights=self.weights)
+        sums = np.bincount(bucket, weights=self.values * self.weights)
+        keep = weights > 0
+        self.values = sums[keep] / weights[keep]
+        self.weights = weights[keep]
+
+    def median(self):
+        """
+        Median of all values seen so far, NaN when the sketch is empty
+
+        Matches ``numpy.median``: the mean of the two middle values for an
+        even count.
+        """
+        n = self.count
+        if n == 0:
+            return np.nan
+        cum = np.cumsum(self.weights)
+        lo = self.values[np.searchsorted(cum, (n - 1) // 2, side='right')]
+        hi = self.values[np.searchsorted(cum, n // 2, side='right')]
+        return (lo + hi) / 2
+
+
+def read_chunks(path, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Iterate over a CSV file in chunks with the pipeline's missing-value markers
+
+    Args:
+        path (str): Path to CSV file
+        chunksize (int): Rows per chunk
+
+    Returns:
+        iterator: pandas.DataFrame chunks
+    """
+    return pd.read_csv(path, na_values=list(NA_VALUES), chunksize=chunksize)
+
+
+@timed_stage('profile_pass', step='stream')
+def profile_pass(path, chunksize=DEFAULT_CHUNKSIZE, median="exact", max_centroids=APPROX_CENTROIDS):
+    """
+    First pass: missing counts, numeric columns, min/max and medians
+
+    Args:
+        path (str): Path to CSV file
+        chunksize (int): Rows per chunk
+        median (str): "exact" or "approx" (bounded quantile sketch)
+        max_centroids (int): Sketch size for approximate medians
+
+    Returns:
+        dict: Column profile of the whole file
+    """
+    if median not in MEDIAN_MODES:
+        raise ValueError(f"median must be one of {MEDIAN_MODES}")
+
+    columns = None
+    missing = None
+    non_numeric = set()
+    sketches = {}
+    data_min = {}
+    data_max = {}
+    head = None
+    n_rows = 0
+    n_chunks = 0
+
+    for chunk in read_chunks(path, chunksize):
+        if columns is None:
+            columns = list(chunk.columns)
+            missing = pd.Series(0, index=chunk.columns, dtype=np.int64)
+            head = chunk.head(HEAD_ROWS)
+        n_rows += len(chunk)
+        n_chunks += 1
+        missing += chunk.isna().sum()
+
+        for col in columns:
+            if col in non_numeric:
+                continue
+            if not pd.api.types.is_numeric_dtype(chunk[col]):
+                non_numeric.add(col)
+                continue
+            values = chunk[col].to_numpy(dtype=float)
+            if col not in sketches:
+                sketches[col] = QuantileSketch(None if median == "exact" else max_centroids)
+            sketches[col].update(values)
+            if not np.isnan(values).all():
+                lo, hi = np.nanmin(values), np.nanmax(values)
+                data_min[col] = min(data_min.get(col, lo), lo)
+                data_max[col] = max(data_max.get(col, hi), hi)
+
+    if columns is None:
+        raise ValueError("Dataset is empty")
+
+    # Kolom yang seluruhnya kosong di-drop, sama seperti load_dataset(drop_empty=True)
+    kept = [col for col in columns if missing[col] < n_rows]
+    numeric = [col for col in kept if col not in non_numeric]
+
+    return {
+        'columns': columns,
+        'kept_columns': kept,
+        'numeric_columns': numeric,
+        'missing': missing,
+        'n_rows': n_rows,
+        'n_chunks': n_chunks,
+        'head': head,
+        'medians': np.array([sketches[col].median() for col in numeric]),
+        'data_min': np.array([data_min[col] for col in numeric]),
+        'data_max': np.array([data_max[col] for col in numeric])
+    }
+
+
+def fit_scaling(profile):
+    """
+    Derive median imputation and MinMax scaling parameters from a profile
+
+    Uses the same arithmetic as ``SimpleImputer`` + ``MinMaxScaler``; the
+    median lies inside [min, max], so imputation does not change the range.
+
+    Args:
+        profile (dict): Output of profile_pass
+
+    Returns:
+        dict: Columns, medians, scale and offset per column
+    """
+    data_range = profile['data_max'] - profile['data_min']
+    data_range[data_range < 10 * np.finfo(data_range.dtype).eps] = 1.0
+    scale = 1.0 / data_range
+    return {
+        'columns': profile['numeric_columns'],
+        'medians': profile['medians'],
+        'scale': scale,
+        'offset': -profile['data_min'] * scale
+    }
+
+
+def transform_chunk(chunk, params):
+    """
+    Impute and scale the numeric columns of one chunk
+
+    Args:
+        chunk (pandas.DataFrame): Raw chunk
+        params (dict): Output of fit_scaling
+
+    Returns:
+        numpy.ndarray: Scaled matrix for the chunk
+    """
+    X = chunk[params['columns']].to_numpy(dtype=float)
+    nan_rows, nan_cols = np.where(np.isnan(X))
+    X[nan_rows, nan_cols] = params['medians'][nan_cols]
+    X *= params['scale']
+    X += params['offset']
+    return X
+
+
+def _target_column(profile, target):
+    return target if target in profile['kept_columns'] else profile['kept_columns'][-1]
+
+
+@timed_stage('scale_pass', step='stream')
+def scale_pass(path, params, profile, target="Biopsy", output_dir="output", chunksize=DEFAULT_CHUNKSIZE,
+               fmt=None):
+    """
+    Second pass: write the scaled data and accumulate ANOVA sufficient statistics
+
+    Per class the row count, the per-feature sum and the sum of squares are
+    accumulated, which is all the F-test needs.
+
+    Args:
+        path (str): Path to CSV file
+        params (dict): Output of fit_scaling
+        profile (dict): Output of profile_pass
+        target (str): Target column name
+        output_dir (str): Output directory
+        chunksize (int): Rows per chunk
+        fmt (str): Artifact format, default ARTIFACT_FORMAT
+
+    Returns:
+        dict: Output file, feature layout, class statistics and scaled ranges
+    """
+    target_col = _target_column(profile, target)
+    columns = params['columns']
+    feature_idx = np.array([i for i, col in enumerate(columns) if col != target_col], dtype=np.intp)
+    n_features = len(feature_idx)
+
+    class_count = {}
+    class_sum = {}
+    sumsq = np.zeros(n_features)
+    scaled_min = np.full(len(columns), np.inf)
+    scaled_max = np.full(len(columns), -np.inf)
+    head = None
+
+    writer = TableWriter(output_dir, "2_scaled_data", columns, n_rows=profile['n_rows'], fmt=fmt)
+    for chunk in read_chunks(path, chunksize):
+        X_scaled = transform_chunk(chunk, params)
+        writer.write(pd.DataFrame(X_scaled, columns=columns))
+        if head is None:
+            head = X_scaled[:HEAD_ROWS].copy()
+        scaled_min = np.minimum(scaled_min, X_scaled.min(axis=0))
+        scaled_max = np.maximum(scaled_max, X_scaled.max(axis=0))
+
+        X_feat = X_scaled[:, feature_idx]
+        sumsq += (X_feat ** 2).sum(axis=0)
+        y = chunk[target_col].to_numpy()
+        for klass in np.unique(y):
+            rows = y == klass
+            class_count[klass] = class_count.get(klass, 0) + int(rows.sum())
+            class_sum[klass] = class_sum.get(klass, np.zeros(n_features)) + X_feat[rows].sum(axis=0)
+
+    return {
+        'output_file': writer.close(),
+        'target_column': target_col,
+        'feature_columns': pd.Index([columns[i] for i in feature_idx]),
+        'feature_idx': feature_idx,
+        'class_count': class_count,
+        'class_sum': class_sum,
+        'sumsq': sumsq,
+        'scaled_min': scaled_min,
+        'scaled_max': scaled_max,
+        'head': head
+    }
+
+
+def anova_from_stats(class_count, class_sum, sumsq):
+    """
+    One-way ANOVA F-test from per-class sufficient statistics
+
+    Same formulas as ``sklearn.feature_selection.f_oneway``.
+
+    Args:
+        class_count (dict): Class -> number of rows
+        class_sum (dict): Class -> per-feature sum
+        sumsq (numpy.ndarray): Per-feature sum of squares over all rows
+
+    Returns:
+        tuple: (F-scores, p-values)
+    """
+    classes = sorted(class_count)
+    n_samples = sum(class_count.values())
+    total_sum = sum(class_sum[k] for k in classes)
+    square_of_sums_alldata = total_sum ** 2
+    sstot = sumsq - square_of_sums_alldata / float(n_samples)
+    ssbn = sum(class_sum[k] ** 2 / class_count[k] for k in classes) - square_of_sums_alldata / float(n_samples)
+    sswn = sstot - ssbn
+    msb = ssbn / float(len(classes) - 1)
+    msw = sswn / float(n_samples - len(classes))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        f = msb / msw
+    from scipy import special
+
+    return f, special.fdtrc(len(classes) - 1, n_samples - len(classes), f)
+
+
+def rus_plan(class_count, random_state=42):
+    """
+    Choose the rows Random Under Sampling keeps, without loading the data
+
+    Draws from the same random stream as ``RandomUnderSampler`` (classes in
+    sorted order, majority classes sampled down to the minority count), so
+    the same rows are kept.
+
+    Args:
+        class_count (dict): Class -> number of rows
+        random_state (int): Seed used by RandomUnderSampler
+
+    Returns:
+        dict: Class -> sorted within-class positions to keep, or None for all
+    """
+    rng = np.random.RandomState(random_state)
+    classes = sorted(class_count)
+    minority = min(classes, key=lambda k: class_count[k])
+    n_min = class_count[minority]
+
+    plan = {}
+    for klass in classes:
+        if klass == minority:
+            plan[klass] = None
+        else:
+            plan[klass] = np.sort(rng.choice(range(class_count[klass]), size=n_min, replace=False))
+    return plan
+
+
+@timed_stage('select_pass', step='stream')
+def select_pass(path, params, profile, scaled, selected_idx, plan, output_dir="output",
+                chunksize=DEFAULT_CHUNKSIZE, fmt=None):
+    """
+    Third pass: write the ANOVA-selected features and the RUS-balanced data
+
+    Balanced rows are grouped by class like RandomUnderSampler's output;
+    within a class they keep file order. Each class is first collected in a
+    raw float64 spool file, then copied into the artifact in class order.
+
+    Args:
+        path (str): Path to CSV file
+        params (dict): Output of fit_scaling
+        profile (dict): Output of profile_pass
+        scaled (dict): Output of scale_pass
+        selected_idx (numpy.ndarray): Selected feature positions
+        plan (dict): Output of rus_plan
+        output_dir (str): Output directory
+        chunksize (int): Rows per chunk
+        fmt (str): Artifact format, default ARTIFACT_FORMAT
+
+    Returns:
+        dict: Output files and the first rows of each
+    """
+    target_col = scaled['target_column']
+    feature_columns = scaled['feature_columns']
+    selected_features = feature_columns.to_numpy()[selected_idx]
+    columns_idx = scaled['feature_idx'][selected_idx]
+    balanced_columns = list(feature_columns) + ['target']
+
+    selected_writer = TableWriter(output_dir, "3_selected_features", list(selected_features) + ['target'],
+                                  n_rows=profile['n_rows'], fmt=fmt)
+    spool_files = {klass: os.path.join(output_dir, f"4_rus_spool_{i}.tmp") for i, klass in enumerate(sorted(plan))}
+    spools = {klass: open(spool, 'wb') for klass, spool in spool_files.items()}
+    seen = dict.fromkeys(plan, 0)
+    kept = dict.fromkeys(plan, 0)
+    selected_head = None
+    target_dtype = None
+
+    try:
+        for chunk in read_chunks(path, chunksize):
+            X_scaled = transform_chunk(chunk, params)
+            y = chunk[target_col].reset_index(drop=True)
+            target_dtype = target_dtype or y.dtype
+
+            selected_data = pd.DataFrame(X_scaled[:, columns_idx], columns=selected_features)
+            selected_data['target'] = y
+            selected_writer.write(selected_data)
+            if selected_head is None:
+                selected_head = selected_data.head(HEAD_ROWS)
+
+            y_values = y.to_numpy()
+            for klass, keep in plan.items():
+                rows = np.flatnonzero(y_values == klass)
+                if keep is not None:
+                    # posisi baris di dalam kelasnya, dihitung lintas chunk
+                    ordinal = np.arange(seen[klass], seen[klass] + rows.size)
+                    pos = np.searchsorted(keep, ordinal)
+                    hit = (pos < keep.size) & (keep[np.minimum(pos, keep.size - 1)] == ordinal)
+                    seen[klass] += rows.size
+                    rows = rows[hit]
+                if rows.size == 0:
+                    continue
+                block = np.column_stack([X_scaled[rows][:, scaled['feature_idx']], y_values[rows].astype(float)])
+                spools[klass].write(np.ascontiguousarray(block, dtype=np.float64).tobytes())
+                kept[klass] += rows.size
+        selected_file = selected_writer.close()
+    finally:
+        for spool in spools.values():
+            spool.close()
+
+    balanced_writer = TableWriter(output_dir, "4_rus_cleaned_data", balanced_columns,
+                                  n_rows=sum(kept.values()), fmt=fmt)
+    balanced_head = None
+    try:
+        for klass in sorted(spool_files):
+            if kept[klass]:
+                block = np.memmap(spool_files[klass], dtype=np.float64, mode='r',
+                                  shape=(kept[klass], len(balanced_columns)))
+                for start in range(0, kept[klass], chunksize):
+                    balanced = pd.DataFrame(np.asarray(block[start:start + chunksize]), columns=balanced_columns)
+                    balanced['target'] = balanced['target'].astype(target_dtype)
+                    balanced_writer.write(balanced)
+                    if balanced_head is None or len(balanced_head) < HEAD_ROWS:
+                        balanced_head = pd.concat([balanced_head, balanced.head(HEAD_ROWS)],
+                                                  ignore_index=True).head(HEAD_ROWS)
+                del block
+        balanced_file = balanced_writer.close()
+    finally:
+        for spool in spool_files.values():
+            if os.path.exists(spool):
+                os.remove(spool)
+
+    return {
+        'selected_features': selected_features,
+        'selected_file': selected_file,
+        'selected_head': selected_head,
+        'balanced_file': balanced_file,
+        'balanced_head': balanced_head
+    }
+
+
+def run_streaming_pipeline(path="dataset/risk_factors_cervical_cancer.csv", target="Biopsy",
+                           output_dir="output", chunksize=DEFAULT_CHUNKSIZE, median="exact",
+                           max_centroids=APPROX_CENTROIDS, on_stage_done=None, fmt=None, policy=None,
+                           balancing=None):
+    """
+    Run steps 1-4 over a CSV file chunk by chunk
+
+    Peak memory is bounded by the chunk size (plus one sketch entry per
+    distinct value for exact medians) instead of the file size. The file is
+    read three times: profiling, scaling with ANOVA statistics, and writing
+    the selected and balanced outputs.
+
+    Args:
+        path (str): Path to CSV file
+        target (str): Target column name
+        output_dir (str): Output directory
+        chunksize (int): Rows per chunk
+        median (str): "exact" or "approx" (bounded quantile sketch)
+        max_centroids (int): Sketch size for approximate medians
+        on_stage_done (callable): Optional callback(stage, completed, total)
+        fmt (str): Artifact format for steps 2-4, default ARTIFACT_FORMAT
+        policy (dict): Step 3 selection policy; features are always scored
+            with ANOVA, from the per-class statistics
+        balancing (dict): Step 4 balancing options; only the rus sampler
+            without a ratio can be planned from class counts, the seed is used
+
+    Returns:
+        dict: Per-step JSON results, per-pass timings and total wall-clock time
+
+    Raises:
+        ValueError: If the balancing options need the whole dataset
+    """
+    balancing = balancing or balancing_options()
+    if balancing['sampler'] != 'rus' or balancing['ratio'] is not None:
+        raise ValueError("Streaming mode only supports the rus sampler without a ratio")
+
+    step1 = step_module('1')
+    step2 = step_module('2')
+    step3 = step_module('3')
+    step4 = step_module('4')
+
+    t0 = time.perf_counter()
+    timings = {}
+    stages = ['profile', 'scale', 'select', 'serialize']
+
+    def timed(stage, func, *args, **kwargs):
+        start = time.perf_counter()
+        value = func(*args, **kwargs)
+        end = time.perf_counter()
+        timings[stage] = {'start': round(start - t0, 6), 'seconds': round(end - start, 6)}
+        logger.info(f"Streaming stage {stage} selesai dalam {end - start:.3f}s")
+        if on_stage_done is not None:
+            on_stage_done(stage, len(timings), len(stages))
+        return value
+
+    # Pass 1: missing value, min/max, median
+    profile = timed('profile', profile_pass, path, chunksize, median, max_centroids)
+    _, missing_df = step1.missing_counts_table(profile['missing'], profile['n_rows'])
+    missing_file = step1.save_missing_value_table(missing_df, output_dir)
+
+    # Pass 2: scaling + statistik ANOVA per kelas
+    params = fit_scaling(profile)
+    scaled = timed('scale', scale_pass, path, params, profile, target, output_dir, chunksize, fmt)
+    scores, pvalues = anova_from_stats(scaled['class_count'], scaled['class_sum'], scaled['sumsq'])
+    selected_idx = step3.select_features(pvalues, scores, policy)
+    plan = rus_plan(scaled['class_count'], balancing['seed'])
+
+    # Pass 3: fitur terpilih + data seimbang
+    selection = timed('select', select_pass, path, params, profile, scaled, selected_idx, plan,
+                      output_dir, chunksize, fmt)
+    save_selection('anova', policy, None, output_dir)
+
+    def serialize():
+        columns = scaled['feature_columns']
+        selected_features = selection['selected_features']
+        metrics_df = step3.anova_metrics(columns, scores, pvalues, selected_features, policy)
+        save_chart_data('anova', step3.anova_chart_data(metrics_df, 'anova', policy), output_dir)
+
+        classes = np.array(sorted(scaled['class_count']))
+        cnt = np.array([scaled['class_count'][k] for k in classes])
+        cnt_res = np.array([scaled['class_count'][k] if plan[k] is None else plan[k].size for k in classes])
+        save_chart_data('rus', step4.rus_chart_data(cnt, cnt_res, classes), output_dir)
+
+        X_head = profile['head'][params['columns']]
+        stats = {
+            'original_min': profile['data_min'],
+            'original_max': profile['data_max'],
+            'scaled_min': scaled['scaled_min'],
+            'scaled_max': scaled['scaled_max'],
+            'total_rows': profile['n_rows']
+        }
+        return {
+            '1': step1.missing_value_result(missing_df, missing_file),
+            '2': step2.scaling_result(X_head, scaled['head'], scaled['output_file'], stats),
+            '3': step3.anova_result(columns, selected_features, metrics_df, selection['selected_head'],
+                                    selection['selected_file'], target, 'anova', policy),
+            '4': step4.rus_result(columns, classes, cnt, classes, cnt_res, selection['balanced_head'],
+                                  selection['balanced_file'], target, balancing)
+        }
+
+    steps = timed('serialize', serialize)
+
+    return {
+        'message': 'Streaming pipeline completed successfully',
+        'mode': 'stream',
+        'rows': profile['n_rows'],
+        'chunks': profile['n_chunks'],
+        'chunksize': chunksize,
+        'median': median,
+        'steps': steps,
+        'timings': timings,
+        'total_seconds': round(time.perf_counter() - t0, 6)
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run steps 1-4 chunk by chunk for CSV files larger than RAM")
+    parser.add_argument("path", nargs="?", default="dataset/risk_factors_cervical_cancer.csv", help="Path to CSV file")
+    parser.add_argument("--target", default="Biopsy", help="Target column name")
+    parser.add_argument("--output-dir", default="output", help="Output directory")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="Rows per chunk")
+    parser.add_argument("--median", choices=MEDIAN_MODES, default="exact", help="Exact or sketch-based median")
+    parser.add_argument("--format", choices=FORMAT_EXTENSIONS, default=None, help="Artifact format for steps 2-4")
+    parser.add_argument("--json", action="store_true", help="Print per-step results as JSON")
+    args = parser.parse_args(argv)
+
+    result = run_streaming_pipeline(args.path, target=args.target, output_dir=args.output_dir,
+                                    chunksize=args.chunksize, median=args.median, fmt=args.format)
+
+    if args.json:
+        print(json.dumps(result, indent=2, default=str))
+        return
+
+    print("=== Streaming Pipeline ===")
+    print(f"{result['rows']} baris dalam {result['chunks']} chunk ({result['chunksize']} baris per chunk)")
+    for stage, timing in result['timings'].items():
+        print(f"{stage:<10} mulai {timing['start']:8.3f}s  durasi {timing['seconds']:8.3f}s")
+    print(f"Total: {result['total_seconds']:.3f}s")
+    for step, step_result in result['steps'].items():
+        print(f"Step {step}: {step_result['output_file']}")
+
+
+if __name__ == "__main__":
+    main()
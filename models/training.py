@@ -0,0 +1,360 @@
+import os
+import math
+import time
+import logging
+
+import numpy as np
+
+from balancing import balancing_options, resample, resampled_target
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FOLDS = 5
+DEFAULT_METRIC = "roc_auc"
+HALVING_FACTOR = 3
+RANDOM_STATE = 42
+# Jumlah worker untuk (kandidat, fold) yang dijalankan paralel
+DEFAULT_JOBS = int(os.environ.get("TRAINING_JOBS", min(4, os.cpu_count() or 1)))
+# Baris training per fold minimal di rung pertama, dan baris minoritas minimal
+# supaya sampler berbasis tetangga (SMOTE, ENN) tetap bisa jalan
+MIN_RESOURCE = 60
+MIN_MINORITY = 12
+MIN_BUDGET = 10
+MODEL_FILE = "5_best_model.joblib"
+METRICS = ("roc_auc", "average_precision", "f1", "precision", "recall", "balanced_accuracy", "accuracy")
+
+
+def _logistic_regression(params, seed):
+    from sklearn.linear_model import LogisticRegression
+
+    return LogisticRegression(max_iter=2000, random_state=seed, **params)
+
+
+def _random_forest(params, seed):
+    from sklearn.ensemble import RandomForestClassifier
+
+    # n_jobs=1: paralelisme ada di level fold/kandidat
+    return RandomForestClassifier(random_state=seed, n_jobs=1, **params)
+
+
+def _gradient_boosting(params, seed):
+    from sklearn.ensemble import HistGradientBoostingClassifier
+
+    return HistGradientBoostingClassifier(random_state=seed, **params)
+
+
+# Registry model: build(params, seed) -> estimator sklearn, grid -> kandidat hyperparameter,
+# budget -> parameter jumlah iterasi yang ikut diperkecil di rung awal successive halving
+MODELS = {
+    'logistic_regression': {
+        'name': 'Logistic Regression',
+        'build': _logistic_regression,
+        'grid': {'C': [0.01, 0.1, 1.0, 10.0]},
+    },
+    'random_forest': {
+        'name': 'Random Forest',
+        'build': _random_forest,
+        'grid': {'n_estimators': [200], 'max_depth': [None, 6, 12], 'min_samples_leaf': [1, 5]},
+        'budget': 'n_estimators',
+    },
+    'gradient_boosting': {
+        'name': 'Gradient Boosting',
+        'build': _gradient_boosting,
+        'grid': {'learning_rate': [0.05, 0.1], 'max_depth': [3, None], 'max_iter': [100, 300]},
+        'budget': 'max_iter',
+    },
+}
+
+
+def training_options(models=None, folds=None, metric=None, halving_factor=None, seed=None):
+    """
+    Build and validate step 5 training options
+
+    Args:
+        models (list or str): Names in MODELS (list or comma separated), default all
+        folds (int): Stratified cross-validation folds, default 5
+        metric (str): Metric candidates are ranked by, one of METRICS
+        halving_factor (int): Successive halving keeps 1/factor of the
+            candidates per rung, default 3
+        seed (int): Random seed of folds, subsamples and models, default 42
+
+    Returns:
+        dict: Options with 'models', 'folds', 'metric', 'halving_factor' and 'seed'
+
+    Raises:
+        ValueError: If an option is invalid
+    """
+    if isinstance(models, str):
+        models = [name.strip() for name in models.split(",") if name.strip()]
+    models = list(models or MODELS)
+    unknown = [name for name in models if name not in MODELS]
+    if unknown:
+        raise ValueError(f"Unknown model {unknown[0]!r}, expected one of {sorted(MODELS)}")
+    metric = metric or DEFAULT_METRIC
+    if metric not in METRICS:
+        raise ValueError(f"Unknown metric {metric!r}, expected one of {list(METRICS)}")
+    try:
+        folds = DEFAULT_FOLDS if folds in (None, "") else int(folds)
+        halving_factor = HALVING_FACTOR if halving_factor in (None, "") else int(halving_factor)
+        seed = RANDOM_STATE if seed in (None, "") else int(seed)
+    except (TypeError, ValueError):
+        raise ValueError("folds, halving_factor and seed must be integers")
+    if not 2 <= folds <= 20:
+        raise ValueError("folds must be between 2 and 20")
+    if halving_factor < 2:
+        raise ValueError("halving_factor must be at least 2")
+    return {'models': list(dict.fromkeys(models)), 'folds': folds, 'metric': metric,
+            'halving_factor': halving_factor, 'seed': seed}
+
+
+def candidates(model):
+    """Hyperparameter candidates of a model, in grid order"""
+    from sklearn.model_selection import ParameterGrid
+
+    return list(ParameterGrid(MODELS[model]['grid']))
+
+
+def rung_params(model, params, fraction):
+    """
+    Hyperparameters of a candidate at a successive halving rung
+
+    The model's budget parameter (trees, boosting iterations) is scaled by
+    the rung's share of the full budget, so early rungs are cheap for
+    models whose cost does not depend much on the row count.
+    """
+    budget = MODELS[model].get('budget')
+    if budget is None or fraction >= 1:
+        return params
+    return {**params, budget: max(MIN_BUDGET, int(params[budget] * fraction))}
+
+
+def fold_indices(y, folds, seed=RANDOM_STATE):
+    """
+    Stratified cross-validation folds
+
+    Returns:
+        list: (train positions, test positions) per fold
+
+    Raises:
+        ValueError: If a class has fewer rows than folds
+    """
+    from sklearn.model_selection import StratifiedKFold
+
+    counts = np.unique(y, return_counts=True)[1]
+    if len(counts) < 2:
+        raise ValueError("Training needs at least two target classes")
+    if counts.min() < folds:
+        raise ValueError(f"The smallest class has {counts.min()} rows, fewer than {folds} folds")
+    return list(StratifiedKFold(n_splits=folds, shuffle=True, random_state=seed).split(np.zeros(len(y)), y))
+
+
+def rung_sizes(n_train, minority_share, rounds, factor):
+    """
+    Training rows per fold for every successive halving rung
+
+    The last rung uses the whole training fold; earlier rungs shrink by
+    ``factor`` but keep at least MIN_RESOURCE rows and MIN_MINORITY rows
+    of the smallest class.
+
+    Returns:
+        list: Row count per rung
+    """
+    floor = max(MIN_RESOURCE, math.ceil(MIN_MINORITY / max(minority_share, 1e-12)))
+    return [min(n_train, max(floor, int(n_train / factor ** (rounds - rung)))) for rung in range(rounds + 1)]
+
+
+def model_metrics(y_true, proba, classes):
+    """
+    Held-out metrics of one fold
+
+    Binary targets use the positive (last) class; multi-class targets use
+    one-vs-rest ROC AUC and macro averages.
+
+    Returns:
+        dict: Metric name -> value
+    """
+    from sklearn import metrics
+
+    pred = classes[np.argmax(proba, axis=1)]
+    binary = len(classes) == 2
+    average = 'binary' if binary else 'macro'
+    kwargs = {'average': average, 'zero_division': 0}
+    if binary:
+        kwargs['pos_label'] = classes[1]
+    present = len(np.unique(y_true)) > 1
+    if binary:
+        roc_auc = metrics.roc_auc_score(y_true, proba[:, 1]) if present else float('nan')
+        average_precision = (metrics.average_precision_score(y_true, proba[:, 1], pos_label=classes[1])
+                             if present else float('nan'))
+    else:
+        roc_auc = metrics.roc_auc_score(y_true, proba, multi_class='ovr', labels=classes) if present else float('nan')
+        onehot = (np.asarray(y_true)[:, None] == classes[None, :]).astype(int)
+        average_precision = metrics.average_precision_score(onehot, proba, average='macro')
+    return {
+        'roc_auc': float(roc_auc),
+        'average_precision': float(average_precision),
+        'f1': float(metrics.f1_score(y_true, pred, **kwargs)),
+        'precision': float(metrics.precision_score(y_true, pred, **kwargs)),
+        'recall': float(metrics.recall_score(y_true, pred, **kwargs)),
+        'balanced_accuracy': float(metrics.balanced_accuracy_score(y_true, pred)),
+        'accuracy': float(metrics.accuracy_score(y_true, pred)),
+    }
+
+
+def balanced_rows(X, y, balancing):
+    """Apply the step 4 sampler to a training set, returning the rows to fit on"""
+    resampled = resample(X, y, balancing)
+    X_bal = X[resampled['indices']]
+    if resampled['X_extra'] is not None:
+        X_bal = np.vstack([X_bal, resampled['X_extra']])
+    return X_bal, resampled_target(y, resampled)
+
+
+def fit_model(X, y, model, params, balancing=None, seed=RANDOM_STATE):
+    """
+    Fit one model on balanced rows
+
+    Args:
+        X (numpy.ndarray): Training features
+        y (numpy.ndarray): Training target
+        model (str): Name in MODELS
+        params (dict): Hyperparameters
+        balancing (dict): Output of balancing.balancing_options
+        seed (int): Random seed of the model
+
+    Returns:
+        estimator: Fitted sklearn classifier
+    """
+    X_bal, y_bal = balanced_rows(X, y, balancing or balancing_options())
+    return MODELS[model]['build'](params, seed).fit(X_bal, y_bal)
+
+
+def evaluate_fold(X, y, model, params, train, test, balancing, seed, classes, columns=None):
+    """
+    Balance a training fold, fit on it and score the untouched test fold
+
+    Balancing happens inside the fold, so resampled or synthetic rows never
+    leak into the rows a model is scored on.
+
+    Args:
+        columns (numpy.ndarray): Feature positions selected on the training
+            fold, None for all columns
+
+    Returns:
+        dict: Metrics plus fit/score seconds, balanced training rows and features used
+    """
+    start = time.perf_counter()
+    if columns is None:
+        columns = np.arange(X.shape[1])
+    X_bal, y_bal = balanced_rows(X[np.ix_(train, columns)], y[train], balancing)
+    estimator = MODELS[model]['build'](params, seed).fit(X_bal, y_bal)
+    fitted = time.perf_counter()
+    proba = estimator.predict_proba(X[np.ix_(test, columns)])
+    # Kelas yang tidak muncul di training fold mendapat probabilitas 0
+    aligned = np.zeros((len(test), len(classes)))
+    aligned[:, np.searchsorted(classes, estimator.classes_)] = proba
+    result = model_metrics(y[test], aligned, classes)
+    result.update({'fit_seconds': fitted - start, 'score_seconds': time.perf_counter() - fitted,
+                   'train_rows': int(len(y_bal)), 'features': int(len(columns))})
+    return result
+
+
+def _subsample(train, y, size, seed):
+    """Stratified subset of a training fold, the same for every candidate of a rung"""
+    # Sisa baris yang terlalu sedikit untuk dibagi per kelas: pakai seluruh fold
+    if size is None or size >= len(train) - len(np.unique(y[train])):
+        return train
+    from sklearn.model_selection import train_test_split
+
+    subset, _ = train_test_split(train, train_size=size, stratify=y[train], random_state=seed)
+    return np.sort(subset)
+
+
+def successive_halving(X, y, options=None, balancing=None, n_jobs=None, select=None):
+    """
+    Cross-validate every model's candidates, dropping poor ones early
+
+    Each rung fits the surviving candidates on all folds, with the training
+    folds subsampled to the rung's size and the iteration budget scaled
+    down alike (see rung_params), and keeps the best 1/factor of
+    every model's candidates by mean ``metric``. Models with fewer
+    candidates join at a later, larger rung, so all of them finish on full
+    training folds. The (candidate, fold) fits of a rung run in parallel.
+
+    With ``select``, features are chosen again on the training rows of every
+    fold and rung, so the test fold takes no part in feature selection and
+    the scores estimate the whole select-then-fit procedure.
+
+    Args:
+        X (numpy.ndarray): Scaled features
+        y (numpy.ndarray): Target values
+        options (dict): Output of training_options, defaults when None
+        balancing (dict): Step 4 sampler applied inside every training fold
+        n_jobs (int): Parallel workers, default TRAINING_JOBS
+        select (callable): select(X_train, y_train) -> column positions,
+            None to use every column of X
+
+    Returns:
+        dict: 'history' (one record per candidate, rung and fold), 'best'
+            (model -> best params and fold records on the last rung) and 'rungs'
+    """
+    import joblib
+
+    options = options or training_options()
+    balancing = balancing or balancing_options()
+    factor, seed, metric = options['halving_factor'], options['seed'], options['metric']
+    y = np.asarray(y)
+    classes = np.unique(y)
+    splits = fold_indices(y, options['folds'], seed)
+
+    grids = {model: candidates(model) for model in options['models']}
+    rounds = max(math.ceil(math.log(len(grid), factor) - 1e-9) for grid in grids.values())
+    share = np.unique(y, return_counts=True)[1].min() / len(y)
+    sizes = rung_sizes(min(len(train) for train, _ in splits), share, rounds, factor)
+    alive = {model: [] for model in grids}
+    history = []
+
+    for rung in range(rounds + 1):
+        for model, grid in grids.items():
+            # Model dengan kandidat sedikit baru masuk di rung yang lebih besar
+            if rung == rounds - math.ceil(math.log(len(grid), factor) - 1e-9):
+                alive[model] = list(range(len(grid)))
+        size = None if rung == rounds else sizes[rung]
+        folds = []
+        for fold, (train, test) in enumerate(splits):
+            train = _subsample(train, y, size, seed + 1000 * rung + fold)
+            # Seleksi fitur hanya dari baris training fold ini
+            columns = None if select is None else np.asarray(select(X[train], y[train]), dtype=np.intp)
+            folds.append((fold, train, test, columns))
+        tasks = [(model, index, fold, train, test, columns) for model, indices in alive.items()
+                 for index in indices for fold, train, test, columns in folds]
+        jobs = min(n_jobs or DEFAULT_JOBS, len(tasks))
+        logger.info(f"Successive halving rung {rung}: {len(tasks)} fit, {sizes[rung]} baris per fold")
+        fraction = factor ** (rung - rounds)
+        outputs = joblib.Parallel(n_jobs=jobs)(
+            joblib.delayed(evaluate_fold)(X, y, model, rung_params(model, grids[model][index], fraction),
+                                          train, test, balancing, seed, classes, columns)
+            for model, index, _, train, test, columns in tasks)
+
+        scores = {}
+        for (model, index, fold, _, _, _), output in zip(tasks, outputs):
+            history.append({'rung': rung, 'model': model, 'candidate': index, 'params': grids[model][index],
+                            'fold': fold, **output})
+            scores.setdefault((model, index), []).append(output[metric])
+        for model, indices in alive.items():
+            ranked = sorted(indices, key=lambda index: -np.nan_to_num(np.mean(scores[(model, index)]), nan=-np.inf))
+            alive[model] = ranked if rung == rounds else ranked[:max(1, math.ceil(len(ranked) / factor))]
+
+    best = {}
+    for model, ranked in alive.items():
+        index = ranked[0]
+        records = [record for record in history
+                   if record['rung'] == rounds and record['model'] == model and record['candidate'] == index]
+        best[model] = {'candidate': index, 'params': grids[model][index], 'folds': records,
+                       'score': float(np.mean([record[metric] for record in records]))}
+    return {'history': history, 'best': best, 'rungs': sizes, 'classes': classes}
+
+
+def best_model(search):
+    """Name of the model with the highest mean cross-validated score"""
+    return max(search['best'], key=lambda model: np.nan_to_num(search['best'][model]['score'], nan=-np.inf))
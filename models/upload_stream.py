@@ -0,0 +1,378 @@
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from dataset_cache import NA_VALUES
+from serialization import frame_records
+
+logger = logging.getLogger(__name__)
+
+# Baris yang sudah lengkap di-parse per batch minimal sebesar ini
+PROFILE_BATCH_BYTES = 1024 * 1024
+PREVIEW_ROWS = 5
+COPY_BUFFER = 64 * 1024
+
+_UPLOAD_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+
+class CsvProfiler:
+    """
+    Build the upload preview incrementally while the bytes arrive
+
+    Bytes are hashed as they come in and complete lines are parsed in small
+    batches, so the header, dtypes, missing-value counts and first rows are
+    known as soon as the last byte is written, without re-reading the file.
+    """
+
+    def __init__(self):
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+        self.header = None
+        self.columns = None
+        self.n_rows = 0
+        self.missing = None
+        self.error = None
+        self._dtypes = {}
+        self._head_lines = []
+        self._buffer = b""
+
+    def feed(self, data):
+        """
+        Consume the next block of the file
+
+        Args:
+            data (bytes): Next block of raw CSV bytes
+        """
+        if not data:
+            return
+        self.sha256.update(data)
+        self.size += len(data)
+        if self.error is not None:
+            return
+
+        self._buffer += data
+        if self.header is None:
+            newline = self._buffer.find(b"\n")
+            if newline < 0:
+                return
+            self.header = self._buffer[:newline + 1]
+            self._buffer = self._buffer[newline + 1:]
+
+        if len(self._buffer) >= PROFILE_BATCH_BYTES:
+            cut = self._complete_lines_end()
+            if cut > 0:
+                batch, self._buffer = self._buffer[:cut], self._buffer[cut:]
+                self._parse(batch)
+
+    def finish(self):
+        """Parse whatever is left after the last block"""
+        if self.error is None:
+            if self.header is None:
+                self.header, self._buffer = self._buffer, b""
+            if self._buffer.strip() or self.columns is None:
+                self._parse(self._buffer)
+            self._buffer = b""
+
+    def hexdigest(self):
+        return self.sha256.hexdigest()
+
+    def _complete_lines_end(self):
+        # Potong di newline terakhir yang tidak berada di dalam field ber-quote
+        cut = self._buffer.rfind(b"\n")
+        while cut >= 0 and self._buffer.count(b'"', 0, cut) % 2:
+            cut = self._buffer.rfind(b"\n", 0, cut)
+        return cut + 1
+
+    def _parse(self, batch):
+        try:
+            frame = pd.read_csv(io.BytesIO(self.header + batch), na_values=list(NA_VALUES))
+        except Exception as e:
+            self.error = str(e)
+            logger.warning(f"Upload profiling stopped: {e}")
+            return
+
+        if self.columns is None:
+            self.columns = list(frame.columns)
+            self.missing = np.zeros(len(self.columns), dtype=np.int64)
+        self.n_rows += len(frame)
+        self.missing += frame.isna().sum().to_numpy()
+        for col in self.columns:
+            self._dtypes.setdefault(col, set()).add(str(frame[col].dtype))
+
+        if len(self._head_lines) < PREVIEW_ROWS and len(frame):
+            lines = io.BytesIO(batch)
+            while len(self._head_lines) < PREVIEW_ROWS:
+                line = lines.readline()
+                if not line:
+                    break
+                self._head_lines.append(line)
+
+    def dtypes(self):
+        """
+        Column dtypes as pandas would infer them for the whole file
+
+        Returns:
+            dict: Column name -> dtype string
+        """
+        result = {}
+        for col in self.columns:
+            kinds = self._dtypes.get(col, {"float64"})
+            # Batch tanpa nilai (semua NaN) terbaca float64 dan tidak mengubah tipe teks
+            other = kinds - {"int64", "float64"}
+            if len(kinds) == 1:
+                result[col] = next(iter(kinds))
+            elif not other:
+                result[col] = "float64"
+            elif len(other) == 1 and other <= {"str", "object"}:
+                result[col] = next(iter(other))
+            else:
+                result[col] = "object"
+        return result
+
+    def preview(self):
+        """
+        Data preview in the same format as ``get_data_preview``
+
+        Returns:
+            dict: Shape, columns, sample rows, dtypes and missing counts
+        """
+        if self.error is not None:
+            return {'error': self.error}
+
+        dtypes = self.dtypes()
+        try:
+            head = pd.read_csv(io.BytesIO(self.header + b"".join(self._head_lines)),
+                               na_values=list(NA_VALUES), dtype=dtypes)
+        except Exception as e:
+            return {'error': str(e)}
+
+        return {
+            'shape': [int(self.n_rows), len(self.columns)],
+            'columns': list(self.columns),
+            'sample_data': frame_records(head),
+            'dtypes': dtypes,
+            'missing_values': {col: int(n) for col, n in zip(self.columns, self.missing)}
+        }
+
+
+class ProfilingUpload(io.RawIOBase):
+    """
+    File-like target for werkzeug's multipart parser
+
+    Writes the upload to a temporary file in the upload directory and feeds
+    every block to a CsvProfiler on the way, so the stored file can be moved
+    into place instead of copied.
+    """
+
+    def __init__(self, upload_dir):
+        super().__init__()
+        os.makedirs(upload_dir, exist_ok=True)
+        fd, self.path = tempfile.mkstemp(suffix=".part", dir=upload_dir)
+        self._file = os.fdopen(fd, "w+b")
+        self.profiler = CsvProfiler()
+
+    def writable(self):
+        return True
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def write(self, data):
+        self.profiler.feed(bytes(data))
+        return self._file.write(data)
+
+    def read(self, size=-1):
+        return self._file.read(size)
+
+    def readinto(self, buffer):
+        return self._file.readinto(buffer)
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        return self._file.seek(offset, whence)
+
+    def tell(self):
+        return self._file.tell()
+
+    def detach_file(self):
+        """
+        Finish profiling and hand over the temporary file
+
+        Returns:
+            str: Path of the complete upload; the caller now owns it
+        """
+        self.profiler.finish()
+        self._file.flush()
+        self._file.close()
+        path, self.path = self.path, None
+        return path
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+        super().close()
+
+
+class UploadOffsetError(Exception):
+    """Raised when a chunk does not start where the previous one ended"""
+
+    def __init__(self, expected):
+        super().__init__(f"Chunk must start at offset {expected}")
+        self.expected = expected
+
+
+class ChunkedUploads:
+    """
+    Resumable uploads sent as a sequence of raw byte chunks
+
+    The partial file and a small JSON sidecar live in the upload directory, so
+    any worker process can continue an upload. Profilers are kept in memory
+    per process; a worker that has not seen an upload rebuilds its profiler
+    from the bytes already on disk.
+    """
+
+    def __init__(self, upload_dir, max_bytes):
+        self.upload_dir = upload_dir
+        self.max_bytes = max_bytes
+        self._profilers = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def _paths(self, upload_id):
+        base = os.path.join(self.upload_dir, f"chunked-{upload_id}")
+        return f"{base}.part", f"{base}.json"
+
+    def _upload_lock(self, upload_id):
+        with self._lock:
+            return self._locks.setdefault(upload_id, threading.Lock())
+
+    def start(self, filename, size=None):
+        """
+        Register a new chunked upload
+
+        Args:
+            filename (str): Original file name
+            size (int): Total size in bytes, if known
+
+        Returns:
+            str: Upload id
+        """
+        if size is not None and size > self.max_bytes:
+            raise ValueError(f"Upload exceeds the {self.max_bytes} byte limit")
+        os.makedirs(self.upload_dir, exist_ok=True)
+        upload_id = uuid.uuid4().hex
+        part_path, meta_path = self._paths(upload_id)
+        open(part_path, "wb").close()
+        with open(meta_path, "w") as f:
+            json.dump({'filename': filename, 'size': size}, f)
+        self._profilers[upload_id] = CsvProfiler()
+        return upload_id
+
+    def status(self, upload_id):
+        """
+        Bytes received so far for an upload
+
+        Returns:
+            dict or None: Upload id, filename, expected and received size
+        """
+        if not _UPLOAD_ID_RE.match(upload_id or ""):
+            return None
+        part_path, meta_path = self._paths(upload_id)
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path) as f:
+            meta = json.load(f)
+        return {
+            'upload_id': upload_id,
+            'filename': meta['filename'],
+            'size': meta['size'],
+            'received': os.path.getsize(part_path)
+        }
+
+    def _profiler(self, upload_id, part_path):
+        profiler = self._profilers.get(upload_id)
+        received = os.path.getsize(part_path)
+        if profiler is None or profiler.size != received:
+            # Upload dilanjutkan di proses lain: bangun ulang dari file parsial
+            profiler = CsvProfiler()
+            with open(part_path, "rb") as f:
+                for block in iter(lambda: f.read(COPY_BUFFER), b""):
+                    profiler.feed(block)
+            self._profilers[upload_id] = profiler
+        return profiler
+
+    def append(self, upload_id, offset, stream):
+        """
+        Append one chunk read from a stream
+
+        Args:
+            upload_id (str): Upload id
+            offset (int): Byte offset the chunk starts at
+            stream (file): Readable stream with the chunk bytes
+
+        Returns:
+            int: Bytes received so far
+
+        Raises:
+            KeyError: If the upload does not exist
+            UploadOffsetError: If offset is not the current end of the upload
+        """
+        if self.status(upload_id) is None:
+            raise KeyError(upload_id)
+        part_path, _ = self._paths(upload_id)
+        with self._upload_lock(upload_id):
+            received = os.path.getsize(part_path)
+            if offset != received:
+                raise UploadOffsetError(received)
+            profiler = self._profiler(upload_id, part_path)
+            with open(part_path, "ab") as f:
+                for block in iter(lambda: stream.read(COPY_BUFFER), b""):
+                    received += len(block)
+                    if received > self.max_bytes:
+                        f.truncate(offset)
+                        self._profilers.pop(upload_id, None)
+                        raise ValueError(f"Upload exceeds the {self.max_bytes} byte limit")
+                    profiler.feed(block)
+                    f.write(block)
+            return received
+
+    def finish(self, upload_id):
+        """
+        Complete an upload
+
+        Returns:
+            tuple: (path of the complete file, filename, finished CsvProfiler);
+            the caller owns the file
+
+        Raises:
+            KeyError: If the upload does not exist
+            ValueError: If fewer bytes arrived than announced
+        """
+        status = self.status(upload_id)
+        if status is None:
+            raise KeyError(upload_id)
+        if status['size'] is not None and status['received'] != status['size']:
+            raise ValueError(f"Upload incomplete: {status['received']} of {status['size']} bytes")
+
+        part_path, meta_path = self._paths(upload_id)
+        with self._upload_lock(upload_id):
+            profiler = self._profiler(upload_id, part_path)
+            profiler.finish()
+            os.remove(meta_path)
+            self._profilers.pop(upload_id, None)
+        with self._lock:
+            self._locks.pop(upload_id, None)
+        return part_path, status['filename'], profiler
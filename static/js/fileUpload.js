@@ -1,4 +1,9 @@
 let selectedFile = null;
+let currentDatasetId = null;
+
+// File lebih besar dari ini dikirim per chunk lewat /upload/chunked
+const CHUNKED_UPLOAD_THRESHOLD = 8 * 1024 * 1024;
+const CHUNK_MAX_RETRIES = 3;
 
 class FileUpload {
     constructor() {
@@ -79,16 +84,20 @@ class FileUpload {
     }
 
     async uploadFile(file) {
-        const formData = new FormData();
-        formData.append('file', file);
-        
         console.log('Uploading file:', file.name, 'Size:', file.size);
 
         try {
-            const data = await makeRequest('/upload', {
-                method: 'POST',
-                body: formData
-            });
+            let data;
+            if (file.size > CHUNKED_UPLOAD_THRESHOLD) {
+                data = await this.uploadFileChunked(file);
+            } else {
+                const formData = new FormData();
+                formData.append('file', file);
+                data = await makeRequest('/upload', {
+                    method: 'POST',
+                    body: formData
+                });
+            }
 
             console.log('Upload response:', data);
 
@@ -96,6 +105,7 @@ class FileUpload {
                 showAlert(data.error, 'error');
             } else {
                 showAlert(data.message, 'success');
+                currentDatasetId = data.dataset_id;
                 this.showFileInfo(data.filename);
                 
                 if (data.preview) {
@@ -110,6 +120,44 @@ class FileUpload {
         }
     }
 
+    async uploadFileChunked(file) {
+        const session = await makeRequest('/upload/chunked', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ filename: file.name, size: file.size })
+        });
+
+        let offset = 0;
+        let retries = 0;
+        while (offset < file.size) {
+            const chunk = file.slice(offset, offset + session.chunk_size);
+            try {
+                const response = await fetch(`${session.upload_url}?offset=${offset}`, {
+                    method: 'PUT',
+                    headers: { 'Content-Type': 'application/octet-stream' },
+                    body: chunk
+                });
+                const data = await response.json();
+                if (response.ok || response.status === 409) {
+                    // 409: server menerima jumlah byte berbeda, lanjutkan dari sana
+                    offset = data.received;
+                    retries = 0;
+                    console.log(`Uploaded ${offset} of ${file.size} bytes`);
+                } else {
+                    throw new Error(data.error || `HTTP ${response.status}`);
+                }
+            } catch (error) {
+                if (++retries > CHUNK_MAX_RETRIES) {
+                    throw error;
+                }
+                const status = await makeRequest(session.upload_url);
+                offset = status.received;
+            }
+        }
+
+        return await makeRequest(`${session.upload_url}/complete`, { method: 'POST' });
+    }
+
     showFileInfo(filename) {
         document.getElementById('fileName').textContent = filename;
         document.getElementById('fileInfo').classList.remove('hidden');
@@ -118,6 +166,10 @@ class FileUpload {
     getSelectedFile() {
         return selectedFile;
     }
+
+    getDatasetId() {
+        return currentDatasetId;
+    }
 }
 
 window.fileUploadManager = new FileUpload();
@@ -2,6 +2,34 @@ class DataProcessor {
     constructor() {
         this.stepSelector = null;
         this.resultsDisplay = null;
+        this.pollInterval = 500;
+    }
+
+    async waitForJob(statusUrl, onProgress) {
+        while (true) {
+            const job = await makeRequest(statusUrl);
+
+            if (job.status === 'done') {
+                return job.result;
+            }
+            if (job.status === 'failed') {
+                throw new Error(job.error || 'Job failed');
+            }
+            if (onProgress) {
+                onProgress(job);
+            }
+            await new Promise(resolve => setTimeout(resolve, this.pollInterval));
+        }
+    }
+
+    stabilityRequested() {
+        const checkbox = document.getElementById('stabilityCheckbox');
+        return Boolean(checkbox && checkbox.checked);
+    }
+
+    selectedSampler() {
+        const select = document.getElementById('samplerSelect');
+        return select ? select.value : 'rus';
     }
 
     async processData() {
@@ -21,30 +49,81 @@ class DataProcessor {
         this.stepSelector.setProcessingState(true);
 
         try {
-            const result = await makeRequest('/process', {
+            const job = await makeRequest('/process', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
                 },
                 body: JSON.stringify({
-                    step: selectedStep.toString()
+                    step: selectedStep.toString(),
+                    dataset_id: window.fileUploadManager.getDatasetId(),
+                    stability: this.stabilityRequested(),
+                    sampler: this.selectedSampler()
                 })
             });
 
-            if (result.error) {
-                showAlert(result.error, 'error');
+            if (job.error) {
+                showAlert(job.error, 'error');
             } else {
-                showAlert(result.result.message, 'success');
-                this.resultsDisplay.showProcessingResults(result.result, selectedStep);
+                const result = await this.waitForJob(job.status_url);
+                showAlert(result.message, 'success');
+                this.resultsDisplay.showProcessingResults(result, selectedStep);
             }
         } catch (error) {
             console.error('Error:', error);
-            showAlert('Error processing data', 'error');
+            showAlert(error.message || 'Error processing data', 'error');
         } finally {
             this.stepSelector.setProcessingState(false);
         }
     }
 
+    async runFullPipeline() {
+        const selectedFile = window.fileUploadManager.getSelectedFile();
+
+        if (!selectedFile) {
+            showAlert('Please select a file first', 'error');
+            return;
+        }
+
+        const runAllBtn = document.getElementById('runAllBtn');
+        const runAllText = document.getElementById('runAllText');
+        if (runAllBtn) runAllBtn.disabled = true;
+        if (runAllText) runAllText.textContent = 'Running pipeline...';
+
+        try {
+            const job = await makeRequest('/process', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+                body: JSON.stringify({
+                    step: 'all',
+                    dataset_id: window.fileUploadManager.getDatasetId(),
+                    stability: this.stabilityRequested(),
+                    sampler: this.selectedSampler()
+                })
+            });
+
+            if (job.error) {
+                showAlert(job.error, 'error');
+            } else {
+                const result = await this.waitForJob(job.status_url, progress => {
+                    if (runAllText) {
+                        runAllText.textContent = `Running pipeline... ${Math.round(progress.progress * 100)}%`;
+                    }
+                });
+                showAlert(result.message, 'success');
+                this.resultsDisplay.showPipelineResults(result);
+            }
+        } catch (error) {
+            console.error('Error:', error);
+            showAlert(error.message || 'Error running full pipeline', 'error');
+        } finally {
+            if (runAllBtn) runAllBtn.disabled = false;
+            if (runAllText) runAllText.textContent = 'Run Full Pipeline';
+        }
+    }
+
     setupEventHandlers() {
         this.stepSelector = window.stepSelectorManager;
         this.resultsDisplay = window.resultsDisplayManager;
@@ -53,6 +132,11 @@ class DataProcessor {
         if (processBtn) {
             processBtn.addEventListener('click', () => this.processData());
         }
+
+        const runAllBtn = document.getElementById('runAllBtn');
+        if (runAllBtn) {
+            runAllBtn.addEventListener('click', () => this.runFullPipeline());
+        }
     }
 }
 
@@ -9,13 +9,55 @@ class ResultsDisplay {
         
         resultsHtml += this.generateStepSpecificResults(result, selectedStep);
         
-        resultsHtml += this.generateChartHTML('Chart', result.chart_base64 || '');
-        
         resultsHtml += this.generateDownloadButton(result.output_file);
         
         this.displayResults(resultsHtml);
     }
 
+    showPipelineResults(pipelineResult) {
+        let resultsHtml = this.generateSuccessMessage(pipelineResult.message);
+
+        resultsHtml += this.generateTimingTable(pipelineResult.timings, pipelineResult.total_seconds);
+
+        Object.keys(pipelineResult.steps).sort().forEach(step => {
+            const result = pipelineResult.steps[step];
+            const stepName = window.stepSelectorManager.getStepName(parseInt(step));
+            resultsHtml += `<h2 class="text-xl font-semibold text-white mt-8 mb-4">Step ${step}: ${stepName}</h2>`;
+            resultsHtml += this.generateStepSpecificResults(result, parseInt(step));
+            resultsHtml += this.generateDownloadButton(result.output_file);
+        });
+
+        this.displayResults(resultsHtml);
+    }
+
+    generateTimingTable(timings, totalSeconds) {
+        const rows = Object.entries(timings).sort((a, b) => a[1].start - b[1].start);
+        return `
+            <div class="mb-4">
+                <h3 class="font-semibold text-white mb-2">Stage Timings (total ${totalSeconds.toFixed(3)}s)</h3>
+                <div class="overflow-x-auto">
+                    <table class="min-w-full table-auto border border-gray-600">
+                        <thead class="bg-gray-800">
+                            <tr>
+                                <th class="px-4 py-2 text-left text-xs font-medium text-gray-300 uppercase tracking-wider border-r border-gray-600">Stage</th>
+                                <th class="px-4 py-2 text-left text-xs font-medium text-gray-300 uppercase tracking-wider border-r border-gray-600">Start (s)</th>
+                                <th class="px-4 py-2 text-left text-xs font-medium text-gray-300 uppercase tracking-wider">Duration (s)</th>
+                            </tr>
+                        </thead>
+                        <tbody class="bg-gray-900 divide-y divide-gray-700">
+                            ${rows.map(([stage, timing]) => `
+                                <tr class="hover:bg-gray-800">
+                                    <td class="px-4 py-2 whitespace-nowrap text-sm text-gray-100 border-r border-gray-600">${stage}</td>
+                                    <td class="px-4 py-2 whitespace-nowrap text-sm text-gray-100 border-r border-gray-600">${timing.start.toFixed(3)}</td>
+                                    <td class="px-4 py-2 whitespace-nowrap text-sm text-gray-100">${timing.seconds.toFixed(3)}</td>
+                                </tr>
+                            `).join('')}
+                        </tbody>
+                    </table>
+                </div>
+            </div>`;
+    }
+
     generateSuccessMessage(message) {
         return `
             <div class="bg-gray-800 border border-gray-600 rounded-lg p-4 mb-4">
@@ -39,6 +81,8 @@ class ResultsDisplay {
                 return this.generateFeatureSelectionResults(result);
             case 4:
                 return this.generateRUSResults(result);
+            case 5:
+                return this.generateTrainingResults(result);
             default:
                 return '';
         }
@@ -124,25 +168,160 @@ class ResultsDisplay {
                     `).join('')}
                 </div>
             </div>
-            ${result.chart_base64 ? this.generateChartHTML('ANOVA Analysis Chart', result.chart_base64) : ''}
+            ${result.chart_url ? this.generateChartHTML('ANOVA Analysis Chart', result.chart_url) : ''}
             ${this.generateFeatureAnalysisTable(result)}
+            ${result.stability_table ? this.generateStabilityTable(result) : ''}
             ${this.generateSampleDataTable(result.sample_output_table, 'Sample Selected Data')}`;
     }
 
+    generateStabilityTable(result) {
+        return `
+            <div class="mb-4">
+                <h3 class="font-semibold text-white mb-2">Stability Selection (${result.summary_stats.stability.resamples} ${result.summary_stats.stability.method} resamples)</h3>
+                <div class="overflow-x-auto">
+                    <table class="min-w-full table-auto border border-gray-600">
+                        <thead class="bg-gray-800">
+                            <tr>
+                                <th class="px-4 py-2 text-left text-xs font-medium text-gray-300 uppercase tracking-wider border-r border-gray-600">Feature</th>
+                                <th class="px-4 py-2 text-left text-xs font-medium text-gray-300 uppercase tracking-wider border-r border-gray-600">Selection Frequency</th>
+                                <th class="px-4 py-2 text-left text-xs font-medium text-gray-300 uppercase tracking-wider">Selected</th>
+                            </tr>
+                        </thead>
+                        <tbody class="bg-gray-900 divide-y divide-gray-700">
+                            ${result.stability_table.map(item => `
+                                <tr class="hover:bg-gray-800">
+                                    <td class="px-4 py-2 whitespace-nowrap text-sm text-gray-100 border-r border-gray-600">${item.feature}</td>
+                                    <td class="px-4 py-2 whitespace-nowrap text-sm text-gray-100 border-r border-gray-600">${(item.frequency * 100).toFixed(1)}%</td>
+                                    <td class="px-4 py-2 whitespace-nowrap text-sm text-gray-100">
+                                        ${item.selected ? 
+                                            '<span class="text-gray-300">✓</span>' : 
+                                            '<span class="text-gray-400">✗</span>'
+                                        }
+                                    </td>
+                                </tr>
+                            `).join('')}
+                        </tbody>
+                    </table>
+                </div>
+            </div>`;
+    }
+
     generateRUSResults(result) {
         return `
             ${this.generateRUSSummary(result)}
             ${this.generateClassDistributionTable(result)}
-            ${result.chart_base64 ? this.generateChartHTML('RUS Balancing Visualization', result.chart_base64) : ''}
+            ${result.chart_url ? this.generateChartHTML('Class Balancing Visualization', result.chart_url) : ''}
             ${this.generateImbalanceRatioAnalysis(result)}
             ${this.generateSampleDataTable(result.sample_output_table, 'Sample Cleaned Data')}`;
     }
 
+    generateTrainingResults(result) {
+        const stats = result.summary_stats;
+        const metric = stats.metric;
+        const datasetId = window.fileUploadManager.getDatasetId();
+        const modelFile = result.model_file.split('/').pop();
+        const cell = 'px-4 py-2 whitespace-nowrap text-sm text-gray-100 border-r border-gray-600';
+        const head = 'px-4 py-2 text-left text-xs font-medium text-gray-300 uppercase tracking-wider border-r border-gray-600';
+        const format = value => (value === null || value === undefined) ? '-' : Number(value).toFixed(3);
+        return `
+            <div class="mb-4">
+                <h3 class="font-semibold text-white mb-2">Training Summary</h3>
+                <div class="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-4 gap-4 mb-4">
+                    <div class="bg-gray-800 p-4 rounded-lg">
+                        <h4 class="font-semibold text-white">Best Model</h4>
+                        <p class="text-lg font-bold text-gray-300">${stats.best_model_name}</p>
+                        <p class="text-xs text-gray-400">${stats.best_params}</p>
+                    </div>
+                    <div class="bg-gray-800 p-4 rounded-lg">
+                        <h4 class="font-semibold text-white">CV ${metric}</h4>
+                        <p class="text-2xl font-bold text-gray-300">${format(stats.cv_score)}</p>
+                    </div>
+                    <div class="bg-gray-800 p-4 rounded-lg">
+                        <h4 class="font-semibold text-white">Features / Folds</h4>
+                        <p class="text-2xl font-bold text-gray-300">${stats.features_used} / ${stats.folds}</p>
+                    </div>
+                    <div class="bg-gray-800 p-4 rounded-lg">
+                        <h4 class="font-semibold text-white">Fits (Candidates)</h4>
+                        <p class="text-2xl font-bold text-gray-300">${stats.total_fits} (${stats.candidates})</p>
+                        <p class="text-xs text-gray-400">Balanced in-fold with ${stats.sampler_name}</p>
+                    </div>
+                </div>
+            </div>
+            <div class="mb-4">
+                <h3 class="font-semibold text-white mb-2">Model Comparison (mean over folds)</h3>
+                <div class="overflow-x-auto">
+                    <table class="min-w-full table-auto border border-gray-600">
+                        <thead class="bg-gray-800">
+                            <tr>
+                                <th class="${head}">Model</th>
+                                <th class="${head}">Params</th>
+                                <th class="${head}">ROC AUC</th>
+                                <th class="${head}">Avg Precision</th>
+                                <th class="${head}">F1</th>
+                                <th class="${head}">Recall</th>
+                                <th class="${head}">Balanced Acc</th>
+                                <th class="${head}">Fit (s)</th>
+                            </tr>
+                        </thead>
+                        <tbody class="bg-gray-900 divide-y divide-gray-700">
+                            ${result.model_comparison.map(item => `
+                                <tr class="hover:bg-gray-800">
+                                    <td class="${cell}">${item.name}</td>
+                                    <td class="${cell}">${item.params}</td>
+                                    <td class="${cell}">${format(item.roc_auc)}</td>
+                                    <td class="${cell}">${format(item.average_precision)}</td>
+                                    <td class="${cell}">${format(item.f1)}</td>
+                                    <td class="${cell}">${format(item.recall)}</td>
+                                    <td class="${cell}">${format(item.balanced_accuracy)}</td>
+                                    <td class="${cell}">${format(item.fit_seconds)}</td>
+                                </tr>
+                            `).join('')}
+                        </tbody>
+                    </table>
+                </div>
+            </div>
+            <div class="mb-4">
+                <h3 class="font-semibold text-white mb-2">Per-Fold Metrics</h3>
+                <div class="overflow-x-auto">
+                    <table class="min-w-full table-auto border border-gray-600">
+                        <thead class="bg-gray-800">
+                            <tr>
+                                <th class="${head}">Model</th>
+                                <th class="${head}">Fold</th>
+                                <th class="${head}">${metric}</th>
+                                <th class="${head}">Train Rows</th>
+                                <th class="${head}">Fit (s)</th>
+                                <th class="${head}">Score (s)</th>
+                            </tr>
+                        </thead>
+                        <tbody class="bg-gray-900 divide-y divide-gray-700">
+                            ${result.fold_metrics.map(item => `
+                                <tr class="hover:bg-gray-800">
+                                    <td class="${cell}">${item.model}</td>
+                                    <td class="${cell}">${item.fold + 1}</td>
+                                    <td class="${cell}">${format(item[metric])}</td>
+                                    <td class="${cell}">${item.train_rows}</td>
+                                    <td class="${cell}">${format(item.fit_seconds)}</td>
+                                    <td class="${cell}">${format(item.score_seconds)}</td>
+                                </tr>
+                            `).join('')}
+                        </tbody>
+                    </table>
+                </div>
+            </div>
+            ${result.chart_url ? this.generateChartHTML('Cross-Validation Scores', result.chart_url) : ''}
+            <div class="mt-4 text-center">
+                <a href="/download/${modelFile}?dataset_id=${datasetId}" class="text-sm text-gray-300 underline">Download trained model (${modelFile})</a>
+            </div>`;
+    }
+
     generateDownloadButton(outputFile) {
-        const filename = outputFile.split('/').pop();
+        // Artefak disimpan biner (npy/feather/parquet), server membuat CSV saat diunduh
+        const filename = outputFile.split('/').pop().replace(/\.[^.]+$/, '.csv');
+        const datasetId = window.fileUploadManager.getDatasetId();
         return `
             <div class="mt-6 text-center">
-                <a href="/download/${filename}" class="bg-blue-600 hover:bg-blue-700 text-white font-bold py-2 px-6 rounded-lg inline-flex items-center">
+                <a href="/download/${filename}?dataset_id=${datasetId}" class="bg-blue-600 hover:bg-blue-700 text-white font-bold py-2 px-6 rounded-lg inline-flex items-center">
                     <svg class="w-5 h-5 mr-2" fill="none" stroke="currentColor" viewBox="0 0 24 24">
                         <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M4 16v1a3 3 0 003 3h10a3 3 0 003-3v-1m-4-4l-4 4m0 0l-4-4m4 4V4"></path>
                     </svg>
@@ -264,7 +443,7 @@ class ResultsDisplay {
     generateRUSSummary(result) {
         return `
             <div class="mb-4">
-                <h3 class="font-semibold text-white mb-2">Data Balancing Summary</h3>
+                <h3 class="font-semibold text-white mb-2">Data Balancing Summary (${result.summary_stats.sampler_name || 'Random Under Sampling'})</h3>
                 <div class="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-4 gap-4 mb-4">
                     <div class="bg-gray-800 p-4 rounded-lg">
                         <h4 class="font-semibold text-white">Samples Before</h4>
@@ -295,9 +474,9 @@ class ResultsDisplay {
                         <thead class="bg-gray-800">
                             <tr>
                                 <th class="px-4 py-2 text-left text-xs font-medium text-gray-300 uppercase tracking-wider border-r border-gray-600">Class</th>
-                                <th class="px-4 py-2 text-left text-xs font-medium text-gray-300 uppercase tracking-wider border-r border-gray-600">Before RUS</th>
-                                <th class="px-4 py-2 text-left text-xs font-medium text-gray-300 uppercase tracking-wider border-r border-gray-600">After RUS</th>
-                                <th class="px-4 py-2 text-left text-xs font-medium text-gray-300 uppercase tracking-wider border-r border-gray-600">Added Samples</th>
+                                <th class="px-4 py-2 text-left text-xs font-medium text-gray-300 uppercase tracking-wider border-r border-gray-600">Before Balancing</th>
+                                <th class="px-4 py-2 text-left text-xs font-medium text-gray-300 uppercase tracking-wider border-r border-gray-600">After Balancing</th>
+                                <th class="px-4 py-2 text-left text-xs font-medium text-gray-300 uppercase tracking-wider border-r border-gray-600">Sample Change</th>
                                 <th class="px-4 py-2 text-left text-xs font-medium text-gray-300 uppercase tracking-wider">Change %</th>
                             </tr>
                         </thead>
@@ -306,7 +485,7 @@ class ResultsDisplay {
                                 <tr class="bover:bg-gray-800">
                                     <td class="px-4 py-2 whitespace-nowrap text-sm text-gray-100 border-r border-gray-600">
                                         <span class="px-2 py-1 rounded-full text-xs ${
-                                            item.class === 'Class 0' 
+                                            index % 2 === 0 
                                                 ? 'bg-blue-100 text-white' 
                                                 : 'bg-orange-100 text-orange-800'
                                         }">
@@ -321,7 +500,7 @@ class ResultsDisplay {
                                           '<span class="text-gray-300">0</span>'}
                                     </td>
                                     <td class="px-4 py-2 whitespace-nowrap text-sm text-gray-100">
-                                        ${item.change > 0 ? `<span class="text-gray-300 font-semibold">${item.percentage_change}</span>` : 
+                                        ${item.change !== 0 ? `<span class="text-gray-300 font-semibold">${item.percentage_change}</span>` : 
                                           '<span class="text-gray-300">No change</span>'}
                                     </td>
                                 </tr>
@@ -338,12 +517,12 @@ class ResultsDisplay {
                 <h3 class="font-semibold text-white mb-2">Imbalance Ratio Analysis</h3>
                 <div class="grid grid-cols-1 md:grid-cols-2 gap-4 mb-4">
                     <div class="bg-gray-800 p-4 rounded-lg border border-gray-600">
-                        <h4 class="font-semibold text-white mb-2">Before RUS</h4>
+                        <h4 class="font-semibold text-white mb-2">Before Balancing</h4>
                         <p class="text-xl font-bold text-red-600">${result.summary_stats.imbalance_ratio_before.toFixed(2)}:1</p>
                         <p class="text-sm text-red-600 mt-1">Highly imbalanced</p>
                     </div>
                     <div class="bg-gray-800 p-4 rounded-lg border border-gray-600">
-                        <h4 class="font-semibold text-white mb-2">After RUS</h4>
+                        <h4 class="font-semibold text-white mb-2">After Balancing</h4>
                         <p class="text-xl font-bold text-gray-300">${result.summary_stats.imbalance_ratio_after.toFixed(2)}:1</p>
                         <p class="text-sm text-gray-300 mt-1">${result.summary_stats.imbalance_ratio_after <= 1.05 ? 'Balanced!' : 'Improved'}</p>
                     </div>
@@ -385,12 +564,16 @@ class ResultsDisplay {
             </div>`;
     }
 
-    generateChartHTML(title, chartBase64) {
-        if (!chartBase64) return '';
+    generateChartHTML(title, chartUrl) {
+        if (!chartUrl) return '';
+        // Preview resolusi rendah, versi 300 DPI hanya dirender saat dibuka
+        const fullUrl = chartUrl.replace(/([?&])dpi=\d+/, '$1dpi=300');
         return `
             <div class="mb-4">
                 <h3 class="font-semibold text-white mb-2">${title}</h3>
-                <img src="${chartBase64}" alt="Chart" class="w-full h-auto border border-gray-600 rounded">
+                <a href="${fullUrl}" target="_blank" rel="noopener">
+                    <img src="${chartUrl}" alt="Chart" loading="lazy" class="w-full h-auto border border-gray-600 rounded">
+                </a>
             </div>`;
     }
 }
@@ -10,7 +10,8 @@ class StepSelector {
             1: 'Missing Values Analysis',
             2: 'MinMax Scaling',
             3: 'Feature Selection (ANOVA)',
-            4: 'RUS Data Balancing'
+            4: 'RUS Data Balancing',
+            5: 'Model Training'
         };
     }
 
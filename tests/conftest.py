@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Modul step di-import dari folder models, sama seperti app.py
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "models"))
+sys.path.insert(0, ROOT)
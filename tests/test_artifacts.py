@@ -0,0 +1,25 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from artifacts import export_csv, load_table, save_table
+
+
+@pytest.mark.parametrize("fmt", ["npy", "csv"])
+def test_concurrent_writers_do_not_share_temp_files(tmp_path, fmt):
+    frame = pd.DataFrame(np.arange(20000, dtype=float).reshape(-1, 4), columns=list("abcd"))
+    output_dir = str(tmp_path)
+
+    # Beberapa thread menulis dan mengekspor artefak yang sama bersamaan
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        paths = list(pool.map(lambda _: save_table(frame, output_dir, "table", fmt), range(16)))
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        exports = list(pool.map(lambda _: export_csv(output_dir, "table"), range(16)))
+
+    assert len(set(paths)) == 1 and len(set(exports)) == 1
+    pd.testing.assert_frame_equal(load_table(paths[0]), frame)
+    pd.testing.assert_frame_equal(pd.read_csv(exports[0]), frame)
+    assert not [name for name in os.listdir(output_dir) if name.endswith(".tmp")]
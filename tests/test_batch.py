@@ -0,0 +1,67 @@
+import json
+import os
+import shutil
+
+import pytest
+
+from batch import DONE, DUPLICATE, FAILED, SKIPPED, run_batch, write_summary
+from feature_selection import selection_policy
+
+DATASET = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dataset",
+                       "risk_factors_cervical_cancer.csv")
+
+
+@pytest.fixture
+def sources(tmp_path):
+    data = tmp_path / "data"
+    data.mkdir()
+    shutil.copy(DATASET, data / "a.csv")
+    shutil.copy(DATASET, data / "a_copy.csv")
+    # Nilai bukan angka: pipeline gagal di tengah
+    (data / "broken.csv").write_text("Age,Biopsy\nabc,0\n")
+    shutil.copy(data / "broken.csv", data / "broken_copy.csv")
+    return {name: str(data / f"{name}.csv") for name in ("a", "a_copy", "broken", "broken_copy", "missing")}
+
+
+def statuses(records):
+    return [record['status'] for record in records]
+
+
+def test_batch_statuses_and_resume(tmp_path, sources):
+    output_root = str(tmp_path / "output")
+    paths = [sources[name] for name in ("a", "a_copy", "broken", "missing")]
+    seen = []
+
+    records = run_batch(paths, output_root, processes=1, on_done=seen.append)
+    assert statuses(records) == [DONE, DUPLICATE, FAILED, FAILED]
+    assert [record['path'] for record in records] == paths
+    assert sorted(seen, key=lambda record: paths.index(record['path'])) == records
+    assert records[1]['same_as'] == sources['a'] and records[1]['dataset_id'] == records[0]['dataset_id']
+    assert records[0]['rows'] == 858 and records[0]['selected_features'] > 0
+    assert records[2]['stage'] and 'FileNotFoundError' in records[3]['error']
+
+    # Dijalankan ulang: output lengkap dilewati, yang gagal dicoba lagi
+    resumed = run_batch(paths, output_root, processes=1)
+    assert statuses(resumed) == [SKIPPED, SKIPPED, FAILED, FAILED]
+    assert resumed[0]['rows'] == records[0]['rows'] and resumed[1]['path'] == sources['a_copy']
+
+    # Opsi lain atau force: dihitung ulang
+    changed = run_batch(paths[:1], output_root, options={'policy': selection_policy(k=3)}, processes=1)
+    assert statuses(changed) == [DONE] and changed[0]['selected_features'] == 3
+    assert statuses(run_batch(paths[:1], output_root, options={'policy': selection_policy(k=3)},
+                              processes=1)) == [SKIPPED]
+    assert statuses(run_batch(paths[:1], output_root, processes=1, force=True)) == [DONE]
+
+
+def test_duplicate_of_failed_dataset_fails(tmp_path, sources):
+    output_root = str(tmp_path / "output")
+    seen = []
+    records = run_batch([sources['broken'], sources['broken_copy']], output_root, processes=1, on_done=seen.append)
+    assert statuses(records) == [FAILED, FAILED] and seen == records
+    assert records[1]['error'] == 'Same content as a failed dataset'
+
+    json_file, csv_file = write_summary(records, output_root, seconds=1.5)
+    with open(json_file) as f:
+        summary = json.load(f)
+    assert summary['counts'] == {DONE: 0, SKIPPED: 0, DUPLICATE: 0, FAILED: 2}
+    assert os.path.exists(csv_file)
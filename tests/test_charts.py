@@ -0,0 +1,25 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from charts import CHART_SOURCES, chart_cache, get_chart, save_chart_data
+
+CHART = {'cnt': [803, 55], 'cnt_res': [55, 55], 'classes': ['Class 0', 'Class 1'], 'sampler': 'rus'}
+
+
+def test_concurrent_renders_publish_complete_files(tmp_path):
+    output_dir = str(tmp_path)
+    chart_cache.clear()
+
+    # Data grafik dan gambar yang sama ditulis dari beberapa thread sekaligus
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda _: save_chart_data('rus', CHART, output_dir), range(16)))
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        images = list(pool.map(lambda _: get_chart('rus', output_dir, dpi=50)[0], range(8)))
+
+    with open(tmp_path / CHART_SOURCES['rus'][2]) as f:
+        assert json.load(f) == CHART
+    assert len(set(images)) == 1 and images[0].startswith(b"\x89PNG")
+    cached = os.listdir(tmp_path / "charts")
+    assert len(cached) == 1 and (tmp_path / "charts" / cached[0]).read_bytes() == images[0]
+    assert not [name for _, _, names in os.walk(tmp_path) for name in names if name.endswith(".tmp")]
@@ -0,0 +1,72 @@
+import os
+
+import joblib
+import numpy as np
+import pytest
+
+from balancing import resample
+from dataset_cache import load_dataset
+from feature_selection import score_features, select_features
+from kernels import CompactMatrix
+from preprocessing import (PREPROCESSING_FILE, clear_preprocessing_cache, fit_preprocessing, load_preprocessing,
+                           split_features)
+
+DATASET = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dataset",
+                       "risk_factors_cervical_cancer.csv")
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    clear_preprocessing_cache()
+    yield
+    clear_preprocessing_cache()
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    df = load_dataset(DATASET, drop_empty=True)
+    X = df.select_dtypes(include="number")
+    return df, fit_preprocessing(X, dtype="float64"), fit_preprocessing(X, dtype="compact")
+
+
+def test_compact_values_within_float32_rounding(dataset):
+    _, reference, compact = dataset
+    X_64, X_c = reference['X_scaled'], compact['X_scaled']
+    assert isinstance(X_c, CompactMatrix)
+    assert X_c.is_code.any() and not X_c.is_code.all()
+
+    decoded = np.asarray(X_c)
+    # Kolom int8 identik, kolom float32 hanya berbeda pembulatan sekali
+    np.testing.assert_array_equal(decoded[:, X_c.is_code], X_64[:, X_c.is_code])
+    np.testing.assert_allclose(decoded, X_64, rtol=0, atol=1e-6)
+
+
+def test_compact_selection_and_balancing_match_float64(dataset):
+    df, reference, compact = dataset
+    columns, X_64, y = split_features(df, reference, "Biopsy")
+    _, X_c, _ = split_features(df, compact, "Biopsy")
+
+    scores_64, pvalues_64 = score_features(X_64, y, 'anova')
+    scores_c, pvalues_c = score_features(X_c, y, 'anova')
+    np.testing.assert_allclose(scores_c, scores_64, rtol=1e-6, atol=0, equal_nan=True)
+    np.testing.assert_array_equal(select_features(pvalues_c, scores_c), select_features(pvalues_64, scores_64))
+    np.testing.assert_array_equal(resample(X_c, y)['indices'], resample(X_64, y)['indices'])
+
+
+def test_other_dtype_refits(tmp_path):
+    float64 = load_preprocessing(DATASET, str(tmp_path), dtype="float64")
+    assert float64['dtype'] == "float64" and not float64['preprocessor'].compact
+
+    # Artefak di disk dengan tipe lain tidak dipakai ulang
+    clear_preprocessing_cache()
+    compact = load_preprocessing(DATASET, str(tmp_path), dtype="compact")
+    assert compact['dtype'] == "compact" and isinstance(compact['X_scaled'], CompactMatrix)
+    assert joblib.load(tmp_path / PREPROCESSING_FILE)['dtype'] == "compact"
+
+    # Di memori: satu artefak per tipe buffer
+    again = load_preprocessing(DATASET, str(tmp_path), dtype="float64")
+    assert again['dtype'] == "float64"
+    np.testing.assert_array_equal(again['X_scaled'], float64['X_scaled'])
+
+    with pytest.raises(ValueError):
+        load_preprocessing(DATASET, str(tmp_path), dtype="int8")
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+from scipy.stats import false_discovery_control
+
+from feature_selection import FALLBACK_K, adjust_pvalues, describe_policy, select_features, selection_policy
+
+PVALUES = np.array([0.01, 0.045, 0.033, 0.005, np.nan, 0.2])
+SCORES = np.array([5.0, 2.0, 3.0, 9.0, 0.0, 1.0])
+
+
+def test_corrections_match_reference_values():
+    finite = np.isfinite(PVALUES)
+    np.testing.assert_allclose(adjust_pvalues(PVALUES, "none"), PVALUES)
+    np.testing.assert_allclose(adjust_pvalues(PVALUES, "bonferroni")[finite],
+                               np.minimum(PVALUES[finite] * 5, 1.0))
+    np.testing.assert_allclose(adjust_pvalues(PVALUES, "fdr")[finite],
+                               false_discovery_control(PVALUES[finite]))
+    # NaN p-value tidak dihitung sebagai uji
+    assert np.isnan(adjust_pvalues(PVALUES, "bonferroni")[4]) and np.isnan(adjust_pvalues(PVALUES, "fdr")[4])
+    assert np.isnan(adjust_pvalues([np.nan, np.nan], "fdr")).all()
+
+
+@pytest.mark.parametrize("alpha, k, correction, expected", [
+    (None, None, None, [0, 1, 2, 3]),
+    (None, None, "bonferroni", [3]),
+    (None, None, "fdr", [0, 3]),
+    (0.1, 2, "fdr", [0, 3]),
+    # p-value terkoreksi 0 dan 3 sama (0.025), p-value mentah 3 lebih kecil
+    (None, 1, "fdr", [3]),
+    (0.2, 3, None, [0, 2, 3]),
+    (0.001, 2, "bonferroni", [3, 0]),
+])
+def test_selection_policies(alpha, k, correction, expected):
+    policy = selection_policy(alpha, k, correction)
+    assert select_features(PVALUES, SCORES, policy).tolist() == expected
+
+
+def test_fallback_takes_best_scored_features():
+    strict = selection_policy(alpha=1e-6)
+    assert select_features(PVALUES, SCORES, strict).tolist() == [3, 0, 2, 1, 5, 4]
+    # Tanpa p-value (mis. mutual information) urutan mengikuti skor
+    no_pvalues = np.full(30, np.nan)
+    scores = np.arange(30.0)
+    assert select_features(no_pvalues, scores).tolist() == list(range(29, 29 - FALLBACK_K, -1))
+    assert select_features(no_pvalues, scores, selection_policy(k=3)).tolist() == [29, 28, 27]
+
+
+def test_ties_in_pvalue_are_broken_by_score():
+    pvalues = np.zeros(4)
+    scores = np.array([1.0, 4.0, 3.0, 2.0])
+    assert select_features(pvalues, scores, selection_policy(k=2)).tolist() == [1, 2]
+
+
+@pytest.mark.parametrize("options, message", [
+    ({'alpha': 0}, "alpha must be in"),
+    ({'alpha': 'x'}, "alpha must be a number"),
+    ({'k': 0}, "k must be positive"),
+    ({'k': '2.5'}, "k must be an integer"),
+    ({'correction': 'holm'}, "Invalid correction"),
+])
+def test_invalid_policies_are_rejected(options, message):
+    with pytest.raises(ValueError, match=message):
+        selection_policy(**options)
+
+
+def test_policy_from_request_strings():
+    policy = selection_policy("0.01", "5", "fdr")
+    assert policy == {'alpha': 0.01, 'k': 5, 'correction': 'fdr'}
+    assert selection_policy("", "", "") == selection_policy()
+    assert describe_policy(policy)
@@ -0,0 +1,66 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from artifacts import find_table, load_table
+from dataset_cache import dataset_cache
+from feature_selection import clear_score_cache
+from incremental import clear_state_cache, link_versions
+from pipeline import run_full_pipeline
+from preprocessing import clear_preprocessing_cache
+
+DATASET = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dataset",
+                       "risk_factors_cervical_cancer.csv")
+TABLES = ('2_scaled_data', '3_selected_features', '4_rus_cleaned_data')
+
+
+def write_rows(path, header, rows):
+    with open(path, "w") as f:
+        f.write(header + "".join(rows))
+    return str(path)
+
+
+def cold_run(path, output_dir):
+    dataset_cache.clear()
+    clear_preprocessing_cache()
+    clear_state_cache()
+    clear_score_cache()
+    return run_full_pipeline(path, output_dir=str(output_dir), max_workers=1)
+
+
+@pytest.mark.parametrize("append, modify, drop", [(30, 0, 0), (20, 8, 12)])
+def test_incremental_run_matches_full_recompute(tmp_path, append, modify, drop):
+    with open(DATASET) as f:
+        header, *rows = f.read().splitlines(True)
+    base_rows, extra = rows[:800], rows[800:]
+    new_rows = list(base_rows)
+    changed = np.random.default_rng(0).choice(len(base_rows), size=modify + drop, replace=False)
+    for i, row in zip(changed[:modify], extra[append:]):
+        new_rows[i] = row
+    dropped = set(changed[modify:].tolist())
+    new_rows = [row for i, row in enumerate(new_rows) if i not in dropped] + extra[:append]
+
+    base_path = write_rows(tmp_path / "base.csv", header, base_rows)
+    new_path = write_rows(tmp_path / "new.csv", header, new_rows)
+    base_dir, inc_dir, full_dir = tmp_path / "base", tmp_path / "incremental", tmp_path / "full"
+
+    cold_run(base_path, base_dir)
+    link_versions(str(inc_dir), base_path, str(base_dir))
+    incremental = cold_run(new_path, inc_dir)
+    full = cold_run(new_path, full_dir)
+
+    delta = incremental['incremental']
+    assert (delta['rows_added'], delta['rows_removed']) == (append + modify, modify + drop)
+    assert 'incremental' not in full
+    for name in TABLES:
+        a = load_table(find_table(str(inc_dir), name))
+        b = load_table(find_table(str(full_dir), name))
+        assert list(a.columns) == list(b.columns), name
+        assert np.array_equal(a.to_numpy(), b.to_numpy(), equal_nan=True), name
+    assert pd.read_csv(inc_dir / "1_missing_values_analysis.csv").equals(
+        pd.read_csv(full_dir / "1_missing_values_analysis.csv"))
+    features = [[row['feature'] for row in result['steps']['3']['selected_features_summary']]
+                for result in (incremental, full)]
+    assert features[0] == features[1]
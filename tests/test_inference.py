@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+
+from inference import MicroBatcher
+
+
+class Identity:
+    def transform(self, X):
+        return X
+
+
+class RowEstimator:
+    """Probability of class 1 = first feature, so every row can be traced back"""
+
+    classes_ = np.array([0, 1])
+
+    def __init__(self, offset=0.0, fail=False):
+        self.offset = offset
+        self.fail = fail
+        self.calls = []
+
+    def predict_proba(self, X):
+        if self.fail:
+            raise RuntimeError("model broke")
+        self.calls.append(len(X))
+        p = X[:, 0] + self.offset
+        return np.column_stack([1 - p, p])
+
+
+def bundle(**kwargs):
+    return {'estimator': RowEstimator(**kwargs), 'preprocessor': Identity()}
+
+
+def rows(*values):
+    return np.array([[value, 0.0] for value in values])
+
+
+def check(future, values):
+    labels, proba = future.result(timeout=10)
+    np.testing.assert_allclose(proba[:, 1], values)
+    assert labels.tolist() == [int(value > 0.5) for value in values]
+
+
+def test_results_go_back_to_their_requests():
+    batcher = MicroBatcher(max_batch=64, max_wait=0.2)
+    model = bundle()
+    requests = [(0.1,), (0.2, 0.9, 0.3), (0.7,), (0.4, 0.6)]
+    futures = [batcher.submit(model, rows(*values)) for values in requests]
+    for future, values in zip(futures, requests):
+        check(future, values)
+    # Semua request di-score dalam satu panggilan
+    assert model['estimator'].calls == [7]
+    assert batcher.stats()['batches'] == 1 and batcher.stats()['records'] == 7
+
+
+def test_batches_respect_max_batch():
+    batcher = MicroBatcher(max_batch=4, max_wait=0.2)
+    model = bundle()
+    requests = [(0.1, 0.2, 0.3), (0.4, 0.5), (0.6,), (0.7, 0.8, 0.9, 0.15, 0.25)]
+    futures = [batcher.submit(model, rows(*values)) for values in requests]
+    for future, values in zip(futures, requests):
+        check(future, values)
+    # Request yang lebih besar dari max_batch tetap di-score utuh
+    assert model['estimator'].calls == [3, 3, 5]
+
+
+def test_bundles_and_failures_are_kept_apart():
+    batcher = MicroBatcher(max_batch=64, max_wait=0.2)
+    first, second, broken = bundle(), bundle(offset=0.05), bundle(fail=True)
+    a = batcher.submit(first, rows(0.1, 0.2))
+    b = batcher.submit(second, rows(0.1))
+    c = batcher.submit(broken, rows(0.3))
+    d = batcher.submit(first, rows(0.8))
+    check(a, (0.1, 0.2))
+    check(b, (0.15,))
+    check(d, (0.8,))
+    with pytest.raises(RuntimeError, match="model broke"):
+        c.result(timeout=10)
+    assert first['estimator'].calls == [3] and second['estimator'].calls == [1]
+
+    # Worker tetap melayani request berikutnya
+    check(batcher.submit(first, rows(0.6)), (0.6,))
+
+
+def test_cancelled_requests_are_skipped():
+    batcher = MicroBatcher(max_batch=64, max_wait=0.2)
+    model = bundle()
+    cancelled = batcher.submit(model, rows(0.1, 0.2))
+    kept = batcher.submit(model, rows(0.3))
+    assert cancelled.cancel()
+    check(kept, (0.3,))
+    assert model['estimator'].calls == [1]
+
+    check(batcher.submit(model, rows(0.9)), (0.9,))
@@ -0,0 +1,61 @@
+import cProfile
+import threading
+
+from instrumentation import ProfileSession, stage_timer
+from pipeline import run_dag
+
+
+def stages(seen):
+    def stage(name):
+        def run(_):
+            seen.append(threading.get_ident())
+            with stage_timer(name, step="test"):
+                return sum(range(1000))
+        return run
+    return {'a': (stage('a'), []), 'b': (stage('b'), []), 'c': (stage('c'), ['a', 'b'])}
+
+
+def test_profiled_dag_runs_in_calling_thread():
+    seen = []
+    with ProfileSession() as session:
+        results, _ = run_dag(stages(seen), max_workers=4)
+    assert results['c'] == sum(range(1000))
+    assert set(seen) == {threading.get_ident()}
+
+    summary = session.summary()
+    assert not summary['cprofile_skipped'] and summary['cprofile']
+    assert {entry['stage'] for entry in summary['stages']} == {'a', 'b', 'c'}
+
+
+def test_profile_skipped_when_another_profiler_is_active():
+    outer = cProfile.Profile()
+    outer.enable()
+    try:
+        with ProfileSession() as session:
+            run_dag(stages([]))
+    finally:
+        outer.disable()
+
+    summary = session.summary()
+    assert summary['cprofile_skipped'] and summary['cprofile'] == []
+    assert len(summary['stages']) == 3
+
+
+def test_concurrent_profiled_runs():
+    summaries, errors = [], []
+
+    def run():
+        try:
+            with ProfileSession() as session:
+                run_dag(stages([]))
+            summaries.append(session.summary())
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors and len(summaries) == 4
+    assert all(len(summary['stages']) == 3 for summary in summaries)
@@ -0,0 +1,98 @@
+import multiprocessing
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from jobs import DONE, FAILED, QUEUED, RUNNING, JobQueue, QueueFullError
+
+
+def wait_for(queue, job_id, statuses, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.get(job_id)
+        if job['status'] in statuses:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} still {job['status']}")
+
+
+def read_in_worker(db_path, job_id):
+    """Status of a job as seen by another worker process sharing the database"""
+    def read(results):
+        results.put(JobQueue(db_path=db_path).get(job_id))
+
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    worker = context.Process(target=read, args=(results,))
+    worker.start()
+    job = results.get(timeout=10)
+    worker.join()
+    return job
+
+
+def test_job_lifecycle_visible_from_other_workers(tmp_path):
+    db_path = str(tmp_path / "jobs.sqlite3")
+    queue = JobQueue(db_path=db_path, max_workers=1)
+    started, release = threading.Event(), threading.Event()
+
+    def work(report):
+        report(0.5, 'halfway')
+        started.set()
+        release.wait(10)
+        return {'rows': 858}
+
+    job_id = queue.submit('2', work, params={'step': '2'})
+    assert started.wait(10)
+
+    # Worker lain membaca status dari database yang sama
+    job = read_in_worker(db_path, job_id)
+    assert (job['status'], job['progress'], job['stage']) == (RUNNING, 0.5, 'halfway')
+    assert job['params'] == {'step': '2'} and 'result' not in job
+
+    release.set()
+    wait_for(queue, job_id, (DONE,))
+    job = read_in_worker(db_path, job_id)
+    assert job['progress'] == 1.0 and job['result'] == {'rows': 858}
+    assert job['timing']['run_seconds'] >= 0
+
+    def fail(report):
+        raise ValueError("Target column not found")
+
+    failed = wait_for(queue, queue.submit('3', fail), (DONE, FAILED))
+    assert failed['status'] == FAILED and failed['error'] == "Target column not found"
+    assert queue.stats() == {DONE: 1, FAILED: 1}
+    assert queue.get('0' * 32) is None
+
+
+def test_queue_limit(tmp_path):
+    queue = JobQueue(db_path=str(tmp_path / "jobs.sqlite3"), max_workers=1, max_pending=2)
+    release = threading.Event()
+    jobs = [queue.submit('1', lambda report: release.wait(10)) for _ in range(2)]
+    with pytest.raises(QueueFullError):
+        queue.submit('1', lambda report: None)
+    release.set()
+    for job_id in jobs:
+        wait_for(queue, job_id, (DONE,))
+    queue.submit('1', lambda report: None)
+
+
+def test_jobs_of_exited_worker_fail_on_startup(tmp_path):
+    db_path = str(tmp_path / "jobs.sqlite3")
+    JobQueue(db_path=db_path)
+    with sqlite3.connect(db_path) as conn:
+        # pid 2^22 + 1 di atas pid_max Linux: proses pemiliknya sudah tidak ada
+        conn.execute("INSERT INTO jobs (id, kind, status, worker_pid, created_at) VALUES (?, ?, ?, ?, ?)",
+                     ('a' * 32, '2', QUEUED, 2 ** 22 + 1, time.time()))
+    job = JobQueue(db_path=db_path).get('a' * 32)
+    assert job['status'] == FAILED and 'exited' in job['error']
+
+
+def test_unknown_job_is_404(tmp_path, monkeypatch):
+    import app as app_module
+
+    monkeypatch.setattr(app_module, 'job_queue', JobQueue(db_path=str(tmp_path / "jobs.sqlite3")))
+    client = app_module.app.test_client()
+    response = client.get('/jobs/' + '0' * 32)
+    assert response.status_code == 404 and response.get_json() == {'error': 'Job not found'}
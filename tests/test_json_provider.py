@@ -0,0 +1,76 @@
+import gzip
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from flask import Flask, jsonify
+
+import json_provider
+from json_provider import NumpyJSONProvider, compress_response
+
+PAYLOAD = {
+    'rows': np.int64(858),
+    'mean': np.float64(0.25),
+    'missing': np.float64('nan'),
+    'inf': float('inf'),
+    'flag': np.bool_(True),
+    'na': pd.NA,
+    'scores': np.array([0.5, np.nan]),
+    'matrix': np.array([[1, 2], [3, 4]], dtype=np.int32),
+    'counts': pd.Series({'Age': 0, 'Smokes': np.nan}),
+    'sample': pd.DataFrame({'Age': [18, 35], 'Biopsy': [0.0, np.nan]}),
+}
+EXPECTED = {
+    'rows': 858, 'mean': 0.25, 'missing': None, 'inf': None, 'flag': True, 'na': None,
+    'scores': [0.5, None], 'matrix': [[1, 2], [3, 4]], 'counts': {'Age': 0.0, 'Smokes': None},
+    'sample': [{'Age': 18, 'Biopsy': 0.0}, {'Age': 35, 'Biopsy': None}],
+}
+
+
+def strict_loads(body):
+    def reject(constant):
+        raise ValueError(f"invalid JSON constant {constant}")
+    return json.loads(body, parse_constant=reject)
+
+
+@pytest.fixture(params=['orjson', 'stdlib'])
+def app(request, monkeypatch):
+    if request.param == 'orjson':
+        if json_provider.orjson is None:
+            pytest.skip("orjson not installed")
+    else:
+        monkeypatch.setattr(json_provider, 'orjson', None)
+    app = Flask(__name__)
+    app.json = NumpyJSONProvider(app)
+    app.after_request(compress_response)
+
+    @app.route('/payload')
+    def payload():
+        return jsonify(PAYLOAD)
+
+    @app.route('/large')
+    def large():
+        return jsonify({'values': np.arange(2000, dtype=np.float64)})
+
+    return app
+
+
+def test_numpy_and_missing_values_encode_to_valid_json(app):
+    response = app.test_client().get('/payload')
+    assert response.status_code == 200 and response.mimetype == 'application/json'
+    assert strict_loads(response.get_data()) == EXPECTED
+    with app.app_context():
+        assert strict_loads(app.json.dumps(PAYLOAD)) == EXPECTED
+
+
+def test_large_responses_are_gzipped_when_accepted(app):
+    client = app.test_client()
+    response = client.get('/large', headers={'Accept-Encoding': 'gzip, deflate'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert strict_loads(gzip.decompress(response.get_data()))['values'][-1] == 1999.0
+
+    assert 'Content-Encoding' not in client.get('/large').headers
+    # Di bawah GZIP_MIN_BYTES tidak dikompres
+    assert 'Content-Encoding' not in client.get('/payload', headers={'Accept-Encoding': 'gzip'}).headers
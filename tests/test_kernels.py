@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.impute import SimpleImputer
+from sklearn.preprocessing import MinMaxScaler
+
+from kernels import MedianMinMaxScaler
+
+PARAMS = ('data_min_', 'data_max_', 'data_range_', 'scale_', 'min_')
+
+
+def reference(X_fit, X=None):
+    imputer = SimpleImputer(strategy="median", keep_empty_features=True).fit(X_fit)
+    scaler = MinMaxScaler().fit(imputer.transform(X_fit))
+    return imputer, scaler, scaler.transform(imputer.transform(X_fit if X is None else X))
+
+
+@pytest.fixture
+def features():
+    rng = np.random.default_rng(0)
+    n = 500
+    frame = pd.DataFrame({
+        'age': rng.integers(13, 80, n).astype(float),
+        'years': rng.gamma(2.0, 3.0, n),
+        'flag': (rng.random(n) < 0.05).astype(float),
+        'empty': np.full(n, np.nan),
+        'constant': np.full(n, 3.5),
+        'negative': rng.normal(-10, 4, n),
+    })
+    for col, rate in [('age', 0.1), ('years', 0.3), ('flag', 0.2), ('constant', 0.5)]:
+        frame.loc[rng.random(n) < rate, col] = np.nan
+    return frame
+
+
+def test_fit_transform_matches_sklearn(features):
+    kernel = MedianMinMaxScaler("float64", sparse_density=0)
+    out = kernel.fit_transform(features)
+    imputer, scaler, expected = reference(features)
+
+    assert isinstance(out, np.ndarray) and out.flags.f_contiguous
+    np.testing.assert_array_equal(out, expected)
+    np.testing.assert_array_equal(kernel.statistics_, imputer.statistics_)
+    for name in PARAMS:
+        np.testing.assert_array_equal(getattr(kernel, name), getattr(scaler, name))
+
+
+def test_empty_and_constant_columns(features):
+    out = MedianMinMaxScaler("float64").fit_transform(features)
+    columns = list(features.columns)
+    np.testing.assert_array_equal(out[:, columns.index('empty')], 0.0)
+    np.testing.assert_array_equal(out[:, columns.index('constant')], 0.0)
+
+
+def test_transform_matches_sklearn(features):
+    kernel = MedianMinMaxScaler("float64").fit(features.iloc[:300])
+    _, _, expected = reference(features.iloc[:300], features.iloc[300:])
+    np.testing.assert_array_equal(kernel.transform(features.iloc[300:]), expected)
+    np.testing.assert_array_equal(MedianMinMaxScaler("float64").fit(features).transform(features),
+                                  MedianMinMaxScaler("float64").fit_transform(features))
+
+
+def test_float32_input(features):
+    X = features.to_numpy(dtype=np.float32)
+    out = MedianMinMaxScaler("float64").fit_transform(X)
+    # Kernel menghitung dalam float64, sama dengan sklearn pada nilai float32 yang sama
+    np.testing.assert_array_equal(out, reference(X.astype(np.float64))[2])
+    np.testing.assert_allclose(out, reference(X)[2], rtol=0, atol=1e-6)
+
+
+def test_float32_output(features):
+    out = MedianMinMaxScaler("float32").fit_transform(features)
+    assert out.dtype == np.float32
+    np.testing.assert_allclose(out, reference(features)[2], rtol=0, atol=1e-6)
+
+
+def test_transform_checks_width(features):
+    kernel = MedianMinMaxScaler("float64").fit(features)
+    with pytest.raises(ValueError):
+        kernel.transform(features.iloc[:, :3])
@@ -0,0 +1,32 @@
+import os
+
+import joblib
+import numpy as np
+import pytest
+
+from preprocessing import PREPROCESSING_FILE, clear_preprocessing_cache, load_preprocessing
+
+DATASET = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dataset",
+                       "risk_factors_cervical_cancer.csv")
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    clear_preprocessing_cache()
+    yield
+    clear_preprocessing_cache()
+
+
+def test_artifact_persists_fitted_part_only(tmp_path):
+    fitted = load_preprocessing(DATASET, str(tmp_path))
+    stored = joblib.load(tmp_path / PREPROCESSING_FILE)
+    assert 'X_scaled' not in stored
+    assert stored['columns'] == fitted['columns']
+
+    # Dari cache memori dan dari disk: matriks dihitung ulang dengan transform, nilainya sama
+    from_memory = load_preprocessing(DATASET, str(tmp_path))
+    clear_preprocessing_cache()
+    from_disk = load_preprocessing(DATASET, str(tmp_path))
+    for artifact in (from_memory, from_disk):
+        np.testing.assert_array_equal(np.asarray(artifact['X_scaled']), np.asarray(fitted['X_scaled']))
+
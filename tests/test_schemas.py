@@ -0,0 +1,58 @@
+import io
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from schemas import NA_VALUES, SCHEMAS, read_csv
+
+DATASET = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dataset",
+                       "risk_factors_cervical_cancer.csv")
+
+
+def edited_csv(column, value):
+    with open(DATASET) as f:
+        lines = f.read().splitlines()
+    position = lines[0].split(',').index(column)
+    row = lines[1].split(',')
+    row[position] = value
+    lines[1] = ','.join(row)
+    return '\n'.join(lines) + '\n'
+
+
+def assert_same_values(frame, text):
+    inferred = pd.read_csv(io.StringIO(text), na_values=NA_VALUES)
+    assert list(frame.columns) == list(inferred.columns)
+    for col in inferred.columns:
+        np.testing.assert_array_equal(frame[col].to_numpy(float), inferred[col].to_numpy(float))
+
+
+@pytest.mark.parametrize("engine", ["pyarrow", "c"])
+def test_known_dataset_gets_schema_dtypes(engine):
+    frame = read_csv(DATASET, engine=engine)
+    expected = SCHEMAS['risk_factors_cervical_cancer']['columns']
+    assert {col: str(dtype) for col, dtype in frame.dtypes.items()} == expected
+    with open(DATASET) as f:
+        assert_same_values(frame, f.read())
+
+
+@pytest.mark.parametrize("engine", ["pyarrow", "c"])
+@pytest.mark.parametrize("column, value", [
+    ('Number of sexual partners', '2.3'),    # float32 akan membulatkan 2.3
+    ('Num of pregnancies', '16777217'),      # bilangan bulat di atas 2^24
+    ('Biopsy', '300'),                       # di luar rentang int8
+    ('Age', '?'),                            # missing value di kolom int16
+])
+def test_values_that_do_not_fit_are_not_narrowed(engine, column, value):
+    text = edited_csv(column, value)
+    frame = read_csv(io.StringIO(text), engine=engine)
+    assert frame[column].dtype.itemsize == 8
+    assert_same_values(frame, text)
+
+
+@pytest.mark.parametrize("engine", ["pyarrow", "c"])
+def test_text_value_falls_back_to_inference(engine):
+    text = edited_csv('Smokes', 'yes')
+    frame = read_csv(io.StringIO(text), engine=engine)
+    pd.testing.assert_frame_equal(frame, pd.read_csv(io.StringIO(text), na_values=NA_VALUES))
@@ -0,0 +1,59 @@
+import os
+
+import numpy as np
+import pytest
+
+from balancing import balancing_options, resample, resampled_blocks
+from dataset_cache import load_dataset
+from feature_selection import score_features, select_features
+from kernels import MedianMinMaxScaler, SparseMatrix
+from preprocessing import build_artifact, split_features
+
+DATASET = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dataset",
+                       "risk_factors_cervical_cancer.csv")
+
+
+def fitted(X, dtype, sparse_density):
+    kernel = MedianMinMaxScaler(dtype, sparse_density)
+    return build_artifact(X.columns, kernel, kernel.fit_transform(X))
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    df = load_dataset(DATASET, drop_empty=True)
+    return df, df.select_dtypes(include="number")
+
+
+@pytest.mark.parametrize("dtype", ["float64", "float32"])
+def test_sparse_path_holds_dense_values(dataset, dtype):
+    _, X = dataset
+    dense = fitted(X, dtype, 0)['X_scaled']
+    sparse = fitted(X, dtype, 0.1)['X_scaled']
+    assert isinstance(dense, np.ndarray)
+    assert isinstance(sparse, SparseMatrix) and sparse.is_sparse.any() and not sparse.is_sparse.all()
+    assert sparse.nbytes < dense.nbytes
+
+    values = sparse.to_dense()
+    assert values.dtype == dense.dtype
+    np.testing.assert_array_equal(values, dense)
+    np.testing.assert_array_equal(sparse.min(axis=0), dense.min(axis=0))
+    np.testing.assert_array_equal(sparse.max(axis=0), dense.max(axis=0))
+
+
+@pytest.mark.parametrize("sampler", ["rus", "smote"])
+def test_sparse_selection_and_balancing_match_dense(dataset, sampler):
+    df, X = dataset
+    columns, X_dense, y = split_features(df, fitted(X, "float64", 0), "Biopsy")
+    _, X_sparse, _ = split_features(df, fitted(X, "float64", 0.1), "Biopsy")
+    assert isinstance(X_sparse, SparseMatrix)
+
+    scores, pvalues = score_features(X_sparse, y, 'anova')
+    expected, expected_p = score_features(X_dense, y, 'anova')
+    np.testing.assert_allclose(scores, expected, rtol=1e-9, atol=0, equal_nan=True)
+    np.testing.assert_array_equal(select_features(pvalues, scores), select_features(expected_p, expected))
+
+    options = balancing_options(sampler)
+    resampled, reference = resample(X_sparse, y, options), resample(X_dense, y, options)
+    np.testing.assert_array_equal(resampled['indices'], reference['indices'])
+    np.testing.assert_array_equal(np.vstack(list(resampled_blocks(X_sparse, resampled))),
+                                  np.vstack(list(resampled_blocks(X_dense, reference))))
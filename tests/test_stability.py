@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from feature_selection import (RESAMPLE_BATCH, anova_f, resample_weights, select_features, selection_policy,
+                               stability_options, stability_selection, stable_features)
+
+
+def dataset(n_rows=300, n_cols=40, seed=0):
+    """Noise features plus two informative columns (0 strong, 1 weak) and an imbalanced target"""
+    rng = np.random.default_rng(seed)
+    y = (rng.random(n_rows) < 0.2).astype(int)
+    X = rng.random((n_rows, n_cols))
+    X[:, 0] += 1.5 * y
+    X[:, 1] += 0.15 * y
+    return X, y
+
+
+@pytest.mark.parametrize("method", ["bootstrap", "rus"])
+def test_fixed_seed_is_deterministic_for_any_n_jobs(method):
+    X, y = dataset()
+    options = stability_options(resamples=2 * RESAMPLE_BATCH + 10, method=method)
+    frequency = stability_selection(X, y, options, random_state=7, n_jobs=1)
+    for n_jobs in (1, 2, 4):
+        np.testing.assert_array_equal(stability_selection(X, y, options, random_state=7, n_jobs=n_jobs), frequency)
+    assert not np.array_equal(stability_selection(X, y, options, random_state=8, n_jobs=1), frequency)
+
+    # Frekuensi = jumlah resample yang memilih fitur / jumlah resample
+    counts = frequency * options['resamples']
+    np.testing.assert_allclose(counts, np.round(counts))
+    assert frequency[0] == 1.0 and frequency[2:].mean() < 0.5
+
+
+@pytest.mark.parametrize("method", ["bootstrap", "rus"])
+def test_frequencies_match_materialized_resamples(method):
+    X, y = dataset(n_rows=120, n_cols=12, seed=1)
+    options = stability_options(resamples=RESAMPLE_BATCH, method=method)
+    policy = selection_policy(k=3)
+    frequency = stability_selection(X, y, options, policy, random_state=3, n_jobs=1)
+
+    # Bobot yang sama dengan batch pertama, tetapi baris disalin dan ANOVA dihitung ulang
+    rng = np.random.default_rng(np.random.SeedSequence(3).spawn(1)[0])
+    blocks = [X[y == klass] for klass in np.unique(y)]
+    weights, counts = resample_weights(rng, [len(X_k) for X_k in blocks], method, RESAMPLE_BATCH)
+    expected = np.zeros(X.shape[1])
+    for r in range(RESAMPLE_BATCH):
+        rows = [np.repeat(X_k, w[r].astype(int), axis=0) for X_k, w in zip(blocks, weights)]
+        assert [len(part) for part in rows] == counts
+        scores, pvalues = anova_f(np.vstack(rows), np.repeat(np.arange(len(rows)), counts))
+        expected[select_features(pvalues, scores, policy)] += 1
+    np.testing.assert_allclose(frequency, expected / RESAMPLE_BATCH)
+
+
+def test_rus_resamples_are_balanced():
+    rng = np.random.default_rng(0)
+    weights, counts = resample_weights(rng, [50, 12, 30], "rus", 5)
+    assert counts == [12, 12, 12]
+    for w in weights:
+        assert set(np.unique(w)) <= {0.0, 1.0} and (w.sum(axis=1) == 12).all()
+
+
+def test_stable_features_threshold_and_cap():
+    frequency = np.array([0.9, 0.2, 0.7, 0.6, 0.1])
+    assert stable_features(frequency, stability_options(threshold=0.6)).tolist() == [0, 2, 3]
+    assert stable_features(frequency, stability_options(threshold=0.6), selection_policy(k=2)).tolist() == [0, 2]
+    # Tidak ada yang mencapai threshold: k fitur paling sering terpilih
+    assert stable_features(frequency, stability_options(threshold=0.95), selection_policy(k=2)).tolist() == [0, 2]
@@ -0,0 +1,106 @@
+import multiprocessing
+import os
+import threading
+import time
+
+import storage
+from jobs import DONE, JobQueue
+from storage import (LEASE_DIR, collect_garbage, dataset_in_use, dataset_path, output_dir_for, store_file,
+                     touch)
+
+TTL = 3600
+
+
+def make_dataset(tmp_path, content):
+    upload_dir, output_root = str(tmp_path / "uploads"), str(tmp_path / "output")
+    os.makedirs(upload_dir, exist_ok=True)
+    src = tmp_path / "src.csv"
+    src.write_text(content)
+    dataset_id = store_file(str(src), upload_dir)
+    os.makedirs(output_dir_for(dataset_id, output_root), exist_ok=True)
+    return dataset_id, upload_dir, output_root
+
+
+def backdate(dataset_id, upload_dir, output_root, seconds=2 * TTL):
+    past = time.time() - seconds
+    for path in (dataset_path(dataset_id, upload_dir), output_dir_for(dataset_id, output_root)):
+        os.utime(path, (past, past))
+
+
+def exists(dataset_id, upload_dir, output_root):
+    return (os.path.exists(dataset_path(dataset_id, upload_dir))
+            and os.path.isdir(output_dir_for(dataset_id, output_root)))
+
+
+def gc_in_worker(upload_dir, output_root):
+    """Sweep from another worker process"""
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    worker = context.Process(target=lambda: results.put(collect_garbage(TTL, upload_dir, output_root)))
+    worker.start()
+    removed = results.get(timeout=10)
+    worker.join()
+    return removed
+
+
+def test_gc_removes_idle_datasets_and_abandoned_uploads(tmp_path):
+    idle, upload_dir, output_root = make_dataset(tmp_path, "Age,Biopsy\n18,0\n")
+    used, _, _ = make_dataset(tmp_path, "Age,Biopsy\n35,1\n")
+    backdate(idle, upload_dir, output_root)
+    backdate(used, upload_dir, output_root)
+    touch(used, upload_dir, output_root)
+
+    part = os.path.join(upload_dir, "tmp123.part")
+    open(part, "w").close()
+    os.utime(part, (0, 0))
+
+    assert collect_garbage(TTL, upload_dir, output_root) == [idle]
+    assert not os.path.exists(dataset_path(idle, upload_dir)) and not os.path.exists(part)
+    assert exists(used, upload_dir, output_root)
+
+
+def test_gc_keeps_dataset_of_running_job(tmp_path):
+    dataset_id, upload_dir, output_root = make_dataset(tmp_path, "Age,Biopsy\n18,0\n")
+    queue = JobQueue(db_path=str(tmp_path / "jobs.sqlite3"), max_workers=1)
+    started, release = threading.Event(), threading.Event()
+
+    def work(report):
+        with dataset_in_use(dataset_id, upload_dir, output_root):
+            started.set()
+            release.wait(10)
+            # Job menulis hasilnya setelah GC berjalan
+            with open(os.path.join(output_dir_for(dataset_id, output_root), "2_scaled_data.csv"), "w") as f:
+                f.write("Age\n0.0\n")
+        return {'rows': 1}
+
+    job_id = queue.submit('2', work, params={'step': '2', 'dataset_id': dataset_id})
+    assert started.wait(10)
+    # Job berjalan lebih lama dari TTL
+    backdate(dataset_id, upload_dir, output_root)
+    assert collect_garbage(TTL, upload_dir, output_root) == []
+    assert gc_in_worker(upload_dir, output_root) == []
+
+    release.set()
+    deadline = time.time() + 10
+    while queue.get(job_id)['status'] != DONE and time.time() < deadline:
+        time.sleep(0.01)
+    assert queue.get(job_id)['status'] == DONE
+    assert os.listdir(os.path.join(output_root, LEASE_DIR)) == []
+    # Waktu idle dihitung sejak job selesai
+    assert collect_garbage(TTL, upload_dir, output_root) == []
+    assert exists(dataset_id, upload_dir, output_root)
+
+    backdate(dataset_id, upload_dir, output_root)
+    assert collect_garbage(TTL, upload_dir, output_root) == [dataset_id]
+
+
+def test_gc_ignores_lease_of_exited_process(tmp_path, monkeypatch):
+    dataset_id, upload_dir, output_root = make_dataset(tmp_path, "Age,Biopsy\n18,0\n")
+    lease_dir = os.path.join(output_root, LEASE_DIR)
+    os.makedirs(lease_dir)
+    open(os.path.join(lease_dir, f"{dataset_id}.{2 ** 22 + 1}.stale"), "w").close()
+    monkeypatch.setattr(storage, "pid_alive", lambda pid: pid != 2 ** 22 + 1)
+    backdate(dataset_id, upload_dir, output_root)
+
+    assert collect_garbage(TTL, upload_dir, output_root) == [dataset_id]
+    assert os.listdir(lease_dir) == []
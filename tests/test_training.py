@@ -0,0 +1,97 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from balancing import balancing_options
+from feature_selection import (SELECTION_FILE, anova_f, load_selection, select_features, selection_policy,
+                               stability_options)
+from training import fold_indices, successive_halving, training_options
+
+DATASET = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dataset",
+                       "risk_factors_cervical_cancer.csv")
+
+
+def noise(n_rows=240, n_cols=400, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.random((n_rows, n_cols)), rng.integers(0, 2, n_rows)
+
+
+def select(X, y):
+    scores, pvalues = anova_f(X, y)
+    return select_features(pvalues, scores)
+
+
+def test_features_are_selected_on_training_rows_only():
+    X, y = noise()
+    # Kolom pertama = nomor baris, supaya terlihat baris mana yang dipakai seleksi
+    X[:, 0] = np.arange(len(y))
+    options = training_options(['logistic_regression'], folds=4)
+    seen = []
+
+    def spy(X_train, y_train):
+        seen.append(X_train[:, 0].astype(int))
+        return select(X_train, y_train)
+
+    search = successive_halving(X, y, options, balancing_options(), n_jobs=1, select=spy)
+    trains = [set(train) for train, _ in fold_indices(y, options['folds'], options['seed'])]
+    assert seen and all(any(set(rows) <= train for train in trains) for rows in seen)
+    assert all(record['features'] < X.shape[1] for record in search['history'])
+
+
+def test_in_fold_selection_is_not_optimistic_on_noise():
+    X, y = noise()
+    options = training_options(['logistic_regression'], folds=4)
+
+    # Seleksi pada semua baris lalu CV: skor bocor dari baris uji
+    leaky = successive_halving(X[:, select(X, y)], y, options, balancing_options(), n_jobs=1)
+    nested = successive_halving(X, y, options, balancing_options(), n_jobs=1, select=select)
+    leaky_score = leaky['best']['logistic_regression']['score']
+    nested_score = nested['best']['logistic_regression']['score']
+    assert leaky_score > 0.65
+    assert abs(nested_score - 0.5) < 0.1
+
+
+def run_steps(output_dir, **selection):
+    from pipeline import step_module
+
+    step_module('3').step3_anova(DATASET, return_json=True, output_dir=output_dir, **selection)
+    step_module('5').step5_train(DATASET, return_json=True, output_dir=output_dir,
+                                 options=training_options(['logistic_regression'], folds=3))
+
+
+def test_folds_repeat_the_step3_selection(tmp_path, monkeypatch):
+    from pipeline import step_module
+
+    calls = []
+    step5 = step_module('5')
+    fold_features = step5.fold_features
+
+    def spy(X, y, **selection):
+        calls.append(selection)
+        return fold_features(X, y, **selection)
+
+    monkeypatch.setattr(step5, 'fold_features', spy)
+
+    policy = selection_policy(k=3, correction='fdr')
+    run_steps(str(tmp_path), scorer='chi2', policy=policy)
+    assert load_selection(str(tmp_path)) == ('chi2', policy, None)
+    assert calls and all(call['scorer'] == 'chi2' and call['policy'] == policy for call in calls)
+    history = pd.read_csv(tmp_path / "5_cv_results.csv")
+    assert history['features'].max() <= 3
+
+    calls.clear()
+    stability = stability_options(resamples=20)
+    run_steps(str(tmp_path), stability=stability)
+    assert calls and all(call['stability'] == stability for call in calls)
+
+
+def test_training_rejects_selection_without_options(tmp_path):
+    from pipeline import step_module
+
+    step_module('3').step3_anova(DATASET, return_json=True, output_dir=str(tmp_path))
+    os.remove(tmp_path / SELECTION_FILE)
+    with pytest.raises(ValueError, match="selection options"):
+        step_module('5').step5_train(DATASET, return_json=True, output_dir=str(tmp_path),
+                                     options=training_options(['logistic_regression'], folds=3))
@@ -0,0 +1,101 @@
+import hashlib
+import io
+import os
+
+import pytest
+from flask import request
+
+from upload_stream import ChunkedUploads, CsvProfiler, ProfilingUpload, UploadOffsetError
+
+DATASET = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dataset",
+                       "risk_factors_cervical_cancer.csv")
+
+
+@pytest.fixture(scope="module")
+def data():
+    with open(DATASET, "rb") as f:
+        return f.read()
+
+
+@pytest.fixture
+def app_module(tmp_path, monkeypatch):
+    import app as app_module
+
+    upload_dir = str(tmp_path / "uploads")
+    monkeypatch.setitem(app_module.app.config, 'UPLOAD_FOLDER', upload_dir)
+    monkeypatch.setitem(app_module.app.config, 'OUTPUT_FOLDER', str(tmp_path / "output"))
+    monkeypatch.setattr(app_module, 'chunked_uploads', ChunkedUploads(upload_dir, 10 * 2 ** 20))
+    return app_module
+
+
+def test_resume_in_another_worker(tmp_path, data):
+    first, rest = data[:40_000], data[40_000:]
+    uploads = ChunkedUploads(str(tmp_path), 10 * 2 ** 20)
+    upload_id = uploads.start("risk.csv", len(data))
+    assert uploads.append(upload_id, 0, io.BytesIO(first)) == len(first)
+
+    # Worker lain tanpa profiler di memori melanjutkan dari offset terakhir
+    other = ChunkedUploads(str(tmp_path), 10 * 2 ** 20)
+    assert other.status(upload_id)['received'] == len(first)
+    with pytest.raises(UploadOffsetError) as error:
+        other.append(upload_id, 0, io.BytesIO(first))
+    assert error.value.expected == len(first)
+    assert other.append(upload_id, error.value.expected, io.BytesIO(rest)) == len(data)
+
+    part_path, filename, profiler = other.finish(upload_id)
+    with open(part_path, "rb") as f:
+        assert f.read() == data
+    single = CsvProfiler()
+    single.feed(data)
+    single.finish()
+    assert filename == "risk.csv"
+    assert profiler.hexdigest() == hashlib.sha256(data).hexdigest()
+    assert profiler.preview() == single.preview()
+    assert other.status(upload_id) is None
+
+
+def test_rejected_chunks_leave_upload_unchanged(tmp_path, data):
+    uploads = ChunkedUploads(str(tmp_path), 50_000)
+    upload_id = uploads.start("risk.csv")
+    uploads.append(upload_id, 0, io.BytesIO(data[:30_000]))
+    with pytest.raises(ValueError):
+        uploads.append(upload_id, 30_000, io.BytesIO(data[30_000:]))
+    assert uploads.status(upload_id)['received'] == 30_000
+    with pytest.raises(KeyError):
+        uploads.append("0" * 32, 0, io.BytesIO(data))
+    with pytest.raises(ValueError):
+        ChunkedUploads(str(tmp_path), 50_000).start("big.csv", len(data))
+
+    sized = uploads.start("risk.csv", 1000)
+    uploads.append(sized, 0, io.BytesIO(data[:100]))
+    with pytest.raises(ValueError, match="incomplete"):
+        uploads.finish(sized)
+
+
+def test_chunked_upload_endpoints(app_module, data):
+    client = app_module.app.test_client()
+    start = client.post('/upload/chunked', json={'filename': 'risk.csv', 'size': len(data)})
+    assert start.status_code == 201
+    url = start.get_json()['upload_url']
+
+    assert client.put(f"{url}?offset=0", data=data[:50_000]).status_code == 200
+    conflict = client.put(f"{url}?offset=10", data=data[10:])
+    assert conflict.status_code == 409 and conflict.get_json()['received'] == 50_000
+    assert client.put(f"{url}?offset=50000", data=data[50_000:]).get_json()['received'] == len(data)
+    assert client.get(url).get_json()['received'] == len(data)
+
+    done = client.post(f"{url}/complete").get_json()
+    assert done['dataset_id'] == hashlib.sha256(data).hexdigest()[:16]
+    assert client.get('/upload/chunked/' + 'f' * 32).status_code == 404
+
+
+def test_only_upload_endpoint_spools_files(app_module, data):
+    app = app_module.app
+    with app.test_request_context('/upload', method='POST', data={'file': (io.BytesIO(data), 'risk.csv')}):
+        stream = request.files['file'].stream
+        assert isinstance(stream, ProfilingUpload)
+        stream.close()
+    with app.test_request_context('/predict', method='POST', data={'file': (io.BytesIO(data), 'risk.csv')}):
+        assert not isinstance(request.files['file'].stream, ProfilingUpload)
+        assert request.files['file'].read() == data
+    assert not os.listdir(app.config['UPLOAD_FOLDER'])